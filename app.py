@@ -10,19 +10,31 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # Configuracao da pagina (deve ser a primeira chamada Streamlit)
-from config.settings import PAGE_CONFIG, INTERCOMPANY_PATTERNS, TIPOS_EXCLUIDOS, CACHE_TTL
+from config.settings import PAGE_CONFIG, TIPOS_EXCLUIDOS
 st.set_page_config(**PAGE_CONFIG)
 
 from auth import verificar_autenticacao
 if not verificar_autenticacao():
     st.stop()
 
+# Copy-on-Write do pandas: frames do registro compartilhado sao somente leitura
+from data.registro import ativar_copy_on_write
+ativar_copy_on_write()
+
 # Imports apos configuracao
 from datetime import datetime
 import pandas as pd
 
 from config.theme import get_cores, get_css
-from data.loader import carregar_dados, aplicar_filtros, get_opcoes_filtros, get_dados_filtrados, calcular_metricas
+from data.atualizador import atualizador_dados
+from data.loader import (
+    carregar_dados, versao_dados, data_atualizacao_dados, ledger_filtrado, get_opcoes_filtros, calcular_metricas,
+    indice_documentos
+)
+from data.periodo import fatiar_periodo
+from data.registro import registro_datasets
+from data.secoes import chave_aba, registrar_frame
+from components.abas import render_abas
 from components.navbar import render_navbar, render_page_header
 from components.sidebar import render_sidebar
 from utils.formatters import formatar_numero
@@ -62,21 +74,17 @@ def fragment_tipo_documento(df):
     render_tipo_documento(df)
 
 @st.fragment
-def fragment_detalhes(df):
-    render_detalhes(df)
+def fragment_detalhes(df, busca_documentos):
+    render_detalhes(df, busca_documentos)
 
 
 PADROES_CUSTOS_FINANCEIROS = ['TAXA', 'JUROS', 'BANC', 'EMPRESTIMO', 'MULTA CONTRATUAL', 'IOF', 'ENCARGO']
 
 
-@st.cache_data(ttl=CACHE_TTL)
-def _preparar_dados_pagar(_df_contas):
+def _preparar_dados_pagar(df_contas):
     """Pre-processa dados: remove intercompany, extrai adiantamentos e custos financeiros"""
-    # Excluir fornecedores Intercompany dos dados principais
-    mask_intercompany = _df_contas['NOME_FORNECEDOR'].str.upper().str.contains(
-        '|'.join(INTERCOMPANY_PATTERNS), na=False, regex=True
-    )
-    df_sem_ic = _df_contas[~mask_intercompany]
+    # Excluir fornecedores Intercompany dos dados principais (classificados na ingestao)
+    df_sem_ic = df_contas[~df_contas['IS_INTERCOMPANY']]
 
     # Separar tipos excluidos (FAT, PR) para aba propria
     df_provisoes = pd.DataFrame()
@@ -85,10 +93,8 @@ def _preparar_dados_pagar(_df_contas):
         df_provisoes = df_sem_ic[mask_excluidos]
         df_sem_ic = df_sem_ic[~mask_excluidos]
 
-    # Extrair adiantamentos (TIPO=PA ou DESCRICAO contendo ADTO/ADIANT)
-    mask_tipo_adto = df_sem_ic['TIPO'].isin(['PA', 'ADI'])
-    mask_desc_adto = df_sem_ic['DESCRICAO'].str.upper().str.contains('ADTO|ADIANT', na=False, regex=True)
-    mask_adiantamento = mask_tipo_adto | mask_desc_adto
+    # Extrair adiantamentos (TIPO=PA/ADI ou DESCRICAO contendo ADTO/ADIANT, marcados na ingestao)
+    mask_adiantamento = df_sem_ic['IS_ADIANTAMENTO']
     df_adiantamentos = df_sem_ic[mask_adiantamento]
     df_sem_adto = df_sem_ic[~mask_adiantamento]
 
@@ -102,6 +108,15 @@ def _preparar_dados_pagar(_df_contas):
     return df_contas_sem_ic, df_custos_financeiros, df_adiantamentos, df_provisoes
 
 
+def _carregar_dados_preparados(data_posicao=None):
+    """Dados de pagar na data de posicao + recortes de _preparar_dados_pagar"""
+    df_contas, df_baixas = carregar_dados(data_posicao)
+    preparados = registro_datasets().obter(
+        'pagar_preparado', versao_dados(data_posicao), lambda: _preparar_dados_pagar(df_contas)
+    )
+    return (df_contas, df_baixas) + preparados
+
+
 def main():
     """Funcao principal do dashboard"""
 
@@ -114,11 +129,14 @@ def main():
     # Aplicar CSS
     st.markdown(get_css(), unsafe_allow_html=True)
 
-    # Carregar dados PRIMEIRO para obter opcoes de filiais
-    df_contas, df_baixas = carregar_dados()
+    # Data de referencia do aging (widget "Posicao em" da sidebar; padrao = hoje)
+    data_posicao = st.session_state.get('sb_data_posicao')
 
-    # Pre-processar dados (cacheado) - extrai adiantamentos do proprio Contas a Pagar
-    df_contas_sem_ic, df_custos_financeiros, df_adiant, df_provisoes = _preparar_dados_pagar(df_contas)
+    # Carregar dados PRIMEIRO para obter opcoes de filiais
+    # (pre-processados no registro compartilhado; refeitos pelo atualizador quando os arquivos mudam)
+    atualizador_dados().registrar_aquecedor('pagar_preparado', _carregar_dados_preparados)
+    (df_contas, df_baixas,
+     df_contas_sem_ic, df_custos_financeiros, df_adiant, df_provisoes) = _carregar_dados_preparados(data_posicao)
 
     # Obter opcoes de filtros (SEM intercompany e SEM adiantamentos)
     filiais_por_grupo, categorias_opcoes = get_opcoes_filtros(df_contas_sem_ic)
@@ -136,16 +154,19 @@ def main():
         df_contas_sem_ic, filiais_por_grupo, categorias_opcoes
     )
 
-    # Aplicar filtros (sem intercompany)
-    df = aplicar_filtros(
+    # Aplicar filtros (sem intercompany); resultados compartilhados entre sessoes com os mesmos filtros
+    # (recorte preguicoso: pendentes/vencidos so sao materializados quando uma aba pede)
+    ledger = ledger_filtrado(
         df_contas_sem_ic, data_inicio, data_fim,
         filtro_filiais, filtro_status, filtro_categoria, busca_fornecedor,
-        filtro_tipo_doc, filtro_forma_pagto
+        filtro_tipo_doc, filtro_forma_pagto, versao=versao_dados(data_posicao)
     )
-    df_pendentes, df_vencidos = get_dados_filtrados(df, df_contas_sem_ic)
+    df = ledger.df
 
-    # Calcular metricas
-    metricas = calcular_metricas(df, df_vencidos)
+    # Calcular metricas (so as colunas usadas)
+    metricas = calcular_metricas(
+        ledger.colunas(['VALOR_ORIGINAL', 'SALDO']), ledger.vencidos.colunas(['SALDO', 'DIAS_ATRASO']), ledger.chave
+    )
 
     # Page Header
     render_page_header(
@@ -155,43 +176,16 @@ def main():
         cor=cores['primaria']
     )
 
-    # Tabs (11 tabs)
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11 = st.tabs([
-        "Visao Geral", "Vencimentos", "Fornecedores", "Categorias",
-        "Tipo Documento", "Formas Pagto", "Bancos", "Juros e Cambio", "Adiantamentos", "FAT/FT/PR", "Detalhes"
-    ])
-
-    with tab1:
-        # KPIs e alertas apenas na Visao Geral
-        render_visao_geral(df, df_pendentes, df_vencidos, metricas)
-
-    with tab2:
-        fragment_vencimentos(df)
-
-    with tab3:
-        fragment_fornecedores(df)
-
-    with tab4:
-        fragment_categorias(df)
-
-    with tab5:
-        fragment_tipo_documento(df)
-
-    with tab6:
-        fragment_formas_pagamento(df)
-
-    with tab7:
+    # Abas (11): so a aba ativa executa (components/abas.py)
+    def aba_bancos():
         # Aplicar filtro de filial nos bancos (custos financeiros)
         df_bancos_filtrado = df_custos_financeiros
         if filtro_filiais is not None and 'FILIAL' in df_bancos_filtrado.columns:
             df_bancos_filtrado = df_bancos_filtrado[df_bancos_filtrado['FILIAL'].isin(filtro_filiais)]
+        registrar_frame(df_bancos_filtrado, chave_aba('bancos', versao_dados(data_posicao), filtro_filiais))
         render_bancos(df_bancos_filtrado)
 
-    with tab8:
-        # Juros e Cambio - usa df filtrado (todas as contas, nao apenas bancos)
-        render_juros_cambio(df)
-
-    with tab9:
+    def aba_adiantamentos():
         # Aplicar filtro de filial nos adiantamentos e baixas
         df_adiant_filtrado = df_adiant
         df_baixas_filtrado = df_baixas
@@ -201,18 +195,15 @@ def main():
             if 'FILIAL' in df_baixas_filtrado.columns:
                 df_baixas_filtrado = df_baixas_filtrado[df_baixas_filtrado['FILIAL'].isin(filtro_filiais)]
         # Aplicar filtro de data (mesmo criterio das outras abas)
-        if 'EMISSAO' in df_adiant_filtrado.columns:
-            df_adiant_filtrado = df_adiant_filtrado[
-                (pd.to_datetime(df_adiant_filtrado['EMISSAO'], errors='coerce').dt.date >= data_inicio) &
-                (pd.to_datetime(df_adiant_filtrado['EMISSAO'], errors='coerce').dt.date <= data_fim)
-            ]
-        if 'DT_BAIXA' in df_baixas_filtrado.columns:
-            df_baixas_filtrado = df_baixas_filtrado[
-                pd.to_datetime(df_baixas_filtrado['DT_BAIXA'], errors='coerce').dt.date <= data_fim
-            ]
+        # (adiantamentos ordenados por EMISSAO e baixas por DT_BAIXA: fatias por busca binaria)
+        df_adiant_filtrado = fatiar_periodo(df_adiant_filtrado, data_inicio, data_fim)
+        df_baixas_filtrado = fatiar_periodo(df_baixas_filtrado, None, data_fim, coluna='DT_BAIXA')
+        versao = versao_dados(data_posicao)
+        registrar_frame(df_adiant_filtrado, chave_aba('adiantamentos', versao, filtro_filiais, data_inicio, data_fim))
+        registrar_frame(df_baixas_filtrado, chave_aba('baixas', versao, filtro_filiais, None, data_fim))
         render_adiantamentos(df_adiant_filtrado, df_baixas_filtrado)
 
-    with tab10:
+    def aba_provisoes():
         # FAT / PR - filtrar por filial e data, excluir bancos (ficam na aba Bancos)
         df_prov_filtrado = df_provisoes
         if 'DESCRICAO' in df_prov_filtrado.columns:
@@ -222,21 +213,34 @@ def main():
             df_prov_filtrado = df_prov_filtrado[~mask_banco]
         if filtro_filiais is not None and 'FILIAL' in df_prov_filtrado.columns:
             df_prov_filtrado = df_prov_filtrado[df_prov_filtrado['FILIAL'].isin(filtro_filiais)]
-        if 'EMISSAO' in df_prov_filtrado.columns:
-            df_prov_filtrado = df_prov_filtrado[
-                (df_prov_filtrado['EMISSAO'].dt.date >= data_inicio) &
-                (df_prov_filtrado['EMISSAO'].dt.date <= data_fim)
-            ]
+        df_prov_filtrado = fatiar_periodo(df_prov_filtrado, data_inicio, data_fim)
+        registrar_frame(df_prov_filtrado, chave_aba('provisoes', versao_dados(data_posicao), filtro_filiais, data_inicio, data_fim))
         render_provisoes(df_prov_filtrado)
 
-    with tab11:
-        fragment_detalhes(df)
-
-    # Footer
-    hoje = datetime.now()
+    render_abas({
+        # KPIs e alertas apenas na Visao Geral
+        "Visao Geral": lambda: render_visao_geral(df, ledger.pendentes.df, ledger.vencidos.df, metricas),
+        "Vencimentos": lambda: fragment_vencimentos(df),
+        "Fornecedores": lambda: fragment_fornecedores(df),
+        "Categorias": lambda: fragment_categorias(df),
+        "Tipo Documento": lambda: fragment_tipo_documento(df),
+        "Formas Pagto": lambda: fragment_formas_pagamento(df),
+        "Bancos": aba_bancos,
+        # Juros e Cambio - usa df filtrado (todas as contas, nao apenas bancos)
+        "Juros e Cambio": lambda: render_juros_cambio(df),
+        "Adiantamentos": aba_adiantamentos,
+        "FAT/FT/PR": aba_provisoes,
+        # Busca por numero/documento: indice de trigramas da versao dos dados (linhas de df_contas)
+        "Detalhes": lambda: fragment_detalhes(df, indice_documentos(df_contas, versao_dados(data_posicao))),
+    }, key="aba_pagar")
+
+    # Footer (data dos arquivos da versao em uso)
+    atualizado_em = data_atualizacao_dados()
     st.divider()
-    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {hoje.strftime('%d/%m/%Y %H:%M')}")
+    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {atualizado_em.strftime('%d/%m/%Y %H:%M')}")
 
 
 if __name__ == "__main__":
-    main()
+    # Uma versao dos dados por rerun (o atualizador pode trocar a versao em paralelo)
+    with atualizador_dados().fixar_versoes():
+        main()
@@ -0,0 +1,40 @@
+"""
+Abas preguicosas
+
+O st.tabs executa o corpo de todas as abas a cada rerun (o navegador so esconde
+as inativas). Aqui a aba ativa fica no session_state, escolhida num controle
+segmentado, e so o corpo dela roda.
+"""
+import streamlit as st
+
+
+def _manter_ativa(key, ultima):
+    """Clicar na aba ja ativa desmarca o controle: volta para ela"""
+    if st.session_state.get(key) is None:
+        st.session_state[key] = st.session_state.get(ultima)
+
+
+def render_abas(abas, key):
+    """Mostra o seletor de abas e executa apenas a aba ativa.
+
+    abas: dict {rotulo: funcao sem argumentos}, na ordem de exibicao
+    key: chave do session_state com o rotulo da aba ativa
+    Retorna o rotulo da aba ativa.
+    """
+    rotulos = list(abas)
+    ultima = f'{key}_ultima'
+
+    # O estado do widget some quando ele nao e desenhado (troca de pagina): usa a ultima aba
+    if st.session_state.get(key) not in rotulos:
+        anterior = st.session_state.get(ultima)
+        st.session_state[key] = anterior if anterior in rotulos else rotulos[0]
+    st.session_state[ultima] = st.session_state[key]
+
+    st.segmented_control(
+        "Abas", rotulos, key=key, on_change=_manter_ativa, args=(key, ultima),
+        label_visibility="collapsed"
+    )
+
+    ativa = st.session_state[key]
+    abas[ativa]()
+    return ativa
@@ -0,0 +1,39 @@
+"""
+Painel de diagnostico da carga de dados
+
+Expander na sidebar com os relatorios da ingestao neste processo: tempo de
+leitura de cada arquivo (data/ingestao.py), memoria das tabelas antes e depois
+do schema compacto (data/schema.py) e acertos do cache de resultados de filtros
+compartilhado entre sessoes (data/cache_resultados.py).
+"""
+import streamlit as st
+
+from data.cache_resultados import cache_resultados
+from data.ingestao import relatorio_leituras
+from data.schema import relatorio_memoria
+
+
+def render_diagnostico():
+    """Expander "Diagnostico" (chamar dentro do bloco da sidebar)"""
+    with st.expander("Diagnostico", expanded=False):
+        st.caption("Leitura dos arquivos")
+        leituras = relatorio_leituras()
+        if leituras.empty:
+            st.caption("Dados lidos do snapshot: nenhum arquivo Excel lido neste processo")
+        else:
+            st.dataframe(leituras.drop(columns='Caminho').round(2), hide_index=True, use_container_width=True)
+
+        st.caption("Memoria (schema compacto)")
+        memoria = relatorio_memoria()
+        if memoria.empty:
+            st.caption("Dados lidos do snapshot: schema aplicado em uma carga anterior")
+        else:
+            st.dataframe(memoria.round(1), hide_index=True, use_container_width=True)
+
+        st.caption("Cache de resultados")
+        estatisticas = cache_resultados().estatisticas()
+        st.caption(
+            f"{estatisticas['itens']} itens | {estatisticas['bytes'] / 1024 ** 2:.1f} MB | "
+            f"{estatisticas['acertos']} acertos, {estatisticas['falhas']} falhas "
+            f"({estatisticas['taxa_acerto']:.0%})"
+        )
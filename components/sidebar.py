@@ -5,6 +5,7 @@ import streamlit as st
 from datetime import datetime, timedelta, date
 import calendar
 from config.theme import get_cores
+from components.diagnostico import render_diagnostico
 from config.settings import MESES_NOMES, OPCOES_PERIODO_RAPIDO, STATUS_OPCOES
 from utils.formatters import to_excel, to_csv, formatar_moeda, formatar_numero
 
@@ -48,6 +49,12 @@ def render_sidebar(df_contas, filiais_opcoes, categorias_opcoes):
 
         busca_fornecedor = st.text_input("Fornecedor", placeholder="Buscar...", key="sb_busca_forn")
 
+        # Data de referencia do aging (lida no inicio do rerun pelo app, antes de carregar os dados)
+        st.date_input(
+            "Posicao em", value=hoje.date(), key="sb_data_posicao", format="DD/MM/YYYY",
+            help="Calcula status e dias de atraso como se hoje fosse esta data"
+        )
+
         st.divider()
 
         # Exportar
@@ -96,6 +103,9 @@ def render_sidebar(df_contas, filiais_opcoes, categorias_opcoes):
 
         st.divider()
 
+        # Relatorios da carga de dados
+        render_diagnostico()
+
         # Footer
         st.markdown(f"""
         <div style="text-align: center; margin-top: 1.5rem; padding-top: 1rem;
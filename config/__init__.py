@@ -1,2 +1,20 @@
-from .theme import get_cores, get_css, SEQUENCIA_CORES
-from .settings import PAGE_CONFIG
+"""
+Pacote de configuracao
+
+Os atalhos abaixo sao resolvidos sob demanda: config.settings e importado pelos
+processos de leitura e pelos scripts, que nao carregam o tema nem o Streamlit.
+"""
+import importlib
+
+_ATALHOS = {
+    'get_cores': 'config.theme',
+    'get_css': 'config.theme',
+    'SEQUENCIA_CORES': 'config.theme',
+    'PAGE_CONFIG': 'config.settings',
+}
+
+
+def __getattr__(nome):
+    if nome in _ATALHOS:
+        return getattr(importlib.import_module(_ATALHOS[nome]), nome)
+    raise AttributeError(f"module 'config' has no attribute {nome!r}")
@@ -17,9 +17,34 @@ DATA_FILES = {
     "baixas_receber": "data/Baixas de adiantamentos a receber.xlsx",
 }
 
+# Colunas dos Excel usadas pelos loaders e pelas abas (as demais nao sao lidas).
+# Ao usar uma coluna nova da planilha em alguma aba, inclua-a aqui.
+COLUNAS_ORIGEM = [
+    # Identificacao do titulo
+    'FILIAL', 'NOME_FILIAL', 'NUMERO', 'PARCELA', 'TIPO', 'DOCUMENTO', 'DESCRICAO',
+    'FORNECEDOR', 'NOME_FORNECEDOR', 'CLIENTE', 'NOME_CLIENTE', 'DESCRICAO_FORMA_PAGAMENTO',
+    # Datas
+    'EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DT_ESCRITURACAO',
+    'DIF_DIAS_EMIS_BAIXA', 'DIF_HORAS_DATAS', 'DIF_DIAS_DATAS',
+    # Valores
+    'VALOR_ORIGINAL', 'SALDO', 'VALOR_REAL', 'VALOR_BAIXA', 'TX_MOEDA',
+    'VALOR_JUROS', 'VALOR_MULTA', 'VLR_DESCONTO', 'VALOR_CORRECAO', 'VALOR_ACRESCIMO', 'VALOR_DECRESCIMO',
+]
+
 # Configurações de cache
 CACHE_TTL = 300  # 5 minutos
 
+# Snapshot colunar (Parquet) dos arquivos Excel ja processados
+# Incrementar SNAPSHOT_VERSAO sempre que o processamento dos loaders mudar
+SNAPSHOT_DIR = "data/.cache"
+SNAPSHOT_VERSAO = 11
+
+# Atualizador em segundo plano: intervalo (segundos) entre verificacoes dos arquivos de origem
+ATUALIZACAO_INTERVALO = 60
+
+# Cache de resultados de filtros compartilhado entre sessoes (posicoes e metricas), em bytes
+CACHE_RESULTADOS_BYTES = 64 * 1024 * 1024
+
 # Mapeamento de meses
 MESES_NOMES = {
     1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril',
@@ -230,3 +255,41 @@ INTERCOMPANY_TIPOS = {
     'IMPERIAL': 'Imperial',
     'FAMILIA SANDERS': 'Familia Sanders',
 }
+
+# Padroes para identificar o GRUPO do destino (fornecedor/cliente) na visao Intercompany
+# Ordem importa: mais especifico primeiro
+INTERCOMPANY_GRUPO_DESTINO = [
+    # --- Progresso Agroindustrial (filiais 2xx) ---
+    ('PROGRESSO AGROINDUST', 'Progresso Agroindustrial'),
+
+    # --- Progresso Agricola (filiais 1xx) ---
+    ('PROGRESSO MATRIZ', 'Progresso Agricola'),
+    ('PROGRESSO AGRICOLA', 'Progresso Agricola'),
+    ('FAZENDA PENINSULA', 'Progresso Agricola'),
+    ('PENINSULA', 'Progresso Agricola'),
+    ('IMPERIAL', 'Progresso Agricola'),
+    ('RAINHA DA SERRA', 'Progresso Agricola'),
+    ('FAZENDA OURO BRANCO', 'Progresso Agricola'),
+    ('OURO BRANCO INSUMOS', 'Progresso Agricola'),
+    ('SEMENTES OURO BRANCO', 'Progresso Agricola'),
+    ('OURO BRANCO', 'Progresso Agricola'),
+    ('FAZENDA TROPICAL', 'Progresso Agricola'),
+    ('HOTEL TROPICAL', 'Progresso Agricola'),
+    ('POUSADA TROPICAL', 'Progresso Agricola'),
+
+    # --- Familia Sanders (pessoas fisicas do grupo) ---
+    ('CORNELIO', 'Familia Sanders'),
+    ('GREICY', 'Familia Sanders'),
+    ('GREGORY SANDERS', 'Familia Sanders'),
+    ('GUEBERSON SANDERS', 'Familia Sanders'),
+
+    # --- Outros (filiais 3xx-8xx) ---
+    ('BRASIL AGRICOLA', 'Outros'),
+    ('TROPICAL AGROPART', 'Progresso Agricola'),
+    ('PROGRESSO FBO', 'Progresso Agricola'),
+    ('AG3 AGRO', 'Outros'),
+    ('CG3 AGRO', 'Outros'),
+    ('SDS PARTICIPACOES', 'Outros'),
+    # TROPICAL generico (apos padroes especificos acima) - filial 105 = 1xx
+    ('TROPICAL', 'Progresso Agricola'),
+]
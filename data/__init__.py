@@ -1 +1,20 @@
-from .loader import carregar_dados, aplicar_filtros, get_opcoes_filtros
+"""
+Pacote de dados
+
+Os atalhos abaixo sao resolvidos sob demanda: importar um modulo leve do pacote
+(ex: data.ingestao nos processos de leitura e nos scripts) nao carrega o loader
+nem o Streamlit.
+"""
+import importlib
+
+_ATALHOS = {
+    'carregar_dados': 'data.loader',
+    'aplicar_filtros': 'data.loader',
+    'get_opcoes_filtros': 'data.loader',
+}
+
+
+def __getattr__(nome):
+    if nome in _ATALHOS:
+        return getattr(importlib.import_module(_ATALHOS[nome]), nome)
+    raise AttributeError(f"module 'data' has no attribute {nome!r}")
@@ -0,0 +1,77 @@
+"""
+Motor de classificacao ABC / Pareto
+
+Fornecedores, Clientes e as duas abas de Categorias repetiam o mesmo ordena,
+acumula e compara com 80/95 em np.where aninhados, e as classes por nome saiam de
+um dict montado com zip. Aqui a curva e uma ordenacao + cumsum e a classe sai de
+np.searchsorted do percentual acumulado nos limites (quaisquer limites/classes),
+como Categorical. O roll-up por dimensao (fornecedor, cliente, categoria, filial)
+vem do cubo do recorte e o resultado fica no cache de resultados por estado dos filtros.
+"""
+import numpy as np
+import pandas as pd
+
+from data.cubo import MEDIDAS, cubo_agregado
+from data.secoes import memoizar_secao
+
+# Percentual acumulado que fecha cada classe (a ultima classe vai ate 100%)
+LIMITES_ABC = (80, 95)
+CLASSES_ABC = ('A', 'B', 'C')
+
+
+def classificar_abc(valores, limites=LIMITES_ABC, classes=CLASSES_ABC, pela_anterior=False):
+    """Classes de `valores` ja em ordem decrescente: (PCT, PCT_ACUM, CLASSE Categorical).
+
+    pela_anterior=False: classe pelo acumulado ate o proprio item (PCT_ACUM <= limite).
+    pela_anterior=True: classe pelo acumulado ate o item anterior (o item que cruza
+    o limite fica na classe de antes, como no grafico de Pareto).
+    """
+    if len(classes) != len(limites) + 1:
+        raise ValueError("Informe uma classe a mais que o numero de limites")
+    valores = np.asarray(valores, dtype='float64')
+    pct = valores / valores.sum() * 100
+    acum = np.cumsum(pct)
+    if pela_anterior:
+        anterior = np.concatenate(([0.0], acum[:-1]))
+        codigos = np.searchsorted(limites, anterior, side='right')
+    else:
+        codigos = np.searchsorted(limites, acum, side='left')
+    return pct, acum, pd.Categorical.from_codes(codigos, categories=list(classes))
+
+
+@memoizar_secao
+def curva_abc(agregado, dimensao, medida, limites=LIMITES_ABC, classes=CLASSES_ABC, pela_anterior=False):
+    """Linhas de `agregado` (uma por item de `dimensao`) por `medida` decrescente,
+    com PCT, PCT_ACUM, RANK e CLASSE (vazio se o total e zero)"""
+    curva = agregado.sort_values(medida, ascending=False, kind='stable').reset_index(drop=True)
+    if curva[medida].sum() == 0:
+        # Sem linhas, mas com as mesmas colunas (classes_abc e as abas leem CLASSE)
+        curva = curva.iloc[:0].copy()
+        curva['PCT'], curva['PCT_ACUM'], curva['CLASSE'] = classificar_abc([], limites, classes, pela_anterior)
+    else:
+        curva['PCT'], curva['PCT_ACUM'], curva['CLASSE'] = classificar_abc(
+            curva[medida], limites, classes, pela_anterior
+        )
+    curva['RANK'] = np.arange(1, len(curva) + 1)
+    return curva
+
+
+@memoizar_secao
+def curva_abc_recorte(df, dimensao, medida='VALOR_ORIGINAL', extras=(), limites=LIMITES_ABC,
+                      classes=CLASSES_ABC, pela_anterior=False):
+    """Curva ABC do recorte `df` por `dimensao` (NOME_FORNECEDOR, NOME_CLIENTE, DESCRICAO,
+    FILIAL, GRUPO...): colunas dimensao, medida, `extras`, PCT, PCT_ACUM, RANK e CLASSE"""
+    colunas = [dimensao, medida, *extras]
+    cubo = cubo_agregado(df)
+    if dimensao in cubo.celulas.columns and all(c in MEDIDAS for c in colunas[1:]):
+        agregado = cubo.agregar(dimensao)[colunas]
+    else:
+        agregado = df.groupby(dimensao, observed=True)[colunas[1:]].sum().reset_index()
+    return curva_abc(agregado, dimensao, medida, limites, classes, pela_anterior)
+
+
+@memoizar_secao
+def classes_abc(df, dimensao, medida='VALOR_ORIGINAL', limites=LIMITES_ABC, classes=CLASSES_ABC):
+    """Series {item de dimensao: classe} do recorte `df`"""
+    curva = curva_abc_recorte(df, dimensao, medida, limites=limites, classes=classes)
+    return pd.Series(curva['CLASSE'].to_numpy(), index=pd.Index(curva[dimensao].to_numpy()), name='CLASSE')
@@ -0,0 +1,166 @@
+"""
+Atualizacao dos dados em segundo plano
+
+Uma thread daemon verifica os arquivos de origem a cada ATUALIZACAO_INTERVALO
+segundos (stat; hash so quando tamanho/mtime mudam, ver data/snapshot.py). Quando
+uma fonte muda, a nova versao e construida fora das requisicoes: primeiro a base,
+depois os datasets derivados registrados (status de hoje, dados preparados das
+paginas, intercompany). So entao a versao corrente e trocada, de uma vez so.
+Ate a troca, os leitores continuam recebendo a versao anterior.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+from config.settings import ATUALIZACAO_INTERVALO
+from data.snapshot import versao_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _data_fontes(arquivos):
+    """Data da ultima modificacao entre os arquivos de origem"""
+    return datetime.fromtimestamp(max(os.path.getmtime(arquivo) for arquivo in arquivos))
+
+
+class AtualizadorDados:
+    """Versoes publicadas das fontes de dados e a thread que as mantem atualizadas.
+
+    Fontes e aquecedores se registram na primeira chamada de versao() / registrar_aquecedor().
+    """
+
+    def __init__(self, intervalo=ATUALIZACAO_INTERVALO):
+        self.intervalo = intervalo
+        self._fontes = {}       # nome -> (arquivos, construir(versao))
+        self._publicadas = {}   # nome -> (versao, data dos arquivos)
+        self._aquecedores = {}  # nome -> funcao sem argumentos
+        self._lock = threading.Lock()
+        self._lock_carga = threading.RLock()  # reentrante: um aquecedor pode carregar outra fonte
+        self._local = threading.local()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def versao(self, nome, arquivos, construir):
+        """Versao publicada da fonte `nome`.
+
+        arquivos: arquivos de origem da fonte
+        construir: funcao(versao) que monta a base da fonte (chamada fora da requisicao)
+        Na primeira chamada do processo a base e montada e publicada na hora.
+        """
+        # Dentro da thread, durante a preparacao, os derivados enxergam a versao nova
+        preparando = getattr(self._local, 'preparando', {})
+        if nome in preparando:
+            return preparando[nome]
+        fixadas = getattr(self._local, 'fixadas', None)
+        if fixadas is not None and nome in fixadas:
+            return fixadas[nome]
+
+        with self._lock:
+            self._fontes.setdefault(nome, (arquivos, construir))
+            publicada = self._publicadas.get(nome)
+        if publicada is None:
+            with self._lock_carga:
+                publicada = self._publicadas.get(nome)
+                if publicada is None:
+                    versao = versao_snapshot(nome, arquivos)
+                    construir(versao)
+                    publicada = (versao, _data_fontes(arquivos))
+                    with self._lock:
+                        self._publicadas[nome] = publicada
+        self._iniciar()
+        if fixadas is not None:
+            fixadas[nome] = publicada[0]
+        return publicada[0]
+
+    @contextmanager
+    def fixar_versoes(self):
+        """Dentro do bloco, cada fonte responde sempre a mesma versao nesta thread.
+
+        Usado em volta de um rerun: frames, indices e resultados em cache chaveados
+        pela versao ficam consistentes mesmo se a troca acontecer no meio do rerun.
+        """
+        anteriores = getattr(self._local, 'fixadas', None)
+        self._local.fixadas = {} if anteriores is None else anteriores
+        try:
+            yield
+        finally:
+            self._local.fixadas = anteriores
+
+    def atualizado_em(self, *nomes):
+        """Data dos arquivos da versao publicada (a mais recente entre `nomes`)"""
+        with self._lock:
+            datas = [self._publicadas[n][1] for n in nomes if n in self._publicadas]
+        return max(datas) if datas else None
+
+    def registrar_aquecedor(self, nome, funcao):
+        """Registra um dataset derivado para ser reconstruido antes de cada troca de versao"""
+        with self._lock:
+            self._aquecedores[nome] = funcao
+
+    def verificar(self):
+        """Reconstroi as fontes alteradas e publica as novas versoes. Retorna as fontes trocadas."""
+        with self._lock:
+            fontes = dict(self._fontes)
+            publicadas = dict(self._publicadas)
+            aquecedores = list(self._aquecedores.items())
+
+        with self._lock_carga:
+            novas = {}
+            for nome, (arquivos, _) in fontes.items():
+                versao = versao_snapshot(nome, arquivos)
+                if publicadas.get(nome, (None,))[0] != versao:
+                    novas[nome] = (versao, _data_fontes(arquivos))
+            if not novas:
+                return []
+
+            # Bases alteradas em paralelo (a leitura de cada arquivo ja vai para o pool
+            # de processos de data/ingestao.py; aqui pagar e receber nao esperam um pelo outro)
+            with ThreadPoolExecutor(max_workers=len(novas)) as executor:
+                construcoes = [executor.submit(fontes[nome][1], versao) for nome, (versao, _) in novas.items()]
+                for construcao in construcoes:
+                    construcao.result()
+
+            # Derivados na versao nova, ainda invisiveis para as requisicoes
+            self._local.preparando = {nome: versao for nome, (versao, _) in novas.items()}
+            try:
+                for nome, aquecer in aquecedores:
+                    try:
+                        aquecer()
+                    except Exception:
+                        logger.exception('Falha ao preparar %s; sera montado na primeira leitura', nome)
+            finally:
+                self._local.preparando = {}
+
+            # Troca atomica: todas as fontes alteradas passam a valer juntas
+            with self._lock:
+                self._publicadas.update(novas)
+        logger.info('Dados atualizados: %s', ', '.join(novas))
+        return list(novas)
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                # Arquivo em copia/corrompido: mantem a versao atual e tenta de novo no proximo ciclo
+                logger.exception('Falha ao atualizar os dados')
+
+    def _iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='atualizador-dados', daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+
+@st.cache_resource(show_spinner=False)
+def atualizador_dados():
+    """Instancia unica do atualizador no processo"""
+    return AtualizadorDados()
@@ -0,0 +1,171 @@
+"""
+Indice de trigramas para as buscas por nome e numero de documento
+
+As buscas da sidebar e da aba Detalhes rodavam str.contains(case=False) em todas
+as linhas a cada tecla. Os nomes se repetem muito (um fornecedor tem centenas de
+titulos), entao o indice e montado sobre os valores distintos: cada trigrama
+aponta para os valores que o contem. Uma consulta cruza as listas dos seus
+trigramas (a menor primeiro), confirma o trecho so nos candidatos e devolve os
+codigos dos valores; as linhas saem dos codigos (mascara por lookup inteiro ou
+indice de grupos), sem nenhuma operacao de texto por linha.
+
+Colunas categoricas (NOME_FORNECEDOR, NOME_CLIENTE) reaproveitam o indice entre
+reruns: recortes do mesmo frame compartilham as categorias. Colunas quase unicas
+(NUMERO, DOCUMENTO) tem um BuscaColuna por versao dos dados, montado pelo loader
+sobre a base inteira (indice_documentos).
+
+Mudanca de comportamento: o str.contains antigo interpretava a consulta como
+expressao regular ('.' casava qualquer caractere, '(' sem par derrubava a pagina).
+Agora a consulta e sempre um trecho literal, sem diferenciar maiusculas e sem os
+espacos das pontas (normalizar_consulta); busca por regex deixou de existir.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_N = 3
+
+# Indices por categorias: {id(categorias): (categorias, indice)}
+_INDICES_CATEGORIAS = OrderedDict()
+_MAX_INDICES = 16
+_lock = threading.Lock()
+
+
+def _normalizar(texto):
+    return str(texto).casefold()
+
+
+def normalizar_consulta(consulta):
+    """Texto de busca como digitado -> forma usada na busca e nas chaves de cache
+    (sem espacos nas pontas; '' quando so ha espacos)"""
+    return (consulta or '').strip().casefold()
+
+
+def _trigramas(texto):
+    return {texto[i:i + _N] for i in range(len(texto) - _N + 1)}
+
+
+class IndiceBusca:
+    """Indice de trigramas sobre valores distintos.
+
+    valores: textos distintos (o codigo de cada um e a sua posicao)
+    """
+
+    def __init__(self, valores):
+        self.valores = list(valores)
+        self._textos = [_normalizar(v) for v in self.valores]
+        listas = {}
+        for codigo, texto in enumerate(self._textos):
+            for trigrama in _trigramas(texto):
+                listas.setdefault(trigrama, []).append(codigo)
+        self._listas = {t: np.array(c, dtype=np.int32) for t, c in listas.items()}
+
+    def codigos(self, consulta):
+        """Codigos (ordenados) dos valores que contem `consulta` (sem diferenciar maiusculas)"""
+        consulta = _normalizar(consulta)
+        if len(consulta) < _N:
+            # Consulta curta: varre so os valores distintos
+            return np.array([c for c, texto in enumerate(self._textos) if consulta in texto], dtype=np.int32)
+
+        listas = []
+        for trigrama in _trigramas(consulta):
+            lista = self._listas.get(trigrama)
+            if lista is None:
+                return np.empty(0, dtype=np.int32)
+            listas.append(lista)
+        listas.sort(key=len)
+        candidatos = listas[0]
+        for lista in listas[1:]:
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+            if len(candidatos) == 0:
+                return candidatos
+        if len(listas) == 1:
+            return candidatos
+        # Os trigramas podem estar em outra ordem no texto: confirma o trecho
+        return np.array([c for c in candidatos if consulta in self._textos[c]], dtype=np.int32)
+
+    def mascara(self, consulta, codigos_linhas):
+        """Mascara booleana das linhas (codigos por linha; -1 = vazio) que contem `consulta`"""
+        alvo = np.zeros(len(self.valores) + 1, dtype=bool)
+        alvo[self.codigos(consulta)] = True
+        # -1 cai na ultima posicao (sempre False)
+        return alvo[codigos_linhas]
+
+
+def _codigos_coluna(serie):
+    """(valores distintos, codigo por linha) de uma coluna; categoricas sem passada nas linhas"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.categories, serie.cat.codes.to_numpy()
+    codigos, valores = pd.factorize(serie.astype(str).where(serie.notna()))
+    return valores, codigos
+
+
+def indice_coluna(serie):
+    """IndiceBusca dos valores de `serie` e os codigos das suas linhas.
+
+    Para colunas categoricas o indice fica em cache pelas categorias (compartilhadas
+    pelos recortes do mesmo frame); para as demais e montado na hora.
+    """
+    valores, codigos = _codigos_coluna(serie)
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return IndiceBusca(valores), codigos
+
+    chave = id(valores)
+    with _lock:
+        item = _INDICES_CATEGORIAS.get(chave)
+        if item is not None and item[0] is valores:
+            _INDICES_CATEGORIAS.move_to_end(chave)
+            return item[1], codigos
+    indice = IndiceBusca(valores)
+    with _lock:
+        _INDICES_CATEGORIAS[chave] = (valores, indice)
+        while len(_INDICES_CATEGORIAS) > _MAX_INDICES:
+            _INDICES_CATEGORIAS.popitem(last=False)
+    return indice, codigos
+
+
+class BuscaColuna:
+    """Busca sobre uma coluna inteira: indice de trigramas + linhas de cada valor.
+
+    As linhas por valor vem de um argsort dos codigos (feito uma vez), entao
+    linhas(consulta) custa proporcional ao numero de linhas encontradas.
+    """
+
+    def __init__(self, serie):
+        self.indice, codigos = indice_coluna(serie)
+        self._total = len(codigos)
+        self._ordem = np.argsort(codigos, kind='stable')
+        # Codigos -1 (vazio) ficam antes do 0 e nunca sao pedidos
+        self._limites = np.searchsorted(codigos[self._ordem], np.arange(len(self.indice.valores) + 1))
+
+    def linhas(self, consulta):
+        """Posicoes (ordenadas) das linhas cujo valor contem `consulta`"""
+        partes = [self._ordem[self._limites[c]:self._limites[c + 1]] for c in self.indice.codigos(consulta)]
+        if not partes:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(partes))
+
+    def contem(self, consulta, posicoes):
+        """Mascara booleana: quais das `posicoes` (linhas da coluna indexada) contem `consulta`"""
+        alvo = np.zeros(self._total, dtype=bool)
+        alvo[self.linhas(consulta)] = True
+        return alvo[np.asarray(posicoes)]
+
+
+def buscar(serie, consulta):
+    """Mascara booleana (np.ndarray) das linhas de `serie` que contem `consulta`.
+
+    Equivale a serie.str.contains(consulta, case=False, regex=False, na=False): nulos
+    nunca casam e a consulta e um trecho literal ('.', '*' e '(' nao sao regex).
+    Colunas nao categoricas nao guardam indice: o trecho e conferido uma vez por valor
+    distinto (para colunas quase unicas, use um BuscaColuna montado uma vez).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        indice, codigos = indice_coluna(serie)
+        return indice.mascara(consulta, codigos)
+    valores, codigos = _codigos_coluna(serie)
+    consulta = _normalizar(consulta)
+    alvo = np.array([consulta in _normalizar(v) for v in valores] + [False], dtype=bool)
+    return alvo[codigos]
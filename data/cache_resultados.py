@@ -0,0 +1,93 @@
+"""
+Cache de resultados de filtros compartilhado entre sessoes
+
+Muitos usuarios abrem o dashboard com os mesmos filtros (padroes da navbar e da
+sidebar), e cada sessao refazia aplicar_filtros, get_dados_filtrados e
+calcular_metricas. Aqui os resultados ficam no processo, chaveados por
+(versao dos dados, filtros normalizados): posicoes de linha (np.ndarray), dicts
+de metricas e os agregados das secoes das abas (data/secoes.py), que sao
+DataFrames pequenos ja agrupados. A remocao e LRU dentro de um orcamento de
+bytes (CACHE_RESULTADOS_BYTES).
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config.settings import CACHE_RESULTADOS_BYTES
+
+
+def _tamanho(valor):
+    """Bytes aproximados de um resultado (arrays, frames, tuplas, dicts e escalares)"""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes + 112
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(np.sum(valor.memory_usage(index=True, deep=True))) + 512
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor.values())
+    return sys.getsizeof(valor)
+
+
+class CacheResultados:
+    """Resultados por chave com LRU limitado a `max_bytes`"""
+
+    def __init__(self, max_bytes=CACHE_RESULTADOS_BYTES):
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave, calcular):
+        """Resultado de `chave`; `calcular()` roda so quando nao esta em cache"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[0]
+            self.falhas += 1
+
+        # Calculado fora do lock: duas sessoes com a mesma chave podem calcular juntas,
+        # o resultado e o mesmo
+        valor = calcular()
+        if isinstance(valor, np.ndarray):
+            valor.flags.writeable = False
+        tamanho = _tamanho(valor)
+        with self._lock:
+            if tamanho <= self.max_bytes and chave not in self._itens:
+                self._itens[chave] = (valor, tamanho)
+                self._bytes += tamanho
+                while self._bytes > self.max_bytes:
+                    _, (_, removido) = self._itens.popitem(last=False)
+                    self._bytes -= removido
+        return valor
+
+    def estatisticas(self):
+        """{'itens', 'bytes', 'acertos', 'falhas', 'taxa_acerto'}"""
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+
+@st.cache_resource(show_spinner=False)
+def cache_resultados():
+    """Instancia unica do cache de resultados no processo"""
+    return CacheResultados()
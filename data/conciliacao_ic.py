@@ -0,0 +1,179 @@
+"""
+Conciliacao intercompany titulo a titulo
+
+A conciliacao por pares de grupos (calcular_conciliacao) so compara totais: uma
+divergencia nao diz quais titulos faltam do outro lado. Aqui cada titulo A Pagar
+(A paga para B) procura o seu A Receber (B recebe de A) pelo par de grupos, valor
+dentro da tolerancia, emissao e vencimento dentro da janela e numero do documento
+quando os dois lados tem.
+
+Sem produto cartesiano: os A Receber ficam ordenados por (par, valor em centavos)
+e cada A Pagar acha por searchsorted a faixa [valor - tolerancia, valor + tolerancia]
+do seu par; so essas candidatas passam pelos filtros de data e documento. Os pares
+saem em rodadas de "melhor candidato mutuo" (unico, sem empate), que vetorizadas
+convergem em poucas rodadas; quem ainda tem candidatas no fim fica ambiguo.
+"""
+import numpy as np
+import pandas as pd
+
+from data.periodo import SEM_DATA, chave_periodo
+
+SITUACOES = ['Conciliado', 'Ambiguo', 'Sem par']
+
+# Valores em centavos abaixo de 2^40 (R$ 10 bi): par * _ESCALA + centavos nao se sobrepoe
+_ESCALA = 1 << 40
+
+
+def _documentos(*series):
+    """Numero do documento normalizado (so digitos, sem zeros a esquerda) como codigo comum; -1 = sem numero"""
+    codigos, unicos = pd.factorize(pd.concat(series, ignore_index=True).astype(str))
+    normalizados = pd.Series(unicos).str.replace(r'\D', '', regex=True).str.lstrip('0')
+    norm_codigos, _ = pd.factorize(normalizados.where(normalizados != ''))
+    return np.split(norm_codigos[codigos], np.cumsum([len(s) for s in series])[:-1])
+
+
+def _dias(df, coluna):
+    """Chave DIA da coluna (SEM_DATA em todas as linhas se a coluna nao existe)"""
+    if coluna not in df.columns and f'{coluna}_DIA' not in df.columns:
+        return np.full(len(df), SEM_DATA, dtype='int64')
+    return chave_periodo(df, coluna).to_numpy().astype('int64')
+
+
+def _lado(df, de, para, categorias, documento):
+    """Arrays do pareamento de um lado: par de grupos, centavos, dias de emissao/vencimento"""
+    cod_de = pd.Categorical(de, categories=categorias).codes.astype('int64')
+    cod_para = pd.Categorical(para, categories=categorias).codes.astype('int64')
+    centavos = np.rint(df['VALOR_ORIGINAL'].to_numpy(dtype='float64', na_value=np.nan) * 100)
+    valido = (cod_de >= 0) & (cod_para >= 0) & np.isfinite(centavos) & (centavos >= 0) & (centavos < _ESCALA)
+    return {
+        'chave': np.where(valido, (cod_de * len(categorias) + cod_para) * _ESCALA + np.nan_to_num(centavos), -1).astype('int64'),
+        'valido': valido,
+        'emissao': _dias(df, 'EMISSAO'),
+        'vencimento': _dias(df, 'VENCIMENTO'),
+        'documento': documento,
+    }
+
+
+def _candidatas(p, r, tolerancia, janela_dias):
+    """Pares (indice pagar, indice receber) dentro da tolerancia de valor, janela e documento"""
+    ordem = np.argsort(r['chave'], kind='stable')
+    chaves_r = r['chave'][ordem]
+    tol = int(round(tolerancia * 100))
+    lo = np.searchsorted(chaves_r, p['chave'] - tol, side='left')
+    hi = np.searchsorted(chaves_r, p['chave'] + tol, side='right')
+    qtd = np.where(p['valido'], hi - lo, 0)
+
+    ip = np.repeat(np.arange(len(qtd)), qtd)
+    deslocamento = np.arange(len(ip)) - np.repeat(np.cumsum(qtd) - qtd, qtd)
+    ir = ordem[np.repeat(lo, qtd) + deslocamento]
+    ok = r['valido'][ir]
+
+    for coluna in ('emissao', 'vencimento'):
+        dp, dr = p[coluna][ip], r[coluna][ir]
+        com_data = (dp != SEM_DATA) & (dr != SEM_DATA)
+        ok &= ~com_data | (np.abs(dp - dr) <= janela_dias)
+    docp, docr = p['documento'][ip], r['documento'][ir]
+    ok &= (docp < 0) | (docr < 0) | (docp == docr)
+
+    ip, ir = ip[ok], ir[ok]
+    # Ordem de preferencia: mesmo documento, menor diferenca de valor, datas mais proximas
+    sem_doc = ((p['documento'][ip] < 0) | (r['documento'][ir] < 0)).astype('int64')
+    dif_valor = np.abs((p['chave'][ip] % _ESCALA) - (r['chave'][ir] % _ESCALA))
+    dif_dias = np.abs(p['vencimento'][ip] - r['vencimento'][ir]) + np.abs(p['emissao'][ip] - r['emissao'][ir])
+    return ip, ir, (sem_doc, dif_valor, dif_dias)
+
+
+def _melhor_unico(lado, custo):
+    """Mascara das arestas que sao a melhor (sem empate) do seu titulo em `lado`"""
+    ordem = np.lexsort(custo[::-1] + (lado,))
+    lado_o = lado[ordem]
+    custo_o = np.column_stack([c[ordem] for c in custo])
+    primeiro = np.r_[True, lado_o[1:] != lado_o[:-1]]
+    empate_prox = np.r_[(lado_o[1:] == lado_o[:-1]) & (custo_o[1:] == custo_o[:-1]).all(axis=1), False]
+    melhor = np.zeros(len(lado), dtype=bool)
+    melhor[ordem] = primeiro & ~empate_prox
+    return melhor
+
+
+def _parear(ip, ir, custo, n_pagar, n_receber):
+    """Rodadas de melhor candidato mutuo; retorna arestas pareadas e restantes"""
+    pareadas = np.zeros(len(ip), dtype=bool)
+    ativas = np.ones(len(ip), dtype=bool)
+    while ativas.any():
+        idx = ativas.nonzero()[0]
+        custo_a = tuple(c[idx] for c in custo)
+        mutuas = _melhor_unico(ip[idx], custo_a) & _melhor_unico(ir[idx], custo_a)
+        if not mutuas.any():
+            break
+        pareadas[idx[mutuas]] = True
+        usado_p = np.bincount(ip[idx[mutuas]], minlength=n_pagar) > 0
+        usado_r = np.bincount(ir[idx[mutuas]], minlength=n_receber) > 0
+        ativas &= ~usado_p[ip] & ~usado_r[ir]
+    return pareadas, ativas
+
+
+def _pendencias(df, lado, de, para, pareado, restantes, candidatas):
+    """Titulos de um lado sem par conciliado, com SITUACAO e numero de candidatas"""
+    mascara = ~pareado
+    situacao = np.where(restantes > 0, 1, 2)[mascara]
+    colunas = [c for c in ('NOME_FILIAL', 'NUMERO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO') if c in df.columns]
+    pend = df.loc[mascara, colunas].reset_index(names='ID')
+    pend.insert(0, 'LADO', lado)
+    pend.insert(2, 'DE', np.asarray(de)[mascara])
+    pend.insert(3, 'PARA', np.asarray(para)[mascara])
+    pend['CANDIDATAS'] = candidatas[mascara]
+    pend['SITUACAO'] = pd.Categorical.from_codes(situacao, categories=SITUACOES)
+    return pend
+
+
+def conciliar_titulos(df_pagar, df_receber, tolerancia=1.0, janela_dias=15):
+    """Concilia titulos A Pagar x A Receber intercompany (GRUPO_ORIGEM/GRUPO_DESTINO).
+
+    tolerancia: diferenca maxima de VALOR_ORIGINAL (R$)
+    janela_dias: distancia maxima entre as emissoes e entre os vencimentos (dias)
+
+    Retorna (pares, pendencias):
+        pares: um A Pagar e um A Receber por linha (ID_PAGAR/ID_RECEBER = indices
+            dos frames), DE, PARA, numeros, valores, saldos e DIF_SALDO
+        pendencias: titulos nao conciliados dos dois lados, com LADO ('Pagar'/'Receber'),
+            ID, DE, PARA, colunas do titulo, CANDIDATAS e SITUACAO ('Ambiguo'/'Sem par')
+    """
+    # A Pagar: origem paga para destino | A Receber: destino paga para origem
+    de_p, para_p = df_pagar['GRUPO_ORIGEM'], df_pagar['GRUPO_DESTINO']
+    de_r, para_r = df_receber['GRUPO_DESTINO'], df_receber['GRUPO_ORIGEM']
+    categorias = pd.Index(pd.concat([
+        pd.Series(s.astype('category').cat.categories) for s in (de_p, para_p, de_r, para_r)
+    ]).unique())
+
+    doc_p, doc_r = _documentos(df_pagar['NUMERO'], df_receber['NUMERO'])
+    p = _lado(df_pagar, de_p, para_p, categorias, doc_p)
+    r = _lado(df_receber, de_r, para_r, categorias, doc_r)
+
+    ip, ir, custo = _candidatas(p, r, tolerancia, janela_dias)
+    pareadas, restantes = _parear(ip, ir, custo, len(df_pagar), len(df_receber))
+    ip_ok, ir_ok = ip[pareadas], ir[pareadas]
+
+    pagar, receber = df_pagar.iloc[ip_ok], df_receber.iloc[ir_ok]
+    pares = pd.DataFrame({
+        'ID_PAGAR': pagar.index.to_numpy(),
+        'ID_RECEBER': receber.index.to_numpy(),
+        'DE': np.asarray(de_p)[ip_ok],
+        'PARA': np.asarray(para_p)[ip_ok],
+        'NUMERO_PAGAR': pagar['NUMERO'].to_numpy(),
+        'NUMERO_RECEBER': receber['NUMERO'].to_numpy(),
+        'EMISSAO': pagar['EMISSAO'].to_numpy(),
+        'VALOR_PAGAR': pagar['VALOR_ORIGINAL'].to_numpy(dtype='float64'),
+        'VALOR_RECEBER': receber['VALOR_ORIGINAL'].to_numpy(dtype='float64'),
+        'SALDO_PAGAR': pagar['SALDO'].to_numpy(dtype='float64'),
+        'SALDO_RECEBER': receber['SALDO'].to_numpy(dtype='float64'),
+    })
+    pares['DIF_SALDO'] = pares['SALDO_PAGAR'] - pares['SALDO_RECEBER']
+
+    n_p, n_r = len(df_pagar), len(df_receber)
+    pendencias = pd.concat([
+        _pendencias(df_pagar, 'Pagar', de_p, para_p, np.bincount(ip_ok, minlength=n_p) > 0,
+                    np.bincount(ip[restantes], minlength=n_p), np.bincount(ip, minlength=n_p)),
+        _pendencias(df_receber, 'Receber', de_r, para_r, np.bincount(ir_ok, minlength=n_r) > 0,
+                    np.bincount(ir[restantes], minlength=n_r), np.bincount(ir, minlength=n_r)),
+    ], ignore_index=True)
+    return pares, pendencias
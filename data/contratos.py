@@ -0,0 +1,91 @@
+"""
+Motor de contratos/parcelas (aba Bancos)
+
+A analise de parcelas fazia groupby(...).apply com um callback Python por grupo
+que refiltrava o grupo tres vezes (pagas, pendentes, vencidas), e repetia isso por
+banco e por tipo de operacao. Aqui as parcelas ganham colunas booleanas uma vez
+(marcar_parcelas) e cada resumo e uma unica agregacao nomeada: contagens, valores,
+% quitado e proximo vencimento por contrato, banco ou tipo.
+"""
+import numpy as np
+
+# Identificador do contrato/emprestimo
+CHAVE_CONTRATO = ['NOME_FORNECEDOR', 'NUMERO']
+
+# Colunas extras do resumo por contrato: coluna -> agregacao
+_EXTRAS_CONTRATO = {
+    'PARCELA': 'max',      # total de parcelas do contrato
+    'DESCRICAO': 'first',
+    'EMISSAO': 'min',
+    'VENCIMENTO': 'max',
+}
+
+
+def marcar_parcelas(df):
+    """Frame com PAGA, PENDENTE, VENCIDA (bool) e VENC_A_VENCER (vencimento das pendentes em dia)"""
+    saldo = df['SALDO'].to_numpy(dtype='float64', na_value=np.nan)
+    vencida = (df['STATUS'] == 'Vencido').to_numpy(dtype=bool, na_value=False)
+    pendente = saldo > 0
+    marcadas = df.copy(deep=False)
+    marcadas['PAGA'] = saldo == 0
+    marcadas['PENDENTE'] = pendente
+    marcadas['VENCIDA'] = vencida
+    marcadas['VENC_A_VENCER'] = df['VENCIMENTO'].where(pendente & ~vencida)
+    return marcadas
+
+
+def resumo_parcelas(df, por=CHAVE_CONTRATO):
+    """Parcelas por `por` (coluna ou lista) numa passada de agregacao nomeada.
+
+    Colunas: PAGAS, PENDENTES, VENCIDAS, TOTAL_PARCELAS (pagas + pendentes),
+    VALOR_ORIGINAL, SALDO, PAGO, PCT_QUITADO e PROXIMO_VENC (vencimento mais
+    proximo entre as parcelas pendentes em dia); VALOR_JUROS quando df tem a coluna.
+    Agrupando pela chave do contrato, tambem PARCELA, DESCRICAO, EMISSAO e VENCIMENTO
+    (as que existirem em df).
+    """
+    por = [por] if isinstance(por, str) else list(por)
+    marcadas = marcar_parcelas(df)
+
+    agg = dict(
+        PAGAS=('PAGA', 'sum'),
+        PENDENTES=('PENDENTE', 'sum'),
+        VENCIDAS=('VENCIDA', 'sum'),
+        VALOR_ORIGINAL=('VALOR_ORIGINAL', 'sum'),
+        SALDO=('SALDO', 'sum'),
+        PROXIMO_VENC=('VENC_A_VENCER', 'min'),
+    )
+    if 'VALOR_JUROS' in marcadas.columns:
+        agg['VALOR_JUROS'] = ('VALOR_JUROS', 'sum')
+    if por == CHAVE_CONTRATO:
+        agg.update({col: (col, f) for col, f in _EXTRAS_CONTRATO.items() if col in marcadas.columns})
+
+    resumo = marcadas.groupby(por, observed=True, sort=False).agg(**agg).reset_index()
+    resumo['TOTAL_PARCELAS'] = resumo['PAGAS'] + resumo['PENDENTES']
+    resumo['PAGO'] = resumo['VALOR_ORIGINAL'] - resumo['SALDO']
+    resumo['PCT_QUITADO'] = (resumo['PAGO'] / resumo['VALOR_ORIGINAL'] * 100).round(1)
+    return resumo
+
+
+def cronograma_contrato(df, banco, numero):
+    """Cronograma de amortizacao de um contrato: uma linha por parcela, em ordem.
+
+    Colunas: PARCELA, VENCIMENTO, VALOR_ORIGINAL, PAGO, SALDO, VALOR_JUROS, STATUS,
+    PAGO_ACUMULADO e SALDO_DEVEDOR (principal ainda em aberto apos a parcela);
+    PARCELA, VALOR_JUROS e STATUS so quando df tem a coluna.
+    """
+    mascara = (df['NOME_FORNECEDOR'] == banco).to_numpy(dtype=bool, na_value=False)
+    mascara &= (df['NUMERO'] == numero).to_numpy(dtype=bool, na_value=False)
+    parcelas = df[mascara]
+
+    ordem = [c for c in ('VENCIMENTO', 'PARCELA') if c in parcelas.columns]
+    parcelas = parcelas.sort_values(ordem, kind='stable')
+
+    colunas = [c for c in ('PARCELA', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO', 'VALOR_JUROS', 'STATUS')
+               if c in parcelas.columns]
+    cronograma = parcelas[colunas].reset_index(drop=True)
+    cronograma['PAGO'] = cronograma['VALOR_ORIGINAL'] - cronograma['SALDO']
+    cronograma['PAGO_ACUMULADO'] = cronograma['PAGO'].cumsum()
+    cronograma['SALDO_DEVEDOR'] = cronograma['VALOR_ORIGINAL'].sum() - cronograma['VALOR_ORIGINAL'].cumsum() + cronograma['SALDO'].cumsum()
+    ordem_colunas = ['PARCELA', 'VENCIMENTO', 'VALOR_ORIGINAL', 'PAGO', 'SALDO', 'VALOR_JUROS', 'STATUS',
+                     'PAGO_ACUMULADO', 'SALDO_DEVEDOR']
+    return cronograma[[c for c in ordem_colunas if c in cronograma.columns]]
@@ -0,0 +1,207 @@
+"""
+Cubo de agregados compartilhado pelas abas
+
+Visao Geral, Categorias, Fornecedores, Formas Pagto, Tipo Documento e Vencimentos
+reagrupavam o mesmo recorte por filial, categoria, fornecedor, mes, status, tipo
+de documento e forma de pagamento. O cubo faz uma passada no recorte e guarda
+soma/contagem/min/max de VALOR_ORIGINAL e SALDO no menor grao dessas dimensoes
+(as celulas); cada aba pede um roll-up (agregar), calculado sobre as celulas.
+O grao inclui fornecedor/cliente, categoria e mes, entao o numero de celulas
+pode ficar proximo do numero de linhas: o ganho e que cada recorte e agrupado
+uma vez, e os roll-ups seguintes saem do cache.
+
+Um cubo por estado dos filtros: cubo_agregado(df) fica no cache de resultados
+(data/secoes.py), e cada roll-up e um item proprio desse cache, chaveado pelo
+cubo, de modo que entra no orcamento de bytes.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.cache_resultados import cache_resultados
+from data.periodo import chave_periodo
+from data.secoes import chave_frame, memoizar_secao
+
+# Dimensoes das celulas (as ausentes no recorte sao ignoradas). NOME_FILIAL e TIPO_DOC
+# dependem de FILIAL e TIPO: nao aumentam o numero de celulas
+DIMENSOES = [
+    'FILIAL', 'NOME_FILIAL', 'DESCRICAO', 'NOME_FORNECEDOR', 'NOME_CLIENTE',
+    'EMISSAO_AAAAMM', 'STATUS', 'TIPO', 'TIPO_DOC', 'DESCRICAO_FORMA_PAGAMENTO',
+]
+
+# Medida -> funcao que reagrega as celulas
+MEDIDAS = {
+    'VALOR_ORIGINAL': 'sum',
+    'SALDO': 'sum',
+    'QTD': 'sum',
+    'QTD_PENDENTE': 'sum',    # SALDO > 0
+    'SALDO_PENDENTE': 'sum',  # SALDO dos pendentes
+    'QTD_QUITADO': 'sum',     # SALDO == 0
+    'VALOR_QUITADO': 'sum',   # VALOR_ORIGINAL dos quitados
+    'VALOR_MIN': 'min',
+    'VALOR_MAX': 'max',
+    'SALDO_MIN': 'min',
+    'SALDO_MAX': 'max',
+}
+
+_MAX_ROLLUPS = 128
+
+
+def nome_grupo(cod_filial):
+    """Nome do grupo de uma filial ('Outros' sem filial)"""
+    if pd.isna(cod_filial):
+        return 'Outros'
+    grupo_id = get_grupo_filial(int(cod_filial))
+    return GRUPOS_FILIAIS.get(grupo_id, f"Grupo {grupo_id}")
+
+
+def reagregar(celulas, por):
+    """Roll-up de um frame de celulas (ou de outro roll-up) pelas colunas `por`"""
+    medidas = {m: f for m, f in MEDIDAS.items() if m in celulas.columns}
+    if not por:
+        return celulas[list(medidas)].agg(medidas).to_frame().T
+    return celulas.groupby(por, observed=True, sort=False).agg(medidas).reset_index()
+
+
+class CuboAgregado:
+    """Celulas agregadas de um recorte + roll-ups memoizados.
+
+    Dimensao derivada: GRUPO (nome do grupo da FILIAL), calculada nas celulas.
+    chave: identificador do recorte (chave_frame); com ela os roll-ups ficam no cache
+    de resultados, sem ela num dicionario do proprio cubo
+    """
+
+    def __init__(self, df, dimensoes=DIMENSOES, chave=None):
+        self.chave = chave
+        colunas = {}
+        for dim in dimensoes:
+            if dim in df.columns:
+                colunas[dim] = df[dim]
+            elif dim == 'EMISSAO_AAAAMM' and 'EMISSAO' in df.columns:
+                # Frames montados fora da ingestao nao tem a chave de periodo
+                colunas[dim] = chave_periodo(df, 'EMISSAO', 'AAAAMM')
+        self.dimensoes = list(colunas)
+
+        valor = df['VALOR_ORIGINAL'].to_numpy(dtype='float64', na_value=np.nan)
+        saldo = df['SALDO'].to_numpy(dtype='float64', na_value=np.nan)
+        quitado = saldo == 0
+        base = pd.DataFrame(colunas)
+        base['VALOR_ORIGINAL'] = valor
+        base['SALDO'] = saldo
+        pendente = saldo > 0
+        base['PENDENTE'] = pendente.astype('int32')
+        base['SALDO_PENDENTE'] = np.where(pendente, saldo, 0.0)
+        base['QUITADO'] = quitado.astype('int32')
+        base['VALOR_QUITADO'] = np.where(quitado, valor, 0.0)
+
+        agg = dict(
+            VALOR_ORIGINAL=('VALOR_ORIGINAL', 'sum'),
+            SALDO=('SALDO', 'sum'),
+            QTD=('VALOR_ORIGINAL', 'size'),
+            QTD_PENDENTE=('PENDENTE', 'sum'),
+            SALDO_PENDENTE=('SALDO_PENDENTE', 'sum'),
+            QTD_QUITADO=('QUITADO', 'sum'),
+            VALOR_QUITADO=('VALOR_QUITADO', 'sum'),
+            VALOR_MIN=('VALOR_ORIGINAL', 'min'),
+            VALOR_MAX=('VALOR_ORIGINAL', 'max'),
+            SALDO_MIN=('SALDO', 'min'),
+            SALDO_MAX=('SALDO', 'max'),
+        )
+        # dropna=False: linhas sem alguma dimensao continuam nos totais
+        self.celulas = base.groupby(self.dimensoes, observed=True, sort=False, dropna=False).agg(**agg).reset_index()
+
+        if 'FILIAL' in self.celulas.columns:
+            filiais = self.celulas['FILIAL']
+            distintas = filiais.drop_duplicates()
+            self.celulas['GRUPO'] = filiais.map(dict(zip(distintas, distintas.map(nome_grupo))))
+
+        self._rollups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.celulas)
+
+    def __sizeof__(self):
+        with self._lock:
+            rollups = list(self._rollups.values())
+        return sum(int(t.memory_usage(index=True, deep=True).sum()) for t in [self.celulas] + rollups)
+
+    def qtd_grupos(self, medida='QTD'):
+        """Grupos distintos (id de get_grupo_filial) das filiais com `medida` > 0; sem filial nao conta"""
+        if 'FILIAL' not in self.dimensoes:
+            return 0
+        filiais = self.agregar('FILIAL')
+        return len({get_grupo_filial(int(f)) for f in filiais.loc[filiais[medida] > 0, 'FILIAL']})
+
+    def fatia(self, filtro=None):
+        """Celulas que atendem `filtro` ({dimensao: valor ou lista de valores})"""
+        if not filtro:
+            return self.celulas
+        mascara = np.ones(len(self.celulas), dtype=bool)
+        for dim, valor in filtro.items():
+            coluna = self.celulas[dim]
+            if isinstance(valor, (list, tuple)):
+                mascara &= coluna.isin(list(valor)).to_numpy()
+            else:
+                mascara &= (coluna == valor).to_numpy(dtype=bool, na_value=False)
+        return self.celulas[mascara]
+
+    def _memo(self, chave, calcular):
+        if self.chave is not None:
+            return cache_resultados().obter(('cubo', self.chave) + chave, calcular).copy(deep=False)
+        with self._lock:
+            resultado = self._rollups.get(chave)
+            if resultado is not None:
+                self._rollups.move_to_end(chave)
+        if resultado is None:
+            resultado = calcular()
+            with self._lock:
+                self._rollups[chave] = resultado
+                while len(self._rollups) > _MAX_ROLLUPS:
+                    self._rollups.popitem(last=False)
+        return resultado.copy(deep=False)
+
+    def agregar(self, por, filtro=None):
+        """Roll-up pelas dimensoes `por` (str ou lista) das celulas em `filtro`.
+
+        Retorna DataFrame com as colunas de `por` e as MEDIDAS; linhas com alguma
+        dimensao vazia ficam de fora (como no groupby padrao).
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        return self._memo(
+            ('agregar', tuple(por), _chave_filtro(filtro)),
+            lambda: reagregar(self.fatia(filtro), por)
+        )
+
+    def total(self, filtro=None):
+        """Series com as MEDIDAS somadas de todas as celulas em `filtro`"""
+        return self._memo(('total', _chave_filtro(filtro)), lambda: reagregar(self.fatia(filtro), [])).iloc[0]
+
+    def distintos(self, por, dimensao, medida='QTD', filtro=None):
+        """Valores distintos de `dimensao` por `por` (coluna `dimensao`), nas celulas com `medida` > 0"""
+        por = [por] if isinstance(por, str) else list(por)
+
+        def calcular():
+            celulas = self.fatia(filtro)
+            celulas = celulas[celulas[medida] > 0]
+            return celulas.groupby(por, observed=True, sort=False)[dimensao].nunique().reset_index()
+
+        return self._memo(('distintos', tuple(por), dimensao, medida, _chave_filtro(filtro)), calcular)
+
+
+def _chave_filtro(filtro):
+    if not filtro:
+        return None
+    return tuple(sorted(
+        (dim, tuple(valor) if isinstance(valor, (list, tuple)) else valor)
+        for dim, valor in filtro.items()
+    ))
+
+
+@memoizar_secao
+def cubo_agregado(df):
+    """Cubo do recorte `df` (um por estado dos filtros, no cache de resultados)"""
+    return CuboAgregado(df, chave=chave_frame(df))
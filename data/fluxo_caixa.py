@@ -0,0 +1,98 @@
+"""
+Motor de fluxo de caixa por periodo (dia, semana ou mes)
+
+As projecoes (proximas 8 semanas, calendario de 30 dias) distribuiam cada titulo
+pendente num periodo com Series.apply sobre datas Python e depois faziam merge com
+a grade de periodos. Aqui o periodo sai da chave DIA/AAAAMM gravada na ingestao
+(data/periodo.py) com aritmetica de inteiros, e valores/quantidades por periodo
+saem de um np.bincount: custo linear no numero de titulos, independente do
+horizonte (semanas ou anos).
+"""
+import numpy as np
+import pandas as pd
+
+from data.periodo import SEM_DATA, chave_periodo, dia_ref
+from data.secoes import memoizar_secao
+
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def _indice_mes(aaaamm):
+    """Meses desde o ano 0 de chaves AAAAMM"""
+    return (aaaamm // 100) * 12 + aaaamm % 100 - 1
+
+
+def _limites(ref, horizonte, granularidade):
+    """Dias (chave DIA) de inicio e fim de cada periodo; o primeiro comeca em `ref`"""
+    i = np.arange(horizonte, dtype='int64')
+    if granularidade == 'dia':
+        return ref + i, ref + i
+    if granularidade == 'semana':
+        return ref + 7 * i, ref + 7 * i + 6
+    mes_ref = np.datetime64(_EPOCA + np.timedelta64(ref, 'D'), 'M')
+    meses = mes_ref + np.arange(horizonte + 1)
+    dias = (meses.astype('datetime64[D]') - _EPOCA).astype('int64')
+    inicio = dias[:-1].copy()
+    inicio[0] = ref
+    return inicio, dias[1:] - 1
+
+
+def _periodos(df, hoje, horizonte, granularidade, coluna_data, incluir_alem):
+    """Periodo (0-based) de cada linha e mascara das linhas dentro do horizonte"""
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade invalida: {granularidade}")
+    ref = dia_ref(hoje)
+
+    dias = chave_periodo(df, coluna_data).to_numpy().astype('int64')
+    valido = (dias != SEM_DATA) & (dias >= ref)
+    if granularidade == 'mes':
+        periodo = _indice_mes(chave_periodo(df, coluna_data, 'AAAAMM').to_numpy().astype('int64'))
+        periodo -= _indice_mes(pd.Timestamp(hoje).year * 100 + pd.Timestamp(hoje).month)
+    else:
+        periodo = dias - ref
+        if granularidade == 'semana':
+            periodo //= 7
+
+    if incluir_alem:
+        periodo = np.minimum(periodo, horizonte - 1)
+    else:
+        valido &= periodo < horizonte
+    return periodo, valido
+
+
+def periodo_por_titulo(df, hoje, horizonte=8, granularidade='semana', coluna_data='VENCIMENTO', incluir_alem=False):
+    """Series com o PERIODO (1..horizonte) de cada linha de df; 0 = fora do horizonte ou sem data"""
+    periodo, valido = _periodos(df, hoje, horizonte, granularidade, coluna_data, incluir_alem)
+    return pd.Series(np.where(valido, periodo + 1, 0), index=df.index, name='PERIODO')
+
+
+@memoizar_secao
+def projetar_fluxo(df, hoje, horizonte=8, granularidade='semana', coluna_data='VENCIMENTO',
+                   coluna_valor='SALDO', incluir_alem=False):
+    """Valores e quantidades de `df` por periodo a partir de `hoje`.
+
+    horizonte: numero de periodos (ex: 8 semanas, 90 dias, 12 meses)
+    granularidade: 'dia', 'semana' (7 dias a partir de hoje) ou 'mes' (mes civil)
+    incluir_alem: titulos depois do horizonte entram no ultimo periodo (senao ficam de fora)
+    Titulos sem data ou com data antes de hoje ficam de fora.
+
+    Retorna DataFrame com uma linha por periodo: PERIODO (1..horizonte), INICIO, FIM,
+    VALOR, QTD e ACUMULADO.
+    """
+    periodo, valido = _periodos(df, hoje, horizonte, granularidade, coluna_data, incluir_alem)
+    periodo = periodo[valido]
+    valores = df[coluna_valor].to_numpy(dtype='float64', na_value=0.0)[valido]
+
+    valor = np.bincount(periodo, weights=np.nan_to_num(valores), minlength=horizonte)
+    qtd = np.bincount(periodo, minlength=horizonte)
+    inicio, fim = _limites(dia_ref(hoje), horizonte, granularidade)
+    return pd.DataFrame({
+        'PERIODO': np.arange(1, horizonte + 1),
+        'INICIO': pd.to_datetime(_EPOCA + inicio),
+        'FIM': pd.to_datetime(_EPOCA + fim),
+        'VALOR': valor,
+        'QTD': qtd,
+        'ACUMULADO': np.cumsum(valor),
+    })
@@ -0,0 +1,103 @@
+"""
+Padronizacao das formas de pagamento
+
+Cada forma bruta distinta passa pelas regras de padrao uma unica vez; o resultado
+fica numa tabela persistente (data/mapeamento.py). Sem dependencia do Streamlit:
+roda nos processos de leitura (data/preparo.py).
+"""
+from data.mapeamento import MapeamentoPersistente
+
+
+# Regras de mapeamento por padrão (ordem importa - mais específico primeiro)
+_REGRAS_FORMA_PAGAMENTO = [
+    # PIX (antes de transferência para evitar conflito)
+    ('PIX', 'PIX'),
+
+    # Boleto
+    ('BOLETO', 'Boleto'),
+    ('COBRANCA', 'Boleto'),
+    ('COBRANÇA', 'Boleto'),
+
+    # TED/Transferência
+    ('TED', 'TED'),
+    ('TRANSFER', 'TED'),  # Captura TRANSFERENCIA, TRANSFERÊNCIA, etc
+    ('CREDITO EM CONTA', 'TED'),
+
+    # Compensação
+    ('COMPENSACAO', 'Compensacao'),
+    ('COMPENSAÇÃO', 'Compensacao'),
+    ('TITULO PARA COMPENSACAO', 'Compensacao'),
+
+    # Dinheiro
+    ('DINHEIRO', 'Dinheiro'),
+    ('ESPECIE', 'Dinheiro'),
+    ('ESPÉCIE', 'Dinheiro'),
+
+    # Cheque
+    ('CHEQUE', 'Cheque'),
+
+    # Débito em Conta
+    ('DEBITO', 'Debito em Conta'),
+    ('DÉBITO', 'Debito em Conta'),
+
+    # Cartão
+    ('CARTAO', 'Cartao'),
+    ('CARTÃO', 'Cartao'),
+
+    # Depósito
+    ('DEPOSITO', 'Deposito'),
+    ('DEPÓSITO', 'Deposito'),
+
+    # Tributos
+    ('TRIBUTO', 'Tributos'),
+    ('DARF', 'Tributos'),
+    ('GPS', 'Tributos'),
+    ('FGTS', 'Tributos'),
+
+    # Concessionárias
+    ('CONCESSIONARIA', 'Concessionarias'),
+    ('CONCESSIONÁRIA', 'Concessionarias'),
+
+    # Sem pagamento
+    ('SEM PAGAMENTO', 'Sem Pagamento'),
+]
+
+# Incrementar ao mudar _REGRAS_FORMA_PAGAMENTO (invalida a tabela persistida)
+_VERSAO_REGRAS_FORMA_PAGAMENTO = 1
+
+
+def _mapear_formas_pagamento(valores):
+    """Resolve formas de pagamento distintas (texto bruto) pelas regras de padrão"""
+    resultados = []
+    for valor in valores:
+        valor_upper = str(valor).upper().strip()
+
+        # Corrigir encoding quebrado (caractere � = encoding issue)
+        valor_upper = valor_upper.replace('�', 'E')
+
+        if valor_upper == '':
+            resultados.append('Nao Informado')
+            continue
+
+        # Buscar por padrão (contains); se não encontrar, "Outros"
+        resultados.append(next(
+            (resultado for padrao, resultado in _REGRAS_FORMA_PAGAMENTO if padrao in valor_upper),
+            'Outros'
+        ))
+    return resultados
+
+
+# Tabela persistente {forma bruta: forma padronizada}: cada valor novo e resolvido uma unica vez
+_FORMAS_PAGAMENTO = MapeamentoPersistente(
+    'formas_pagamento', _VERSAO_REGRAS_FORMA_PAGAMENTO, _mapear_formas_pagamento
+)
+
+
+def padronizar_forma_pagamento(serie):
+    """Padroniza as formas de pagamento para evitar duplicatas (retorna coluna categorica)"""
+    return _FORMAS_PAGAMENTO.aplicar(serie).fillna('Nao Informado').astype('category')
+
+
+def formas_pagamento_sem_regra():
+    """Formas de pagamento brutas ja vistas que nenhuma regra reconhece (caem em 'Outros')"""
+    return sorted(valor for valor, forma in _FORMAS_PAGAMENTO.valores().items() if forma == 'Outros')
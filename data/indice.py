@@ -0,0 +1,84 @@
+"""
+Indice bitmap das dimensoes de filtro do ledger
+
+Um bitset (np.packbits, 8 titulos por byte) por valor distinto de cada dimensao,
+montado uma vez por versao dos dados. Uma combinacao de filtros vira OR entre os
+valores escolhidos de uma dimensao e AND entre dimensoes, sobre bytes; o resultado
+e um array de posicoes de linha (selecionar_linhas(df, posicoes)).
+"""
+import numpy as np
+import pandas as pd
+
+
+class IndiceBitmap:
+    """Bitsets por valor das colunas `dimensoes` de `df` (e de mascaras booleanas extras).
+
+    mascaras: {nome: Series/array booleano} guardadas como bitsets (ex: QUITADO = SALDO == 0)
+    As posicoes retornadas sao relativas a `df` (mesma ordem de linhas).
+    """
+
+    def __init__(self, df, dimensoes, mascaras=None):
+        self.n = len(df)
+        self._vazio = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        self._bitmaps = {}
+        for coluna in dimensoes:
+            if coluna in df.columns:
+                self._bitmaps[coluna] = self._indexar(df[coluna])
+        self._mascaras = {nome: self.empacotar(mascara) for nome, mascara in (mascaras or {}).items()}
+
+    def _indexar(self, serie):
+        """{valor: bitset} com uma passada: posicoes agrupadas por codigo do valor"""
+        codigos, valores = pd.factorize(serie)
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+        bitmaps = {}
+        for k, valor in enumerate(valores.tolist()):
+            bits = np.zeros(self.n, dtype=bool)
+            bits[ordem[limites[k]:limites[k + 1]]] = True
+            bitmaps[valor] = np.packbits(bits)
+        return bitmaps
+
+    def __contains__(self, dimensao):
+        return dimensao in self._bitmaps
+
+    def empacotar(self, mascara):
+        """Converte uma mascara booleana de tamanho n em bitset"""
+        return np.packbits(np.asarray(mascara, dtype=bool))
+
+    def todos(self):
+        return self.empacotar(np.ones(self.n, dtype=bool))
+
+    def valor(self, dimensao, valor):
+        """Bitset das linhas com dimensao == valor (vazio se o valor nao existe)"""
+        return self._bitmaps[dimensao].get(valor, self._vazio)
+
+    def qualquer(self, dimensao, valores):
+        """Bitset das linhas com dimensao em `valores` (OR dos bitsets)"""
+        bits = self._vazio.copy()
+        for valor in valores:
+            bits |= self.valor(dimensao, valor)
+        return bits
+
+    def mascara(self, nome):
+        return self._mascaras[nome]
+
+    def posicoes(self, bits, inicio=0, fim=None):
+        """Posicoes (np.intp) das linhas marcadas em `bits`, restritas a [inicio, fim)
+
+        So os bytes do intervalo sao desempacotados (ex: fatia de periodo, data/periodo.py).
+        """
+        fim = self.n if fim is None else fim
+        byte = inicio // 8
+        marcadas = np.unpackbits(bits[byte:(fim + 7) // 8], count=fim - byte * 8)
+        return np.flatnonzero(marcadas[inicio - byte * 8:]) + inicio
+
+    def marcadas(self, bits, posicoes):
+        """Mascara de quais `posicoes` estao marcadas em `bits` (sem desempacotar o bitset)"""
+        return ((bits[posicoes >> 3] >> (7 - (posicoes & 7))) & 1).astype(bool)
+
+
+def selecionar_linhas(df, posicoes):
+    """df.take(posicoes); posicoes consecutivas viram fatia iloc (visao, sem copia)"""
+    if len(posicoes) and posicoes[-1] - posicoes[0] + 1 == len(posicoes):
+        return df.iloc[posicoes[0]:posicoes[-1] + 1]
+    return df.take(posicoes)
@@ -0,0 +1,156 @@
+"""
+Leitura paralela dos arquivos Excel de origem
+
+O parse do .xlsx (openpyxl) e puro Python e segura o GIL: ler os arquivos um apos
+o outro custa a soma de todos. Aqui cada arquivo vai para um processo do pool,
+junto com o processamento que so depende dele (nos loaders, data/preparo.py); o
+tempo total fica proximo ao do maior arquivo. Usado pelos loaders e pelos scripts
+de carga no banco.
+
+Este modulo e os que rodam nos processos de leitura nao importam o Streamlit.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from data.leitor_xlsx import ler_xlsx
+from data.schema import registrar_relatorios, relatorios_schema
+
+logger = logging.getLogger(__name__)
+
+# Colunas de data comuns aos relatorios de pagar/receber
+COLUNAS_DATA = ['EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DT_ESCRITURACAO']
+
+LeituraArquivo = namedtuple('LeituraArquivo', ['nome', 'caminho', 'df', 'segundos', 'erro'])
+
+# Tempos da ultima leitura de cada arquivo: {nome: (caminho, linhas, segundos)}
+_TEMPOS = {}
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def padronizar_colunas(df):
+    """Colunas em maiusculas e colunas de data convertidas (padrao dos loaders)"""
+    df.columns = [str(c).upper() for c in df.columns]
+    for col in COLUNAS_DATA:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def _ler(caminho, opcoes, preparar):
+    """Executado no processo filho: le um arquivo e aplica `preparar`.
+    Retorna tambem o relatorio de memoria do schema gerado no processo filho."""
+    inicio = time.perf_counter()
+    relatorios_antes = relatorios_schema()
+    if 'colunas' in opcoes:
+        # Leitura em streaming so das colunas usadas (data/leitor_xlsx.py)
+        df = ler_xlsx(caminho, **opcoes)
+    else:
+        df = pd.read_excel(caminho, **opcoes)
+    if preparar is not None:
+        df = preparar(df)
+    memoria = {nome: r for nome, r in relatorios_schema().items() if relatorios_antes.get(nome) != r}
+    return df, time.perf_counter() - inicio, memoria
+
+
+def _obter_pool():
+    """Pool de processos compartilhado (spawn: seguro em processo com threads, como o Streamlit)"""
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def ler_arquivos(arquivos, preparar=padronizar_colunas, paralelo=True):
+    """Le varios arquivos Excel em paralelo.
+
+    arquivos: {nome: caminho}, {nome: (caminho, opcoes)} ou {nome: (caminho, opcoes, preparar)};
+              opcoes sao as do pd.read_excel, ou as de ler_xlsx (sheet_name, colunas)
+              quando incluem 'colunas'
+    preparar: funcao de nivel de modulo df -> df aplicada no processo filho (ou None);
+              a do proprio arquivo, quando informada, tem precedencia
+    paralelo: False le no proprio processo, um apos o outro
+
+    Retorna {nome: LeituraArquivo} na mesma ordem de `arquivos`. Erros de um arquivo
+    (ex: FileNotFoundError) ficam em LeituraArquivo.erro e nao interrompem os demais.
+    """
+    tarefas = {}
+    for nome, fonte in arquivos.items():
+        if not isinstance(fonte, tuple):
+            fonte = (fonte, {})
+        if len(fonte) == 2:
+            fonte = fonte + (preparar,)
+        tarefas[nome] = fonte
+
+    futuros = {}
+    if paralelo and len(tarefas) > 1:
+        try:
+            pool = _obter_pool()
+            futuros = {nome: pool.submit(_ler, *tarefa) for nome, tarefa in tarefas.items()}
+        except (BrokenProcessPool, RuntimeError, OSError):
+            # Pool indisponivel (ex: processo sendo encerrado): le no proprio processo
+            logger.exception('Pool de leitura indisponivel; lendo sequencialmente')
+            _descartar_pool()
+            futuros = {}
+
+    resultados = {}
+    for nome, tarefa in tarefas.items():
+        caminho = tarefa[0]
+        try:
+            if nome in futuros:
+                try:
+                    df, segundos, memoria = futuros[nome].result()
+                except BrokenProcessPool:
+                    _descartar_pool()
+                    df, segundos, memoria = _ler(*tarefa)
+            else:
+                df, segundos, memoria = _ler(*tarefa)
+        except Exception as e:
+            resultados[nome] = LeituraArquivo(nome, caminho, None, 0.0, e)
+            continue
+        # O schema aplicado no processo filho entra no relatorio deste processo
+        registrar_relatorios(memoria)
+        resultados[nome] = LeituraArquivo(nome, caminho, df, segundos, None)
+        _TEMPOS[nome] = (caminho, len(df), segundos)
+        logger.info('%s: %d linhas em %.2fs', caminho, len(df), segundos)
+    return resultados
+
+
+def ler_obrigatorios(arquivos, preparar=padronizar_colunas):
+    """Como ler_arquivos, mas propaga o erro do primeiro arquivo que falhar.
+    Retorna os DataFrames na ordem de `arquivos`."""
+    resultados = ler_arquivos(arquivos, preparar)
+    for leitura in resultados.values():
+        if leitura.erro is not None:
+            raise leitura.erro
+    return tuple(leitura.df for leitura in resultados.values())
+
+
+def relatorio_leituras():
+    """DataFrame com o tempo da ultima leitura de cada arquivo neste processo"""
+    linhas = [
+        {'Arquivo': nome, 'Caminho': caminho, 'Linhas': linhas, 'Segundos': segundos}
+        for nome, (caminho, linhas, segundos) in _TEMPOS.items()
+    ]
+    return pd.DataFrame(linhas, columns=['Arquivo', 'Caminho', 'Linhas', 'Segundos'])
@@ -0,0 +1,103 @@
+"""
+Classificador intercompany compilado a partir dos padroes de config/settings.py
+
+Um unico regex reune todos os padroes (INTERCOMPANY_PATTERNS, INTERCOMPANY_PADRONIZACAO
+e INTERCOMPANY_GRUPO_DESTINO). Uma varredura por nome encontra todos os padroes
+contidos nele; cada conjunto de regras escolhe entao o seu padrao de maior
+prioridade (primeiro da lista), exatamente como os loops por substring faziam.
+A classificacao roda uma vez por nome distinto, na ingestao.
+"""
+import re
+
+import pandas as pd
+
+from config.settings import INTERCOMPANY_GRUPO_DESTINO, INTERCOMPANY_PADRONIZACAO, INTERCOMPANY_PATTERNS
+
+
+class MatcherPadroes:
+    """Matcher multi-padrao por substring com prioridade por conjunto de regras.
+
+    conjuntos: {nome_conjunto: [(padrao, resultado), ...]} em ordem de prioridade
+    """
+
+    def __init__(self, conjuntos):
+        padroes = sorted({p.upper() for regras in conjuntos.values() for p, _ in regras},
+                         key=len, reverse=True)
+        # Lookahead: um match (possivelmente sobreposto) por posicao; com os padroes
+        # ordenados do mais longo para o mais curto, cada posicao reporta o mais longo
+        self._regex = re.compile('(?=(' + '|'.join(re.escape(p) for p in padroes) + '))')
+        # Os demais padroes que casam na mesma posicao sao prefixos do mais longo
+        self._prefixos = {p: [q for q in padroes if p.startswith(q)] for p in padroes}
+        self._regras = {}
+        for nome, regras in conjuntos.items():
+            prioridades = {}
+            for ordem, (padrao, resultado) in enumerate(regras):
+                prioridades.setdefault(padrao.upper(), (ordem, resultado))
+            self._regras[nome] = prioridades
+
+    def padroes_encontrados(self, texto):
+        """Conjunto de padroes contidos em `texto` (ja em maiusculas)"""
+        encontrados = set()
+        for m in self._regex.finditer(texto):
+            encontrados.update(self._prefixos[m.group(1)])
+        return encontrados
+
+    def classificar(self, texto):
+        """Retorna {nome_conjunto: resultado do padrao mais prioritario ou None}"""
+        encontrados = self.padroes_encontrados(texto)
+        resultado = {}
+        for nome, prioridades in self._regras.items():
+            candidatos = [prioridades[p] for p in encontrados if p in prioridades]
+            resultado[nome] = min(candidatos)[1] if candidatos else None
+        return resultado
+
+
+_MATCHER = MatcherPadroes({
+    'IS_INTERCOMPANY': [(p, True) for p in INTERCOMPANY_PATTERNS],
+    'IC_PADRAO': list(INTERCOMPANY_PADRONIZACAO.items()),
+    'GRUPO_DESTINO': INTERCOMPANY_GRUPO_DESTINO,
+})
+
+
+def _texto(nome):
+    return str(nome).strip().upper()
+
+
+def eh_intercompany(nome):
+    """Verifica se o nome é de uma empresa do grupo"""
+    if pd.isna(nome):
+        return False
+    return _MATCHER.classificar(_texto(nome))['IS_INTERCOMPANY'] is not None
+
+
+def padronizar_nome_intercompany(nome):
+    """Padroniza nomes de empresas do grupo para comparação correta"""
+    if pd.isna(nome):
+        return nome
+    padrao = _MATCHER.classificar(_texto(nome))['IC_PADRAO']
+    return padrao if padrao is not None else nome  # Retorna original se não for intercompany
+
+
+def grupo_destino(nome):
+    """Grupo IC (visao Intercompany) do fornecedor/cliente, ou None se nao for do grupo"""
+    if pd.isna(nome):
+        return None
+    return _MATCHER.classificar(_texto(nome))['GRUPO_DESTINO']
+
+
+def classificar_intercompany(serie):
+    """Classifica uma coluna de nomes (fornecedor/cliente) uma vez por valor distinto.
+
+    Retorna DataFrame com o mesmo indice e as colunas:
+        IS_INTERCOMPANY (bool), IC_PADRAO (category), GRUPO_DESTINO (category)
+    """
+    codigos, unicos = pd.factorize(serie)
+    classes = [_MATCHER.classificar(_texto(nome)) for nome in unicos]
+    por_unico = pd.DataFrame(classes, columns=['IS_INTERCOMPANY', 'IC_PADRAO', 'GRUPO_DESTINO'])
+    por_unico.loc[len(por_unico)] = [None, None, None]  # codigo -1 (nulo)
+
+    resultado = por_unico.take(codigos).set_axis(serie.index)
+    resultado['IS_INTERCOMPANY'] = resultado['IS_INTERCOMPANY'].notna()
+    resultado['IC_PADRAO'] = resultado['IC_PADRAO'].astype('category')
+    resultado['GRUPO_DESTINO'] = resultado['GRUPO_DESTINO'].astype('category')
+    return resultado
@@ -0,0 +1,92 @@
+"""
+Visao preguicosa de um recorte do ledger
+
+A pagina montava df, df_pendentes, df_vencidos e cada aba copiava de novo. Um
+LedgerFiltrado guarda so a base (frame do registro) e as posicoes selecionadas;
+os recortes derivados (pendentes, vencidos, pagos) sao novas posicoes, calculadas
+lendo uma coluna, e nada e materializado ate alguem pedir .df ou colunas().
+Com o Copy-on-Write (data/registro.py), um .df de posicoes consecutivas e uma
+fatia sem copia, e as abas podem acrescentar colunas sem copiar o frame.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from data.cache_resultados import cache_resultados
+from data.indice import selecionar_linhas
+from data.secoes import registrar_frame
+
+
+class LedgerFiltrado:
+    """Base + posicoes de linha selecionadas.
+
+    chave: identificador do recorte (ex: chave_filtros); com ela os recortes
+    derivados ficam no cache de resultados compartilhado entre sessoes
+    """
+
+    def __init__(self, base, posicoes, chave=None):
+        self.base = base
+        self.posicoes = np.asarray(posicoes)
+        self.chave = chave
+        self._colunas = {}
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    @cached_property
+    def df(self):
+        """Recorte materializado (fatia sem copia quando as posicoes sao consecutivas).
+
+        Com chave, o frame fica registrado para as compute_* memoizadas (data/secoes.py)
+        """
+        return registrar_frame(selecionar_linhas(self.base, self.posicoes), self.chave)
+
+    def coluna(self, nome):
+        """Valores (np.ndarray) de uma coluna do recorte, sem materializar as demais"""
+        if nome not in self._colunas:
+            self._colunas[nome] = self.base[nome].to_numpy()[self.posicoes]
+        return self._colunas[nome]
+
+    def colunas(self, nomes):
+        """DataFrame so com as colunas `nomes` do recorte"""
+        return selecionar_linhas(self.base[list(nomes)], self.posicoes)
+
+    def igual(self, nome, valor):
+        """Mascara coluna == valor no recorte (categoricas comparam codigos)"""
+        serie = self.base[nome]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            if valor not in serie.cat.categories:
+                return np.zeros(len(self.posicoes), dtype=bool)
+            return serie.cat.codes.to_numpy()[self.posicoes] == serie.cat.categories.get_loc(valor)
+        return self.coluna(nome) == valor
+
+    def selecionar(self, mascara, nome=None):
+        """Sub-recorte pelas linhas de `mascara` (booleana do tamanho do recorte, ou funcao que a retorna).
+
+        nome: identifica o sub-recorte; com a chave do recorte, as posicoes (relativas
+        ao recorte) vem do cache de resultados
+        """
+        def calcular():
+            return np.flatnonzero(mascara() if callable(mascara) else mascara)
+
+        if nome is None or self.chave is None:
+            return LedgerFiltrado(self.base, self.posicoes[calcular()])
+        chave = (nome,) + tuple(self.chave)
+        relativas = cache_resultados().obter(chave, calcular)
+        return LedgerFiltrado(self.base, self.posicoes[relativas], chave)
+
+    @cached_property
+    def pendentes(self):
+        """Titulos com saldo em aberto"""
+        return self.selecionar(lambda: self.coluna('SALDO') > 0, 'pendentes')
+
+    @cached_property
+    def pagos(self):
+        """Titulos quitados (saldo zero)"""
+        return self.selecionar(lambda: self.coluna('SALDO') == 0, 'pagos')
+
+    @cached_property
+    def vencidos(self):
+        """Titulos com STATUS 'Vencido'"""
+        return self.selecionar(lambda: self.igual('STATUS', 'Vencido'), 'vencidos')
@@ -0,0 +1,145 @@
+"""
+Leitor XLSX em streaming com projecao de colunas
+
+O pd.read_excel monta o modelo de objetos completo do openpyxl (todas as celulas,
+estilos, todas as colunas) antes de criar o DataFrame. Aqui a planilha e lida em
+modo read_only, linha a linha (iter_rows(values_only=True)), e so as colunas da
+lista sao guardadas, cada uma em um buffer tipado (array de float enquanto so
+chegarem numeros). O resultado segue as conversoes do read_excel: numeros inteiros
+(inclusive floats integrais, como 3.0) viram int64, datas viram datetime64, colunas
+mistas ficam object; cabecalhos repetidos ganham sufixo (.1, .2); linhas em branco
+no meio dos dados ficam como linhas nulas e as do final sao descartadas. Diferenca:
+colunas sem cabecalho sao ignoradas (o read_excel as chamaria de "Unnamed: n").
+"""
+from array import array
+from datetime import date, datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+# Inteiros acima disso nao cabem exatos no buffer float64
+_MAX_INT_EXATO = 2 ** 53
+
+
+class _BufferColuna:
+    """Valores de uma coluna: float64 compacto enquanto so houver numeros, senao lista"""
+
+    __slots__ = ('numeros', 'objetos', 'so_inteiros', 'tem_data', 'tem_numero')
+
+    def __init__(self):
+        self.numeros = array('d')
+        self.objetos = None
+        self.so_inteiros = True
+        self.tem_data = False
+        self.tem_numero = False
+
+    def _promover(self):
+        """Troca o buffer numerico por lista de objetos (coluna mista)"""
+        self.objetos = [
+            np.nan if v != v else (int(v) if v.is_integer() else v)
+            for v in self.numeros
+        ]
+        self.numeros = None
+
+    def anexar(self, valor):
+        if self.objetos is not None:
+            if valor is None:
+                valor = np.nan
+            elif isinstance(valor, float) and valor.is_integer():
+                # Como o read_excel: float integral vira int
+                valor = int(valor)
+            self.objetos.append(valor)
+            return
+        if valor is None:
+            self.numeros.append(np.nan)
+            return
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool) and not self.tem_data:
+            if isinstance(valor, int):
+                if abs(valor) >= _MAX_INT_EXATO:
+                    self._promover()
+                    self.objetos.append(valor)
+                    return
+            elif not valor.is_integer():
+                self.so_inteiros = False
+            self.tem_numero = True
+            self.numeros.append(valor)
+            return
+        # Datas e textos vao para a lista; datas sao convertidas em bloco no fim
+        self.tem_data = isinstance(valor, (datetime, date)) and not self.tem_numero
+        self._promover()
+        self.objetos.append(valor)
+
+    def serie(self, nome, linhas):
+        """Series com as `linhas` primeiras posicoes do buffer"""
+        if self.objetos is None:
+            valores = np.frombuffer(self.numeros, dtype='float64')[:linhas]
+            if self.so_inteiros and self.tem_numero and not np.isnan(valores).any():
+                return pd.Series(valores.astype('int64'), name=nome)
+            return pd.Series(valores.copy(), name=nome)
+
+        objetos = self.objetos[:linhas]
+        if self.tem_data and all(isinstance(v, (datetime, date)) or v is np.nan for v in objetos):
+            return pd.Series(pd.to_datetime(objetos), name=nome)
+        return pd.Series(objetos, dtype=object, name=nome)
+
+
+def _nomes_unicos(cabecalho):
+    """(posicao, nome) das colunas com cabecalho; repetidos recebem .1, .2 pulando nomes
+    que ja existem no cabecalho (mesma regra do read_excel)"""
+    originais = set(cabecalho)
+    contagem = {}
+    nomes = []
+    for i, nome in enumerate(cabecalho):
+        if nome is None:
+            continue
+        base = nome
+        n = contagem.get(nome, 0)
+        while n > 0:
+            contagem[base] = n + 1
+            nome = f'{base}.{n}'
+            n = n + 1 if nome in originais else contagem.get(nome, 0)
+        contagem[nome] = n + 1
+        nomes.append((i, nome))
+    return nomes
+
+
+def ler_xlsx(caminho, sheet_name=0, colunas=None):
+    """Le uma planilha .xlsx em streaming.
+
+    sheet_name: indice ou nome da aba (como no pd.read_excel)
+    colunas: nomes de colunas a manter (comparados em maiusculas); None = todas
+    A primeira linha e o cabecalho; nomes repetidos viram NOME, NOME.1, ... (como
+    no read_excel) antes do filtro. Linhas vazias no final sao descartadas.
+    """
+    filtro = {str(c).upper() for c in colunas} if colunas is not None else None
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = next(linhas, None) or ()
+
+        selecionadas = [
+            (i, nome) for i, nome in _nomes_unicos(cabecalho)
+            if filtro is None or str(nome).strip().upper() in filtro
+        ]
+        buffers = [_BufferColuna() for _ in selecionadas]
+
+        total = 0
+        ultima_preenchida = 0
+        for linha in linhas:
+            total += 1
+            if any(v is not None for v in linha):
+                ultima_preenchida = total
+            for (i, _), buffer in zip(selecionadas, buffers):
+                buffer.anexar(linha[i] if i < len(linha) else None)
+    finally:
+        wb.close()
+
+    # Linhas em branco no fim da planilha sao ignoradas; as do meio ficam (como no read_excel)
+    if not selecionadas:
+        return pd.DataFrame(index=range(ultima_preenchida))
+    return pd.concat(
+        [buffer.serie(nome, ultima_preenchida) for (_, nome), buffer in zip(selecionadas, buffers)],
+        axis=1,
+    )
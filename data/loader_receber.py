@@ -1,213 +1,192 @@
 """
 Carregamento e processamento de dados - Contas a Receber
 """
-import pandas as pd
+import numpy as np
 import streamlit as st
-from datetime import datetime
 
-from config.settings import CACHE_TTL, INTERCOMPANY_PADRONIZACAO, INTERCOMPANY_PATTERNS, GRUPOS_FILIAIS, get_grupo_filial
+from config.settings import COLUNAS_ORIGEM, DATA_FILES, get_grupo_filial
+from data.atualizador import atualizador_dados
+from data.busca import BuscaColuna, normalizar_consulta
+from data.cache_resultados import cache_resultados
+from data.indice import IndiceBitmap
+from data.ingestao import ler_obrigatorios
+from data.ledger import LedgerFiltrado
+from data.preparo import preparar_baixas_receber, preparar_contas_receber
+from data.periodo import intervalo_datas
+from data.vinculos import vincular_adiantamentos
+from data.registro import registro_datasets
+from data.snapshot import carregar_snapshot
+from data.status import calcular_status, normalizar_data_ref
+
+
+def _processar_receber():
+    """Le os arquivos Excel de receber e aplica o processamento que nao depende da data atual"""
+
+    # Leitura em paralelo, um processo por arquivo, so COLUNAS_ORIGEM; cada processo ja
+    # aplica o processamento do proprio arquivo (data/preparo.py: nomes, formas de
+    # pagamento, intercompany, colunas derivadas, schema, ordem por data)
+    # Adiantamentos sao extraidos do proprio Contas a Receber (evita duplicacao)
+    df_contas, df_baixas = ler_obrigatorios({
+        'contas_receber': (DATA_FILES['contas_receber'], {'sheet_name': 'Planilha1', 'colunas': COLUNAS_ORIGEM},
+                           preparar_contas_receber),
+        'baixas_receber': (DATA_FILES['baixas_receber'], {'colunas': COLUNAS_ORIGEM}, preparar_baixas_receber),
+    })
 
+    # Vinculo adiantamento <-> baixas: CHAVE_TITULO e compensacao FIFO (data/vinculos.py)
+    vincular_adiantamentos(df_contas, df_baixas)
 
-def normalizar_nome_empresa(serie):
-    """Normaliza nomes de empresas para evitar duplicatas por variacao de grafia.
-    Trata: case, sufixos juridicos (S/A, S.A., LTDA.), pontuacao e espacos."""
-    import re
-    def _normalizar(nome):
-        if pd.isna(nome) or str(nome).strip() == '':
-            return nome
-        n = str(nome).strip().upper()
-        # Sufixos juridicos: S/A, S.A., S.A -> S A
-        n = re.sub(r'\bS\s*/\s*A\b', 'S A', n)
-        n = re.sub(r'\bS\.A\.?', 'S A', n)
-        # LTDA. -> LTDA
-        n = re.sub(r'\bLTDA\.', 'LTDA', n)
-        # Remover hifen e ponto no final do nome
-        n = re.sub(r'[\-\.]+\s*$', '', n)
-        # Colapsar espacos multiplos
-        n = re.sub(r'\s+', ' ', n).strip()
-        return n
-    return serie.apply(_normalizar)
+    return df_contas, df_baixas
 
 
-def padronizar_nome_intercompany(nome):
-    """Padroniza nomes de empresas do grupo para comparação correta"""
-    if pd.isna(nome):
-        return nome
+_ARQUIVOS_RECEBER = [DATA_FILES['contas_receber'], DATA_FILES['baixas_receber']]
 
-    nome_limpo = str(nome).strip().upper()
 
-    # Busca no mapeamento de padronização
-    for variacao, padrao in INTERCOMPANY_PADRONIZACAO.items():
-        if variacao.upper() in nome_limpo:
-            return padrao
+def _carregar_base_receber(versao):
+    """Base estatica de receber (sem colunas dependentes da data), uma por versao dos arquivos"""
+    return registro_datasets().obter(
+        'receber_base', versao, lambda: carregar_snapshot('receber', _ARQUIVOS_RECEBER, _processar_receber), max_versoes=2
+    )
 
-    return nome  # Retorna original se não for intercompany
 
+def _calcular_receber_em(versao, as_of):
+    """Base + colunas de status/aging na data de referencia"""
+    df_contas, df_baixas = _carregar_base_receber(versao)
+    return calcular_status(df_contas, 'VENCIMENTO', as_of, rotulo_quitado='Recebido'), df_baixas
 
-def eh_intercompany(nome):
-    """Verifica se o nome é de uma empresa do grupo"""
-    if pd.isna(nome):
-        return False
-    nome_upper = str(nome).strip().upper()
-    return any(p.upper() in nome_upper for p in INTERCOMPANY_PATTERNS)
 
+def _versao_receber():
+    """Versao publicada dos arquivos de receber; registra o status de hoje como derivado"""
+    atualizador = atualizador_dados()
+    atualizador.registrar_aquecedor('receber', carregar_dados_receber)
+    return atualizador.versao('receber', _ARQUIVOS_RECEBER, _carregar_base_receber)
 
-@st.cache_data(ttl=CACHE_TTL)
-def carregar_dados_receber():
-    """Carrega e processa os dados de Contas a Receber dos arquivos Excel"""
 
-    # Carregar dados dos arquivos Excel
-    # Adiantamentos sao extraidos do proprio Contas a Receber (evita duplicacao)
-    df_contas = pd.read_excel('data/Contas a receber.xlsx', sheet_name='Planilha1')
-    df_baixas = pd.read_excel('data/Baixas de adiantamentos a receber.xlsx')
-
-    # Converter nomes de colunas para uppercase (compatibilidade)
-    df_contas.columns = [str(c).upper() for c in df_contas.columns]
-    df_baixas.columns = [str(c).upper() for c in df_baixas.columns]
-
-    # Normalizar nomes de clientes/fornecedores (case, sufixos juridicos, espacos, pontuacao)
-    if 'NOME_CLIENTE' in df_contas.columns:
-        df_contas['NOME_CLIENTE'] = normalizar_nome_empresa(df_contas['NOME_CLIENTE'].astype(str))
-    if 'NOME_CLIENTE' in df_baixas.columns:
-        df_baixas['NOME_CLIENTE'] = normalizar_nome_empresa(df_baixas['NOME_CLIENTE'].astype(str))
-    if 'NOME_FORNECEDOR' in df_contas.columns:
-        df_contas['NOME_FORNECEDOR'] = normalizar_nome_empresa(df_contas['NOME_FORNECEDOR'].astype(str))
-    if 'NOME_FORNECEDOR' in df_baixas.columns:
-        df_baixas['NOME_FORNECEDOR'] = normalizar_nome_empresa(df_baixas['NOME_FORNECEDOR'].astype(str))
-
-    # Limpar espaços da coluna TIPO (vem com espaços do Excel)
-    if 'TIPO' in df_contas.columns:
-        df_contas['TIPO'] = df_contas['TIPO'].str.strip()
-    if 'TIPO' in df_baixas.columns:
-        df_baixas['TIPO'] = df_baixas['TIPO'].str.strip()
-
-    # Converter colunas de data
-    for col in ['EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DT_ESCRITURACAO']:
-        for df in [df_contas, df_baixas]:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-
-    hoje = datetime.now()
-
-    # Adicionar colunas temporais
-    df_contas['ANO'] = df_contas['EMISSAO'].dt.year
-    df_contas['MES'] = df_contas['EMISSAO'].dt.month
-    df_contas['TRIMESTRE'] = df_contas['EMISSAO'].dt.quarter
-
-    # Calcular dias até vencimento
-    df_contas['DIAS_VENC'] = (df_contas['VENCIMENTO'] - hoje).dt.days
-
-    # Classificar status usando vetorização
-    df_contas['STATUS'] = 'Vence em +60 dias'
-    df_contas.loc[df_contas['SALDO'] <= 0, 'STATUS'] = 'Recebido'
-    df_contas.loc[df_contas['VENCIMENTO'].isna() & (df_contas['SALDO'] > 0), 'STATUS'] = 'Sem data'
-    df_contas.loc[(df_contas['DIAS_VENC'] < 0) & (df_contas['SALDO'] > 0), 'STATUS'] = 'Vencido'
-    df_contas.loc[(df_contas['DIAS_VENC'] >= 0) & (df_contas['DIAS_VENC'] <= 7) & (df_contas['SALDO'] > 0), 'STATUS'] = 'Vence em 7 dias'
-    df_contas.loc[(df_contas['DIAS_VENC'] > 7) & (df_contas['DIAS_VENC'] <= 15) & (df_contas['SALDO'] > 0), 'STATUS'] = 'Vence em 15 dias'
-    df_contas.loc[(df_contas['DIAS_VENC'] > 15) & (df_contas['DIAS_VENC'] <= 30) & (df_contas['SALDO'] > 0), 'STATUS'] = 'Vence em 30 dias'
-    df_contas.loc[(df_contas['DIAS_VENC'] > 30) & (df_contas['DIAS_VENC'] <= 60) & (df_contas['SALDO'] > 0), 'STATUS'] = 'Vence em 60 dias'
-
-    # Calcular dias de atraso
-    df_contas['DIAS_ATRASO'] = 0
-    mask_vencido = (df_contas['STATUS'] == 'Vencido') & df_contas['DIAS_VENC'].notna()
-    df_contas.loc[mask_vencido, 'DIAS_ATRASO'] = df_contas.loc[mask_vencido, 'DIAS_VENC'].abs()
-
-    # ========== NOVAS MÉTRICAS COM COLUNAS ADICIONAIS ==========
-
-    # DSO - Dias para receber (para títulos baixados)
-    if 'DT_BAIXA' in df_contas.columns:
-        df_contas['DSO'] = (df_contas['DT_BAIXA'] - df_contas['EMISSAO']).dt.days
-        df_contas.loc[df_contas['DSO'] < 0, 'DSO'] = None  # Limpar valores inválidos
-
-        # Flag de pontualidade (recebeu antes ou no vencimento)
-        df_contas['PONTUAL'] = df_contas['DT_BAIXA'] <= df_contas['VENCIMENTO']
-        df_contas.loc[df_contas['DT_BAIXA'].isna(), 'PONTUAL'] = None
-
-        # Dias de atraso no recebimento (DT_BAIXA - VENCIMENTO)
-        df_contas['DIAS_ATRASO_RECEB'] = (df_contas['DT_BAIXA'] - df_contas['VENCIMENTO']).dt.days
-        df_contas.loc[df_contas['DIAS_ATRASO_RECEB'] < 0, 'DIAS_ATRASO_RECEB'] = 0  # Não atrasou
-
-    # Renegociação (VENCTO_REAL diferente de VENCIMENTO)
-    if 'VENCTO_REAL' in df_contas.columns:
-        df_contas['RENEGOCIADO'] = (
-            df_contas['VENCTO_REAL'].notna() &
-            df_contas['VENCIMENTO'].notna() &
-            (df_contas['VENCTO_REAL'] != df_contas['VENCIMENTO'])
-        )
-        # Dias de prorrogação
-        df_contas['DIAS_PRORROGACAO'] = (df_contas['VENCTO_REAL'] - df_contas['VENCIMENTO']).dt.days
-        df_contas.loc[~df_contas['RENEGOCIADO'], 'DIAS_PRORROGACAO'] = 0
-
-    # Classificar COM NF / SEM NF
-    tipos_com_nf = ['NF', 'NFE', 'NFSE', 'NDF', 'FT']
-    df_contas['COM_NF'] = df_contas['TIPO'].isin(tipos_com_nf)
-    df_contas['TIPO_DOC'] = df_contas['COM_NF'].map({True: 'Com NF', False: 'Sem NF'})
-
-    # Alerta NF entrada < 48h do vencimento
-    if 'DIF_HORAS_DATAS' in df_contas.columns:
-        df_contas['ALERTA_48H'] = (df_contas['DIF_HORAS_DATAS'].abs() <= 48) & (df_contas['SALDO'] > 0)
-    elif 'DIF_DIAS_DATAS' in df_contas.columns:
-        df_contas['ALERTA_48H'] = (df_contas['DIF_DIAS_DATAS'].abs() <= 2) & (df_contas['SALDO'] > 0)
-    else:
-        df_contas['ALERTA_48H'] = False
-
-    # Padronizar nomes de clientes intercompany
-    if 'NOME_CLIENTE' in df_contas.columns:
-        df_contas['CLIENTE_IC_PADRAO'] = df_contas['NOME_CLIENTE'].apply(padronizar_nome_intercompany)
-        df_contas['IS_INTERCOMPANY'] = df_contas['NOME_CLIENTE'].apply(eh_intercompany)
-
-    # Garantir valores numéricos para colunas financeiras
-    colunas_financeiras = ['VALOR_JUROS', 'VALOR_MULTA', 'VLR_DESCONTO', 'VALOR_CORRECAO',
-                           'VALOR_ACRESCIMO', 'VALOR_DECRESCIMO', 'TX_MOEDA', 'VALOR_REAL']
-    for col in colunas_financeiras:
-        if col in df_contas.columns:
-            df_contas[col] = pd.to_numeric(df_contas[col], errors='coerce').fillna(0)
-
-    # Calcular intervalo entre adiantamento e baixa
-    if 'DIF_DIAS_EMIS_BAIXA' in df_baixas.columns:
-        df_baixas['DIAS_ATE_BAIXA'] = pd.to_numeric(df_baixas['DIF_DIAS_EMIS_BAIXA'], errors='coerce').fillna(0)
+def carregar_dados_receber(as_of=None):
+    """Carrega os dados de receber processados com status/aging na data `as_of` (None = hoje).
 
-    return df_contas, df_baixas
+    Os frames vem do registro compartilhado do processo (somente leitura). A versao
+    dos arquivos e a publicada pelo atualizador em segundo plano (data/atualizador.py).
+    """
+    versao = _versao_receber()
+    as_of = normalizar_data_ref(as_of)
+    return registro_datasets().obter('receber', (versao, as_of), lambda: _calcular_receber_em(versao, as_of))
 
 
-def aplicar_filtros_receber(df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
-                            busca_cliente, filtro_tipo_doc='Todos', filtro_forma_pagto='Todas'):
-    """Aplica filtros de forma otimizada usando máscaras booleanas
+def versao_dados_receber(as_of=None):
+    """Identificador dos dados retornados por carregar_dados_receber(as_of), para chavear caches derivados"""
+    return f"{_versao_receber()}@{normalizar_data_ref(as_of).isoformat()}"
 
-    filtro_filiais: None (todas) ou lista de codigos int de filiais selecionadas
+
+def data_atualizacao_receber():
+    """Data dos arquivos de origem da versao em uso (rodape "Atualizado em")"""
+    return atualizador_dados().atualizado_em('receber')
+
+
+# Dimensoes com indice bitmap (filtros da sidebar/navbar)
+_DIMENSOES_FILTRO = ['FILIAL', 'STATUS', 'DESCRICAO', 'TIPO_DOC', 'DESCRICAO_FORMA_PAGAMENTO']
+# Status filtraveis diretamente pela coluna STATUS (o quitado usa SALDO == 0)
+_STATUS_FILTRAVEIS = ['Vencido', 'Vence em 7 dias', 'Vence em 15 dias', 'Vence em 30 dias']
+
+
+def indice_filtros_receber(df_contas, versao=None):
+    """Indice bitmap das dimensoes de filtro de df_contas.
+
+    versao: identificador de df_contas (ex: versao_dados); com ele o indice e montado
+    uma vez por versao e fica no registro compartilhado
     """
-    # Criar máscara base para datas (comparacao vetorizada em C)
-    ts_inicio = pd.Timestamp(data_inicio)
-    ts_fim = pd.Timestamp(data_fim) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    mask = (df_contas['EMISSAO'] >= ts_inicio) & (df_contas['EMISSAO'] <= ts_fim)
+    def construir():
+        return IndiceBitmap(df_contas, _DIMENSOES_FILTRO, mascaras={'QUITADO': df_contas['SALDO'] == 0})
+
+    if versao is None:
+        return construir()
+    return registro_datasets().obter('indice_receber', versao, construir)
+
 
-    # Aplicar filtro de filiais (lista de codigos ou None)
+def indice_busca_receber(df_contas, versao=None):
+    """Indice de trigramas de NOME_CLIENTE (busca da sidebar), por versao como indice_filtros_receber"""
+    if versao is None:
+        return BuscaColuna(df_contas['NOME_CLIENTE'])
+    return registro_datasets().obter('busca_receber', versao, lambda: BuscaColuna(df_contas['NOME_CLIENTE']))
+
+
+def filtrar_posicoes_receber(df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+                             busca_cliente, filtro_tipo_doc='Todos', filtro_forma_pagto='Todas', versao=None):
+    """Posicoes das linhas de df_contas que passam nos filtros (ver aplicar_filtros_receber)"""
+    # Mesma forma da consulta usada em chave_filtros_receber
+    busca_cliente = normalizar_consulta(busca_cliente)
+    indice = indice_filtros_receber(df_contas, versao)
+
+    # Intervalo de datas: df_contas vem ordenado por EMISSAO, o periodo e uma faixa de posicoes
+    inicio, fim = intervalo_datas(df_contas['EMISSAO'], data_inicio, data_fim)
+    bits = indice.todos()
+
+    # Filiais (lista de codigos ou None)
     if filtro_filiais is not None:
-        mask &= df_contas['FILIAL'].isin(filtro_filiais)
+        bits &= indice.qualquer('FILIAL', filtro_filiais)
 
     if filtro_status != 'Todos os Status':
         if filtro_status == 'Recebido':
-            mask &= (df_contas['SALDO'] == 0)
-        elif filtro_status == 'Vencido':
-            mask &= (df_contas['STATUS'] == 'Vencido')
-        elif filtro_status == 'Vence em 7 dias':
-            mask &= (df_contas['STATUS'] == 'Vence em 7 dias')
-        elif filtro_status == 'Vence em 15 dias':
-            mask &= (df_contas['STATUS'] == 'Vence em 15 dias')
-        elif filtro_status == 'Vence em 30 dias':
-            mask &= (df_contas['STATUS'] == 'Vence em 30 dias')
+            bits &= indice.mascara('QUITADO')
+        elif filtro_status in _STATUS_FILTRAVEIS:
+            bits &= indice.valor('STATUS', filtro_status)
 
     if filtro_categoria != 'Todas as Categorias':
-        mask &= (df_contas['DESCRICAO'] == filtro_categoria)
+        bits &= indice.valor('DESCRICAO', filtro_categoria)
+
+    # Filtro por tipo de documento (Com NF / Sem NF)
+    if filtro_tipo_doc != 'Todos' and 'TIPO_DOC' in indice:
+        bits &= indice.valor('TIPO_DOC', filtro_tipo_doc)
 
+    # Busca por nome: linhas do indice de trigramas, conferidas contra o bitset
     if busca_cliente:
-        mask &= df_contas['NOME_CLIENTE'].str.contains(busca_cliente, case=False, na=False)
+        linhas = indice_busca_receber(df_contas, versao).linhas(busca_cliente)
+        linhas = linhas[(linhas >= inicio) & (linhas < fim)]
+        return linhas[indice.marcadas(bits, linhas)]
 
-    # Filtro por tipo de documento (Com NF / Sem NF)
-    if filtro_tipo_doc != 'Todos' and 'TIPO_DOC' in df_contas.columns:
-        mask &= (df_contas['TIPO_DOC'] == filtro_tipo_doc)
+    return indice.posicoes(bits, inicio, fim)
+
+
+def chave_filtros_receber(versao, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+                        busca_cliente, filtro_tipo_doc='Todos', filtro_forma_pagto='Todas'):
+    """Chave normalizada de um estado de filtros (cache de resultados entre sessoes)"""
+    filiais = None if filtro_filiais is None else tuple(sorted(set(filtro_filiais)))
+    return ('receber', versao, str(data_inicio), str(data_fim), filiais, filtro_status, filtro_categoria,
+            normalizar_consulta(busca_cliente), filtro_tipo_doc, filtro_forma_pagto)
+
+
+def ledger_filtrado_receber(df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+                        busca_cliente, filtro_tipo_doc='Todos', filtro_forma_pagto='Todas', versao=None):
+    """Recorte preguicoso (data/ledger.py) de df_contas nos filtros da sidebar/navbar
 
-    return df_contas[mask]
+    df_contas deve estar na ordem da base (EMISSAO crescente; recortes booleanos preservam).
+
+    filtro_filiais: None (todas) ou lista de codigos int de filiais selecionadas
+    versao: identificador de df_contas para reaproveitar o indice e o resultado entre reruns
+    """
+    # Mesma consulta na chave do cache e na busca
+    busca_cliente = normalizar_consulta(busca_cliente)
+
+    def calcular():
+        return filtrar_posicoes_receber(
+            df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+            busca_cliente, filtro_tipo_doc, filtro_forma_pagto, versao
+        )
+
+    if versao is None:
+        return LedgerFiltrado(df_contas, calcular())
+    # Mesmos filtros na mesma versao (qualquer sessao): posicoes do cache compartilhado
+    chave = chave_filtros_receber(versao, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+                          busca_cliente, filtro_tipo_doc, filtro_forma_pagto)
+    return LedgerFiltrado(df_contas, cache_resultados().obter(('posicoes',) + chave, calcular), chave)
+
+
+def aplicar_filtros_receber(df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+                        busca_cliente, filtro_tipo_doc='Todos', filtro_forma_pagto='Todas', versao=None):
+    """Aplica os filtros da sidebar/navbar (ver ledger_filtrado_receber) e materializa o recorte"""
+    return ledger_filtrado_receber(
+        df_contas, data_inicio, data_fim, filtro_filiais, filtro_status, filtro_categoria,
+        busca_cliente, filtro_tipo_doc, filtro_forma_pagto, versao
+    ).df
 
 
 @st.cache_data
@@ -230,15 +209,26 @@ def get_opcoes_filtros_receber(_df_contas):
     return filiais_por_grupo, categorias
 
 
-def get_dados_filtrados_receber(df, df_contas):
-    """Retorna dataframes filtrados comuns"""
-    df_pendentes = df[df['SALDO'] > 0]
-    df_vencidos = df[df['STATUS'] == 'Vencido']
-    return df_pendentes, df_vencidos
+def get_dados_filtrados_receber(df, df_contas, chave=None):
+    """Retorna dataframes filtrados comuns
+
+    chave: chave_filtros_receber de df; com ela as posicoes vem do cache compartilhado
+    """
+    ledger = LedgerFiltrado(df, np.arange(len(df)), chave)
+    return ledger.pendentes.df, ledger.vencidos.df
+
+
+def calcular_metricas_receber(df, df_vencidos, chave=None):
+    """Calcula métricas principais do dashboard
+
+    chave: chave_filtros_receber de df; com ela as metricas vem do cache compartilhado
+    """
+    if chave is None:
+        return _calcular_metricas_receber(df, df_vencidos)
+    return dict(cache_resultados().obter(('metricas',) + chave, lambda: _calcular_metricas_receber(df, df_vencidos)))
 
 
-def calcular_metricas_receber(df, df_vencidos):
-    """Calcula métricas principais do dashboard"""
+def _calcular_metricas_receber(df, df_vencidos):
     total = df['VALOR_ORIGINAL'].sum()
     recebido = total - df['SALDO'].sum()
     pendente = df['SALDO'].sum()
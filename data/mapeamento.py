@@ -0,0 +1,91 @@
+"""
+Tabelas de mapeamento valor bruto -> valor canonico, persistidas em disco
+
+Usadas na ingestao para resolver cada valor distinto uma unica vez: a coluna e
+fatorada, so os valores ainda nao vistos passam pela regra, e o resultado volta
+para as linhas pelos codigos. A tabela sobrevive entre atualizacoes dos dados.
+
+Varios processos de leitura (data/ingestao.py) podem gravar a mesma tabela: antes
+de salvar, o arquivo e relido e as entradas dos outros processos sao mantidas.
+Uma entrada perdida numa gravacao simultanea so e resolvida de novo depois.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config.settings import SNAPSHOT_DIR
+
+
+class MapeamentoPersistente:
+    """Dicionario persistente {valor bruto: valor canonico} para uma regra de ingestao.
+
+    nome: nome do arquivo JSON em SNAPSHOT_DIR
+    versao: versao da regra; se mudar, a tabela salva e descartada
+    resolver: funcao que recebe uma Series de valores brutos distintos (str)
+              e retorna uma sequencia de mesmo tamanho com os valores canonicos
+    """
+
+    def __init__(self, nome, versao, resolver):
+        self.nome = nome
+        self.versao = versao
+        self.resolver = resolver
+        self._mapa = None
+        self._lock = threading.Lock()
+
+    @property
+    def caminho(self):
+        return os.path.join(SNAPSHOT_DIR, f'{self.nome}.json')
+
+    def _ler_arquivo(self):
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                conteudo = json.load(f)
+        except (OSError, ValueError):
+            conteudo = {}
+        return conteudo.get('mapa', {}) if conteudo.get('versao') == self.versao else {}
+
+    def _carregar(self):
+        if self._mapa is None:
+            self._mapa = self._ler_arquivo()
+
+    def _salvar(self):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = f'{self.caminho}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'versao': self.versao, 'mapa': self._mapa}, f, ensure_ascii=False)
+        os.replace(tmp, self.caminho)
+
+    def resolver_unicos(self, valores):
+        """Retorna os valores canonicos para uma lista de valores brutos distintos"""
+        with self._lock:
+            self._carregar()
+            novos = [v for v in valores if v not in self._mapa]
+            if novos:
+                canonicos = self.resolver(pd.Series(novos, dtype=object))
+                # Entradas gravadas por outros processos desde a ultima leitura
+                self._mapa = {**self._ler_arquivo(), **self._mapa}
+                self._mapa.update(zip(novos, canonicos))
+                self._salvar()
+            return [self._mapa[v] for v in valores]
+
+    def aplicar(self, serie):
+        """Mapeia a Series inteira resolvendo apenas os valores distintos.
+
+        Nulos sao preservados. Valores nao-string sao comparados pela forma str().
+        """
+        codigos, unicos = pd.factorize(serie)
+        chaves = [str(v) for v in unicos]
+        canonicos = np.empty(len(chaves) + 1, dtype=object)
+        canonicos[:-1] = self.resolver_unicos(chaves)
+        canonicos[-1] = np.nan  # codigo -1 (nulo) aponta para a ultima posicao
+        return pd.Series(canonicos.take(codigos), index=serie.index, name=serie.name)
+
+    def valores(self):
+        """Copia da tabela atual {valor bruto: valor canonico}, relida do disco
+        (as gravacoes vem dos processos de leitura)"""
+        with self._lock:
+            self._mapa = {**(self._mapa or {}), **self._ler_arquivo()}
+            return dict(self._mapa)
@@ -0,0 +1,45 @@
+"""
+Normalizacao de nomes de empresas (fornecedores e clientes)
+
+Os nomes se repetem milhares de vezes no ledger: a regra roda so sobre os valores
+distintos (operacoes .str vetorizadas com padroes pre-compilados) e o resultado
+fica em uma tabela persistente entre atualizacoes.
+"""
+import re
+
+from data.mapeamento import MapeamentoPersistente
+
+# Sufixos juridicos: S/A, S.A., S.A -> S A
+_RE_SA_BARRA = re.compile(r'\bS\s*/\s*A\b')
+_RE_SA_PONTO = re.compile(r'\bS\.A\.?')
+# LTDA. -> LTDA
+_RE_LTDA = re.compile(r'\bLTDA\.')
+# Hifen e ponto no final do nome
+_RE_PONTUACAO_FINAL = re.compile(r'[\-\.]+\s*$')
+# Espacos multiplos
+_RE_ESPACOS = re.compile(r'\s+')
+
+# Incrementar ao mudar as regras acima (invalida a tabela persistida)
+_VERSAO_REGRAS = 1
+
+
+def _normalizar_unicos(valores):
+    """Aplica as regras de normalizacao a uma Series de nomes distintos"""
+    limpos = valores.str.strip()
+    n = limpos.str.upper()
+    n = n.str.replace(_RE_SA_BARRA, 'S A', regex=True)
+    n = n.str.replace(_RE_SA_PONTO, 'S A', regex=True)
+    n = n.str.replace(_RE_LTDA, 'LTDA', regex=True)
+    n = n.str.replace(_RE_PONTUACAO_FINAL, '', regex=True)
+    n = n.str.replace(_RE_ESPACOS, ' ', regex=True).str.strip()
+    # Nomes vazios ficam como vieram
+    return n.where(limpos != '', valores).tolist()
+
+
+_NOMES_EMPRESAS = MapeamentoPersistente('nomes_empresas', _VERSAO_REGRAS, _normalizar_unicos)
+
+
+def normalizar_nome_empresa(serie):
+    """Normaliza nomes de empresas para evitar duplicatas por variacao de grafia.
+    Trata: case, sufixos juridicos (S/A, S.A., LTDA.), pontuacao e espacos."""
+    return _NOMES_EMPRESAS.aplicar(serie)
@@ -0,0 +1,153 @@
+"""
+Recorte por periodo sobre frames ordenados por data
+
+As bases saem da ingestao ordenadas por EMISSAO (contas) e DT_BAIXA (baixas), com
+NaT no fim. Um intervalo [data_inicio, data_fim] vira duas buscas binarias
+(np.searchsorted) e o resultado e uma fatia contigua (iloc): com o Copy-on-Write,
+uma visao sem copia. Filtros booleanos e take com posicoes crescentes preservam a
+ordem, entao os recortes derivados (sem IC, adiantamentos, provisoes, intercompany)
+tambem podem ser fatiados assim.
+
+Chaves de periodo: a ingestao grava, para cada coluna de COLUNAS_PERIODO, inteiros
+compactos (<coluna>_DIA, _AAAAMM, _SEMANA, _MES). Agrupar por mes, semana ou dia e
+medir prazos vira aritmetica de inteiros, sem acessores .dt nem lambdas nas abas.
+Data vazia (NaT) vira SEM_DATA em todas as chaves, um valor fora da faixa de todas
+(DIA 0 e 1970-01-01, uma data valida). Somas por faixa de chaves (ex: vencimentos
+de hoje ate +7 dias) usam somas_acumuladas + soma_faixa: duas buscas binarias.
+"""
+import numpy as np
+import pandas as pd
+
+# Colunas de data com chaves inteiras gravadas na ingestao
+COLUNAS_PERIODO = ['EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DATA_VENC']
+
+# Valor das chaves quando a data e NaT (nenhuma chave valida e negativa ate esse ponto)
+SEM_DATA = int(np.iinfo('int32').min)
+
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def ordenar_por_data(df, coluna):
+    """Ordena df por `coluna` (estavel, NaT no fim) com indice 0..n-1"""
+    if coluna not in df.columns:
+        return df
+    return df.sort_values(coluna, kind='stable', na_position='last', ignore_index=True)
+
+
+def _valores_data(serie):
+    """Valores datetime64 da coluna (sem copia quando ja e datetime)"""
+    if not pd.api.types.is_datetime64_dtype(serie):
+        serie = pd.to_datetime(serie, errors='coerce')
+    return serie.to_numpy()
+
+
+def intervalo_datas(serie, data_inicio=None, data_fim=None):
+    """Posicoes (inicio, fim) das linhas de `serie` (ordenada) no periodo.
+
+    data_inicio/data_fim: date/Timestamp, inclusivos (data_fim vale o dia inteiro);
+    None = sem limite naquele lado. Linhas sem data (NaT, no fim) ficam de fora.
+    """
+    valores = _valores_data(serie)
+    inicio = 0
+    if data_inicio is not None:
+        limite = np.datetime64(pd.Timestamp(data_inicio).normalize()).astype(valores.dtype)
+        inicio = int(np.searchsorted(valores, limite, side='left'))
+    if data_fim is not None:
+        limite = pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)
+        fim = int(np.searchsorted(valores, np.datetime64(limite).astype(valores.dtype), side='left'))
+    else:
+        fim = int(np.searchsorted(valores, np.datetime64('NaT').astype(valores.dtype), side='left'))
+    return inicio, max(inicio, fim)
+
+
+def fatiar_periodo(df, data_inicio=None, data_fim=None, coluna='EMISSAO'):
+    """Linhas de df (ordenado por `coluna`) no periodo, como fatia contigua"""
+    if coluna not in df.columns:
+        return df
+    inicio, fim = intervalo_datas(df[coluna], data_inicio, data_fim)
+    return df.iloc[inicio:fim]
+
+
+def _dias(serie):
+    """Dias desde 1970-01-01 (int64) e mascara de datas validas"""
+    dias = _valores_data(serie).astype('datetime64[D]')
+    validas = ~np.isnat(dias)
+    return np.where(validas, (dias - _EPOCA).astype('int64'), 0), validas
+
+
+def chaves_periodo(serie):
+    """Chaves inteiras de uma coluna de datas: {'DIA', 'AAAAMM', 'SEMANA', 'MES'}.
+
+    DIA: dias desde 1970-01-01 | AAAAMM: ano*100 + mes | SEMANA: ano ISO*100 + semana ISO
+    MES: mes do ano (1-12). NaT vira SEM_DATA. Todas int32 (SEM_DATA nao cabe em int8).
+    """
+    dias, validas = _dias(serie)
+    meses = dias.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    ano, mes = meses // 12 + 1970, meses % 12 + 1
+
+    # Semana ISO: a semana (seg-dom) pertence ao ano da sua quinta-feira (1970-01-01 foi quinta)
+    quinta = dias - (dias + 3) % 7 + 3
+    ano_iso = quinta.astype('datetime64[D]').astype('datetime64[Y]').astype('int64') + 1970
+    inicio_ano = (ano_iso - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype('int64')
+    semana = (quinta - inicio_ano) // 7 + 1
+
+    return {
+        'DIA': np.where(validas, dias, SEM_DATA).astype('int32'),
+        'AAAAMM': np.where(validas, ano * 100 + mes, SEM_DATA).astype('int32'),
+        'SEMANA': np.where(validas, ano_iso * 100 + semana, SEM_DATA).astype('int32'),
+        'MES': np.where(validas, mes, SEM_DATA).astype('int32'),
+    }
+
+
+def adicionar_chaves_periodo(df, colunas=COLUNAS_PERIODO):
+    """Grava as chaves de periodo das colunas de data de df (in place; usado na ingestao)"""
+    for coluna in colunas:
+        if coluna in df.columns:
+            for tipo, valores in chaves_periodo(df[coluna]).items():
+                df[f'{coluna}_{tipo}'] = valores
+    return df
+
+
+def chave_periodo(df, coluna, tipo='DIA'):
+    """Series com a chave `tipo` da coluna de datas (calculada na hora se o frame nao a tem)"""
+    nome = f'{coluna}_{tipo}'
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(chaves_periodo(df[coluna])[tipo], index=df.index, name=nome)
+
+
+def dia_ref(data):
+    """Chave DIA de uma data (date/Timestamp/str)"""
+    return int((np.datetime64(pd.Timestamp(data).date(), 'D') - _EPOCA).astype('int64'))
+
+
+def dias_entre(df, fim, inicio):
+    """Dias de `inicio` ate `fim` (colunas de data) por linha; NaN quando falta uma das datas"""
+    d_fim = chave_periodo(df, fim).to_numpy().astype('int64')
+    d_inicio = chave_periodo(df, inicio).to_numpy().astype('int64')
+    dias = (d_fim - d_inicio).astype('float64')
+    dias[(d_fim == SEM_DATA) | (d_inicio == SEM_DATA)] = np.nan
+    return pd.Series(dias, index=df.index)
+
+
+def rotulo_mes(aaaamm):
+    """Rotulos 'AAAA-MM' de chaves AAAAMM (Series ou array)"""
+    aaaamm = pd.Series(aaaamm).astype('int64')
+    return (aaaamm // 100).astype(str) + '-' + (aaaamm % 100).astype(str).str.zfill(2)
+
+
+def somas_acumuladas(chaves, valores):
+    """(chaves ordenadas, somas acumuladas de `valores`) das linhas com data, para soma_faixa"""
+    chaves = np.asarray(chaves).astype('int64')
+    validas = chaves != SEM_DATA
+    ordem = np.argsort(chaves[validas], kind='stable')
+    valores = np.nan_to_num(np.asarray(valores, dtype='float64')[validas][ordem])
+    return chaves[validas][ordem], np.concatenate([[0.0], np.cumsum(valores)])
+
+
+def soma_faixa(chaves, acumulado, inicio, fim):
+    """(soma, quantidade) das linhas com chave em [inicio, fim] (saida de somas_acumuladas)"""
+    i = int(np.searchsorted(chaves, inicio, side='left'))
+    j = int(np.searchsorted(chaves, fim, side='right'))
+    j = max(i, j)
+    return float(acumulado[j] - acumulado[i]), j - i
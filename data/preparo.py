@@ -0,0 +1,193 @@
+"""
+Processamento por arquivo dos relatorios de pagar/receber
+
+Cada funcao recebe o DataFrame recem-lido de um unico arquivo e aplica tudo o que
+so depende dele: colunas padronizadas, nomes normalizados, formas de pagamento,
+classificacao intercompany, colunas derivadas, chaves de periodo, schema compacto
+e ordenacao por data. Rodam dentro dos processos de leitura (data/ingestao.py),
+um arquivo por processo; o que cruza arquivos (vinculo adiantamento <-> baixas)
+fica no loader. Sem dependencia do Streamlit.
+"""
+import pandas as pd
+
+from data.formas_pagamento import padronizar_forma_pagamento
+from data.ingestao import padronizar_colunas
+from data.intercompany import classificar_intercompany
+from data.normalizacao import normalizar_nome_empresa
+from data.periodo import adicionar_chaves_periodo, ordenar_por_data
+from data.schema import aplicar_schema
+
+# Tipos de documento com nota fiscal
+_TIPOS_COM_NF = ['NF', 'NFE', 'NFSE', 'NDF', 'FT']
+
+_COLUNAS_FINANCEIRAS = ['VALOR_JUROS', 'VALOR_MULTA', 'VLR_DESCONTO', 'VALOR_CORRECAO',
+                        'VALOR_ACRESCIMO', 'VALOR_DECRESCIMO', 'TX_MOEDA', 'VALOR_REAL']
+
+
+def _normalizar_nomes(df, colunas):
+    """Normaliza nomes de empresas (case, sufixos juridicos, espacos, pontuacao)"""
+    for col in colunas:
+        if col in df.columns:
+            df[col] = normalizar_nome_empresa(df[col].astype(str))
+
+
+def _classificar_nf(df):
+    """Classificar COM NF / SEM NF"""
+    df['COM_NF'] = df['TIPO'].isin(_TIPOS_COM_NF)
+    df['TIPO_DOC'] = df['COM_NF'].map({True: 'Com NF', False: 'Sem NF'})
+
+
+def _alerta_48h(df):
+    """Alerta NF entrada < 48h do vencimento"""
+    if 'DIF_HORAS_DATAS' in df.columns:
+        df['ALERTA_48H'] = (df['DIF_HORAS_DATAS'].abs() <= 48) & (df['SALDO'] > 0)
+    elif 'DIF_DIAS_DATAS' in df.columns:
+        df['ALERTA_48H'] = (df['DIF_DIAS_DATAS'].abs() <= 2) & (df['SALDO'] > 0)
+    else:
+        df['ALERTA_48H'] = False
+
+
+def _numericos_financeiros(df):
+    """Garantir valores numericos para colunas financeiras"""
+    for col in _COLUNAS_FINANCEIRAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+
+def _dias_ate_baixa(df):
+    """Calcular intervalo entre adiantamento e baixa"""
+    if 'DIF_DIAS_EMIS_BAIXA' in df.columns:
+        df['DIAS_ATE_BAIXA'] = pd.to_numeric(df['DIF_DIAS_EMIS_BAIXA'], errors='coerce').fillna(0)
+
+
+def _finalizar(df, tabela, coluna_data):
+    """Chaves de periodo, schema compacto e ordenacao por data"""
+    # Chaves inteiras de periodo (dia, AAAAMM, semana ISO, mes) das colunas de data (data/periodo.py)
+    adicionar_chaves_periodo(df)
+    # Tipos compactos (categoricos e inteiros pequenos)
+    aplicar_schema(df, tabela)
+    # Ordenados por data: recortes de periodo viram busca binaria (data/periodo.py)
+    return ordenar_por_data(df, coluna_data)
+
+
+def preparar_contas_pagar(df):
+    """Contas a Pagar (inclui os adiantamentos, marcados em IS_ADIANTAMENTO)"""
+    df = padronizar_colunas(df)
+    _normalizar_nomes(df, ['NOME_FORNECEDOR'])
+
+    # Adicionar colunas temporais
+    df['ANO'] = df['EMISSAO'].dt.year
+    df['MES'] = df['EMISSAO'].dt.month
+    df['TRIMESTRE'] = df['EMISSAO'].dt.quarter
+
+    # Usar VENCTO_REAL como data de vencimento (fallback para VENCIMENTO se não existir)
+    df['DATA_VENC'] = df['VENCTO_REAL'].fillna(df['VENCIMENTO'])
+
+    # Calcular dias para pagar (da emissao ate o pagamento)
+    if 'DT_BAIXA' in df.columns:
+        df['DIAS_PARA_PAGAR'] = (df['DT_BAIXA'] - df['EMISSAO']).dt.days
+        # Se pagou antes do vencimento = negativo (antecipado), se pagou depois = positivo (atrasado)
+        df['DIAS_ATRASO_PGTO'] = (df['DT_BAIXA'] - df['DATA_VENC']).dt.days
+    else:
+        df['DIAS_PARA_PAGAR'] = None
+        df['DIAS_ATRASO_PGTO'] = None
+
+    _classificar_nf(df)
+
+    # Padronizar formas de pagamento
+    if 'DESCRICAO_FORMA_PAGAMENTO' in df.columns:
+        df['DESCRICAO_FORMA_PAGAMENTO'] = padronizar_forma_pagamento(df['DESCRICAO_FORMA_PAGAMENTO'])
+
+    # Classificar fornecedores intercompany (uma vez por nome distinto):
+    # IS_INTERCOMPANY, IC_PADRAO (filial padronizada) e GRUPO_DESTINO (grupo na visao IC)
+    if 'NOME_FORNECEDOR' in df.columns:
+        df = df.join(classificar_intercompany(df['NOME_FORNECEDOR']))
+
+    # Identificar adiantamentos (TIPO=PA/ADI ou ADTO FORNECEDOR, ADTO SALARIOS, etc.)
+    df['IS_ADIANTAMENTO'] = df['TIPO'].isin(['PA', 'ADI']) if 'TIPO' in df.columns else False
+    if 'DESCRICAO' in df.columns:
+        df['IS_ADIANTAMENTO'] |= df['DESCRICAO'].str.upper().str.contains(
+            'ADTO|ADIANT', na=False, regex=True
+        )
+
+    _alerta_48h(df)
+    _numericos_financeiros(df)
+    return _finalizar(df, 'pagar_contas', 'EMISSAO')
+
+
+def preparar_baixas_pagar(df):
+    """Baixas de adiantamentos a pagar"""
+    df = padronizar_colunas(df)
+    _normalizar_nomes(df, ['NOME_FORNECEDOR'])
+    _dias_ate_baixa(df)
+    return _finalizar(df, 'pagar_baixas', 'DT_BAIXA')
+
+
+def preparar_contas_receber(df):
+    """Contas a Receber (inclui os adiantamentos, marcados em IS_ADIANTAMENTO)"""
+    df = padronizar_colunas(df)
+    _normalizar_nomes(df, ['NOME_CLIENTE', 'NOME_FORNECEDOR'])
+
+    # Limpar espaços da coluna TIPO (vem com espaços do Excel)
+    if 'TIPO' in df.columns:
+        df['TIPO'] = df['TIPO'].str.strip()
+
+    # Adicionar colunas temporais
+    df['ANO'] = df['EMISSAO'].dt.year
+    df['MES'] = df['EMISSAO'].dt.month
+    df['TRIMESTRE'] = df['EMISSAO'].dt.quarter
+
+    # DSO - Dias para receber (para títulos baixados)
+    if 'DT_BAIXA' in df.columns:
+        df['DSO'] = (df['DT_BAIXA'] - df['EMISSAO']).dt.days
+        df.loc[df['DSO'] < 0, 'DSO'] = None  # Limpar valores inválidos
+
+        # Flag de pontualidade (recebeu antes ou no vencimento)
+        df['PONTUAL'] = df['DT_BAIXA'] <= df['VENCIMENTO']
+        df.loc[df['DT_BAIXA'].isna(), 'PONTUAL'] = None
+
+        # Dias de atraso no recebimento (DT_BAIXA - VENCIMENTO)
+        df['DIAS_ATRASO_RECEB'] = (df['DT_BAIXA'] - df['VENCIMENTO']).dt.days
+        df.loc[df['DIAS_ATRASO_RECEB'] < 0, 'DIAS_ATRASO_RECEB'] = 0  # Não atrasou
+
+    # Renegociação (VENCTO_REAL diferente de VENCIMENTO)
+    if 'VENCTO_REAL' in df.columns:
+        df['RENEGOCIADO'] = (
+            df['VENCTO_REAL'].notna() &
+            df['VENCIMENTO'].notna() &
+            (df['VENCTO_REAL'] != df['VENCIMENTO'])
+        )
+        # Dias de prorrogação
+        df['DIAS_PRORROGACAO'] = (df['VENCTO_REAL'] - df['VENCIMENTO']).dt.days
+        df.loc[~df['RENEGOCIADO'], 'DIAS_PRORROGACAO'] = 0
+
+    _classificar_nf(df)
+
+    # Identificar adiantamentos (TIPO=RA/PA/AD/ADTO ou descricao de adiantamento)
+    df['IS_ADIANTAMENTO'] = df['TIPO'].isin(['RA', 'PA', 'AD', 'ADTO']) if 'TIPO' in df.columns else False
+    if 'DESCRICAO' in df.columns:
+        df['IS_ADIANTAMENTO'] |= df['DESCRICAO'].str.upper().str.contains(
+            'ADIANTAMENTO|ADT |ADTO', na=False, regex=True
+        )
+
+    _alerta_48h(df)
+
+    # Classificar clientes intercompany (uma vez por nome distinto):
+    # IS_INTERCOMPANY, IC_PADRAO (filial padronizada) e GRUPO_DESTINO (grupo na visao IC)
+    if 'NOME_CLIENTE' in df.columns:
+        df = df.join(classificar_intercompany(df['NOME_CLIENTE']))
+
+    _numericos_financeiros(df)
+    return _finalizar(df, 'receber_contas', 'EMISSAO')
+
+
+def preparar_baixas_receber(df):
+    """Baixas de adiantamentos a receber"""
+    df = padronizar_colunas(df)
+    _normalizar_nomes(df, ['NOME_CLIENTE', 'NOME_FORNECEDOR'])
+    if 'TIPO' in df.columns:
+        df['TIPO'] = df['TIPO'].str.strip()
+    if 'NOME_CLIENTE' in df.columns:
+        df = df.join(classificar_intercompany(df['NOME_CLIENTE']))
+    _dias_ate_baixa(df)
+    return _finalizar(df, 'receber_baixas', 'DT_BAIXA')
@@ -0,0 +1,87 @@
+"""
+Registro de datasets compartilhado por todas as sessoes do processo
+
+O st.cache_data serializa o DataFrame a cada chamada (pickle na gravacao e uma
+copia completa por leitor). Aqui os frames ficam uma unica vez em memoria, dentro
+de um objeto guardado com st.cache_resource, e cada leitor recebe uma visao rasa.
+
+Os frames do registro sao somente leitura. Com o Copy-on-Write do pandas ligado,
+visoes e fatias compartilham os arrays e qualquer escrita copia so a coluna
+alterada, sem tocar no dado compartilhado. O modo e global ao processo: cada
+pagina o liga no inicio com ativar_copy_on_write(), e nao como efeito do import
+(scripts e processos de leitura seguem com o padrao do pandas).
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+
+def ativar_copy_on_write():
+    """Liga o Copy-on-Write do pandas no processo (chamar no inicio de cada pagina)"""
+    pd.set_option('mode.copy_on_write', True)
+
+
+def _visao(tabela):
+    """Visao rasa: colunas adicionadas/substituidas pelo leitor ficam so na visao"""
+    if isinstance(tabela, pd.DataFrame):
+        return tabela.copy(deep=False)
+    return tabela
+
+
+class RegistroDatasets:
+    """Datasets imutaveis por nome e versao.
+
+    Cada nome guarda no maximo `max_versoes` versoes (as mais recentes). A versao
+    e qualquer valor hashable que identifique o conteudo (ex: versao_dados()).
+    """
+
+    def __init__(self, max_versoes=4):
+        self.max_versoes = max_versoes
+        self._datasets = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_nome(self, nome):
+        with self._lock:
+            return self._locks.setdefault(nome, threading.Lock())
+
+    def obter(self, nome, versao, construir, max_versoes=None):
+        """Tabelas do dataset `nome` na `versao`; `construir()` roda so na primeira vez.
+
+        construir: funcao sem argumentos que retorna um DataFrame ou uma tupla deles
+        max_versoes: limite de versoes deste nome (padrao: o do registro)
+        """
+        # Lock por nome: sessoes concorrentes esperam a mesma construcao em vez de repeti-la
+        with self._lock_nome(nome):
+            versoes = self._datasets.setdefault(nome, OrderedDict())
+            if versao not in versoes:
+                versoes[versao] = construir()
+                while len(versoes) > (max_versoes or self.max_versoes):
+                    versoes.popitem(last=False)
+            versoes.move_to_end(versao)
+            tabelas = versoes[versao]
+
+        if isinstance(tabelas, tuple):
+            return tuple(_visao(t) for t in tabelas)
+        return _visao(tabelas)
+
+    def versoes(self, nome):
+        """Versoes em memoria de um dataset (da menos para a mais recente)"""
+        with self._lock_nome(nome):
+            return list(self._datasets.get(nome, {}))
+
+    def limpar(self, nome=None):
+        """Descarta um dataset (ou todos)"""
+        with self._lock:
+            if nome is None:
+                self._datasets.clear()
+            else:
+                self._datasets.pop(nome, None)
+
+
+@st.cache_resource(show_spinner=False)
+def registro_datasets():
+    """Instancia unica do registro no processo"""
+    return RegistroDatasets()
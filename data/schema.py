@@ -0,0 +1,126 @@
+"""
+Schema compacto de tipos do ledger em memoria
+
+Aplicado no fim dos loaders (antes do snapshot): textos repetitivos viram
+categoricos (mascaras e groupby comparam codigos inteiros) e contadores pequenos
+viram inteiros de 8/16/32 bits. Inteiros com nulos usam os tipos anulaveis
+(Int8/Int16/Int32), que mantem o pd.NA no lugar do NaN.
+
+Codigos de titulo (NUMERO, PARCELA, DOCUMENTO) e qualquer outra coluna object com
+tipos misturados (ex: 123 e '2025/014 ') viram texto: o Parquet do snapshot exige
+um tipo por coluna.
+"""
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Colunas ausentes em um dos lados (ex: NOME_CLIENTE no pagar) sao ignoradas
+SCHEMA_LEDGER = {
+    # Textos de baixa cardinalidade
+    'NOME_FILIAL': 'category',
+    'NOME_FORNECEDOR': 'category',
+    'NOME_CLIENTE': 'category',
+    'DESCRICAO': 'category',
+    'TIPO': 'category',
+    'TIPO_DOC': 'category',
+    'DESCRICAO_FORMA_PAGAMENTO': 'category',
+    # Codigos do titulo (numeros e textos misturados na origem)
+    'NUMERO': 'str',
+    'PARCELA': 'str',
+    'DOCUMENTO': 'str',
+    # Codigos e periodos
+    'FILIAL': 'int16',
+    'ANO': 'int16',
+    'MES': 'int8',
+    'TRIMESTRE': 'int8',
+    # Contadores de dias
+    'DIAS_PARA_PAGAR': 'int32',
+    'DIAS_ATRASO_PGTO': 'int32',
+    'DSO': 'int32',
+    'DIAS_ATRASO_RECEB': 'int32',
+    'DIAS_PRORROGACAO': 'int32',
+    'DIAS_ATE_BAIXA': 'int32',
+}
+
+# Relatorio da ultima conversao de cada tabela: {nome: (bytes antes, bytes depois)}
+_RELATORIOS = {}
+
+
+def _converter_inteiro(serie, tipo):
+    """Converte para int de largura fixa; com nulos usa o tipo anulavel equivalente.
+    Colunas com texto ou fracoes ficam como estao (a conversao perderia dados)."""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    nulos = numeros.isna()
+    if nulos.sum() > serie.isna().sum() or (numeros[~nulos] % 1 != 0).any():
+        return serie
+    if nulos.any():
+        return numeros.astype(tipo.capitalize())
+    return numeros.astype(tipo)
+
+
+def _converter_texto(serie):
+    """Converte para texto (str; nulos como None, igual ao Parquet relido).
+    Inteiros guardados como float (coluna com vazios) nao ganham o sufixo '.0'."""
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype('Int64')
+    return serie.astype(str).where(serie.notna(), None)
+
+
+def _tipos_misturados(serie):
+    """Coluna object com valores de tipos diferentes (ex: int e str)"""
+    return serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True).startswith('mixed')
+
+
+def memoria_bytes(df):
+    """Memoria ocupada pelo DataFrame, contando o conteudo das strings"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def aplicar_schema(df, nome, schema=SCHEMA_LEDGER):
+    """Converte as colunas de `df` para os tipos de `schema` (in place) e registra a memoria.
+
+    nome: identificador da tabela no relatorio (ex: 'pagar_contas')
+    """
+    antes = memoria_bytes(df)
+    for coluna, tipo in schema.items():
+        if coluna not in df.columns:
+            continue
+        if tipo == 'category':
+            df[coluna] = df[coluna].astype('category')
+        elif tipo == 'str':
+            df[coluna] = _converter_texto(df[coluna])
+        else:
+            df[coluna] = _converter_inteiro(df[coluna], tipo)
+    for coluna in df.columns:
+        if coluna not in schema and _tipos_misturados(df[coluna]):
+            df[coluna] = _converter_texto(df[coluna])
+    depois = memoria_bytes(df)
+    _RELATORIOS[nome] = (antes, depois)
+    logger.info('%s: %.1f MB -> %.1f MB com o schema compacto', nome, antes / 1024 ** 2, depois / 1024 ** 2)
+    return df
+
+
+def relatorios_schema():
+    """Copia do relatorio bruto {tabela: (bytes antes, bytes depois)} deste processo"""
+    return dict(_RELATORIOS)
+
+
+def registrar_relatorios(relatorios):
+    """Incorpora relatorios gerados em outro processo (ex: processos de leitura)"""
+    _RELATORIOS.update(relatorios)
+
+
+def relatorio_memoria():
+    """DataFrame com a memoria antes e depois do schema (MB) das tabelas processadas neste processo"""
+    linhas = [
+        {
+            'Tabela': nome,
+            'Antes (MB)': antes / 1024 ** 2,
+            'Depois (MB)': depois / 1024 ** 2,
+            'Reducao (%)': (1 - depois / antes) * 100 if antes else 0.0,
+        }
+        for nome, (antes, depois) in _RELATORIOS.items()
+    ]
+    return pd.DataFrame(linhas, columns=['Tabela', 'Antes (MB)', 'Depois (MB)', 'Reducao (%)'])
@@ -0,0 +1,120 @@
+"""
+Calculos das secoes das abas (compute_*) memoizados
+
+Em todas as abas (pagar, receber e intercompany) cada secao e dividida em uma
+funcao pura compute_*(df, parametros) com os groupby/agregacoes e um
+renderizador que so formata e desenha. As compute_* decoradas com @memoizar_secao
+(nas abas e em data/abc.py, data/cubo.py, data/fluxo_caixa.py) guardam o resultado
+no cache de resultados do processo (LRU por bytes, data/cache_resultados.py),
+chaveado por (funcao, chave do frame, parametros): trocar o tema, mexer num widget
+de outra secao ou voltar a uma aba nao refaz nenhum groupby.
+
+A chave do frame identifica o conteudo: LedgerFiltrado.df registra o recorte com
+a chave dos filtros (versao dos dados + filtros normalizados), app.py e a pagina
+de receber registram os recortes de Bancos/Adiantamentos/Provisoes com chave_aba(),
+carregar_periodo_intercompany() os de A Pagar/A Receber intercompany, recorte()
+registra sub-recortes e os DataFrames retornados pelas compute_* ficam
+registrados com a propria chave. Frames sem chave (montados na hora) sao
+calculados sem cache.
+Frames registrados sao tratados como somente leitura.
+"""
+import functools
+import threading
+import weakref
+
+import pandas as pd
+
+from data.cache_resultados import cache_resultados
+
+# id(frame) -> (weakref do frame, chave)
+_CHAVES = {}
+_lock = threading.Lock()
+
+
+def registrar_frame(df, chave):
+    """Associa `chave` ao frame `df` enquanto ele existir"""
+    if chave is None:
+        return df
+    id_frame = id(df)
+
+    def _remover(_, id_frame=id_frame):
+        with _lock:
+            item = _CHAVES.get(id_frame)
+            if item is not None and item[0]() is None:
+                del _CHAVES[id_frame]
+
+    with _lock:
+        _CHAVES[id_frame] = (weakref.ref(df, _remover), chave)
+    return df
+
+
+def chave_frame(df):
+    """Chave registrada para `df` (None se o frame nao tem chave)"""
+    with _lock:
+        item = _CHAVES.get(id(df))
+    if item is None or item[0]() is not df:
+        return None
+    return item[1]
+
+
+def chave_aba(aba, versao, filtro_filiais, data_inicio=None, data_fim=None):
+    """Chave dos recortes montados pelas paginas fora do ledger (Bancos, Adiantamentos, Provisoes)"""
+    filiais = None if filtro_filiais is None else tuple(sorted(set(filtro_filiais)))
+    return (aba, versao, filiais, str(data_inicio), str(data_fim))
+
+
+def recorte(df, nome, mascara):
+    """Sub-recorte de df pelas linhas de mascara(df), registrado como (nome, chave de df).
+
+    As posicoes do recorte ficam no cache de resultados quando df tem chave.
+    """
+    chave = chave_frame(df)
+
+    def calcular():
+        return mascara(df).to_numpy(dtype=bool).nonzero()[0]
+
+    if chave is None:
+        return df[mascara(df)]
+    chave = (nome, chave)
+    return registrar_frame(df.iloc[cache_resultados().obter(('recorte',) + chave, calcular)], chave)
+
+
+def _chave_argumento(valor):
+    """Parte da chave para um argumento (None = argumento sem chave estavel)"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        chave = chave_frame(valor)
+        return None if chave is None else ('frame', chave)
+    try:
+        hash(valor)
+    except TypeError:
+        return None
+    return ('valor', valor)
+
+
+def _visao(valor, chave):
+    """Copia rasa do resultado (o renderizador pode acrescentar colunas sem tocar no cache)"""
+    if isinstance(valor, pd.DataFrame):
+        return registrar_frame(valor.copy(deep=False), chave)
+    if isinstance(valor, pd.Series):
+        return valor.copy(deep=False)
+    if isinstance(valor, tuple):
+        return tuple(_visao(v, chave + (i,)) for i, v in enumerate(valor))
+    if isinstance(valor, dict):
+        return dict(valor)
+    return valor
+
+
+def memoizar_secao(funcao):
+    """Decorador das compute_*: resultado em cache por (funcao, frames, parametros)"""
+    nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        partes = [_chave_argumento(v) for v in args]
+        partes += [_chave_argumento(v) for _, v in sorted(kwargs.items())]
+        if any(p is None for p in partes):
+            return funcao(*args, **kwargs)
+        chave = ('secao', nome) + tuple(partes) + tuple(sorted(kwargs))
+        return _visao(cache_resultados().obter(chave, lambda: funcao(*args, **kwargs)), chave)
+
+    return envolvida
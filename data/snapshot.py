@@ -0,0 +1,121 @@
+"""
+Snapshot colunar (Parquet) dos arquivos Excel de origem
+
+O parse do Excel e a normalizacao rodam uma unica vez por versao dos arquivos.
+A chave do snapshot e tamanho + mtime + hash do conteudo de cada arquivo
+(mais SNAPSHOT_VERSAO); enquanto ela nao mudar, os loaders leem o Parquet.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from config.settings import SNAPSHOT_DIR, SNAPSHOT_VERSAO
+
+
+def _hash_arquivo(caminho, bloco=1 << 20):
+    """SHA-1 do conteudo do arquivo (lido em blocos de 1 MB)"""
+    h = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _ler_manifesto(nome):
+    caminho = os.path.join(SNAPSHOT_DIR, f'{nome}.json')
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_manifesto(nome, manifesto):
+    caminho = os.path.join(SNAPSHOT_DIR, f'{nome}.json')
+    tmp = f'{caminho}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+
+def identificar_fontes(arquivos, manifesto=None):
+    """Retorna {arquivo: {tamanho, mtime, hash}} dos arquivos de origem.
+
+    O hash so e recalculado quando tamanho ou mtime mudam em relacao ao manifesto.
+    """
+    anteriores = (manifesto or {}).get('fontes', {})
+    fontes = {}
+    for arquivo in arquivos:
+        st_arq = os.stat(arquivo)
+        info = {'tamanho': st_arq.st_size, 'mtime': st_arq.st_mtime_ns}
+        anterior = anteriores.get(arquivo)
+        if anterior and anterior['tamanho'] == info['tamanho'] and anterior['mtime'] == info['mtime']:
+            info['hash'] = anterior['hash']
+        else:
+            info['hash'] = _hash_arquivo(arquivo)
+        fontes[arquivo] = info
+    return fontes
+
+
+def calcular_chave(fontes):
+    """Chave unica do snapshot: hashes das fontes + versao do processamento"""
+    h = hashlib.sha1(f'v{SNAPSHOT_VERSAO}'.encode())
+    for arquivo in sorted(fontes):
+        h.update(f"{arquivo}:{fontes[arquivo]['hash']}".encode())
+    return h.hexdigest()
+
+
+def versao_snapshot(nome, arquivos):
+    """Chave atual das fontes de um snapshot (so faz stat, salvo se um arquivo mudou).
+
+    Usada como argumento das funcoes cacheadas: muda apenas quando os Excel mudam.
+    """
+    return calcular_chave(identificar_fontes(arquivos, _ler_manifesto(nome)))
+
+
+def _gravar_tabela(df, caminho):
+    """Grava em Parquet (arquivo temporario + rename).
+
+    Colunas com tipos misturados ja sairam do schema como texto (data/schema.py);
+    se ainda assim o pyarrow recusar uma coluna, o erro sobe: nao ha outro formato.
+    """
+    tmp = f'{caminho}.{os.getpid()}.tmp'
+    try:
+        df.to_parquet(tmp, index=False)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, caminho)
+
+
+def carregar_snapshot(nome, arquivos, construir):
+    """Retorna as tabelas de `construir()` a partir do snapshot em disco.
+
+    nome: identificador do snapshot (ex: 'pagar')
+    arquivos: lista de arquivos de origem que definem a versao
+    construir: funcao sem argumentos que le os Excel e retorna tupla de DataFrames
+
+    Se a chave mudou (ou o snapshot nao existe), reconstroi e grava os Parquet.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    manifesto = _ler_manifesto(nome)
+    fontes = identificar_fontes(arquivos, manifesto)
+    chave = calcular_chave(fontes)
+
+    if manifesto.get('chave') == chave:
+        try:
+            return tuple(
+                pd.read_parquet(os.path.join(SNAPSHOT_DIR, f'{nome}_{i}.parquet'))
+                for i in range(manifesto['tabelas'])
+            )
+        except (OSError, ValueError, KeyError):
+            pass  # Snapshot corrompido ou incompleto: reconstruir
+
+    tabelas = construir()
+    for i, df in enumerate(tabelas):
+        _gravar_tabela(df, os.path.join(SNAPSHOT_DIR, f'{nome}_{i}.parquet'))
+    _gravar_manifesto(nome, {'chave': chave, 'fontes': fontes, 'tabelas': len(tabelas)})
+    return tuple(tabelas)
@@ -0,0 +1,76 @@
+"""
+Motor de status/aging por data de referencia (as_of)
+
+As colunas que dependem de "hoje" (DIAS_VENC, STATUS, DIAS_ATRASO) sao calculadas
+aqui, sobre a base estatica dos loaders. Como a data e explicita, a base pode ficar
+em cache enquanto os arquivos nao mudarem, e da para ver o aging em qualquer data
+(ex: posicao no ultimo fechamento de mes).
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from config.settings import ORDEM_AGING
+from data.periodo import SEM_DATA
+
+# Limites superiores (inclusivos) de cada faixa de ORDEM_AGING, em dias ate o vencimento
+# <0 Vencido | 0-7 | 8-15 | 16-30 | 31-60 | >60
+_LIMITES_FAIXAS = np.array([0, 8, 16, 31, 61])
+_ROTULOS_FAIXAS = np.array(ORDEM_AGING, dtype=object)
+
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def dia_ordinal(serie):
+    """Converte datas em inteiros (dias desde 1970-01-01); NaT vira NaN"""
+    dias = serie.to_numpy(dtype='datetime64[D]')
+    ordinais = (dias - _EPOCA).astype('float64')
+    ordinais[np.isnat(dias)] = np.nan
+    return ordinais
+
+
+def normalizar_data_ref(as_of=None):
+    """Data de referencia como `date` (None = hoje)"""
+    if as_of is None:
+        return date.today()
+    if isinstance(as_of, datetime):
+        return as_of.date()
+    if isinstance(as_of, pd.Timestamp):
+        return as_of.date()
+    return as_of
+
+
+def calcular_status(df, coluna_venc, as_of=None, rotulo_quitado='Pago'):
+    """Retorna copia rasa de df com DIAS_VENC, STATUS e DIAS_ATRASO na data `as_of`.
+
+    coluna_venc: coluna de vencimento usada no aging (DATA_VENC no pagar, VENCIMENTO no receber)
+    rotulo_quitado: status dos titulos com SALDO <= 0 ('Pago' ou 'Recebido')
+    """
+    as_of = normalizar_data_ref(as_of)
+    ref = (np.datetime64(as_of, 'D') - _EPOCA).astype('int64')
+
+    # Chave DIA gravada na ingestao (data/periodo.py) quando existe; senao converte as datas
+    if f'{coluna_venc}_DIA' in df.columns:
+        ordinais = df[f'{coluna_venc}_DIA'].to_numpy().astype('float64')
+        ordinais[ordinais == SEM_DATA] = np.nan
+    else:
+        ordinais = dia_ordinal(df[coluna_venc])
+    dias = ordinais - ref
+    sem_data = np.isnan(dias)
+    saldo = df['SALDO'].to_numpy(dtype='float64', na_value=np.nan)
+
+    # Faixa de aging: uma busca binaria por titulo (NaN cai na ultima faixa e e sobrescrito abaixo)
+    faixa = np.digitize(dias, _LIMITES_FAIXAS)
+    status = np.select(
+        [saldo <= 0, ~(saldo > 0), sem_data],
+        [rotulo_quitado, ORDEM_AGING[-1], 'Sem data'],
+        default=_ROTULOS_FAIXAS[np.minimum(faixa, len(ORDEM_AGING) - 1)],
+    )
+    vencido = status == 'Vencido'
+
+    resultado = df.copy(deep=False)
+    resultado['DIAS_VENC'] = dias
+    resultado['STATUS'] = pd.Categorical(status, categories=ORDEM_AGING + ['Sem data', rotulo_quitado])
+    resultado['DIAS_ATRASO'] = np.where(vencido, -dias, 0.0)
+    return resultado
@@ -0,0 +1,116 @@
+"""
+Vinculo entre adiantamentos e baixas (pagar e receber)
+
+As abas de Adiantamentos ligavam cada baixa ao seu adiantamento testando a tupla
+(FILIAL, NUMERO) com df.apply(axis=1), uma chamada Python por baixa a cada rerun.
+Aqui a ingestao grava CHAVE_TITULO, um hash int64 de (FILIAL, NUMERO), nas contas e
+nas baixas: o vinculo vira um isin sobre inteiros. A ingestao tambem distribui as
+baixas entre os adiantamentos de mesma chave em ordem FIFO (adiantamento mais
+antigo primeiro, baixas em ordem de data), com somas acumuladas e merge_asof:
+
+- contas (adiantamentos): ADTO_COMPENSADO, ADTO_SALDO_FIFO, DIAS_ATE_QUITAR
+  (emissao ate a baixa que completa o adiantamento) e ID_BAIXA (indice dessa baixa)
+- baixas: ID_ADIANTAMENTO (indice do adiantamento que a baixa comeca a compensar)
+
+Os IDs sao o indice das bases ordenadas (0..n-1), que os recortes preservam; -1 = sem vinculo.
+"""
+import numpy as np
+import pandas as pd
+
+from data.periodo import SEM_DATA, chave_periodo
+
+# Tolerancia (centavos) nas comparacoes de valores acumulados
+_TOLERANCIA = 0.005
+
+
+def chave_titulo(df):
+    """Hash int64 de (FILIAL, NUMERO) por linha (CHAVE_TITULO da ingestao quando existe)"""
+    if 'CHAVE_TITULO' in df.columns:
+        return df['CHAVE_TITULO']
+    filial = pd.to_numeric(df['FILIAL'], errors='coerce').fillna(-1).astype('int64')
+    numero = df['NUMERO'].astype(str)
+    hashes = pd.util.hash_pandas_object(pd.DataFrame({'FILIAL': filial, 'NUMERO': numero}), index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=df.index, name='CHAVE_TITULO')
+
+
+def baixas_vinculadas(df_ad, df_bx):
+    """Baixas cujo titulo (FILIAL, NUMERO) esta entre os adiantamentos de df_ad"""
+    if len(df_ad) == 0 or len(df_bx) == 0:
+        return df_bx
+    return df_bx[chave_titulo(df_bx).isin(chave_titulo(df_ad)).to_numpy()]
+
+
+def _acumulados(df, chave, dia, valor):
+    """Frame ordenado por (chave, dia, indice) com FIM/INICIO acumulados de `valor` na chave"""
+    acum = pd.DataFrame({
+        'CHAVE': chave.to_numpy(),
+        'DIA': dia.to_numpy(),
+        'VALOR': pd.to_numeric(valor, errors='coerce').fillna(0).to_numpy(dtype='float64'),
+        'ID': df.index.to_numpy(),
+    })
+    # Sem data vai para o fim da fila
+    acum['DIA'] = np.where(acum['DIA'] == SEM_DATA, np.iinfo('int32').max, acum['DIA'])
+    acum = acum.sort_values(['CHAVE', 'DIA', 'ID'], kind='stable', ignore_index=True)
+    acum['FIM'] = acum.groupby('CHAVE', sort=False)['VALOR'].cumsum()
+    acum['INICIO'] = acum['FIM'] - acum['VALOR']
+    return acum
+
+
+def vincular_adiantamentos(df_contas, df_baixas):
+    """Grava CHAVE_TITULO nas duas bases e as colunas FIFO (in place; usado na ingestao).
+
+    Adiantamentos sao as linhas de df_contas com IS_ADIANTAMENTO; o valor compensado
+    vem de VALOR_BAIXA das baixas com a mesma chave.
+    """
+    df_contas['CHAVE_TITULO'] = chave_titulo(df_contas)
+    df_baixas['CHAVE_TITULO'] = chave_titulo(df_baixas)
+
+    df_contas['ADTO_COMPENSADO'] = np.nan
+    df_contas['ADTO_SALDO_FIFO'] = np.nan
+    df_contas['DIAS_ATE_QUITAR'] = np.nan
+    df_contas['ID_BAIXA'] = np.int32(-1)
+    df_baixas['ID_ADIANTAMENTO'] = np.int32(-1)
+
+    if 'IS_ADIANTAMENTO' not in df_contas.columns or 'VALOR_BAIXA' not in df_baixas.columns:
+        return df_contas, df_baixas
+    adiant = df_contas[df_contas['IS_ADIANTAMENTO'].to_numpy(dtype=bool)]
+    baixas = df_baixas[df_baixas['CHAVE_TITULO'].isin(adiant['CHAVE_TITULO']).to_numpy()]
+    if len(adiant) == 0:
+        return df_contas, df_baixas
+
+    a = _acumulados(adiant, adiant['CHAVE_TITULO'], chave_periodo(adiant, 'EMISSAO'), adiant['VALOR_ORIGINAL'])
+    b = _acumulados(baixas, baixas['CHAVE_TITULO'], chave_periodo(baixas, 'DT_BAIXA'), baixas['VALOR_BAIXA'])
+
+    # Compensado: parte do intervalo [INICIO, FIM) do adiantamento coberta pelo total baixado na chave
+    total_baixado = b.groupby('CHAVE', sort=False)['FIM'].max()
+    coberto = a['CHAVE'].map(total_baixado).fillna(0).to_numpy()
+    compensado = np.clip(np.minimum(a['FIM'].to_numpy(), coberto) - a['INICIO'].to_numpy(), 0, a['VALOR'].to_numpy())
+
+    # Baixa que completa o adiantamento: primeira com acumulado >= FIM do adiantamento
+    # (ordenacao estavel: com acumulados empatados, por baixas de valor zero, vale a mais antiga)
+    a['ALVO'] = a['FIM'] - _TOLERANCIA
+    quitacao = pd.merge_asof(
+        a.sort_values('ALVO'), b[['CHAVE', 'FIM', 'DIA', 'ID']].sort_values('FIM', kind='stable'),
+        left_on='ALVO', right_on='FIM', by='CHAVE', direction='forward', suffixes=('', '_BX')
+    ).set_index('ID').reindex(a['ID'])
+    id_baixa = quitacao['ID_BX'].fillna(-1).to_numpy(dtype='int64')
+    dias = quitacao['DIA_BX'].to_numpy(dtype='float64') - a['DIA'].to_numpy(dtype='float64')
+    sem_data = np.iinfo('int32').max
+    dias[(id_baixa < 0) | (a['DIA'].to_numpy() == sem_data) | (quitacao['DIA_BX'].to_numpy() == sem_data)] = np.nan
+
+    ids = a['ID'].to_numpy()
+    df_contas.loc[ids, 'ADTO_COMPENSADO'] = compensado
+    df_contas.loc[ids, 'ADTO_SALDO_FIFO'] = a['VALOR'].to_numpy() - compensado
+    df_contas.loc[ids, 'DIAS_ATE_QUITAR'] = dias
+    df_contas.loc[ids, 'ID_BAIXA'] = id_baixa.astype('int32')
+
+    # Adiantamento que cada baixa comeca a compensar: primeiro com FIM > INICIO da baixa
+    if len(b) > 0:
+        b['ALVO'] = b['INICIO'] + _TOLERANCIA
+        destino = pd.merge_asof(
+            b.sort_values('ALVO'), a[['CHAVE', 'FIM', 'ID']].sort_values('FIM', kind='stable'),
+            left_on='ALVO', right_on='FIM', by='CHAVE', direction='forward', suffixes=('', '_AD')
+        )
+        df_baixas.loc[destino['ID'].to_numpy(), 'ID_ADIANTAMENTO'] = destino['ID_AD'].fillna(-1).to_numpy(dtype='int32')
+
+    return df_contas, df_baixas
@@ -3,7 +3,6 @@ Intercompany - Visao Unificada A Pagar + A Receber
 Dashboard Financeiro - Grupo Progresso
 """
 import streamlit as st
-import pandas as pd
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,11 +17,19 @@ from auth import verificar_autenticacao
 if not verificar_autenticacao():
     st.stop()
 
+# Copy-on-Write do pandas: frames do registro compartilhado sao somente leitura
+from data.registro import ativar_copy_on_write
+ativar_copy_on_write()
+
 from datetime import datetime
 
 from config.theme import get_cores, get_css
+from data.atualizador import atualizador_dados
 from components.navbar import render_navbar, render_page_header
-from tabs.intercompany_unified import render_intercompany_unificado, carregar_dados_intercompany
+from tabs.intercompany_unified import (
+    render_intercompany_unificado, carregar_dados_intercompany, carregar_conciliacao_titulos,
+    carregar_periodo_intercompany
+)
 from utils.formatters import formatar_moeda, formatar_numero, to_excel
 
 
@@ -43,18 +50,15 @@ def main():
     else:
         data_inicio, data_fim = datetime(2000, 1, 1).date(), datetime.now().date()
 
-    # Carregar dados para sidebar
-    df_pagar, df_receber = carregar_dados_intercompany()
+    # Carregar dados para sidebar (refeitos pelo atualizador quando os arquivos mudam)
+    atualizador_dados().registrar_aquecedor('intercompany', carregar_dados_intercompany)
+    atualizador_dados().registrar_aquecedor('conciliacao_titulos', carregar_conciliacao_titulos)
 
-    # Aplicar filtro de data
-    ts_inicio = pd.Timestamp(data_inicio)
-    ts_fim = pd.Timestamp(data_fim) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    if 'EMISSAO' in df_pagar.columns:
-        df_pagar = df_pagar[(df_pagar['EMISSAO'] >= ts_inicio) & (df_pagar['EMISSAO'] <= ts_fim)]
-    if 'EMISSAO' in df_receber.columns:
-        df_receber = df_receber[(df_receber['EMISSAO'] >= ts_inicio) & (df_receber['EMISSAO'] <= ts_fim)]
+    # Aplicar filtro de data (recortes chaveados: calculos das secoes em cache)
+    df_pagar, df_receber = carregar_periodo_intercompany(data_inicio, data_fim)
 
     hoje = datetime.now()
+    atualizado_em = atualizador_dados().atualizado_em('pagar', 'receber')  # data dos arquivos em uso
 
     # ========== SIDEBAR ==========
     with st.sidebar:
@@ -146,7 +150,7 @@ def main():
         <div style="text-align: center; margin-top: 1rem; padding-top: 0.75rem;
                     border-top: 1px solid {cores['borda']};">
             <p style="color: {cores['texto_secundario']}; font-size: 0.65rem; margin: 0;">
-                Atualizado: {hoje.strftime('%d/%m/%Y %H:%M')}</p>
+                Atualizado: {atualizado_em.strftime('%d/%m/%Y %H:%M')}</p>
         </div>
         """, unsafe_allow_html=True)
 
@@ -158,17 +162,19 @@ def main():
         cor=cores['primaria']
     )
 
-    # Renderizar pagina unificada (com datas filtradas)
-    render_intercompany_unificado(data_inicio, data_fim)
+    # Renderizar pagina unificada (mesmos recortes da sidebar)
+    render_intercompany_unificado(data_inicio, data_fim, dados=(df_pagar, df_receber))
 
     # Footer
     st.divider()
-    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {hoje.strftime('%d/%m/%Y %H:%M')}")
+    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {atualizado_em.strftime('%d/%m/%Y %H:%M')}")
 
 
 if __name__ == "__main__":
     try:
-        main()
+        # Uma versao dos dados por rerun (o atualizador pode trocar a versao em paralelo)
+        with atualizador_dados().fixar_versoes():
+            main()
     except Exception as e:
         import traceback
         st.error(f"Erro: {str(e)}")
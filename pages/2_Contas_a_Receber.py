@@ -17,22 +17,33 @@ from auth import verificar_autenticacao
 if not verificar_autenticacao():
     st.stop()
 
+# Copy-on-Write do pandas: frames do registro compartilhado sao somente leitura
+from data.registro import ativar_copy_on_write
+ativar_copy_on_write()
+
 from datetime import datetime
 import pandas as pd
 
 from config.theme import get_cores, get_css
-from config.settings import INTERCOMPANY_PATTERNS, TIPOS_EXCLUIDOS, CACHE_TTL
+from config.settings import TIPOS_EXCLUIDOS
+from components.abas import render_abas
+from components.diagnostico import render_diagnostico
 from components.navbar import render_navbar, render_page_header
 from utils.formatters import formatar_moeda, formatar_numero, to_excel, to_csv
 
 # Importar funcoes do loader de receber
 from data.loader_receber import (
     carregar_dados_receber,
-    aplicar_filtros_receber,
+    versao_dados_receber,
+    data_atualizacao_receber,
+    ledger_filtrado_receber,
     get_opcoes_filtros_receber,
-    get_dados_filtrados_receber,
     calcular_metricas_receber
 )
+from data.atualizador import atualizador_dados
+from data.periodo import fatiar_periodo
+from data.registro import registro_datasets
+from data.secoes import chave_aba, registrar_frame
 
 # Importar tabs de receber
 from tabs_receber.visao_geral import render_visao_geral_receber
@@ -67,14 +78,10 @@ def fragment_detalhes(df):
     render_detalhes_receber(df)
 
 
-@st.cache_data(ttl=CACHE_TTL)
-def _preparar_dados_receber(_df_contas_raw, _df_baixas_raw):
+def _preparar_dados_receber(df_contas_raw, df_baixas_raw):
     """Pre-processa dados de receber: remove intercompany, extrai adiantamentos"""
-    # Excluir clientes Intercompany
-    mask_cliente_ic = _df_contas_raw['NOME_CLIENTE'].str.upper().str.contains(
-        '|'.join(INTERCOMPANY_PATTERNS), na=False, regex=True
-    )
-    df_sem_ic = _df_contas_raw[~mask_cliente_ic]
+    # Excluir clientes Intercompany (classificados na ingestao)
+    df_sem_ic = df_contas_raw[~df_contas_raw['IS_INTERCOMPANY']]
 
     # Separar tipos excluidos (FAT, PR) para aba propria
     df_provisoes = pd.DataFrame()
@@ -84,24 +91,28 @@ def _preparar_dados_receber(_df_contas_raw, _df_baixas_raw):
         df_sem_ic = df_sem_ic[~mask_excluidos]
 
     # Baixas: filtrar intercompany por NOME_CLIENTE
-    df_baixas = _df_baixas_raw
-    if len(df_baixas) > 0 and 'NOME_CLIENTE' in df_baixas.columns:
-        mask_ic_baixas = df_baixas['NOME_CLIENTE'].str.upper().str.contains(
-            '|'.join(INTERCOMPANY_PATTERNS), na=False, regex=True
-        )
-        df_baixas = df_baixas[~mask_ic_baixas]
+    df_baixas = df_baixas_raw
+    if len(df_baixas) > 0 and 'IS_INTERCOMPANY' in df_baixas.columns:
+        df_baixas = df_baixas[~df_baixas['IS_INTERCOMPANY']]
 
-    # Extrair adiantamentos do proprio Contas a Receber (evita duplicacao com arquivo separado)
-    tipos_adiantamento = ['RA', 'PA', 'AD', 'ADTO']
-    mask_tipo_adto = df_sem_ic['TIPO'].isin(tipos_adiantamento)
-    mask_desc_adto = df_sem_ic['DESCRICAO'].str.upper().str.contains('ADIANTAMENTO|ADT |ADTO', na=False, regex=True)
-    mask_adiantamento = mask_tipo_adto | mask_desc_adto
+    # Extrair adiantamentos do proprio Contas a Receber (evita duplicacao com arquivo separado;
+    # TIPO=RA/PA/AD/ADTO ou descricao de adiantamento, marcados na ingestao)
+    mask_adiantamento = df_sem_ic['IS_ADIANTAMENTO']
     df_adiant = df_sem_ic[mask_adiantamento]
     df_contas = df_sem_ic[~mask_adiantamento]
 
     return df_contas, df_adiant, df_baixas, df_provisoes
 
 
+def _carregar_dados_preparados(data_posicao=None):
+    """Dados de receber na data de posicao, ja separados por _preparar_dados_receber"""
+    df_contas_raw, df_baixas_raw = carregar_dados_receber(data_posicao)
+    return registro_datasets().obter(
+        'receber_preparado', versao_dados_receber(data_posicao),
+        lambda: _preparar_dados_receber(df_contas_raw, df_baixas_raw)
+    )
+
+
 def main():
     # Tema
     if 'tema_escuro' not in st.session_state:
@@ -110,11 +121,13 @@ def main():
     cores = get_cores()
     st.markdown(get_css(), unsafe_allow_html=True)
 
-    # Carregar dados PRIMEIRO para obter opcoes de filiais
-    df_contas_raw, df_baixas_raw = carregar_dados_receber()
+    # Data de referencia do aging (widget "Posicao em" da sidebar; padrao = hoje)
+    data_posicao = st.session_state.get('rec_data_posicao')
 
-    # Pre-processar dados (cacheado) - extrai adiantamentos do proprio Contas a Receber
-    df_contas, df_adiant, df_baixas, df_provisoes = _preparar_dados_receber(df_contas_raw, df_baixas_raw)
+    # Carregar dados PRIMEIRO para obter opcoes de filiais
+    # (pre-processados no registro compartilhado; refeitos pelo atualizador quando os arquivos mudam)
+    atualizador_dados().registrar_aquecedor('receber_preparado', _carregar_dados_preparados)
+    df_contas, df_adiant, df_baixas, df_provisoes = _carregar_dados_preparados(data_posicao)
 
     filiais_por_grupo, categorias_opcoes = get_opcoes_filtros_receber(df_contas)
 
@@ -122,6 +135,7 @@ def main():
     navbar_result = render_navbar(pagina_atual='receber', mostrar_filtro_tempo=True, filiais_por_grupo=filiais_por_grupo)
 
     hoje = datetime.now()
+    atualizado_em = data_atualizacao_receber()  # data dos arquivos da versao em uso
 
     # Datas do filtro da navbar (3 valores: data_inicio, data_fim, filtro_filiais)
     if navbar_result:
@@ -160,6 +174,12 @@ def main():
 
         busca_cliente = st.text_input("Cliente", placeholder="Buscar...", key="rec_busca")
 
+        # Data de referencia do aging (lida no inicio do rerun, antes de carregar os dados)
+        st.date_input(
+            "Posicao em", value=hoje.date(), key="rec_data_posicao", format="DD/MM/YYYY",
+            help="Calcula status e dias de atraso como se hoje fosse esta data"
+        )
+
         st.divider()
 
         # Exportar
@@ -208,22 +228,29 @@ def main():
 
         st.divider()
 
+        # Relatorios da carga de dados
+        render_diagnostico()
+
         # Footer
         st.markdown(f"""
         <div style="text-align: center; margin-top: 1.5rem; padding-top: 1rem;
                     border-top: 1px solid {cores['borda']};">
             <p style="color: {cores['texto_secundario']}; font-size: 0.65rem; margin: 0;">
-                Atualizado: {hoje.strftime('%d/%m/%Y %H:%M')}</p>
+                Atualizado: {atualizado_em.strftime('%d/%m/%Y %H:%M')}</p>
         </div>
         """, unsafe_allow_html=True)
 
     # ========== APLICAR FILTROS ==========
-    df = aplicar_filtros_receber(
+    # (resultados compartilhados entre sessoes com os mesmos filtros)
+    ledger = ledger_filtrado_receber(
         df_contas, data_inicio, data_fim,
-        filtro_filiais, filtro_status, filtro_categoria, busca_cliente, filtro_tipo_doc
+        filtro_filiais, filtro_status, filtro_categoria, busca_cliente, filtro_tipo_doc,
+        versao=versao_dados_receber(data_posicao)
+    )
+    df = ledger.df
+    metricas = calcular_metricas_receber(
+        ledger.colunas(['VALOR_ORIGINAL', 'SALDO']), ledger.vencidos.colunas(['SALDO', 'DIAS_ATRASO']), ledger.chave
     )
-    df_pendentes, df_vencidos = get_dados_filtrados_receber(df, df_contas)
-    metricas = calcular_metricas_receber(df, df_vencidos)
 
     # ========== CONTEUDO PRINCIPAL ==========
     render_page_header(
@@ -233,28 +260,8 @@ def main():
         cor=cores['sucesso']
     )
 
-    # Tabs (8 tabs) - Estrutura otimizada para dados de Receber
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
-        "Visao Geral", "Vencimentos", "Clientes", "Categorias",
-        "Tipos", "Adiantamentos", "FAT/FT/PR", "Detalhes"
-    ])
-
-    with tab1:
-        render_visao_geral_receber(df)
-
-    with tab2:
-        fragment_vencimentos(df)
-
-    with tab3:
-        fragment_clientes(df)
-
-    with tab4:
-        fragment_categorias(df)
-
-    with tab5:
-        fragment_tipo_documento(df)
-
-    with tab6:
+    # Abas (8) - Estrutura otimizada para dados de Receber; so a aba ativa executa
+    def aba_adiantamentos():
         # Aplicar filtro de filial nos adiantamentos e baixas
         df_adiant_filtrado = df_adiant
         df_baixas_filtrado = df_baixas
@@ -266,37 +273,42 @@ def main():
                 df_baixas_filtrado = df_baixas_filtrado[df_baixas_filtrado['FILIAL'].isin(filtro_filiais)]
 
         # Aplicar filtro de data (mesmo criterio das outras abas)
-        if 'EMISSAO' in df_adiant_filtrado.columns:
-            df_adiant_filtrado = df_adiant_filtrado[
-                (pd.to_datetime(df_adiant_filtrado['EMISSAO'], errors='coerce').dt.date >= data_inicio) &
-                (pd.to_datetime(df_adiant_filtrado['EMISSAO'], errors='coerce').dt.date <= data_fim)
-            ]
-        if 'DT_BAIXA' in df_baixas_filtrado.columns:
-            df_baixas_filtrado = df_baixas_filtrado[
-                pd.to_datetime(df_baixas_filtrado['DT_BAIXA'], errors='coerce').dt.date <= data_fim
-            ]
+        # (adiantamentos ordenados por EMISSAO e baixas por DT_BAIXA: fatias por busca binaria)
+        df_adiant_filtrado = fatiar_periodo(df_adiant_filtrado, data_inicio, data_fim)
+        df_baixas_filtrado = fatiar_periodo(df_baixas_filtrado, None, data_fim, coluna='DT_BAIXA')
+        versao = versao_dados_receber(data_posicao)
+        registrar_frame(df_adiant_filtrado, chave_aba('adiantamentos_receber', versao, filtro_filiais, data_inicio, data_fim))
+        registrar_frame(df_baixas_filtrado, chave_aba('baixas_receber', versao, filtro_filiais, None, data_fim))
 
         render_adiantamentos_receber(df_adiant_filtrado, df_baixas_filtrado)
 
-    with tab7:
+    def aba_provisoes():
         # FAT / PR - filtrar por filial e data
         df_prov_filtrado = df_provisoes
         if filtro_filiais is not None and 'FILIAL' in df_prov_filtrado.columns:
             df_prov_filtrado = df_prov_filtrado[df_prov_filtrado['FILIAL'].isin(filtro_filiais)]
-        if 'EMISSAO' in df_prov_filtrado.columns:
-            df_prov_filtrado = df_prov_filtrado[
-                (df_prov_filtrado['EMISSAO'].dt.date >= data_inicio) &
-                (df_prov_filtrado['EMISSAO'].dt.date <= data_fim)
-            ]
+        df_prov_filtrado = fatiar_periodo(df_prov_filtrado, data_inicio, data_fim)
+        registrar_frame(df_prov_filtrado, chave_aba('provisoes_receber', versao_dados_receber(data_posicao), filtro_filiais,
+                                                    data_inicio, data_fim))
         render_provisoes_receber(df_prov_filtrado)
 
-    with tab8:
-        fragment_detalhes(df)
+    render_abas({
+        "Visao Geral": lambda: render_visao_geral_receber(df),
+        "Vencimentos": lambda: fragment_vencimentos(df),
+        "Clientes": lambda: fragment_clientes(df),
+        "Categorias": lambda: fragment_categorias(df),
+        "Tipos": lambda: fragment_tipo_documento(df),
+        "Adiantamentos": aba_adiantamentos,
+        "FAT/FT/PR": aba_provisoes,
+        "Detalhes": lambda: fragment_detalhes(df),
+    }, key="aba_receber")
 
     # Footer
     st.divider()
-    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {hoje.strftime('%d/%m/%Y %H:%M')}")
+    st.caption(f"Grupo Progresso - Dashboard Financeiro | Atualizado em {atualizado_em.strftime('%d/%m/%Y %H:%M')}")
 
 
 if __name__ == "__main__":
-    main()
+    # Uma versao dos dados por rerun (o atualizador pode trocar a versao em paralelo)
+    with atualizador_dados().fixar_versoes():
+        main()
@@ -5,6 +5,13 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+import sys
+import time
+
+# Raiz do repositorio no path: o script roda como `python scripts/...`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.ingestao import ler_arquivos
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -31,11 +38,8 @@ def get_engine():
     return create_engine(DATABASE_URL)
 
 
-def carregar_excel(arquivo):
-    """Carrega arquivo Excel e padroniza colunas"""
-    print(f"  Carregando {arquivo}...")
-    df = pd.read_excel(arquivo)
-
+def padronizar_excel(df):
+    """Padroniza colunas e limpa strings (roda no processo de leitura de cada arquivo)"""
     # Converter nomes de colunas para lowercase (padrão do banco)
     df.columns = [c.lower().strip() for c in df.columns]
 
@@ -43,10 +47,27 @@ def carregar_excel(arquivo):
     for col in df.select_dtypes(include=['object']).columns:
         df[col] = df[col].apply(lambda x: str(x).strip() if pd.notna(x) else x)
 
-    print(f"    -> {len(df)} registros carregados")
     return df
 
 
+def carregar_excels(arquivos):
+    """Carrega todos os arquivos Excel em paralelo (um processo por arquivo)"""
+    print(f"  Carregando {len(arquivos)} arquivos em paralelo...")
+    inicio = time.perf_counter()
+    leituras = ler_arquivos(arquivos, preparar=padronizar_excel)
+
+    for leitura in leituras.values():
+        if isinstance(leitura.erro, FileNotFoundError):
+            print(f"    -> AVISO: Arquivo '{leitura.caminho}' não encontrado, pulando...")
+        elif leitura.erro is not None:
+            print(f"    -> ERRO ao carregar {leitura.caminho}: {leitura.erro}")
+        else:
+            print(f"    -> {leitura.caminho}: {len(leitura.df)} registros em {leitura.segundos:.1f}s")
+    print(f"    -> Leitura total: {time.perf_counter() - inicio:.1f}s")
+
+    return {tabela: leitura.df for tabela, leitura in leituras.items() if leitura.erro is None}
+
+
 def atualizar_tabela(engine, tabela, df):
     """Atualiza tabela no banco (substitui todos os dados)"""
     print(f"  Atualizando tabela '{tabela}'...")
@@ -80,27 +101,29 @@ def main():
         print(f"    -> ERRO: {e}")
         return
 
+    # Ler todos os arquivos (pagar e receber) de uma vez, em paralelo
+    print("\n[2] Lendo arquivos Excel...")
+    dados = carregar_excels({**ARQUIVOS_PAGAR, **ARQUIVOS_RECEBER})
+
     # Processar Contas a Pagar
-    print("\n[2] Processando CONTAS A PAGAR...")
-    for tabela, arquivo in ARQUIVOS_PAGAR.items():
+    print("\n[3] Processando CONTAS A PAGAR...")
+    for tabela in ARQUIVOS_PAGAR:
+        if tabela not in dados:
+            continue
         try:
-            df = carregar_excel(arquivo)
-            atualizar_tabela(engine, tabela, df)
-        except FileNotFoundError:
-            print(f"    -> AVISO: Arquivo '{arquivo}' não encontrado, pulando...")
+            atualizar_tabela(engine, tabela, dados[tabela])
         except Exception as e:
-            print(f"    -> ERRO ao processar {arquivo}: {e}")
+            print(f"    -> ERRO ao processar {ARQUIVOS_PAGAR[tabela]}: {e}")
 
     # Processar Contas a Receber
-    print("\n[3] Processando CONTAS A RECEBER...")
-    for tabela, arquivo in ARQUIVOS_RECEBER.items():
+    print("\n[4] Processando CONTAS A RECEBER...")
+    for tabela in ARQUIVOS_RECEBER:
+        if tabela not in dados:
+            continue
         try:
-            df = carregar_excel(arquivo)
-            atualizar_tabela(engine, tabela, df)
-        except FileNotFoundError:
-            print(f"    -> AVISO: Arquivo '{arquivo}' não encontrado, pulando...")
+            atualizar_tabela(engine, tabela, dados[tabela])
         except Exception as e:
-            print(f"    -> ERRO ao processar {arquivo}: {e}")
+            print(f"    -> ERRO ao processar {ARQUIVOS_RECEBER[tabela]}: {e}")
 
     # Resumo final
     print("\n" + "=" * 60)
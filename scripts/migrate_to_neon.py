@@ -5,6 +5,13 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+import sys
+import time
+
+# Raiz do repositorio no path: o script roda como `python scripts/...`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.ingestao import ler_arquivos
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -15,6 +22,17 @@ def criar_engine():
     """Cria conexão com o banco Neon"""
     return create_engine(DATABASE_URL)
 
+def preparar_para_banco(df):
+    """Converte colunas de data e normaliza nomes de colunas (roda no processo de leitura)"""
+    date_columns = ['EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DT_ESCRITURACAO']
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    # Normalizar nomes de colunas (lowercase para PostgreSQL)
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
 def migrar_dados():
     """Migra os 3 arquivos Excel para o PostgreSQL"""
 
@@ -34,30 +52,27 @@ def migrar_dados():
     # Ler arquivos Excel
     print("\n[2/4] Lendo arquivos Excel...")
 
-    df_contas = pd.read_excel('Contas a Pagar.xlsx')
-    print(f"  [OK] Contas a Pagar: {len(df_contas):,} registros")
-
-    df_adiant = pd.read_excel('Adiantamentos a pagar.xlsx')
-    print(f"  [OK] Adiantamentos: {len(df_adiant):,} registros")
+    # Leitura e processamento em paralelo (um processo por arquivo):
+    # colunas de data para datetime e nomes de colunas em lowercase (PostgreSQL)
+    inicio = time.perf_counter()
+    leituras = ler_arquivos({
+        'Contas a Pagar': 'Contas a Pagar.xlsx',
+        'Adiantamentos': 'Adiantamentos a pagar.xlsx',
+        'Baixas': 'Baixas de adiantamentos a pagar.xlsx',
+    }, preparar=preparar_para_banco)
+
+    for nome, leitura in leituras.items():
+        if leitura.erro is not None:
+            raise leitura.erro
+        print(f"  [OK] {nome}: {len(leitura.df):,} registros ({leitura.segundos:.1f}s)")
+    print(f"  [OK] Leitura total: {time.perf_counter() - inicio:.1f}s")
+
+    df_contas = leituras['Contas a Pagar'].df
+    df_adiant = leituras['Adiantamentos'].df
+    df_baixas = leituras['Baixas'].df
 
-    df_baixas = pd.read_excel('Baixas de adiantamentos a pagar.xlsx')
-    print(f"  [OK] Baixas: {len(df_baixas):,} registros")
-
-    # Converter colunas de data para datetime
     print("\n[3/4] Processando dados...")
-
-    date_columns = ['EMISSAO', 'VENCIMENTO', 'VENCTO_REAL', 'DT_BAIXA', 'DT_ESCRITURACAO']
-    for col in date_columns:
-        for df in [df_contas, df_adiant, df_baixas]:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-
-    # Normalizar nomes de colunas (lowercase para PostgreSQL)
-    df_contas.columns = [c.lower() for c in df_contas.columns]
-    df_adiant.columns = [c.lower() for c in df_adiant.columns]
-    df_baixas.columns = [c.lower() for c in df_baixas.columns]
-
-    print("  [OK] Dados processados")
+    print("  [OK] Dados processados (datas e colunas padronizadas na leitura)")
 
     # Fazer upload para o banco
     print("\n[4/4] Enviando para o Neon...")
@@ -5,12 +5,15 @@ Layout flat alinhado com fornecedores.py e categorias.py
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from config.theme import get_cores
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial, abreviar_nome_subfilial
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
+from data.periodo import SEM_DATA, chave_periodo, dia_ref, rotulo_mes
+from data.secoes import memoizar_secao
+from data.vinculos import baixas_vinculadas
 
 
 def render_adiantamentos(df_adiant, df_baixas):
@@ -19,47 +22,19 @@ def render_adiantamentos(df_adiant, df_baixas):
     hoje = datetime.now()
 
     # ========== PREPARAR DADOS ==========
-    df_ad = df_adiant.copy() if len(df_adiant) > 0 else pd.DataFrame()
-    df_bx = df_baixas.copy() if len(df_baixas) > 0 else pd.DataFrame()
-
-    # Correlacionar baixas com adiantamentos
-    if len(df_ad) > 0 and len(df_bx) > 0 and 'FILIAL' in df_ad.columns and 'NUMERO' in df_ad.columns:
-        chaves_ad = set(zip(df_ad['FILIAL'], df_ad['NUMERO'].astype(str)))
-        mask_match = df_bx.apply(lambda r: (r['FILIAL'], str(r['NUMERO'])) in chaves_ad, axis=1)
-        df_bx = df_bx[mask_match].copy()
-
-    # Converter datas
-    if len(df_ad) > 0:
-        if 'EMISSAO' in df_ad.columns:
-            df_ad['EMISSAO'] = pd.to_datetime(df_ad['EMISSAO'], errors='coerce')
-        if 'VENCIMENTO' in df_ad.columns:
-            df_ad['VENCIMENTO'] = pd.to_datetime(df_ad['VENCIMENTO'], errors='coerce')
-        if 'EMISSAO' in df_ad.columns:
-            df_ad['DIAS_PENDENTE'] = (hoje - df_ad['EMISSAO']).dt.days
-        if 'DESCRICAO' in df_ad.columns:
-            df_ad['TIPO_ADTO'] = df_ad['DESCRICAO'].apply(_classificar_tipo)
-
-    if len(df_bx) > 0:
-        if 'EMISSAO' in df_bx.columns:
-            df_bx['EMISSAO'] = pd.to_datetime(df_bx['EMISSAO'], errors='coerce')
-        if 'DT_BAIXA' in df_bx.columns:
-            df_bx['DT_BAIXA'] = pd.to_datetime(df_bx['DT_BAIXA'], errors='coerce')
-        if 'DESCRICAO' in df_bx.columns:
-            df_bx['TIPO_ADTO'] = df_bx['DESCRICAO'].apply(_classificar_tipo)
+    df_ad, df_bx = compute_base_adiantamentos(df_adiant, df_baixas, hoje.date())
 
     if len(df_ad) == 0:
         st.info("Nenhum adiantamento encontrado no periodo.")
         return
 
     # Calcular totais gerais
-    total_adiantado = df_ad['VALOR_ORIGINAL'].sum()
-    saldo_pendente = df_ad['SALDO'].sum() if 'SALDO' in df_ad.columns else 0
+    kpis = compute_kpis(df_ad, df_bx)
+    total_adiantado = kpis['total_adiantado']
+    saldo_pendente = kpis['saldo_pendente']
     total_compensado = total_adiantado - saldo_pendente
-    qtd_pendentes = len(df_ad[df_ad['SALDO'] > 0]) if 'SALDO' in df_ad.columns else 0
-
-    prazo_medio = 0
-    if len(df_bx) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
-        prazo_medio = pd.to_numeric(df_bx['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    qtd_pendentes = kpis['qtd_pendentes']
+    prazo_medio = kpis['prazo_medio']
 
     # ========== 1. KPIs PRINCIPAIS ==========
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -154,6 +129,249 @@ def _detectar_multiplos_grupos(df):
     return grupos > 1
 
 
+# ==========================================================================
+# Calculos
+# ==========================================================================
+
+@memoizar_secao
+def compute_base_adiantamentos(df_adiant, df_baixas, hoje_date):
+    """(adiantamentos, baixas vinculadas a eles) com datas convertidas e tipo do adiantamento"""
+    df_ad = df_adiant.copy(deep=False) if len(df_adiant) > 0 else pd.DataFrame()
+    df_bx = df_baixas.copy(deep=False) if len(df_baixas) > 0 else pd.DataFrame()
+
+    # Correlacionar baixas com adiantamentos (CHAVE_TITULO gravada na ingestao)
+    if len(df_ad) > 0 and len(df_bx) > 0 and 'FILIAL' in df_ad.columns and 'NUMERO' in df_ad.columns:
+        df_bx = baixas_vinculadas(df_ad, df_bx)
+
+    # Converter datas
+    if len(df_ad) > 0:
+        if 'EMISSAO' in df_ad.columns:
+            df_ad['EMISSAO'] = pd.to_datetime(df_ad['EMISSAO'], errors='coerce')
+        if 'VENCIMENTO' in df_ad.columns:
+            df_ad['VENCIMENTO'] = pd.to_datetime(df_ad['VENCIMENTO'], errors='coerce')
+        if 'EMISSAO' in df_ad.columns:
+            df_ad['DIAS_PENDENTE'] = (pd.Timestamp(hoje_date) - df_ad['EMISSAO']).dt.days
+        if 'DESCRICAO' in df_ad.columns:
+            df_ad['TIPO_ADTO'] = df_ad['DESCRICAO'].apply(_classificar_tipo)
+
+    if len(df_bx) > 0:
+        if 'EMISSAO' in df_bx.columns:
+            df_bx['EMISSAO'] = pd.to_datetime(df_bx['EMISSAO'], errors='coerce')
+        if 'DT_BAIXA' in df_bx.columns:
+            df_bx['DT_BAIXA'] = pd.to_datetime(df_bx['DT_BAIXA'], errors='coerce')
+        if 'DESCRICAO' in df_bx.columns:
+            df_bx['TIPO_ADTO'] = df_bx['DESCRICAO'].apply(_classificar_tipo)
+    return df_ad, df_bx
+
+
+@memoizar_secao
+def compute_kpis(df_ad, df_bx):
+    """Total adiantado, saldo e titulos pendentes e prazo medio ate a baixa"""
+    prazo_medio = 0
+    if len(df_bx) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
+        prazo_medio = pd.to_numeric(df_bx['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    return {
+        'total_adiantado': df_ad['VALOR_ORIGINAL'].sum(),
+        'saldo_pendente': df_ad['SALDO'].sum() if 'SALDO' in df_ad.columns else 0,
+        'qtd_pendentes': len(df_ad[df_ad['SALDO'] > 0]) if 'SALDO' in df_ad.columns else 0,
+        'prazo_medio': prazo_medio,
+    }
+
+
+@memoizar_secao
+def compute_fluxo_mensal(df_ad, df_bx):
+    """Adiantado, compensado e liquido dos ultimos 12 meses com movimento"""
+    # Adiantamentos por mes
+    df_ad_mes = df_ad.copy(deep=False)
+    df_ad_mes['MES'] = chave_periodo(df_ad_mes, 'EMISSAO', 'AAAAMM')
+    adiant_mes = df_ad_mes.groupby('MES', observed=True)['VALOR_ORIGINAL'].sum().drop(SEM_DATA, errors='ignore')
+
+    # Baixas por mes
+    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
+        df_bx_mes = df_bx.copy(deep=False)
+        df_bx_mes['MES'] = chave_periodo(df_bx_mes, 'DT_BAIXA', 'AAAAMM')
+        baixa_mes = df_bx_mes.groupby('MES', observed=True)['VALOR_BAIXA'].sum().drop(SEM_DATA, errors='ignore')
+    else:
+        baixa_mes = pd.Series(dtype=float)
+
+    meses = sorted(set(adiant_mes.index.tolist() + baixa_mes.index.tolist()))[-12:]
+    df_fluxo = pd.DataFrame({
+        'MES': rotulo_mes(meses).tolist(),
+        'Adiantado': [adiant_mes.get(m, 0) for m in meses],
+        'Compensado': [baixa_mes.get(m, 0) for m in meses]
+    })
+    df_fluxo['Liquido'] = df_fluxo['Adiantado'] - df_fluxo['Compensado']
+    return df_fluxo
+
+
+@memoizar_secao
+def compute_ultimos_90_dias(df_ad, df_bx, hoje_date):
+    """(adiantado, compensado) com emissao/baixa nos ultimos 90 dias, contando hoje"""
+    inicio = dia_ref(hoje_date) - 89
+    adiant_3m = df_ad.loc[chave_periodo(df_ad, 'EMISSAO') >= inicio, 'VALOR_ORIGINAL'].sum()
+
+    comp_3m = 0
+    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
+        comp_3m = df_bx.loc[chave_periodo(df_bx, 'DT_BAIXA') >= inicio, 'VALOR_BAIXA'].sum()
+    return adiant_3m, comp_3m
+
+
+@memoizar_secao
+def compute_por_fornecedor(df_ad):
+    """Total, pendente, compensado e quantidade de adiantamentos por fornecedor"""
+    df_forn = df_ad.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
+    df_forn['Compensado'] = df_forn['Total'] - df_forn['Pendente']
+    return df_forn
+
+
+@memoizar_secao
+def compute_por_filial(df_ad):
+    """(multiplos grupos?, 12 maiores filiais/grupos por total adiantado em ordem crescente)"""
+    multiplos_grupos = _detectar_multiplos_grupos(df_ad)
+
+    df_temp = df_ad.copy(deep=False)
+    if multiplos_grupos:
+        df_temp['_AGRUP'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x))
+    else:
+        df_temp['_AGRUP'] = df_temp.apply(
+            lambda r: f"{int(r['FILIAL'])} - {abreviar_nome_subfilial(r['NOME_FILIAL'])}", axis=1
+        )
+
+    df_fil = df_temp.groupby('_AGRUP', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_fil.columns = ['Filial', 'Total', 'Pendente', 'Qtd']
+    df_fil['Compensado'] = df_fil['Total'] - df_fil['Pendente']
+    df_fil = df_fil.sort_values('Total', ascending=False)
+
+    return multiplos_grupos, df_fil.head(12).sort_values('Total', ascending=True)
+
+
+def _faixa_prazo(d):
+    if pd.isna(d) or d < 0:
+        return 'N/A'
+    d = int(d)
+    if d <= 15:
+        return 'Ate 15d'
+    elif d <= 30:
+        return '16-30d'
+    elif d <= 60:
+        return '31-60d'
+    elif d <= 90:
+        return '61-90d'
+    elif d <= 180:
+        return '91-180d'
+    return '180+d'
+
+
+@memoizar_secao
+def compute_prazos_faixa(df_bx):
+    """Valor e quantidade de baixas por faixa de prazo desde a emissao"""
+    df_temp = df_bx.copy(deep=False)
+    df_temp['PRAZO'] = pd.to_numeric(df_temp['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
+
+    df_temp['FAIXA'] = df_temp['PRAZO'].apply(_faixa_prazo)
+    ordem = ['Ate 15d', '16-30d', '31-60d', '61-90d', '91-180d', '180+d']
+
+    df_faixa = df_temp.groupby('FAIXA', observed=True).agg({
+        'VALOR_BAIXA': 'sum' if 'VALOR_BAIXA' in df_temp.columns else 'count',
+        'PRAZO': 'count'
+    }).reindex(ordem, fill_value=0).reset_index()
+    df_faixa.columns = ['Faixa', 'Valor', 'Qtd']
+    return df_faixa
+
+
+@memoizar_secao
+def compute_prazo_mensal(df_bx):
+    """Prazo medio das baixas por mes da baixa (ultimos 12 meses)"""
+    df_evol = df_bx.copy(deep=False)
+    df_evol['MES'] = chave_periodo(df_evol, 'DT_BAIXA', 'AAAAMM')
+    df_evol['PRAZO'] = pd.to_numeric(df_evol['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
+
+    df_prazo_mes = df_evol.groupby('MES', observed=True)['PRAZO'].mean().drop(SEM_DATA, errors='ignore').tail(12).reset_index()
+    df_prazo_mes.columns = ['MES', 'Prazo']
+    df_prazo_mes['MES'] = rotulo_mes(df_prazo_mes['MES'])
+    return df_prazo_mes
+
+
+@memoizar_secao
+def compute_fornecedores(df_ad):
+    """Fornecedores com adiantamento, em ordem alfabetica"""
+    return sorted(df_ad['NOME_FORNECEDOR'].dropna().unique().tolist())
+
+
+@memoizar_secao
+def compute_consulta_fornecedor(df_ad, df_bx, fornecedor):
+    """(total, saldo, % compensado, prazo medio, quantidade, 30 titulos mais recentes) do fornecedor"""
+    df_sel = df_ad[df_ad['NOME_FORNECEDOR'] == fornecedor]
+    df_bx_sel = df_bx[df_bx['NOME_FORNECEDOR'] == fornecedor] if len(df_bx) > 0 and 'NOME_FORNECEDOR' in df_bx.columns else pd.DataFrame()
+
+    total_forn = df_sel['VALOR_ORIGINAL'].sum()
+    saldo_forn = df_sel['SALDO'].sum() if 'SALDO' in df_sel.columns else 0
+    pct_comp = ((total_forn - saldo_forn) / total_forn * 100) if total_forn > 0 else 0
+
+    # Prazo de quitacao FIFO (emissao ate a baixa que completa o adiantamento)
+    prazo_forn = 0
+    if 'DIAS_ATE_QUITAR' in df_sel.columns and df_sel['DIAS_ATE_QUITAR'].notna().any():
+        prazo_forn = df_sel['DIAS_ATE_QUITAR'].mean()
+    elif len(df_bx_sel) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx_sel.columns:
+        prazo_forn = pd.to_numeric(df_bx_sel['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+
+    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'EMISSAO', 'VALOR_ORIGINAL', 'SALDO', 'DIAS_ATE_QUITAR']
+    colunas_disp = [c for c in colunas if c in df_sel.columns]
+    df_tab = df_sel[colunas_disp].sort_values('EMISSAO', ascending=False).head(30)
+    return total_forn, saldo_forn, pct_comp, prazo_forn, len(df_sel), df_tab
+
+
+@memoizar_secao
+def compute_ranking(df_ad, df_bx):
+    """Total, pendente, compensado, % compensado e prazo medio por fornecedor"""
+    df_forn = compute_por_fornecedor(df_ad)
+    df_forn['Pct_Comp'] = (df_forn['Compensado'] / df_forn['Total'] * 100).fillna(0).round(1)
+
+    # Prazo medio
+    if len(df_bx) > 0 and 'NOME_FORNECEDOR' in df_bx.columns and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
+        prazo_forn = df_bx.groupby('NOME_FORNECEDOR', observed=True)['DIF_DIAS_EMIS_BAIXA'].apply(
+            lambda x: pd.to_numeric(x, errors='coerce').mean()
+        )
+        df_forn['Prazo_Medio'] = df_forn['Fornecedor'].map(prazo_forn).fillna(0)
+    else:
+        df_forn['Prazo_Medio'] = 0
+    return df_forn
+
+
+_ORDEM_RANKING = {
+    "Maior Pendente": ('Pendente', False),
+    "Maior Total": ('Total', False),
+    "Menor % Compensado": ('Pct_Comp', True),
+    "Maior Prazo": ('Prazo_Medio', False),
+}
+
+
+@memoizar_secao
+def compute_ranking_exibir(df_ad, df_bx, ordenar, filtro, busca):
+    """Ate 100 fornecedores do ranking com o filtro e a busca, na ordem escolhida"""
+    df_exibir = compute_ranking(df_ad, df_bx)
+
+    if filtro == "Com Pendencia":
+        df_exibir = df_exibir[df_exibir['Pendente'] > 0]
+    elif filtro == "Quitados":
+        df_exibir = df_exibir[df_exibir['Pendente'] <= 0]
+
+    if busca:
+        df_exibir = df_exibir[df_exibir['Fornecedor'].str.upper().str.contains(busca.upper(), na=False)]
+
+    col_sort, asc = _ORDEM_RANKING[ordenar]
+    return df_exibir.sort_values(col_sort, ascending=asc).head(100)
+
+
 # ==========================================================================
 # Secoes
 # ==========================================================================
@@ -169,26 +387,7 @@ def _render_fluxo_mensal(df_ad, df_bx, cores, hoje):
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        # Adiantamentos por mes
-        df_ad_mes = df_ad.copy()
-        df_ad_mes['MES'] = df_ad_mes['EMISSAO'].dt.to_period('M').astype(str)
-        adiant_mes = df_ad_mes.groupby('MES')['VALOR_ORIGINAL'].sum()
-
-        # Baixas por mes
-        if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
-            df_bx_mes = df_bx.copy()
-            df_bx_mes['MES'] = df_bx_mes['DT_BAIXA'].dt.to_period('M').astype(str)
-            baixa_mes = df_bx_mes.groupby('MES')['VALOR_BAIXA'].sum()
-        else:
-            baixa_mes = pd.Series(dtype=float)
-
-        meses = sorted(set(adiant_mes.index.tolist() + baixa_mes.index.tolist()))[-12:]
-        df_fluxo = pd.DataFrame({
-            'MES': meses,
-            'Adiantado': [adiant_mes.get(m, 0) for m in meses],
-            'Compensado': [baixa_mes.get(m, 0) for m in meses]
-        })
-        df_fluxo['Liquido'] = df_fluxo['Adiantado'] - df_fluxo['Compensado']
+        df_fluxo = compute_fluxo_mensal(df_ad, df_bx)
 
         fig = go.Figure()
 
@@ -219,13 +418,7 @@ def _render_fluxo_mensal(df_ad, df_bx, cores, hoje):
 
     with col2:
         st.markdown("###### Ultimos 3 meses")
-        df_3m = df_ad[df_ad['EMISSAO'] >= hoje - timedelta(days=90)]
-        adiant_3m = df_3m['VALOR_ORIGINAL'].sum()
-
-        comp_3m = 0
-        if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
-            df_bx_3m = df_bx[df_bx['DT_BAIXA'] >= hoje - timedelta(days=90)]
-            comp_3m = df_bx_3m['VALOR_BAIXA'].sum()
+        adiant_3m, comp_3m = compute_ultimos_90_dias(df_ad, df_bx, hoje.date())
 
         liquido_3m = adiant_3m - comp_3m
 
@@ -257,13 +450,7 @@ def _render_top_fornecedores(df_ad, cores):
         st.info("Coluna NOME_FORNECEDOR nao disponivel.")
         return
 
-    df_forn = df_ad.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
-    df_forn['Compensado'] = df_forn['Total'] - df_forn['Pendente']
+    df_forn = compute_por_fornecedor(df_ad)
 
     if len(df_forn) == 0:
         st.success("Nenhum adiantamento encontrado.")
@@ -341,29 +528,12 @@ def _render_por_filial(df_ad, df_bx, cores):
     if 'NOME_FILIAL' not in df_ad.columns:
         return
 
-    multiplos_grupos = _detectar_multiplos_grupos(df_ad)
+    multiplos_grupos, df_top = compute_por_filial(df_ad)
 
     if multiplos_grupos:
         st.markdown("##### Por Grupo")
-        df_temp = df_ad.copy()
-        df_temp['_AGRUP'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x))
     else:
         st.markdown("##### Por Filial")
-        df_temp = df_ad.copy()
-        df_temp['_AGRUP'] = df_temp.apply(
-            lambda r: f"{int(r['FILIAL'])} - {abreviar_nome_subfilial(r['NOME_FILIAL'])}", axis=1
-        )
-
-    df_fil = df_temp.groupby('_AGRUP').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_fil.columns = ['Filial', 'Total', 'Pendente', 'Qtd']
-    df_fil['Compensado'] = df_fil['Total'] - df_fil['Pendente']
-    df_fil = df_fil.sort_values('Total', ascending=False)
-
-    df_top = df_fil.head(12).sort_values('Total', ascending=True)
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -402,33 +572,7 @@ def _render_prazos(df_bx, cores):
     with col1:
         st.markdown("###### Distribuicao por Faixa de Prazo")
 
-        df_temp = df_bx.copy()
-        df_temp['PRAZO'] = pd.to_numeric(df_temp['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
-
-        def faixa_prazo(d):
-            if pd.isna(d) or d < 0:
-                return 'N/A'
-            d = int(d)
-            if d <= 15:
-                return 'Ate 15d'
-            elif d <= 30:
-                return '16-30d'
-            elif d <= 60:
-                return '31-60d'
-            elif d <= 90:
-                return '61-90d'
-            elif d <= 180:
-                return '91-180d'
-            return '180+d'
-
-        df_temp['FAIXA'] = df_temp['PRAZO'].apply(faixa_prazo)
-        ordem = ['Ate 15d', '16-30d', '31-60d', '61-90d', '91-180d', '180+d']
-
-        df_faixa = df_temp.groupby('FAIXA').agg({
-            'VALOR_BAIXA': 'sum' if 'VALOR_BAIXA' in df_temp.columns else 'count',
-            'PRAZO': 'count'
-        }).reindex(ordem, fill_value=0).reset_index()
-        df_faixa.columns = ['Faixa', 'Valor', 'Qtd']
+        df_faixa = compute_prazos_faixa(df_bx)
 
         cores_faixas = [cores['sucesso'], cores['info'], '#22d3ee', cores['alerta'], '#f97316', cores['perigo']]
 
@@ -451,12 +595,7 @@ def _render_prazos(df_bx, cores):
         st.markdown("###### Evolucao do Prazo Medio")
 
         if 'DT_BAIXA' in df_bx.columns:
-            df_evol = df_bx.copy()
-            df_evol['MES'] = df_evol['DT_BAIXA'].dt.to_period('M').astype(str)
-            df_evol['PRAZO'] = pd.to_numeric(df_evol['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
-
-            df_prazo_mes = df_evol.groupby('MES')['PRAZO'].mean().tail(12).reset_index()
-            df_prazo_mes.columns = ['MES', 'Prazo']
+            df_prazo_mes = compute_prazo_mensal(df_bx)
 
             if len(df_prazo_mes) > 1:
                 fig = go.Figure()
@@ -489,7 +628,7 @@ def _render_consulta_fornecedor(df_ad, df_bx, cores):
     if 'NOME_FORNECEDOR' not in df_ad.columns:
         return
 
-    fornecedores = sorted(df_ad['NOME_FORNECEDOR'].dropna().unique().tolist())
+    fornecedores = compute_fornecedores(df_ad)
     fornecedor_sel = st.selectbox(
         "Selecione um fornecedor",
         options=['Selecione...'] + fornecedores,
@@ -499,34 +638,23 @@ def _render_consulta_fornecedor(df_ad, df_bx, cores):
     if fornecedor_sel == 'Selecione...':
         return
 
-    df_sel = df_ad[df_ad['NOME_FORNECEDOR'] == fornecedor_sel]
-    df_bx_sel = df_bx[df_bx['NOME_FORNECEDOR'] == fornecedor_sel] if len(df_bx) > 0 and 'NOME_FORNECEDOR' in df_bx.columns else pd.DataFrame()
-
-    total_forn = df_sel['VALOR_ORIGINAL'].sum()
-    saldo_forn = df_sel['SALDO'].sum() if 'SALDO' in df_sel.columns else 0
-    pct_comp = ((total_forn - saldo_forn) / total_forn * 100) if total_forn > 0 else 0
-
-    prazo_forn = 0
-    if len(df_bx_sel) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx_sel.columns:
-        prazo_forn = pd.to_numeric(df_bx_sel['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    total_forn, saldo_forn, pct_comp, prazo_forn, qtd_forn, df_tab = compute_consulta_fornecedor(df_ad, df_bx, fornecedor_sel)
 
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Adiantado", formatar_moeda(total_forn), f"{len(df_sel)} titulos")
+    col1.metric("Total Adiantado", formatar_moeda(total_forn), f"{qtd_forn} titulos")
     col2.metric("Saldo Pendente", formatar_moeda(saldo_forn))
     col3.metric("% Compensado", f"{pct_comp:.1f}%")
     col4.metric("Prazo Medio", f"{prazo_forn:.0f}d" if prazo_forn > 0 else "-")
 
     # Tabela de titulos
-    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'EMISSAO', 'VALOR_ORIGINAL', 'SALDO']
-    colunas_disp = [c for c in colunas if c in df_sel.columns]
-    df_tab = df_sel[colunas_disp].sort_values('EMISSAO', ascending=False).head(30).copy()
-
     if 'EMISSAO' in df_tab.columns:
         df_tab['EMISSAO'] = pd.to_datetime(df_tab['EMISSAO'], errors='coerce').dt.strftime('%d/%m/%Y')
     if 'VALOR_ORIGINAL' in df_tab.columns:
         df_tab['VALOR_ORIGINAL'] = df_tab['VALOR_ORIGINAL'].apply(lambda x: formatar_moeda(x, completo=True))
     if 'SALDO' in df_tab.columns:
         df_tab['SALDO'] = df_tab['SALDO'].apply(lambda x: formatar_moeda(x, completo=True))
+    if 'DIAS_ATE_QUITAR' in df_tab.columns:
+        df_tab['DIAS_ATE_QUITAR'] = df_tab['DIAS_ATE_QUITAR'].apply(lambda x: f"{int(x)}d" if pd.notna(x) else '-')
 
     nomes = {
         'NOME_FILIAL': 'Filial',
@@ -534,7 +662,8 @@ def _render_consulta_fornecedor(df_ad, df_bx, cores):
         'NUMERO': 'Numero Doc',
         'EMISSAO': 'Emissao',
         'VALOR_ORIGINAL': 'Valor',
-        'SALDO': 'Pendente'
+        'SALDO': 'Pendente',
+        'DIAS_ATE_QUITAR': 'Quitado em'
     }
     df_tab.columns = [nomes.get(c, c) for c in df_tab.columns]
 
@@ -548,24 +677,6 @@ def _render_tabela_ranking(df_ad, df_bx, cores):
     if 'NOME_FORNECEDOR' not in df_ad.columns:
         return
 
-    df_forn = df_ad.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
-    df_forn['Compensado'] = df_forn['Total'] - df_forn['Pendente']
-    df_forn['Pct_Comp'] = (df_forn['Compensado'] / df_forn['Total'] * 100).fillna(0).round(1)
-
-    # Prazo medio
-    if len(df_bx) > 0 and 'NOME_FORNECEDOR' in df_bx.columns and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
-        prazo_forn = df_bx.groupby('NOME_FORNECEDOR')['DIF_DIAS_EMIS_BAIXA'].apply(
-            lambda x: pd.to_numeric(x, errors='coerce').mean()
-        )
-        df_forn['Prazo_Medio'] = df_forn['Fornecedor'].map(prazo_forn).fillna(0)
-    else:
-        df_forn['Prazo_Medio'] = 0
-
     # Filtros
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -583,27 +694,10 @@ def _render_tabela_ranking(df_ad, df_bx, cores):
     with col3:
         busca = st.text_input("Buscar fornecedor", key="adto_rank_busca")
 
-    df_exibir = df_forn.copy()
-
-    if filtro == "Com Pendencia":
-        df_exibir = df_exibir[df_exibir['Pendente'] > 0]
-    elif filtro == "Quitados":
-        df_exibir = df_exibir[df_exibir['Pendente'] <= 0]
-
-    if busca:
-        df_exibir = df_exibir[df_exibir['Fornecedor'].str.upper().str.contains(busca.upper(), na=False)]
-
-    sort_map = {
-        "Maior Pendente": ('Pendente', False),
-        "Maior Total": ('Total', False),
-        "Menor % Compensado": ('Pct_Comp', True),
-        "Maior Prazo": ('Prazo_Medio', False),
-    }
-    col_sort, asc = sort_map[ordenar]
-    df_exibir = df_exibir.sort_values(col_sort, ascending=asc).head(100)
+    df_exibir = compute_ranking_exibir(df_ad, df_bx, ordenar, filtro, busca)
 
     # Formatar para exibicao
-    df_show = df_exibir.copy()
+    df_show = df_exibir.copy(deep=False)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Compensado'] = df_show['Compensado'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -622,4 +716,4 @@ def _render_tabela_ranking(df_ad, df_bx, cores):
             )
         }
     )
-    st.caption(f"Exibindo {len(df_show)} de {len(df_forn)} fornecedores")
+    st.caption(f"Exibindo {len(df_show)} de {len(compute_por_fornecedor(df_ad))} fornecedores")
@@ -10,6 +10,9 @@ from datetime import datetime
 from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
+from data.contratos import cronograma_contrato, resumo_parcelas
+from data.periodo import SEM_DATA, chave_periodo, dia_ref, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def render_bancos(df):
@@ -21,36 +24,20 @@ def render_bancos(df):
         return
 
     # Preparar dados
-    df_bancos = df.copy()
-
-    # Garantir colunas necessarias
-    colunas_necessarias = ['VALOR_JUROS', 'VALOR_MULTA', 'VALOR_CORRECAO', 'VALOR_ACRESCIMO', 'VLR_DESCONTO', 'TX_MOEDA', 'PARCELA']
-    for col in colunas_necessarias:
-        if col not in df_bancos.columns:
-            df_bancos[col] = 0
-        else:
-            df_bancos[col] = pd.to_numeric(df_bancos[col], errors='coerce').fillna(0)
-
-    # Total de custos financeiros adicionais
-    df_bancos['CUSTO_ADICIONAL'] = (
-        df_bancos['VALOR_JUROS'] +
-        df_bancos['VALOR_MULTA'] +
-        df_bancos['VALOR_CORRECAO'] +
-        df_bancos['VALOR_ACRESCIMO']
-    )
+    df_bancos = compute_base_bancos(df)
 
     # ========== FILTROS ==========
     st.markdown("##### Filtros")
     col1, col2, col3 = st.columns(3)
 
+    bancos, tipos = compute_opcoes_filtros(df_bancos)
+
     with col1:
         # Filtro de banco/fornecedor
-        bancos = ['Todos'] + sorted(df_bancos['NOME_FORNECEDOR'].dropna().unique().tolist())
         filtro_banco = st.selectbox("Banco/Instituicao", bancos, key="banco_filtro")
 
     with col2:
         # Filtro de tipo de operacao
-        tipos = ['Todas'] + sorted(df_bancos['DESCRICAO'].dropna().unique().tolist())
         filtro_tipo = st.selectbox("Tipo de Operacao", tipos, key="banco_tipo")
 
     with col3:
@@ -58,20 +45,8 @@ def render_bancos(df):
         filtro_status = st.selectbox("Status Parcela", ["Todas", "Pagas", "Pendentes", "Vencidas"], key="banco_status")
 
     # Aplicar filtros
-    df_filtrado = df_bancos.copy()
-
-    if filtro_banco != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['NOME_FORNECEDOR'] == filtro_banco]
-
-    if filtro_tipo != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO'] == filtro_tipo]
-
-    if filtro_status == 'Pagas':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] == 0]
-    elif filtro_status == 'Pendentes':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] > 0]
-    elif filtro_status == 'Vencidas':
-        df_filtrado = df_filtrado[df_filtrado['STATUS'] == 'Vencido']
+    filtros = (filtro_banco, filtro_tipo, filtro_status)
+    df_filtrado = recorte(df_bancos, ('bancos',) + filtros, lambda d: _mascara_filtros(d, *filtros))
 
     st.divider()
 
@@ -104,20 +79,84 @@ def render_bancos(df):
     _render_detalhes(df_filtrado, cores)
 
 
+@memoizar_secao
+def compute_base_bancos(df):
+    """Parcelas com as colunas de encargos numericas (0 quando ausentes) e CUSTO_ADICIONAL"""
+    df_bancos = df.copy(deep=False)
+
+    # Garantir colunas necessarias
+    colunas_necessarias = ['VALOR_JUROS', 'VALOR_MULTA', 'VALOR_CORRECAO', 'VALOR_ACRESCIMO', 'VLR_DESCONTO', 'TX_MOEDA', 'PARCELA']
+    for col in colunas_necessarias:
+        if col not in df_bancos.columns:
+            df_bancos[col] = 0
+        else:
+            df_bancos[col] = pd.to_numeric(df_bancos[col], errors='coerce').fillna(0)
+
+    # Total de custos financeiros adicionais
+    df_bancos['CUSTO_ADICIONAL'] = (
+        df_bancos['VALOR_JUROS'] +
+        df_bancos['VALOR_MULTA'] +
+        df_bancos['VALOR_CORRECAO'] +
+        df_bancos['VALOR_ACRESCIMO']
+    )
+    return df_bancos
+
+
+@memoizar_secao
+def compute_opcoes_filtros(df_bancos):
+    """Opcoes dos filtros de banco e tipo de operacao"""
+    bancos = ['Todos'] + sorted(df_bancos['NOME_FORNECEDOR'].dropna().unique().tolist())
+    tipos = ['Todas'] + sorted(df_bancos['DESCRICAO'].dropna().unique().tolist())
+    return bancos, tipos
+
+
+def _mascara_filtros(df, filtro_banco, filtro_tipo, filtro_status):
+    """Mascara booleana de df com os filtros de banco, tipo e status da parcela"""
+    mask = pd.Series(True, index=df.index)
+
+    if filtro_banco != 'Todos':
+        mask &= df['NOME_FORNECEDOR'] == filtro_banco
+
+    if filtro_tipo != 'Todas':
+        mask &= df['DESCRICAO'] == filtro_tipo
+
+    if filtro_status == 'Pagas':
+        mask &= df['SALDO'] == 0
+    elif filtro_status == 'Pendentes':
+        mask &= df['SALDO'] > 0
+    elif filtro_status == 'Vencidas':
+        mask &= df['STATUS'] == 'Vencido'
+    return mask
+
+
+@memoizar_secao
+def compute_kpis(df):
+    """Totais de valor e contagem de parcelas pagas, pendentes e vencidas"""
+    return {
+        'principal': df['VALOR_ORIGINAL'].sum(),
+        'saldo': df['SALDO'].sum(),
+        'juros': df['VALOR_JUROS'].sum(),
+        'parcelas': len(df),
+        'pagas': int((df['SALDO'] == 0).sum()),
+        'pendentes': int((df['SALDO'] > 0).sum()),
+        'vencidas': int((df['STATUS'] == 'Vencido').sum()),
+    }
+
+
 def _render_kpis(df, cores):
     """KPIs principais com foco em parcelas"""
 
-    total_principal = df['VALOR_ORIGINAL'].sum()
-    total_saldo = df['SALDO'].sum()
+    kpis = compute_kpis(df)
+    total_principal = kpis['principal']
+    total_saldo = kpis['saldo']
     total_pago = total_principal - total_saldo
-    total_juros = df['VALOR_JUROS'].sum()
-    total_custos = df['CUSTO_ADICIONAL'].sum()
+    total_juros = kpis['juros']
 
     # Parcelas
-    total_parcelas = len(df)
-    parcelas_pagas = len(df[df['SALDO'] == 0])
-    parcelas_pendentes = len(df[df['SALDO'] > 0])
-    parcelas_vencidas = len(df[df['STATUS'] == 'Vencido'])
+    total_parcelas = kpis['parcelas']
+    parcelas_pagas = kpis['pagas']
+    parcelas_pendentes = kpis['pendentes']
+    parcelas_vencidas = kpis['vencidas']
 
     pct_parcelas_pagas = (parcelas_pagas / total_parcelas * 100) if total_parcelas > 0 else 0
     pct_valor_pago = (total_pago / total_principal * 100) if total_principal > 0 else 0
@@ -161,36 +200,36 @@ def _render_kpis(df, cores):
     )
 
 
+@memoizar_secao
+def compute_contratos(df, n=20):
+    """Os n contratos (banco + NUMERO) de maior principal, com parcelas e % quitado"""
+    # Uma linha por contrato, numa passada (data/contratos.py)
+    df_contratos = resumo_parcelas(df).rename(columns={
+        'PAGAS': 'Parcelas_Pagas',
+        'PENDENTES': 'Parcelas_Pendentes',
+        'VENCIDAS': 'Parcelas_Vencidas',
+        'TOTAL_PARCELAS': 'Total_Parcelas',
+        'PAGO': 'Pago',
+        'PCT_QUITADO': '% Quitado'
+    })
+    return df_contratos.sort_values('VALOR_ORIGINAL', ascending=False).head(n)
+
+
+@memoizar_secao
+def compute_parcelas_por_banco(df):
+    """Parcelas pagas, pendentes e vencidas dos 10 bancos com mais parcelas pagas"""
+    df_banco_parc = resumo_parcelas(df, 'NOME_FORNECEDOR').rename(columns={
+        'PAGAS': 'Pagas', 'PENDENTES': 'Pendentes', 'VENCIDAS': 'Vencidas'
+    })
+    return df_banco_parc.sort_values('Pagas', ascending=False).head(10)
+
+
 def _render_analise_parcelas(df, cores):
     """Analise detalhada de parcelas por contrato/operacao"""
 
     st.markdown("##### Analise de Parcelas por Contrato")
 
-    # Agrupar por NUMERO (identificador do contrato/emprestimo)
-    df_contratos = df.groupby(['NOME_FORNECEDOR', 'NUMERO']).agg({
-        'PARCELA': 'max',  # Total de parcelas do contrato
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'VALOR_JUROS': 'sum',
-        'DESCRICAO': 'first',
-        'EMISSAO': 'min',
-        'VENCIMENTO': 'max'
-    }).reset_index()
-
-    # Contar parcelas pagas e pendentes por contrato
-    df_parc_status = df.groupby(['NOME_FORNECEDOR', 'NUMERO']).apply(
-        lambda x: pd.Series({
-            'Parcelas_Pagas': len(x[x['SALDO'] == 0]),
-            'Parcelas_Pendentes': len(x[x['SALDO'] > 0]),
-            'Parcelas_Vencidas': len(x[x['STATUS'] == 'Vencido'])
-        })
-    ).reset_index()
-
-    df_contratos = df_contratos.merge(df_parc_status, on=['NOME_FORNECEDOR', 'NUMERO'])
-    df_contratos['Total_Parcelas'] = df_contratos['Parcelas_Pagas'] + df_contratos['Parcelas_Pendentes']
-    df_contratos['Pago'] = df_contratos['VALOR_ORIGINAL'] - df_contratos['SALDO']
-    df_contratos['% Quitado'] = (df_contratos['Pago'] / df_contratos['VALOR_ORIGINAL'] * 100).round(1)
-    df_contratos = df_contratos.sort_values('VALOR_ORIGINAL', ascending=False)
+    df_contratos = compute_contratos(df)
 
     col1, col2 = st.columns(2)
 
@@ -198,14 +237,7 @@ def _render_analise_parcelas(df, cores):
         # Grafico de parcelas pagas vs pendentes por banco
         st.markdown("###### Parcelas por Banco")
 
-        df_banco_parc = df.groupby('NOME_FORNECEDOR').apply(
-            lambda x: pd.Series({
-                'Pagas': len(x[x['SALDO'] == 0]),
-                'Pendentes': len(x[x['SALDO'] > 0]),
-                'Vencidas': len(x[x['STATUS'] == 'Vencido'])
-            })
-        ).reset_index()
-        df_banco_parc = df_banco_parc.sort_values('Pagas', ascending=False).head(10)
+        df_banco_parc = compute_parcelas_por_banco(df)
 
         fig = go.Figure()
 
@@ -246,10 +278,10 @@ def _render_analise_parcelas(df, cores):
         # Resumo geral de parcelas
         st.markdown("###### Resumo de Parcelas")
 
-        total_parcelas = len(df)
-        pagas = len(df[df['SALDO'] == 0])
-        pendentes = len(df[df['SALDO'] > 0])
-        vencidas = len(df[df['STATUS'] == 'Vencido'])
+        kpis = compute_kpis(df)
+        pagas = kpis['pagas']
+        pendentes = kpis['pendentes']
+        vencidas = kpis['vencidas']
 
         fig = go.Figure(go.Pie(
             labels=['Pagas', 'Pendentes (em dia)', 'Vencidas'],
@@ -275,7 +307,7 @@ def _render_analise_parcelas(df, cores):
     # Tabela de contratos
     st.markdown("###### Detalhamento por Contrato")
 
-    df_show = df_contratos.head(20).copy()
+    df_show = df_contratos.copy(deep=False)
     df_show['VALOR_ORIGINAL'] = df_show['VALOR_ORIGINAL'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pago'] = df_show['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['SALDO'] = df_show['SALDO'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -296,23 +328,61 @@ def _render_analise_parcelas(df, cores):
         'SALDO': 'Pendente',
         'VALOR_JUROS': 'Juros',
         'EMISSAO': 'Inicio',
-        'VENCIMENTO': 'Fim'
+        'VENCIMENTO': 'Fim',
+        'PROXIMO_VENC': 'Proximo Venc.'
     })
+    df_show['Proximo Venc.'] = df_show['Proximo Venc.'].dt.strftime('%d/%m/%Y').fillna('-')
 
     st.dataframe(
-        df_show[['Banco', 'Contrato', 'Tipo', 'Total', 'Pagas', 'Pendentes', 'Vencidas', 'Principal', 'Pago', 'Pendente', '% Quitado']],
+        df_show[['Banco', 'Contrato', 'Tipo', 'Total', 'Pagas', 'Pendentes', 'Vencidas', 'Principal', 'Pago', 'Pendente', '% Quitado', 'Proximo Venc.']],
         use_container_width=True,
         hide_index=True,
         height=350
     )
 
+    _render_cronograma_contrato(df, df_contratos)
 
-def _render_por_banco(df, cores):
-    """Analise por banco/instituicao"""
 
-    st.markdown("##### Por Banco/Instituicao")
+@memoizar_secao
+def compute_cronograma_contrato(df, banco, numero):
+    """Cronograma de amortizacao do contrato (data/contratos.py)"""
+    return cronograma_contrato(df, banco, numero)
+
+
+def _render_cronograma_contrato(df, df_contratos):
+    """Cronograma de amortizacao de um contrato escolhido"""
+
+    if len(df_contratos) == 0:
+        return
 
-    df_banco = df.groupby('NOME_FORNECEDOR').agg({
+    opcoes = {
+        f"{str(banco)[:30]} - {numero}": (banco, numero)
+        for banco, numero in zip(df_contratos['NOME_FORNECEDOR'], df_contratos['NUMERO'])
+    }
+
+    with st.expander("Cronograma de amortizacao por contrato"):
+        contrato_sel = st.selectbox("Contrato", list(opcoes.keys()), key="banco_contrato_cronograma")
+        df_tab = compute_cronograma_contrato(df, *opcoes[contrato_sel])
+        if 'VENCIMENTO' in df_tab.columns:
+            df_tab['VENCIMENTO'] = df_tab['VENCIMENTO'].dt.strftime('%d/%m/%Y')
+        for col in ['VALOR_ORIGINAL', 'PAGO', 'SALDO', 'VALOR_JUROS', 'PAGO_ACUMULADO', 'SALDO_DEVEDOR']:
+            if col in df_tab.columns:
+                df_tab[col] = df_tab[col].apply(lambda x: formatar_moeda(x, completo=True))
+
+        nomes = {
+            'PARCELA': 'Parcela', 'VENCIMENTO': 'Vencimento', 'VALOR_ORIGINAL': 'Valor',
+            'PAGO': 'Pago', 'SALDO': 'Pendente', 'VALOR_JUROS': 'Juros', 'STATUS': 'Status',
+            'PAGO_ACUMULADO': 'Pago Acumulado', 'SALDO_DEVEDOR': 'Saldo Devedor'
+        }
+        df_tab.columns = [nomes.get(c, c) for c in df_tab.columns]
+
+        st.dataframe(df_tab, use_container_width=True, hide_index=True, height=300)
+
+
+@memoizar_secao
+def compute_por_banco(df):
+    """Principal, saldo, pago, juros, contratos e parcelas por banco, do maior principal"""
+    df_banco = df.groupby('NOME_FORNECEDOR', observed=True).agg({
         'VALOR_ORIGINAL': 'sum',
         'SALDO': 'sum',
         'VALOR_JUROS': 'sum',
@@ -322,7 +392,15 @@ def _render_por_banco(df, cores):
     df_banco.columns = ['Banco', 'Principal', 'Saldo', 'Juros', 'Contratos', 'Parcelas']
     df_banco['Pago'] = df_banco['Principal'] - df_banco['Saldo']
     df_banco['% Pago'] = (df_banco['Pago'] / df_banco['Principal'] * 100).round(1)
-    df_banco = df_banco.sort_values('Principal', ascending=False)
+    return df_banco.sort_values('Principal', ascending=False)
+
+
+def _render_por_banco(df, cores):
+    """Analise por banco/instituicao"""
+
+    st.markdown("##### Por Banco/Instituicao")
+
+    df_banco = compute_por_banco(df)
 
     col1, col2 = st.columns(2)
 
@@ -359,7 +437,7 @@ def _render_por_banco(df, cores):
 
     with col2:
         # Tabela
-        df_tab = df_banco.copy()
+        df_tab = df_banco.copy(deep=False)
         df_tab['Principal'] = df_tab['Principal'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab['Pago'] = df_tab['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab['Saldo'] = df_tab['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -369,12 +447,10 @@ def _render_por_banco(df, cores):
         st.dataframe(df_tab, use_container_width=True, hide_index=True, height=400)
 
 
-def _render_por_tipo(df, cores):
-    """Analise por tipo de operacao"""
-
-    st.markdown("##### Por Tipo de Operacao")
-
-    df_tipo = df.groupby('DESCRICAO').agg({
+@memoizar_secao
+def compute_por_tipo(df):
+    """Principal, saldo, pago, juros, contratos e parcelas pagas/pendentes por tipo de operacao"""
+    df_tipo = df.groupby('DESCRICAO', observed=True).agg({
         'VALOR_ORIGINAL': 'sum',
         'SALDO': 'sum',
         'VALOR_JUROS': 'sum',
@@ -386,14 +462,18 @@ def _render_por_tipo(df, cores):
     df_tipo['% Pago'] = (df_tipo['Pago'] / df_tipo['Principal'] * 100).round(1)
 
     # Parcelas pagas/pendentes por tipo
-    df_tipo_parc = df.groupby('DESCRICAO').apply(
-        lambda x: pd.Series({
-            'Parc_Pagas': len(x[x['SALDO'] == 0]),
-            'Parc_Pendentes': len(x[x['SALDO'] > 0])
-        })
-    ).reset_index()
+    df_tipo_parc = resumo_parcelas(df, 'DESCRICAO')[['DESCRICAO', 'PAGAS', 'PENDENTES']]
+    df_tipo_parc.columns = ['DESCRICAO', 'Parc_Pagas', 'Parc_Pendentes']
     df_tipo = df_tipo.merge(df_tipo_parc, left_on='Tipo', right_on='DESCRICAO').drop('DESCRICAO', axis=1)
-    df_tipo = df_tipo.sort_values('Principal', ascending=False)
+    return df_tipo.sort_values('Principal', ascending=False)
+
+
+def _render_por_tipo(df, cores):
+    """Analise por tipo de operacao"""
+
+    st.markdown("##### Por Tipo de Operacao")
+
+    df_tipo = compute_por_tipo(df)
 
     col1, col2 = st.columns(2)
 
@@ -419,7 +499,7 @@ def _render_por_tipo(df, cores):
 
     with col2:
         # Tabela
-        df_tab = df_tipo.copy()
+        df_tab = df_tipo.copy(deep=False)
         df_tab['Principal'] = df_tab['Principal'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab['Pago'] = df_tab['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab['Saldo'] = df_tab['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -434,27 +514,45 @@ def _render_por_tipo(df, cores):
         )
 
 
-def _render_cronograma(df, cores):
-    """Cronograma de vencimentos futuros"""
-
-    st.markdown("##### Cronograma de Vencimentos")
-
+@memoizar_secao
+def compute_cronograma(df):
+    """Saldo e parcelas pendentes por mes de vencimento; None sem parcela pendente"""
     # Filtrar apenas pendentes
-    df_pend = df[df['SALDO'] > 0].copy()
+    df_pend = df[df['SALDO'] > 0]
 
     if len(df_pend) == 0:
-        st.success("Nenhuma parcela pendente!")
-        return
+        return None
 
     # Agrupar por mes de vencimento
-    df_pend['MES_VENC'] = df_pend['VENCIMENTO'].dt.to_period('M')
+    df_pend = df_pend.assign(MES_VENC=chave_periodo(df_pend, 'VENCIMENTO', 'AAAAMM'))
 
-    df_crono = df_pend.groupby('MES_VENC').agg({
+    df_crono = df_pend[df_pend['MES_VENC'] != SEM_DATA].groupby('MES_VENC', observed=True).agg({
         'SALDO': 'sum',
         'NUMERO': 'count'
     }).reset_index()
     df_crono.columns = ['Mes', 'Valor', 'Parcelas']
-    df_crono['Mes'] = df_crono['Mes'].astype(str)
+    df_crono['Mes'] = rotulo_mes(df_crono['Mes'])
+    return df_crono
+
+
+@memoizar_secao
+def compute_pendentes_vencidas(df, hoje_date):
+    """Parcelas pendentes com vencimento ate hoje, do maior saldo para o menor"""
+    df_pend = df[df['SALDO'] > 0]
+    dia_venc = chave_periodo(df_pend, 'VENCIMENTO')
+    vencidas = (dia_venc != SEM_DATA) & (dia_venc <= dia_ref(hoje_date))
+    return df_pend[vencidas].sort_values('SALDO', ascending=False)
+
+
+def _render_cronograma(df, cores):
+    """Cronograma de vencimentos futuros"""
+
+    st.markdown("##### Cronograma de Vencimentos")
+
+    df_crono = compute_cronograma(df)
+    if df_crono is None:
+        st.success("Nenhuma parcela pendente!")
+        return
 
     col1, col2 = st.columns([2, 1])
 
@@ -483,9 +581,7 @@ def _render_cronograma(df, cores):
         # Titulos vencidos
         st.markdown("###### Titulos Vencidos")
 
-        hoje = datetime.now()
-        df_pend['DIAS_VENC'] = (df_pend['VENCIMENTO'] - pd.Timestamp(hoje)).dt.days
-        df_vencidos = df_pend[df_pend['DIAS_VENC'] < 0].sort_values('SALDO', ascending=False)
+        df_vencidos = compute_pendentes_vencidas(df, datetime.now().date())
 
         if len(df_vencidos) == 0:
             st.success("Nenhum titulo vencido!")
@@ -494,7 +590,7 @@ def _render_cronograma(df, cores):
 
             colunas = ['DESCRICAO', 'TIPO', 'NUMERO', 'VENCIMENTO', 'SALDO']
             colunas_disp = [c for c in colunas if c in df_vencidos.columns]
-            df_tab = df_vencidos[colunas_disp].head(20).copy()
+            df_tab = df_vencidos[colunas_disp].head(20)
 
             if 'VENCIMENTO' in df_tab.columns:
                 df_tab['VENCIMENTO'] = df_tab['VENCIMENTO'].dt.strftime('%d/%m/%Y')
@@ -514,6 +610,29 @@ def _render_cronograma(df, cores):
             st.dataframe(df_tab, use_container_width=True, hide_index=True, height=300)
 
 
+@memoizar_secao
+def compute_detalhes(df, ordenar, limite, mostrar):
+    """Ate `limite` parcelas do recorte `mostrar`, na ordem escolhida"""
+    df_show = df
+
+    if mostrar == "Apenas pendentes":
+        df_show = df_show[df_show['SALDO'] > 0]
+    elif mostrar == "Apenas vencidas":
+        df_show = df_show[df_show['STATUS'] == 'Vencido']
+
+    # Ordenar
+    if ordenar == "Vencimento":
+        df_show = df_show.sort_values('VENCIMENTO')
+    elif ordenar == "Maior valor":
+        df_show = df_show.sort_values('VALOR_ORIGINAL', ascending=False)
+    elif ordenar == "Maior saldo":
+        df_show = df_show.sort_values('SALDO', ascending=False)
+    else:
+        df_show = df_show.sort_values('NOME_FORNECEDOR')
+
+    return df_show.head(limite)
+
+
 def _render_detalhes(df, cores):
     """Tabela de detalhes das parcelas"""
 
@@ -531,25 +650,7 @@ def _render_detalhes(df, cores):
     with col3:
         mostrar = st.radio("Mostrar", ["Todas", "Apenas pendentes", "Apenas vencidas"], horizontal=True, key="banco_mostrar")
 
-    # Aplicar filtros
-    df_show = df.copy()
-
-    if mostrar == "Apenas pendentes":
-        df_show = df_show[df_show['SALDO'] > 0]
-    elif mostrar == "Apenas vencidas":
-        df_show = df_show[df_show['STATUS'] == 'Vencido']
-
-    # Ordenar
-    if ordenar == "Vencimento":
-        df_show = df_show.sort_values('VENCIMENTO')
-    elif ordenar == "Maior valor":
-        df_show = df_show.sort_values('VALOR_ORIGINAL', ascending=False)
-    elif ordenar == "Maior saldo":
-        df_show = df_show.sort_values('SALDO', ascending=False)
-    else:
-        df_show = df_show.sort_values('NOME_FORNECEDOR')
-
-    df_show = df_show.head(limite)
+    df_show = compute_detalhes(df, ordenar, limite, mostrar)
 
     if len(df_show) == 0:
         st.info("Nenhum registro encontrado.")
@@ -559,7 +660,7 @@ def _render_detalhes(df, cores):
     colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'NUMERO', 'PARCELA', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO',
                'VALOR_ORIGINAL', 'SALDO', 'VALOR_JUROS', 'STATUS']
     colunas_disp = [c for c in colunas if c in df_show.columns]
-    df_tab = df_show[colunas_disp].copy()
+    df_tab = df_show[colunas_disp]
 
     # Formatar
     for col in ['EMISSAO', 'VENCIMENTO']:
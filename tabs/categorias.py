@@ -11,6 +11,10 @@ from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.abc import curva_abc
+from data.cubo import cubo_agregado
+from data.periodo import SEM_DATA, chave_periodo, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def render_categorias(df):
@@ -22,12 +26,16 @@ def render_categorias(df):
         return
 
     # Filtrar apenas titulos PAGOS (SALDO == 0)
-    df_pagos = df[df['SALDO'] == 0].copy()
+    df_pagos = recorte(df, 'pagos', lambda d: d['SALDO'] == 0)
 
     if len(df_pagos) == 0:
         st.warning("Nenhum titulo pago no periodo selecionado.")
         return
 
+    # Dados agregados por categoria (usando df_pagos)
+    df_cat = compute_dados_categoria(df_pagos)
+    kpis = compute_kpis(df_cat, df_pagos)
+
     # Card informativo
     st.markdown(f"""
     <div style="background: {cores['info']}15; border: 1px solid {cores['info']}50;
@@ -35,15 +43,12 @@ def render_categorias(df):
         <p style="color: {cores['info']}; font-size: 0.9rem; font-weight: 600; margin: 0;">
             Esta analise considera apenas titulos PAGOS (baixados)</p>
         <p style="color: {cores['texto_secundario']}; font-size: 0.8rem; margin: 0.25rem 0 0 0;">
-            {formatar_numero(len(df_pagos))} titulos pagos | {formatar_moeda(df_pagos['VALOR_ORIGINAL'].sum())} em valor total</p>
+            {formatar_numero(len(df_pagos))} titulos pagos | {formatar_moeda(kpis['valor_pagos'])} em valor total</p>
     </div>
     """, unsafe_allow_html=True)
 
-    # Dados agregados por categoria (usando df_pagos)
-    df_cat = _preparar_dados_categoria(df_pagos)
-
     # ========== KPIs ==========
-    _render_kpis(df_cat, df_pagos, cores)
+    _render_kpis(kpis, cores)
 
     st.divider()
 
@@ -106,7 +111,7 @@ def _render_alertas(df, df_cat, df_pagos, cores):
     # 1. Categoria com maior concentracao em um fornecedor
     for _, row in df_cat.head(10).iterrows():
         cat = row['Categoria']
-        df_cat_forn = df[df['DESCRICAO'] == cat].groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum()
+        df_cat_forn = df[df['DESCRICAO'] == cat].groupby('NOME_FORNECEDOR', observed=True)['VALOR_ORIGINAL'].sum()
         if len(df_cat_forn) > 0:
             total_cat = df_cat_forn.sum()
             maior_forn = df_cat_forn.idxmax()
@@ -125,8 +130,8 @@ def _render_alertas(df, df_cat, df_pagos, cores):
     df_anterior = df[(df['EMISSAO'] >= hoje - timedelta(days=180)) & (df['EMISSAO'] < hoje - timedelta(days=90))]
 
     if len(df_atual) > 0 and len(df_anterior) > 0:
-        atual_grp = df_atual.groupby('DESCRICAO')['VALOR_ORIGINAL'].sum()
-        anterior_grp = df_anterior.groupby('DESCRICAO')['VALOR_ORIGINAL'].sum()
+        atual_grp = df_atual.groupby('DESCRICAO', observed=True)['VALOR_ORIGINAL'].sum()
+        anterior_grp = df_anterior.groupby('DESCRICAO', observed=True)['VALOR_ORIGINAL'].sum()
         comparativo = pd.DataFrame({'atual': atual_grp, 'anterior': anterior_grp}).fillna(0)
         comparativo['crescimento'] = ((comparativo['atual'] - comparativo['anterior']) / comparativo['anterior'].replace(0, 1)) * 100
         crescimento_alto = comparativo[(comparativo['crescimento'] > 50) & (comparativo['atual'] > 100000)]
@@ -162,7 +167,7 @@ def _render_alertas(df, df_cat, df_pagos, cores):
                 return None
             return (atraso <= 0).sum() / len(atraso) * 100
 
-        pont_por_cat = df_pagos.groupby('DESCRICAO').apply(calc_pont).dropna()
+        pont_por_cat = df_pagos.groupby('DESCRICAO', observed=True).apply(calc_pont).dropna()
         if len(pont_por_cat) > 0:
             pior_pont = pont_por_cat.nsmallest(1)
             cat = pior_pont.index[0]
@@ -202,10 +207,11 @@ def _render_alertas(df, df_cat, df_pagos, cores):
             """, unsafe_allow_html=True)
 
 
-def _preparar_dados_categoria(df_pagos):
+@memoizar_secao
+def compute_dados_categoria(df_pagos):
     """Prepara dados agregados por categoria (apenas pagos)"""
 
-    df_cat = df_pagos.groupby('DESCRICAO').agg({
+    df_cat = df_pagos.groupby('DESCRICAO', observed=True).agg({
         'VALOR_ORIGINAL': 'sum',
         'FORNECEDOR': 'count',
         'NOME_FORNECEDOR': 'nunique',
@@ -218,29 +224,47 @@ def _preparar_dados_categoria(df_pagos):
     return df_cat
 
 
-def _render_kpis(df_cat, df_pagos, cores):
-    """KPIs principais (apenas pagos)"""
+def _pontualidade_e_prazo(df_pagos):
+    """(% pagos no prazo, prazo medio em dias) dos titulos pagos"""
+    taxa_pontual = 0
+    prazo_medio = 0
+    if len(df_pagos) > 0:
+        if 'DIAS_ATRASO_PGTO' in df_pagos.columns:
+            atraso = df_pagos['DIAS_ATRASO_PGTO'].dropna()
+            if len(atraso) > 0:
+                taxa_pontual = (atraso <= 0).sum() / len(atraso) * 100
 
-    total_categorias = len(df_cat)
-    total_valor = df_cat['Total'].sum()
-    total_titulos = df_cat['Qtd'].sum()
+        if 'DIAS_PARA_PAGAR' in df_pagos.columns:
+            prazo = df_pagos['DIAS_PARA_PAGAR'].dropna()
+            if len(prazo) > 0:
+                prazo_medio = prazo.mean()
+    return taxa_pontual, prazo_medio
 
-    # Taxa pontualidade geral
-    taxa_pontual = 0
-    if len(df_pagos) > 0 and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
-        atraso = df_pagos['DIAS_ATRASO_PGTO'].dropna()
-        if len(atraso) > 0:
-            taxa_pontual = (atraso <= 0).sum() / len(atraso) * 100
 
-    # Prazo medio geral
-    prazo_medio = 0
-    if len(df_pagos) > 0 and 'DIAS_PARA_PAGAR' in df_pagos.columns:
-        prazo = df_pagos['DIAS_PARA_PAGAR'].dropna()
-        if len(prazo) > 0:
-            prazo_medio = prazo.mean()
+@memoizar_secao
+def compute_kpis(df_cat, df_pagos):
+    """Totais, pontualidade, prazo medio e fornecedores unicos (apenas pagos)"""
+    taxa_pontual, prazo_medio = _pontualidade_e_prazo(df_pagos)
+    return {
+        'valor_pagos': df_pagos['VALOR_ORIGINAL'].sum(),
+        'total_categorias': len(df_cat),
+        'total_valor': df_cat['Total'].sum(),
+        'total_titulos': df_cat['Qtd'].sum(),
+        'taxa_pontual': taxa_pontual,
+        'prazo_medio': prazo_medio,
+        'total_fornecedores': df_pagos['NOME_FORNECEDOR'].nunique() if 'NOME_FORNECEDOR' in df_pagos.columns else 0,
+    }
+
 
-    # Fornecedores unicos
-    total_fornecedores = df_pagos['NOME_FORNECEDOR'].nunique() if 'NOME_FORNECEDOR' in df_pagos.columns else 0
+def _render_kpis(kpis, cores):
+    """KPIs principais (apenas pagos)"""
+
+    total_categorias = kpis['total_categorias']
+    total_valor = kpis['total_valor']
+    total_titulos = kpis['total_titulos']
+    taxa_pontual = kpis['taxa_pontual']
+    prazo_medio = kpis['prazo_medio']
+    total_fornecedores = kpis['total_fornecedores']
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -286,7 +310,7 @@ def _render_treemap(df_cat, cores):
 
     st.markdown("##### Treemap - Distribuicao")
 
-    df_tree = df_cat.head(15).copy()
+    df_tree = df_cat.head(15)
 
     if len(df_tree) == 0:
         st.info("Sem dados")
@@ -316,29 +340,43 @@ def _render_treemap(df_cat, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_top_categorias(df, n):
+    """Nomes das n categorias de maior valor"""
+    return tuple(df.groupby('DESCRICAO', observed=True)['VALOR_ORIGINAL'].sum().nlargest(n).index)
+
+
+@memoizar_secao
+def compute_evolucao_mensal(df, n=5):
+    """Pivot mes x categoria das top n categorias"""
+    top = compute_top_categorias(df, n)
+    df_top = df[df['DESCRICAO'].isin(top)]
+    df_top['MES'] = chave_periodo(df_top, 'EMISSAO', 'AAAAMM')
+
+    pivot = df_top[df_top['MES'] != SEM_DATA].pivot_table(
+        values='VALOR_ORIGINAL',
+        index='MES',
+        columns='DESCRICAO',
+        aggfunc='sum',
+        fill_value=0, observed=True
+    ).reset_index()
+    pivot['MES'] = rotulo_mes(pivot['MES'])
+    return pivot
+
+
 def _render_evolucao_mensal(df, cores):
     """Evolucao mensal das Top 5 categorias"""
 
     st.markdown("##### Evolucao Mensal - Top 5 Categorias")
 
     # Identificar top 5 categorias por valor total
-    top5 = df.groupby('DESCRICAO')['VALOR_ORIGINAL'].sum().nlargest(5).index.tolist()
+    top5 = compute_top_categorias(df, 5)
 
     if len(top5) == 0:
         st.info("Dados insuficientes")
         return
 
-    # Filtrar e agrupar por mes
-    df_top = df[df['DESCRICAO'].isin(top5)].copy()
-    df_top['MES'] = df_top['EMISSAO'].dt.to_period('M').astype(str)
-
-    df_pivot = df_top.pivot_table(
-        values='VALOR_ORIGINAL',
-        index='MES',
-        columns='DESCRICAO',
-        aggfunc='sum',
-        fill_value=0
-    ).reset_index()
+    df_pivot = compute_evolucao_mensal(df, 5)
 
     if len(df_pivot) < 2:
         st.info("Historico insuficiente")
@@ -378,6 +416,24 @@ def _render_evolucao_mensal(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_pareto_abc(df_cat):
+    """Categorias ordenadas por valor com Pct, Acumulado e Classe ABC"""
+    # Classe pelo acumulado ate a categoria anterior:
+    # a primeira categoria que cruza o limiar fica na classe anterior
+    df_pareto = curva_abc(df_cat[['Categoria', 'Total', 'Qtd', 'Fornecedores']], 'Categoria', 'Total', pela_anterior=True)
+    return df_pareto.rename(columns={'PCT': 'Pct', 'PCT_ACUM': 'Acumulado', 'CLASSE': 'Classe'})
+
+
+@memoizar_secao
+def compute_resumo_abc(df_pareto):
+    """{classe: (quantidade, valor)} da curva ABC"""
+    return {
+        classe: (len(df_pareto[df_pareto['Classe'] == classe]), df_pareto[df_pareto['Classe'] == classe]['Total'].sum())
+        for classe in ('A', 'B', 'C')
+    }
+
+
 def _render_pareto_abc(df_cat, cores):
     """Analise Pareto / Curva ABC de categorias (valores pagos)"""
 
@@ -387,38 +443,16 @@ def _render_pareto_abc(df_cat, cores):
         st.info("Sem dados")
         return
 
-    df_pareto = df_cat[['Categoria', 'Total', 'Qtd', 'Fornecedores']].copy()
-    df_pareto = df_pareto.sort_values('Total', ascending=False).reset_index(drop=True)
-
-    total_geral = df_pareto['Total'].sum()
-    if total_geral == 0:
+    df_pareto = compute_pareto_abc(df_cat)
+    if len(df_pareto) == 0:
         st.info("Sem valores para analise")
         return
+    total_geral = df_pareto['Total'].sum()
 
-    df_pareto['Pct'] = df_pareto['Total'] / total_geral * 100
-    df_pareto['Acumulado'] = df_pareto['Pct'].cumsum()
-
-    # Classificacao ABC
-    df_pareto['Classe'] = df_pareto['Acumulado'].apply(
-        lambda x: 'A' if x <= 80 else ('B' if x <= 95 else 'C')
-    )
-    # A primeira categoria que cruza o limiar fica na classe anterior
-    for i in range(len(df_pareto)):
-        if i == 0:
-            df_pareto.loc[i, 'Classe'] = 'A'
-        elif df_pareto.loc[i - 1, 'Acumulado'] < 80:
-            df_pareto.loc[i, 'Classe'] = 'A'
-        elif df_pareto.loc[i - 1, 'Acumulado'] < 95:
-            df_pareto.loc[i, 'Classe'] = 'B'
-        else:
-            df_pareto.loc[i, 'Classe'] = 'C'
-
-    qtd_a = len(df_pareto[df_pareto['Classe'] == 'A'])
-    qtd_b = len(df_pareto[df_pareto['Classe'] == 'B'])
-    qtd_c = len(df_pareto[df_pareto['Classe'] == 'C'])
-    val_a = df_pareto[df_pareto['Classe'] == 'A']['Total'].sum()
-    val_b = df_pareto[df_pareto['Classe'] == 'B']['Total'].sum()
-    val_c = df_pareto[df_pareto['Classe'] == 'C']['Total'].sum()
+    resumo = compute_resumo_abc(df_pareto)
+    qtd_a, val_a = resumo['A']
+    qtd_b, val_b = resumo['B']
+    qtd_c, val_c = resumo['C']
 
     # Cards ABC
     st.markdown(f"""
@@ -451,7 +485,7 @@ def _render_pareto_abc(df_cat, cores):
     """, unsafe_allow_html=True)
 
     # Grafico - barras horizontais por classe
-    df_plot = df_pareto.head(15).copy()
+    df_plot = df_pareto.head(15)
     df_plot = df_plot.sort_values('Total', ascending=True)
 
     cor_classe = {'A': cores['perigo'], 'B': cores['alerta'], 'C': cores['sucesso']}
@@ -480,7 +514,7 @@ def _render_pareto_abc(df_cat, cores):
 
     # Tabela resumo ABC
     with st.expander("Ver detalhes da classificacao ABC"):
-        df_abc = df_pareto[['Categoria', 'Total', 'Pct', 'Acumulado', 'Classe', 'Qtd', 'Fornecedores']].copy()
+        df_abc = df_pareto[['Categoria', 'Total', 'Pct', 'Acumulado', 'Classe', 'Qtd', 'Fornecedores']]
         df_abc['Total'] = df_abc['Total'].apply(formatar_moeda)
         df_abc['Pct'] = df_abc['Pct'].apply(lambda x: f"{x:.1f}%")
         df_abc['Acumulado'] = df_abc['Acumulado'].apply(lambda x: f"{x:.1f}%")
@@ -488,13 +522,31 @@ def _render_pareto_abc(df_cat, cores):
         st.dataframe(df_abc, use_container_width=True, hide_index=True, height=400)
 
 
+@memoizar_secao
+def compute_sazonalidade(df, categoria):
+    """Media historica por mes do ano de uma categoria"""
+    df_cat = df[df['DESCRICAO'] == categoria]
+    df_cat['MES_NUM'] = chave_periodo(df_cat, 'EMISSAO', 'MES')
+
+    df_sazon = df_cat[df_cat['MES_NUM'] != SEM_DATA].groupby('MES_NUM', observed=True)['VALOR_ORIGINAL'].mean().reset_index()
+    df_sazon['MES_NOME'] = df_sazon['MES_NUM'].map({
+        1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
+        7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
+    })
+
+    # Desvio de cada mes em relacao a media
+    media_geral = df_sazon['VALOR_ORIGINAL'].mean()
+    df_sazon['DESVIO'] = ((df_sazon['VALOR_ORIGINAL'] - media_geral) / media_geral * 100)
+    return df_sazon
+
+
 def _render_sazonalidade(df, cores):
     """Analise de sazonalidade por categoria"""
 
     st.markdown("##### Sazonalidade - Padrao Mensal")
 
     # Top 6 categorias
-    top6 = df.groupby('DESCRICAO')['VALOR_ORIGINAL'].sum().nlargest(6).index.tolist()
+    top6 = list(compute_top_categorias(df, 6))
 
     if len(top6) == 0:
         st.info("Dados insuficientes")
@@ -509,24 +561,14 @@ def _render_sazonalidade(df, cores):
             key='sazon_cat'
         )
 
-    df_cat = df[df['DESCRICAO'] == categoria_sel].copy()
-    df_cat['MES_NUM'] = df_cat['EMISSAO'].dt.month
-
-    # Agrupar por mes do ano (media historica)
-    df_sazon = df_cat.groupby('MES_NUM')['VALOR_ORIGINAL'].mean().reset_index()
-    df_sazon['MES_NOME'] = df_sazon['MES_NUM'].map({
-        1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
-        7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
-    })
+    df_sazon = compute_sazonalidade(df, categoria_sel)
 
     with col2:
         if len(df_sazon) < 3:
             st.info("Historico insuficiente para analise de sazonalidade")
             return
 
-        # Identificar meses de pico e baixa
         media_geral = df_sazon['VALOR_ORIGINAL'].mean()
-        df_sazon['DESVIO'] = ((df_sazon['VALOR_ORIGINAL'] - media_geral) / media_geral * 100)
 
         # Cores baseadas no desvio
         def cor_sazon(desvio):
@@ -587,6 +629,7 @@ def _get_nome_grupo_cat(cod_filial):
     grupo_id = get_grupo_filial(int(cod_filial))
     return GRUPOS_FILIAIS.get(grupo_id, f"Grupo {grupo_id}")
 
+@memoizar_secao
 def _detectar_multiplos_grupos_cat(df):
     if 'FILIAL' not in df.columns or len(df) == 0:
         return False
@@ -594,41 +637,42 @@ def _detectar_multiplos_grupos_cat(df):
     return grupos > 1
 
 
+@memoizar_secao
+def compute_matriz_filial_categoria(df, multiplos):
+    """Pivot (grupo ou filial) x top 10 categorias"""
+    cubo = cubo_agregado(df)
+    filtro = {'DESCRICAO': list(compute_top_categorias(df, 10))}
+
+    if multiplos:
+        df_matriz = cubo.agregar(['GRUPO', 'DESCRICAO'], filtro)
+        df_matriz['LABEL'] = df_matriz['GRUPO']
+    else:
+        df_matriz = cubo.agregar(['FILIAL', 'NOME_FILIAL', 'DESCRICAO'], filtro)
+        df_matriz['LABEL'] = df_matriz['FILIAL'].astype(int).astype(str) + ' - ' + df_matriz['NOME_FILIAL'].astype(str).str.split(' - ').str[-1].str.strip()
+    pivot = df_matriz.pivot_table(
+        values='VALOR_ORIGINAL',
+        index='LABEL',
+        columns='DESCRICAO',
+        aggfunc='sum',
+        fill_value=0, observed=True
+    )
+    return pivot
+
+
 def _render_matriz_filial_categoria(df, cores):
     """Matriz Filial x Categoria (Heatmap)"""
 
     multiplos = _detectar_multiplos_grupos_cat(df)
 
     # Top 10 categorias
-    top10_cat = df.groupby('DESCRICAO')['VALOR_ORIGINAL'].sum().nlargest(10).index.tolist()
+    top10_cat = compute_top_categorias(df, 10)
 
     if len(top10_cat) == 0 or 'NOME_FILIAL' not in df.columns:
         st.info("Dados insuficientes")
         return
 
-    # Filtrar e criar pivot
-    df_matriz = df[df['DESCRICAO'].isin(top10_cat)].copy()
-
-    if multiplos:
-        st.markdown("##### Matriz Grupo x Categoria")
-        df_matriz['GRUPO'] = df_matriz['FILIAL'].apply(lambda x: _get_nome_grupo_cat(x))
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='GRUPO',
-            columns='DESCRICAO',
-            aggfunc='sum',
-            fill_value=0
-        )
-    else:
-        st.markdown("##### Matriz Filial x Categoria")
-        df_matriz['FILIAL_LABEL'] = df_matriz['FILIAL'].astype(int).astype(str) + ' - ' + df_matriz['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='FILIAL_LABEL',
-            columns='DESCRICAO',
-            aggfunc='sum',
-            fill_value=0
-        )
+    st.markdown("##### Matriz Grupo x Categoria" if multiplos else "##### Matriz Filial x Categoria")
+    pivot = compute_matriz_filial_categoria(df, multiplos)
 
     if pivot.empty:
         st.info("Dados insuficientes para matriz")
@@ -669,12 +713,10 @@ def _render_matriz_filial_categoria(df, cores):
                         st.caption(f"⚠️ **{cat[:25]}**: {pct_max:.0f}% concentrado em {max_filial}")
 
 
-def _render_donut(df_cat, cores):
-    """Donut das top 8 categorias"""
-
-    st.markdown("##### Top 8 Categorias")
-
-    df_top = df_cat.head(8).copy()
+@memoizar_secao
+def compute_donut(df_cat):
+    """Top 8 categorias e o restante somado em 'Outros'"""
+    df_top = df_cat.head(8)
     outros = df_cat.iloc[8:]['Total'].sum() if len(df_cat) > 8 else 0
 
     if outros > 0:
@@ -682,6 +724,15 @@ def _render_donut(df_cat, cores):
             'Categoria': 'Outros',
             'Total': outros
         }])], ignore_index=True)
+    return df_top
+
+
+def _render_donut(df_cat, cores):
+    """Donut das top 8 categorias"""
+
+    st.markdown("##### Top 8 Categorias")
+
+    df_top = compute_donut(df_cat)
 
     if len(df_top) == 0:
         st.info("Sem dados")
@@ -714,6 +765,18 @@ def _render_donut(df_cat, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_prazo_por_categoria(df_pagos, n=10):
+    """Top n categorias com maior prazo medio de pagamento"""
+    df_prazo = df_pagos.groupby('DESCRICAO', observed=True).agg({
+        'DIAS_PARA_PAGAR': 'mean',
+        'VALOR_ORIGINAL': 'sum'
+    }).reset_index()
+    df_prazo.columns = ['Categoria', 'Prazo', 'Valor']
+    df_prazo = df_prazo.dropna(subset=['Prazo'])
+    return df_prazo.nlargest(n, 'Prazo')
+
+
 def _render_prazo_por_categoria(df_pagos, cores):
     """Prazo medio por categoria"""
 
@@ -723,15 +786,8 @@ def _render_prazo_por_categoria(df_pagos, cores):
         st.info("Sem dados de pagamento")
         return
 
-    df_prazo = df_pagos.groupby('DESCRICAO').agg({
-        'DIAS_PARA_PAGAR': 'mean',
-        'VALOR_ORIGINAL': 'sum'
-    }).reset_index()
-    df_prazo.columns = ['Categoria', 'Prazo', 'Valor']
-    df_prazo = df_prazo.dropna(subset=['Prazo'])
-
     # Top 10 com maior prazo
-    df_top = df_prazo.nlargest(10, 'Prazo')
+    df_top = compute_prazo_por_categoria(df_pagos)
 
     def cor_prazo(p):
         if p <= 30:
@@ -770,7 +826,7 @@ def _render_top_categorias(df_cat, cores):
 
     st.markdown("##### Top 10 Categorias - Valor Pago")
 
-    df_top = df_cat.head(10).copy()
+    df_top = df_cat.head(10)
     df_top = df_top.sort_values('Total', ascending=True)
 
     if len(df_top) == 0:
@@ -799,12 +855,60 @@ def _render_top_categorias(df_cat, cores):
 
 
 
+@memoizar_secao
+def compute_categorias(df_pagos):
+    """Categorias disponiveis para consulta, em ordem alfabetica"""
+    return sorted(df_pagos['DESCRICAO'].unique().tolist())
+
+
+@memoizar_secao
+def compute_resumo_categoria(df_sel):
+    """Valor, quantidade, prazo medio, pontualidade e fornecedores de uma categoria"""
+    taxa_pontual, prazo_medio = _pontualidade_e_prazo(df_sel)
+    return {
+        'total_valor': df_sel['VALOR_ORIGINAL'].sum(),
+        'qtd_titulos': len(df_sel),
+        'prazo_medio': prazo_medio,
+        'taxa_pontual': taxa_pontual,
+        'fornecedores': df_sel['NOME_FORNECEDOR'].nunique(),
+    }
+
+
+@memoizar_secao
+def compute_fornecedores_categoria(df_sel):
+    """Top 10 fornecedores da categoria por valor"""
+    df_forn = df_sel.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'NUMERO': 'count'
+    }).nlargest(10, 'VALOR_ORIGINAL').reset_index()
+    df_forn.columns = ['Fornecedor', 'Valor', 'Qtd']
+    return df_forn.sort_values('Valor', ascending=True)
+
+
+@memoizar_secao
+def compute_filiais_categoria(df_sel):
+    """Valor da categoria por grupo (se houver mais de um) ou por filial"""
+    if _detectar_multiplos_grupos_cat(df_sel):
+        label = df_sel['FILIAL'].apply(lambda x: _get_nome_grupo_cat(x))
+    else:
+        label = df_sel['FILIAL'].astype(int).astype(str) + ' - ' + df_sel['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
+    return df_sel['VALOR_ORIGINAL'].groupby(label, observed=True).sum().rename_axis('LABEL').reset_index()
+
+
+@memoizar_secao
+def compute_titulos_categoria(df_sel):
+    """50 maiores titulos da categoria (so as colunas exibidas)"""
+    colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'TIPO', 'NUMERO', 'EMISSAO', 'VENCIMENTO', 'DT_BAIXA', 'DIAS_PARA_PAGAR', 'VALOR_ORIGINAL']
+    colunas_disp = [c for c in colunas if c in df_sel.columns]
+    return df_sel[colunas_disp].nlargest(50, 'VALOR_ORIGINAL')
+
+
 def _render_busca_categoria(df_pagos, cores):
     """Busca e detalhes de categoria (apenas pagos)"""
 
     st.markdown("##### Consultar Categoria")
 
-    categorias = sorted(df_pagos['DESCRICAO'].unique().tolist())
+    categorias = compute_categorias(df_pagos)
 
     categoria_sel = st.selectbox(
         "Selecione uma categoria",
@@ -815,43 +919,29 @@ def _render_busca_categoria(df_pagos, cores):
     if not categoria_sel:
         return
 
-    df_sel = df_pagos[df_pagos['DESCRICAO'] == categoria_sel]
+    df_sel = recorte(df_pagos, ('categoria', categoria_sel), lambda d: d['DESCRICAO'] == categoria_sel)
 
     # Metricas
-    total_valor = df_sel['VALOR_ORIGINAL'].sum()
-    qtd_titulos = len(df_sel)
+    resumo = compute_resumo_categoria(df_sel)
+    total_valor = resumo['total_valor']
+    qtd_titulos = resumo['qtd_titulos']
 
     # Metricas de pagamento
-    prazo_medio = 0
-    taxa_pontual = 0
-    if len(df_sel) > 0:
-        if 'DIAS_PARA_PAGAR' in df_sel.columns:
-            prazo = df_sel['DIAS_PARA_PAGAR'].dropna()
-            if len(prazo) > 0:
-                prazo_medio = prazo.mean()
-
-        if 'DIAS_ATRASO_PGTO' in df_sel.columns:
-            atraso = df_sel['DIAS_ATRASO_PGTO'].dropna()
-            if len(atraso) > 0:
-                taxa_pontual = (atraso <= 0).sum() / len(atraso) * 100
+    prazo_medio = resumo['prazo_medio']
+    taxa_pontual = resumo['taxa_pontual']
 
     # Linha 1: Metricas
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Valor Pago", formatar_moeda(total_valor), f"{qtd_titulos} titulos")
     col2.metric("Prazo Medio Pgto", f"{prazo_medio:.0f} dias")
     col3.metric("Taxa Pontualidade", f"{taxa_pontual:.1f}%")
-    col4.metric("Fornecedores", df_sel['NOME_FORNECEDOR'].nunique())
+    col4.metric("Fornecedores", resumo['fornecedores'])
 
     # Tabs
     tab1, tab2, tab3 = st.tabs(["Por Fornecedor", "Por Filial", "Titulos"])
 
     with tab1:
-        df_forn = df_sel.groupby('NOME_FORNECEDOR').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).nlargest(10, 'VALOR_ORIGINAL').reset_index()
-        df_forn.columns = ['Fornecedor', 'Valor', 'Qtd']
-        df_forn = df_forn.sort_values('Valor', ascending=True)
+        df_forn = compute_fornecedores_categoria(df_sel)
 
         if len(df_forn) > 0:
             fig = go.Figure(go.Bar(
@@ -872,24 +962,12 @@ def _render_busca_categoria(df_pagos, cores):
             st.plotly_chart(fig, use_container_width=True)
 
     with tab2:
-        multiplos_busca = _detectar_multiplos_grupos_cat(df_sel)
-        if multiplos_busca:
-            df_fil = df_sel.copy()
-            df_fil['GRUPO'] = df_fil['FILIAL'].apply(lambda x: _get_nome_grupo_cat(x))
-            df_fil = df_fil.groupby('GRUPO')['VALOR_ORIGINAL'].sum().reset_index()
-            pie_labels = df_fil['GRUPO']
-            pie_values = df_fil['VALOR_ORIGINAL']
-        else:
-            df_fil = df_sel.copy()
-            df_fil['FILIAL_LABEL'] = df_fil['FILIAL'].astype(int).astype(str) + ' - ' + df_fil['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-            df_fil = df_fil.groupby('FILIAL_LABEL')['VALOR_ORIGINAL'].sum().reset_index()
-            pie_labels = df_fil['FILIAL_LABEL']
-            pie_values = df_fil['VALOR_ORIGINAL']
+        df_fil = compute_filiais_categoria(df_sel)
 
         if len(df_fil) > 0:
             fig = go.Figure(go.Pie(
-                labels=pie_labels,
-                values=pie_values,
+                labels=df_fil['LABEL'],
+                values=df_fil['VALOR_ORIGINAL'],
                 hole=0.4,
                 textinfo='percent+label',
                 textfont=dict(size=10)
@@ -902,9 +980,7 @@ def _render_busca_categoria(df_pagos, cores):
             st.plotly_chart(fig, use_container_width=True)
 
     with tab3:
-        colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'TIPO', 'NUMERO', 'EMISSAO', 'VENCIMENTO', 'DT_BAIXA', 'DIAS_PARA_PAGAR', 'VALOR_ORIGINAL']
-        colunas_disp = [c for c in colunas if c in df_sel.columns]
-        df_tab = df_sel[colunas_disp].nlargest(50, 'VALOR_ORIGINAL').copy()
+        df_tab = compute_titulos_categoria(df_sel)
 
         for col in ['EMISSAO', 'VENCIMENTO', 'DT_BAIXA']:
             if col in df_tab.columns:
@@ -932,50 +1008,30 @@ def _render_busca_categoria(df_pagos, cores):
         st.dataframe(df_tab, use_container_width=True, hide_index=True, height=300)
 
 
-def _render_ranking(df_cat, df_pagos, cores):
-    """Ranking completo (apenas pagos)"""
+def _prazo_medio(prazo):
+    prazo = prazo.dropna()
+    return prazo.mean() if len(prazo) > 0 else None
 
-    st.markdown("##### Ranking de Categorias")
 
-    # Filtros
-    col1, col2 = st.columns(2)
-    with col1:
-        ordenar = st.selectbox(
-            "Ordenar por",
-            ["Valor Pago", "Prazo Medio", "Pontualidade", "Qtd Titulos"],
-            key="cat_ordem"
-        )
-    with col2:
-        qtd_exibir = st.selectbox("Exibir", [15, 30, 50], key="cat_qtd")
-
-    # Adicionar metricas de pagamento
-    df_rank = df_cat.copy()
-
-    if len(df_pagos) > 0:
-        def calc_metricas(cat):
-            df_c = df_pagos[df_pagos['DESCRICAO'] == cat]
-            if len(df_c) == 0:
-                return pd.Series({'Prazo': None, 'Pontualidade': None})
+def _taxa_pontualidade(atraso):
+    atraso = atraso.dropna()
+    return (atraso <= 0).sum() / len(atraso) * 100 if len(atraso) > 0 else None
 
-            prazo = None
-            pont = None
 
-            if 'DIAS_PARA_PAGAR' in df_c.columns:
-                p = df_c['DIAS_PARA_PAGAR'].dropna()
-                if len(p) > 0:
-                    prazo = p.mean()
+@memoizar_secao
+def compute_ranking(df_cat, df_pagos, ordenar, qtd_exibir):
+    """Categorias com prazo medio e pontualidade, ordenadas e limitadas"""
+    df_rank = df_cat.copy(deep=False)
 
-            if 'DIAS_ATRASO_PGTO' in df_c.columns:
-                a = df_c['DIAS_ATRASO_PGTO'].dropna()
-                if len(a) > 0:
-                    pont = (a <= 0).sum() / len(a) * 100
-
-            return pd.Series({'Prazo': prazo, 'Pontualidade': pont})
-
-        metricas = df_rank['Categoria'].apply(calc_metricas)
-        df_rank = pd.concat([df_rank, metricas], axis=1)
+    # Metricas de pagamento por categoria
+    por_categoria = df_pagos.groupby('DESCRICAO', observed=True)
+    if len(df_pagos) > 0 and 'DIAS_PARA_PAGAR' in df_pagos.columns:
+        df_rank['Prazo'] = por_categoria['DIAS_PARA_PAGAR'].apply(_prazo_medio).reindex(df_rank['Categoria']).to_numpy()
     else:
         df_rank['Prazo'] = None
+    if len(df_pagos) > 0 and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
+        df_rank['Pontualidade'] = por_categoria['DIAS_ATRASO_PGTO'].apply(_taxa_pontualidade).reindex(df_rank['Categoria']).to_numpy()
+    else:
         df_rank['Pontualidade'] = None
 
     # Ordenar
@@ -988,10 +1044,29 @@ def _render_ranking(df_cat, df_pagos, cores):
     else:
         df_rank = df_rank.sort_values('Pontualidade', ascending=True, na_position='last')
 
-    df_rank = df_rank.head(qtd_exibir)
+    return df_rank.head(qtd_exibir)
+
+
+def _render_ranking(df_cat, df_pagos, cores):
+    """Ranking completo (apenas pagos)"""
+
+    st.markdown("##### Ranking de Categorias")
+
+    # Filtros
+    col1, col2 = st.columns(2)
+    with col1:
+        ordenar = st.selectbox(
+            "Ordenar por",
+            ["Valor Pago", "Prazo Medio", "Pontualidade", "Qtd Titulos"],
+            key="cat_ordem"
+        )
+    with col2:
+        qtd_exibir = st.selectbox("Exibir", [15, 30, 50], key="cat_qtd")
+
+    df_rank = compute_ranking(df_cat, df_pagos, ordenar, qtd_exibir)
 
     # Formatar
-    df_show = df_rank[['Categoria', 'Total', 'Qtd', 'Fornecedores', 'Prazo', 'Pontualidade']].copy()
+    df_show = df_rank[['Categoria', 'Total', 'Qtd', 'Fornecedores', 'Prazo', 'Pontualidade']]
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Prazo'] = df_show['Prazo'].apply(lambda x: f"{x:.0f}d" if pd.notna(x) else '-')
     df_show['Pontualidade'] = df_show['Pontualidade'].apply(lambda x: f"{x:.0f}%" if pd.notna(x) else '-')
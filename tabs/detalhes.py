@@ -3,15 +3,22 @@ Aba Detalhes - Consulta e busca avancada de titulos
 Foco: Busca, filtros avancados, tabela completa e exportacao
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 from config.theme import get_cores
+from data.busca import buscar
+from data.secoes import memoizar_secao, recorte
 from utils.formatters import formatar_moeda, formatar_numero, to_excel
 
 
-def render_detalhes(df):
-    """Renderiza a aba de Detalhes - Consulta de Titulos"""
+def render_detalhes(df, busca_documentos=None):
+    """Renderiza a aba de Detalhes - Consulta de Titulos
+
+    busca_documentos: {coluna: BuscaColuna} de NUMERO/DOCUMENTO montado sobre a base
+    (indice_documentos no loader); o indice de df sao as linhas dessa base
+    """
     cores = get_cores()
     hoje = datetime.now()
 
@@ -34,8 +41,10 @@ def render_detalhes(df):
             placeholder="Todos"
         )
 
+    opcoes = compute_opcoes_filtros(df)
+
     with col2:
-        filiais = sorted(df['NOME_FILIAL'].dropna().unique().tolist())
+        filiais = opcoes['filiais']
         filtro_filial = st.multiselect(
             "Filial",
             options=filiais,
@@ -45,7 +54,7 @@ def render_detalhes(df):
         )
 
     with col3:
-        categorias = sorted(df['DESCRICAO'].dropna().unique().tolist())
+        categorias = opcoes['categorias']
         filtro_categoria = st.multiselect(
             "Categoria",
             options=categorias,
@@ -55,7 +64,7 @@ def render_detalhes(df):
         )
 
     with col4:
-        formas_pagto = sorted(df['DESCRICAO_FORMA_PAGAMENTO'].dropna().unique().tolist()) if 'DESCRICAO_FORMA_PAGAMENTO' in df.columns else []
+        formas_pagto = opcoes['formas']
         filtro_forma = st.multiselect(
             "Forma Pagto",
             options=formas_pagto,
@@ -134,22 +143,19 @@ def render_detalhes(df):
         )
 
     # ========== APLICAR FILTROS ==========
-    df_filtrado = _aplicar_filtros(df)
+    df_filtrado = _aplicar_filtros(df, busca_documentos)
 
     st.divider()
 
     # ========== RESUMO DOS RESULTADOS ==========
+    resumo = compute_resumo(df_filtrado)
     col1, col2, col3, col4, col5 = st.columns(5)
 
-    col1.metric("Titulos", formatar_numero(len(df_filtrado)))
-    col2.metric("Valor Total", formatar_moeda(df_filtrado['VALOR_ORIGINAL'].sum()))
-    col3.metric("Pendente", formatar_moeda(df_filtrado['SALDO'].sum()))
-
-    qtd_vencidos = len(df_filtrado[df_filtrado['STATUS'] == 'Vencido'])
-    col4.metric("Vencidos", formatar_numero(qtd_vencidos))
-
-    qtd_fornecedores = df_filtrado['NOME_FORNECEDOR'].nunique()
-    col5.metric("Fornecedores", formatar_numero(qtd_fornecedores))
+    col1.metric("Titulos", formatar_numero(resumo['qtd']))
+    col2.metric("Valor Total", formatar_moeda(resumo['total']))
+    col3.metric("Pendente", formatar_moeda(resumo['saldo']))
+    col4.metric("Vencidos", formatar_numero(resumo['vencidos']))
+    col5.metric("Fornecedores", formatar_numero(resumo['fornecedores']))
 
     # ========== TABS ==========
     tab1, tab2, tab3 = st.tabs(["Titulos", "Por Fornecedor", "Exportar"])
@@ -164,76 +170,119 @@ def render_detalhes(df):
         _render_exportar(df_filtrado, hoje)
 
 
-def _aplicar_filtros(df):
-    """Aplica todos os filtros selecionados"""
-    df_filtrado = df.copy()
+@memoizar_secao
+def compute_opcoes_filtros(df):
+    """Opcoes dos multiselects (filiais, categorias, formas de pagamento)"""
+    def opcoes(col):
+        return sorted(df[col].dropna().unique().tolist()) if col in df.columns else []
 
-    # Status
-    if st.session_state.get('det_status'):
-        df_filtrado = df_filtrado[df_filtrado['STATUS'].isin(st.session_state.det_status)]
-
-    # Filial
-    if st.session_state.get('det_filial'):
-        df_filtrado = df_filtrado[df_filtrado['NOME_FILIAL'].isin(st.session_state.det_filial)]
+    return {
+        'filiais': opcoes('NOME_FILIAL'),
+        'categorias': opcoes('DESCRICAO'),
+        'formas': opcoes('DESCRICAO_FORMA_PAGAMENTO'),
+    }
 
-    # Categoria
-    if st.session_state.get('det_categoria'):
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO'].isin(st.session_state.det_categoria)]
 
-    # Forma de pagamento
-    if st.session_state.get('det_forma') and 'DESCRICAO_FORMA_PAGAMENTO' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO_FORMA_PAGAMENTO'].isin(st.session_state.det_forma)]
+def _filtros_sessao():
+    """Filtros da aba lidos do session_state (tupla hashable, parte da chave do recorte)"""
+    estado = st.session_state
+    return (
+        tuple(estado.get('det_status') or ()),
+        tuple(estado.get('det_filial') or ()),
+        tuple(estado.get('det_categoria') or ()),
+        tuple(estado.get('det_forma') or ()),
+        estado.get('det_busca_forn', ''),
+        estado.get('det_busca_num', ''),
+        estado.get('det_tipo', 'Todos'),
+        estado.get('det_tipo_doc', 'Todos'),
+        estado.get('det_valor_min', 0),
+        estado.get('det_valor_max', 0),
+        estado.get('det_venc_inicio'),
+        estado.get('det_venc_fim'),
+    )
+
+
+def _mascara_filtros(df, filtros, busca_documentos=None):
+    """Mascara booleana de df com os filtros da aba (ver _filtros_sessao)"""
+    (status, filiais, categorias, formas, busca_forn, busca_num, filtro_tipo, filtro_tipo_doc,
+     valor_min, valor_max, venc_inicio, venc_fim) = filtros
+    mask = pd.Series(True, index=df.index)
+
+    # Status, filial, categoria e forma de pagamento
+    if status:
+        mask &= df['STATUS'].isin(status)
+    if filiais:
+        mask &= df['NOME_FILIAL'].isin(filiais)
+    if categorias:
+        mask &= df['DESCRICAO'].isin(categorias)
+    if formas and 'DESCRICAO_FORMA_PAGAMENTO' in df.columns:
+        mask &= df['DESCRICAO_FORMA_PAGAMENTO'].isin(formas)
 
     # Busca fornecedor
-    busca_forn = st.session_state.get('det_busca_forn', '')
     if busca_forn:
-        df_filtrado = df_filtrado[
-            df_filtrado['NOME_FORNECEDOR'].str.contains(busca_forn, case=False, na=False)
-        ]
+        mask &= buscar(df['NOME_FORNECEDOR'], busca_forn)
 
     # Busca numero/documento
-    busca_num = st.session_state.get('det_busca_num', '')
     if busca_num:
-        mask = pd.Series([False] * len(df_filtrado), index=df_filtrado.index)
-        if 'NUMERO' in df_filtrado.columns:
-            mask |= df_filtrado['NUMERO'].astype(str).str.contains(busca_num, case=False, na=False)
-        if 'DOCUMENTO' in df_filtrado.columns:
-            mask |= df_filtrado['DOCUMENTO'].astype(str).str.contains(busca_num, case=False, na=False)
-        df_filtrado = df_filtrado[mask]
+        achados = np.zeros(len(df), dtype=bool)
+        for col in ('NUMERO', 'DOCUMENTO'):
+            if col not in df.columns:
+                continue
+            if busca_documentos is not None and col in busca_documentos:
+                # Indice da versao dos dados: custo proporcional as linhas encontradas
+                achados |= busca_documentos[col].contem(busca_num, df.index)
+            else:
+                achados |= buscar(df[col], busca_num)
+        mask &= achados
 
     # Tipo (saldo)
-    filtro_tipo = st.session_state.get('det_tipo', 'Todos')
     if filtro_tipo == 'Com Pendente':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] > 0]
+        mask &= df['SALDO'] > 0
     elif filtro_tipo == 'Pagos':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] == 0]
+        mask &= df['SALDO'] == 0
 
     # Tipo documento
-    filtro_tipo_doc = st.session_state.get('det_tipo_doc', 'Todos')
-    if filtro_tipo_doc != 'Todos' and 'TIPO_DOC' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['TIPO_DOC'] == filtro_tipo_doc]
+    if filtro_tipo_doc != 'Todos' and 'TIPO_DOC' in df.columns:
+        mask &= df['TIPO_DOC'] == filtro_tipo_doc
 
-    # Valor minimo
-    valor_min = st.session_state.get('det_valor_min', 0)
+    # Valor minimo / maximo
     if valor_min > 0:
-        df_filtrado = df_filtrado[df_filtrado['VALOR_ORIGINAL'] >= valor_min]
-
-    # Valor maximo
-    valor_max = st.session_state.get('det_valor_max', 0)
+        mask &= df['VALOR_ORIGINAL'] >= valor_min
     if valor_max > 0:
-        df_filtrado = df_filtrado[df_filtrado['VALOR_ORIGINAL'] <= valor_max]
+        mask &= df['VALOR_ORIGINAL'] <= valor_max
 
-    # Vencimento de
-    venc_inicio = st.session_state.get('det_venc_inicio')
+    # Vencimento de / ate
     if venc_inicio:
-        df_filtrado = df_filtrado[df_filtrado['VENCIMENTO'] >= pd.Timestamp(venc_inicio)]
-
-    # Vencimento ate
-    venc_fim = st.session_state.get('det_venc_fim')
+        mask &= df['VENCIMENTO'] >= pd.Timestamp(venc_inicio)
     if venc_fim:
-        df_filtrado = df_filtrado[df_filtrado['VENCIMENTO'] <= pd.Timestamp(venc_fim)]
+        mask &= df['VENCIMENTO'] <= pd.Timestamp(venc_fim)
+
+    return mask
+
+
+def _aplicar_filtros(df, busca_documentos=None):
+    """Aplica todos os filtros selecionados (recorte registrado com os filtros na chave)"""
+    filtros = _filtros_sessao()
+    df_filtrado = recorte(df, ('detalhes',) + filtros, lambda d: _mascara_filtros(d, filtros, busca_documentos))
+    return compute_titulos_ordenados(df_filtrado, 'VENCIMENTO', True)
+
+
+@memoizar_secao
+def compute_titulos_ordenados(df_filtrado, coluna, ascendente):
+    """Titulos ordenados por `coluna` (nulos no fim)"""
+    return df_filtrado.sort_values(coluna, ascending=ascendente, na_position='last')
 
-    return df_filtrado.sort_values('VENCIMENTO', ascending=True)
+
+@memoizar_secao
+def compute_resumo(df_filtrado):
+    """Totais do resultado dos filtros"""
+    return {
+        'qtd': len(df_filtrado),
+        'total': df_filtrado['VALOR_ORIGINAL'].sum(),
+        'saldo': df_filtrado['SALDO'].sum(),
+        'vencidos': int((df_filtrado['STATUS'] == 'Vencido').sum()),
+        'fornecedores': df_filtrado['NOME_FORNECEDOR'].nunique(),
+    }
 
 
 def _render_tabela_titulos(df_filtrado, cores, hoje):
@@ -270,7 +319,7 @@ def _render_tabela_titulos(df_filtrado, cores, hoje):
         "Maior Atraso": ("DIAS_ATRASO", False)
     }
     col_ordem, asc = ordem_map[ordem]
-    df_ord = df_filtrado.sort_values(col_ordem, ascending=asc, na_position='last')
+    df_ord = compute_titulos_ordenados(df_filtrado, col_ordem, asc)
 
     # Aplicar limite
     if limite != "Todos":
@@ -293,7 +342,7 @@ def _render_tabela_titulos(df_filtrado, cores, hoje):
         ]
 
     colunas_disponiveis = [c for c in colunas_exibir if c in df_ord.columns]
-    df_show = df_ord[colunas_disponiveis].copy()
+    df_show = df_ord[colunas_disponiveis]
 
     # Formatar datas
     for col in ['EMISSAO', 'VENCIMENTO', 'DT_BAIXA']:
@@ -358,6 +407,18 @@ def _render_tabela_titulos(df_filtrado, cores, hoje):
     st.caption(f"Exibindo {len(df_show)} de {len(df_filtrado)} titulos")
 
 
+@memoizar_secao
+def compute_resumo_fornecedor(df_filtrado):
+    """Qtd, total, saldo e atraso medio por fornecedor"""
+    df_grp = df_filtrado.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': ['count', 'sum'],
+        'SALDO': 'sum',
+        'DIAS_ATRASO': 'mean'
+    }).reset_index()
+    df_grp.columns = ['Fornecedor', 'Qtd', 'Total', 'Saldo', 'Atraso Medio']
+    return df_grp
+
+
 def _render_por_fornecedor(df_filtrado, cores):
     """Agrupamento por fornecedor"""
 
@@ -367,13 +428,7 @@ def _render_por_fornecedor(df_filtrado, cores):
 
     st.markdown("##### Resumo por Fornecedor")
 
-    # Agrupar
-    df_grp = df_filtrado.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': ['count', 'sum'],
-        'SALDO': 'sum',
-        'DIAS_ATRASO': 'mean'
-    }).reset_index()
-    df_grp.columns = ['Fornecedor', 'Qtd', 'Total', 'Saldo', 'Atraso Medio']
+    df_grp = compute_resumo_fornecedor(df_filtrado)
 
     # Ordenacao
     col1, col2 = st.columns([3, 1])
@@ -401,7 +456,7 @@ def _render_por_fornecedor(df_filtrado, cores):
         df_grp = df_grp.head(int(limite))
 
     # Formatar
-    df_show = df_grp.copy()
+    df_show = df_grp.copy(deep=False)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Saldo'] = df_show['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Atraso Medio'] = df_show['Atraso Medio'].apply(lambda x: f"{x:.0f}d" if pd.notna(x) and x > 0 else '-')
@@ -421,12 +476,13 @@ def _render_exportar(df_filtrado, hoje):
         return
 
     # Resumo dos dados
+    resumo = compute_resumo(df_filtrado)
     col1, col2, col3, col4 = st.columns(4)
 
-    col1.metric("Titulos", formatar_numero(len(df_filtrado)))
-    col2.metric("Valor Total", formatar_moeda(df_filtrado['VALOR_ORIGINAL'].sum()))
-    col3.metric("Pendente", formatar_moeda(df_filtrado['SALDO'].sum()))
-    col4.metric("Fornecedores", formatar_numero(df_filtrado['NOME_FORNECEDOR'].nunique()))
+    col1.metric("Titulos", formatar_numero(resumo['qtd']))
+    col2.metric("Valor Total", formatar_moeda(resumo['total']))
+    col3.metric("Pendente", formatar_moeda(resumo['saldo']))
+    col4.metric("Fornecedores", formatar_numero(resumo['fornecedores']))
 
     st.markdown("---")
 
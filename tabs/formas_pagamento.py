@@ -8,6 +8,9 @@ from datetime import datetime
 
 from config.theme import get_cores
 from components.charts import criar_layout
+from data.cubo import cubo_agregado
+from data.formas_pagamento import formas_pagamento_sem_regra
+from data.secoes import memoizar_secao, recorte
 from utils.formatters import formatar_moeda, formatar_numero
 
 
@@ -25,17 +28,14 @@ def render_formas_pagamento(df):
         st.warning("Coluna de forma de pagamento nao encontrada.")
         return
 
-    # Tratar valores vazios/nulos na forma de pagamento - INCLUIR como "Nao Informado"
-    df = df.copy()
-    df['DESCRICAO_FORMA_PAGAMENTO'] = df['DESCRICAO_FORMA_PAGAMENTO'].fillna('').astype(str).str.strip()
-    df.loc[df['DESCRICAO_FORMA_PAGAMENTO'] == '', 'DESCRICAO_FORMA_PAGAMENTO'] = 'Nao Informado'
-
-    # Contar registros sem forma original para mostrar cobertura
-    qtd_nao_informado = len(df[df['DESCRICAO_FORMA_PAGAMENTO'] == 'Nao Informado'])
+    # Preparar dados
+    df_pagos = recorte(df, 'pagos', lambda d: d['SALDO'] == 0)
+    kpis = compute_kpis(df, df_pagos)
+    qtd_nao_informado = kpis['qtd_nao_informado']
 
     # ========== RESUMO DE COBERTURA ==========
     if qtd_nao_informado > 0:
-        total_titulos = len(df)
+        total_titulos = kpis['total_titulos']
         pct_nao_info = qtd_nao_informado / total_titulos * 100
         qtd_informado = total_titulos - qtd_nao_informado
 
@@ -57,33 +57,12 @@ def render_formas_pagamento(df):
 
         st.divider()
 
-    # Preparar dados
-    df_pagos = df[df['SALDO'] == 0].copy()
-    df_pendentes = df[df['SALDO'] > 0].copy()
-    df_vencidos = df[df['STATUS'] == 'Vencido'].copy()
-
     # ========== KPIs ==========
-    total_formas = df['DESCRICAO_FORMA_PAGAMENTO'].nunique()
-    total_valor = df['VALOR_ORIGINAL'].sum()
-    total_pendente = df_pendentes['SALDO'].sum()
-
-    # Forma mais usada
-    forma_mais_usada = df.groupby('DESCRICAO_FORMA_PAGAMENTO')['VALOR_ORIGINAL'].sum().idxmax() if len(df) > 0 else 'N/A'
-    pct_forma_top = (df[df['DESCRICAO_FORMA_PAGAMENTO'] == forma_mais_usada]['VALOR_ORIGINAL'].sum() / total_valor * 100) if total_valor > 0 else 0
-
-    # Pontualidade geral
-    taxa_pontual = 0
-    if len(df_pagos) > 0 and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
-        atraso = df_pagos['DIAS_ATRASO_PGTO'].dropna()
-        if len(atraso) > 0:
-            taxa_pontual = (atraso <= 0).sum() / len(atraso) * 100
-
-    # Prazo medio
-    prazo_medio = 0
-    if len(df_pagos) > 0 and 'DIAS_PARA_PAGAR' in df_pagos.columns:
-        prazo = df_pagos['DIAS_PARA_PAGAR'].dropna()
-        if len(prazo) > 0:
-            prazo_medio = prazo.mean()
+    total_formas = kpis['total_formas']
+    total_valor = kpis['total_valor']
+    total_pendente = kpis['total_pendente']
+    taxa_pontual = kpis['taxa_pontual']
+    prazo_medio = kpis['prazo_medio']
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -117,15 +96,61 @@ def render_formas_pagamento(df):
     col1, col2 = st.columns(2)
 
     with col1:
-        _render_pendente_por_forma(df_pendentes, cores)
+        _render_pendente_por_forma(df, cores)
 
     with col2:
-        _render_vencido_por_forma(df_vencidos, cores)
+        _render_vencido_por_forma(df, cores)
 
     st.divider()
 
     # ========== TABELA RANKING ==========
-    _render_ranking_formas(df, df_pagos, df_pendentes, df_vencidos, cores)
+    _render_ranking_formas(df, df_pagos, cores)
+
+    # ========== FORMAS SEM REGRA ==========
+    _render_formas_sem_regra()
+
+
+@memoizar_secao
+def compute_kpis(df, df_pagos):
+    """Cobertura da forma informada, totais, pontualidade e prazo medio dos pagos"""
+    # Vazios/nulos ja chegam como "Nao Informado" (padronizar_forma_pagamento na ingestao)
+    cubo = cubo_agregado(df)
+    df_formas = cubo.agregar('DESCRICAO_FORMA_PAGAMENTO')
+    total = cubo.total()
+
+    # Pontualidade geral
+    taxa_pontual = 0
+    if len(df_pagos) > 0 and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
+        atraso = df_pagos['DIAS_ATRASO_PGTO'].dropna()
+        if len(atraso) > 0:
+            taxa_pontual = (atraso <= 0).sum() / len(atraso) * 100
+
+    # Prazo medio
+    prazo_medio = 0
+    if len(df_pagos) > 0 and 'DIAS_PARA_PAGAR' in df_pagos.columns:
+        prazo = df_pagos['DIAS_PARA_PAGAR'].dropna()
+        if len(prazo) > 0:
+            prazo_medio = prazo.mean()
+
+    return {
+        # Contar registros sem forma original para mostrar cobertura
+        'qtd_nao_informado': int(df_formas.loc[df_formas['DESCRICAO_FORMA_PAGAMENTO'] == 'Nao Informado', 'QTD'].sum()),
+        'total_titulos': int(total['QTD']),
+        'total_formas': len(df_formas),
+        'total_valor': total['VALOR_ORIGINAL'],
+        'total_pendente': total['SALDO_PENDENTE'],
+        'taxa_pontual': taxa_pontual,
+        'prazo_medio': prazo_medio,
+    }
+
+
+@memoizar_secao
+def compute_distribuicao_valor(df):
+    """10 formas com maior valor original"""
+    df_grp = cubo_agregado(df).agregar('DESCRICAO_FORMA_PAGAMENTO')[['DESCRICAO_FORMA_PAGAMENTO', 'VALOR_ORIGINAL']]
+    df_grp = df_grp.sort_values('VALOR_ORIGINAL', ascending=False).head(10)
+    df_grp.columns = ['Forma', 'Valor']
+    return df_grp
 
 
 def _render_distribuicao_valor(df, cores):
@@ -133,8 +158,7 @@ def _render_distribuicao_valor(df, cores):
 
     st.markdown("##### Distribuicao por Valor")
 
-    df_grp = df.groupby('DESCRICAO_FORMA_PAGAMENTO')['VALOR_ORIGINAL'].sum().sort_values(ascending=False).head(10).reset_index()
-    df_grp.columns = ['Forma', 'Valor']
+    df_grp = compute_distribuicao_valor(df)
 
     fig = go.Figure(go.Pie(
         labels=df_grp['Forma'],
@@ -156,13 +180,21 @@ def _render_distribuicao_valor(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_distribuicao_quantidade(df):
+    """10 formas com mais titulos"""
+    df_grp = cubo_agregado(df).agregar('DESCRICAO_FORMA_PAGAMENTO')[['DESCRICAO_FORMA_PAGAMENTO', 'QTD']]
+    df_grp = df_grp.sort_values('QTD', ascending=False).head(10)
+    df_grp.columns = ['Forma', 'Qtd']
+    return df_grp
+
+
 def _render_distribuicao_quantidade(df, cores):
     """Distribuicao por quantidade"""
 
     st.markdown("##### Distribuicao por Quantidade")
 
-    df_grp = df.groupby('DESCRICAO_FORMA_PAGAMENTO').size().sort_values(ascending=False).head(10).reset_index()
-    df_grp.columns = ['Forma', 'Qtd']
+    df_grp = compute_distribuicao_quantidade(df)
 
     fig = go.Figure(go.Bar(
         x=df_grp['Forma'].str[:15],
@@ -182,6 +214,19 @@ def _render_distribuicao_quantidade(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_prazo_por_forma(df_pagos):
+    """10 formas com menor prazo medio (min. 5 pagamentos)"""
+    df_grp = df_pagos.groupby('DESCRICAO_FORMA_PAGAMENTO', observed=True).agg({
+        'DIAS_PARA_PAGAR': 'mean',
+        'VALOR_ORIGINAL': 'count'
+    }).reset_index()
+    df_grp.columns = ['Forma', 'Prazo', 'Qtd']
+
+    # Filtrar formas com pelo menos 5 pagamentos
+    return df_grp[df_grp['Qtd'] >= 5].sort_values('Prazo', ascending=True).head(10)
+
+
 def _render_prazo_por_forma(df_pagos, cores):
     """Prazo medio de pagamento por forma"""
 
@@ -191,14 +236,7 @@ def _render_prazo_por_forma(df_pagos, cores):
         st.info("Sem dados de pagamento")
         return
 
-    df_grp = df_pagos.groupby('DESCRICAO_FORMA_PAGAMENTO').agg({
-        'DIAS_PARA_PAGAR': 'mean',
-        'VALOR_ORIGINAL': 'count'
-    }).reset_index()
-    df_grp.columns = ['Forma', 'Prazo', 'Qtd']
-
-    # Filtrar formas com pelo menos 5 pagamentos
-    df_grp = df_grp[df_grp['Qtd'] >= 5].sort_values('Prazo', ascending=True).head(10)
+    df_grp = compute_prazo_por_forma(df_pagos)
 
     if len(df_grp) == 0:
         st.info("Sem dados suficientes (min. 5 pagamentos)")
@@ -223,6 +261,30 @@ def _render_prazo_por_forma(df_pagos, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+def _pontualidade(atraso):
+    """% de pagamentos em dia (None com menos de 5 pagamentos)"""
+    atraso = atraso.dropna()
+    if len(atraso) < 5:
+        return None
+    return (atraso <= 0).sum() / len(atraso) * 100
+
+
+def _prazo(prazo):
+    """Prazo medio (None com menos de 5 pagamentos)"""
+    prazo = prazo.dropna()
+    if len(prazo) < 5:
+        return None
+    return prazo.mean()
+
+
+@memoizar_secao
+def compute_pontualidade_por_forma(df_pagos):
+    """10 formas mais pontuais (min. 5 pagamentos)"""
+    df_pont = df_pagos.groupby('DESCRICAO_FORMA_PAGAMENTO', observed=True)['DIAS_ATRASO_PGTO'].apply(_pontualidade).dropna().sort_values(ascending=False).head(10).reset_index()
+    df_pont.columns = ['Forma', 'Pontualidade']
+    return df_pont
+
+
 def _render_pontualidade_por_forma(df_pagos, cores):
     """Pontualidade por forma de pagamento"""
 
@@ -232,15 +294,7 @@ def _render_pontualidade_por_forma(df_pagos, cores):
         st.info("Sem dados de pagamento")
         return
 
-    # Calcular pontualidade por forma
-    def calc_pontualidade(group):
-        atraso = group['DIAS_ATRASO_PGTO'].dropna()
-        if len(atraso) < 5:
-            return None
-        return (atraso <= 0).sum() / len(atraso) * 100
-
-    df_pont = df_pagos.groupby('DESCRICAO_FORMA_PAGAMENTO').apply(calc_pontualidade).dropna().sort_values(ascending=False).head(10).reset_index()
-    df_pont.columns = ['Forma', 'Pontualidade']
+    df_pont = compute_pontualidade_por_forma(df_pagos)
 
     if len(df_pont) == 0:
         st.info("Sem dados suficientes (min. 5 pagamentos)")
@@ -274,18 +328,30 @@ def _render_pontualidade_por_forma(df_pagos, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_pendente_por_forma(df_pendentes, cores):
+@memoizar_secao
+def compute_pendente_por_forma(df):
+    """8 formas com maior saldo pendente; None sem pendencias"""
+    cubo = cubo_agregado(df)
+    if cubo.total()['QTD_PENDENTE'] == 0:
+        return None
+
+    df_grp = cubo.agregar('DESCRICAO_FORMA_PAGAMENTO')
+    df_grp = df_grp[df_grp['QTD_PENDENTE'] > 0][['DESCRICAO_FORMA_PAGAMENTO', 'SALDO_PENDENTE']]
+    df_grp = df_grp.sort_values('SALDO_PENDENTE', ascending=False).head(8)
+    df_grp.columns = ['Forma', 'Valor']
+    return df_grp
+
+
+def _render_pendente_por_forma(df, cores):
     """Valor pendente por forma"""
 
     st.markdown("##### Valor Pendente por Forma")
 
-    if len(df_pendentes) == 0:
+    df_grp = compute_pendente_por_forma(df)
+    if df_grp is None:
         st.success("Sem pendencias!")
         return
 
-    df_grp = df_pendentes.groupby('DESCRICAO_FORMA_PAGAMENTO')['SALDO'].sum().sort_values(ascending=False).head(8).reset_index()
-    df_grp.columns = ['Forma', 'Valor']
-
     fig = go.Figure(go.Bar(
         y=df_grp['Forma'].str[:20],
         x=df_grp['Valor'],
@@ -305,18 +371,28 @@ def _render_pendente_por_forma(df_pendentes, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_vencido_por_forma(df_vencidos, cores):
+@memoizar_secao
+def compute_vencido_por_forma(df):
+    """8 formas com maior saldo vencido; None sem vencidos"""
+    df_grp = cubo_agregado(df).agregar('DESCRICAO_FORMA_PAGAMENTO', {'STATUS': 'Vencido'})
+    if len(df_grp) == 0:
+        return None
+
+    df_grp = df_grp[['DESCRICAO_FORMA_PAGAMENTO', 'SALDO']].sort_values('SALDO', ascending=False).head(8)
+    df_grp.columns = ['Forma', 'Valor']
+    return df_grp
+
+
+def _render_vencido_por_forma(df, cores):
     """Valor vencido por forma"""
 
     st.markdown("##### Valor Vencido por Forma")
 
-    if len(df_vencidos) == 0:
+    df_grp = compute_vencido_por_forma(df)
+    if df_grp is None:
         st.success("Sem vencidos!")
         return
 
-    df_grp = df_vencidos.groupby('DESCRICAO_FORMA_PAGAMENTO')['SALDO'].sum().sort_values(ascending=False).head(8).reset_index()
-    df_grp.columns = ['Forma', 'Valor']
-
     fig = go.Figure(go.Bar(
         y=df_grp['Forma'].str[:20],
         x=df_grp['Valor'],
@@ -336,53 +412,44 @@ def _render_vencido_por_forma(df_vencidos, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_ranking_formas(df, df_pagos, df_pendentes, df_vencidos, cores):
-    """Tabela ranking de formas de pagamento"""
-
-    st.markdown("##### Ranking - Formas de Pagamento")
+@memoizar_secao
+def compute_ranking_formas(df, df_pagos):
+    """Qtd, total, saldo, pontualidade, prazo medio e vencido por forma, do maior total"""
+    cubo = cubo_agregado(df)
 
     # Agrupar dados
-    df_grp = df.groupby('DESCRICAO_FORMA_PAGAMENTO').agg({
-        'VALOR_ORIGINAL': ['count', 'sum'],
-        'SALDO': 'sum'
-    }).reset_index()
+    df_grp = cubo.agregar('DESCRICAO_FORMA_PAGAMENTO')[['DESCRICAO_FORMA_PAGAMENTO', 'QTD', 'VALOR_ORIGINAL', 'SALDO']]
     df_grp.columns = ['Forma', 'Qtd', 'Total', 'Saldo']
 
-    # Calcular pontualidade
-    if len(df_pagos) > 0 and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
-        def calc_pont(forma):
-            subset = df_pagos[df_pagos['DESCRICAO_FORMA_PAGAMENTO'] == forma]['DIAS_ATRASO_PGTO'].dropna()
-            if len(subset) < 5:
-                return None
-            return (subset <= 0).sum() / len(subset) * 100
-
-        df_grp['Pontualidade'] = df_grp['Forma'].apply(calc_pont)
+    # Pontualidade e prazo medio dos pagos (min. 5 pagamentos por forma)
+    por_forma = df_pagos.groupby('DESCRICAO_FORMA_PAGAMENTO', observed=True) if len(df_pagos) > 0 else None
+    if por_forma is not None and 'DIAS_ATRASO_PGTO' in df_pagos.columns:
+        df_grp['Pontualidade'] = por_forma['DIAS_ATRASO_PGTO'].apply(_pontualidade).reindex(df_grp['Forma']).to_numpy()
     else:
         df_grp['Pontualidade'] = None
 
-    # Calcular prazo medio
-    if len(df_pagos) > 0 and 'DIAS_PARA_PAGAR' in df_pagos.columns:
-        def calc_prazo(forma):
-            subset = df_pagos[df_pagos['DESCRICAO_FORMA_PAGAMENTO'] == forma]['DIAS_PARA_PAGAR'].dropna()
-            if len(subset) < 5:
-                return None
-            return subset.mean()
-
-        df_grp['Prazo'] = df_grp['Forma'].apply(calc_prazo)
+    if por_forma is not None and 'DIAS_PARA_PAGAR' in df_pagos.columns:
+        df_grp['Prazo'] = por_forma['DIAS_PARA_PAGAR'].apply(_prazo).reindex(df_grp['Forma']).to_numpy()
     else:
         df_grp['Prazo'] = None
 
     # Calcular vencido
-    df_venc_grp = df_vencidos.groupby('DESCRICAO_FORMA_PAGAMENTO')['SALDO'].sum().reset_index()
+    df_venc_grp = cubo.agregar('DESCRICAO_FORMA_PAGAMENTO', {'STATUS': 'Vencido'})[['DESCRICAO_FORMA_PAGAMENTO', 'SALDO']]
     df_venc_grp.columns = ['Forma', 'Vencido']
     df_grp = df_grp.merge(df_venc_grp, on='Forma', how='left')
     df_grp['Vencido'] = df_grp['Vencido'].fillna(0)
 
     # Ordenar
-    df_grp = df_grp.sort_values('Total', ascending=False)
+    return df_grp.sort_values('Total', ascending=False)
+
+
+def _render_ranking_formas(df, df_pagos, cores):
+    """Tabela ranking de formas de pagamento"""
+
+    st.markdown("##### Ranking - Formas de Pagamento")
 
     # Formatar
-    df_show = df_grp.copy()
+    df_show = compute_ranking_formas(df, df_pagos)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Saldo'] = df_show['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Vencido'] = df_show['Vencido'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -400,3 +467,15 @@ def _render_ranking_formas(df, df_pagos, df_pendentes, df_vencidos, cores):
     )
 
     st.caption(f"Total: {len(df_show)} formas de pagamento")
+
+
+def _render_formas_sem_regra():
+    """Formas de pagamento brutas sem regra de padronizacao (agrupadas em 'Outros')"""
+    sem_regra = formas_pagamento_sem_regra()
+    if not sem_regra:
+        return
+
+    with st.expander(f"Formas sem regra de padronizacao ({len(sem_regra)}) - agrupadas como Outros"):
+        st.caption("Valores originais do Excel que nenhuma regra reconhece. "
+                   "Inclua uma regra em data/loader.py para separa-los de 'Outros'.")
+        st.dataframe(pd.DataFrame({'Forma original': sem_regra}), use_container_width=True, hide_index=True)
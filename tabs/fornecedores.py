@@ -11,7 +11,10 @@ from datetime import datetime, timedelta
 from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
-from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.abc import classes_abc, curva_abc_recorte
+from data.cubo import cubo_agregado
+from data.periodo import SEM_DATA, chave_periodo, dias_entre, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def render_fornecedores(df):
@@ -75,32 +78,379 @@ def render_fornecedores(df):
 # HELPERS
 # =============================================
 
-def _get_nome_grupo_forn(cod_filial):
-    grupo_id = get_grupo_filial(int(cod_filial))
-    return GRUPOS_FILIAIS.get(grupo_id, f"Grupo {grupo_id}")
-
-def _detectar_multiplos_grupos_forn(df):
-    if 'FILIAL' not in df.columns or len(df) == 0:
-        return False
-    grupos = df['FILIAL'].dropna().apply(lambda x: get_grupo_filial(int(x))).nunique()
-    return grupos > 1
-
-def _calcular_classe_abc(df):
-    """Retorna dict {NOME_FORNECEDOR: 'A'/'B'/'C'}"""
-    df_abc = df.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum().sort_values(ascending=False)
-    total = df_abc.sum()
-    if total == 0:
-        return {}
-    pct_acum = (df_abc / total * 100).cumsum()
-    classes = {}
-    for forn, pct in pct_acum.items():
-        if pct <= 80:
-            classes[forn] = 'A'
-        elif pct <= 95:
-            classes[forn] = 'B'
+def _detectar_multiplos_grupos_forn(cubo):
+    return cubo.qtd_grupos() > 1
+
+def _por_unidade(cubo, multiplos, por=(), filtro=None):
+    """Roll-up do cubo por grupo (multiplos grupos) ou por filial, com a coluna LABEL"""
+    if multiplos:
+        df_grp = cubo.agregar(['GRUPO', *por], filtro)
+        df_grp['LABEL'] = df_grp['GRUPO']
+    else:
+        df_grp = cubo.agregar(['FILIAL', 'NOME_FILIAL', *por], filtro)
+        df_grp['LABEL'] = df_grp['FILIAL'].astype(int).astype(str) + ' - ' + df_grp['NOME_FILIAL'].astype(str).str.split(' - ').str[-1].str.strip()
+    return df_grp
+
+def compute_resumo_fornecedores(df):
+    """Total, pendente e quantidade de titulos por fornecedor (roll-up do cubo)"""
+    df_forn = cubo_agregado(df).agregar('NOME_FORNECEDOR')[['NOME_FORNECEDOR', 'VALOR_ORIGINAL', 'SALDO', 'QTD']]
+    df_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
+    return df_forn
+
+
+def compute_curva_abc(df):
+    """Fornecedores por valor decrescente com PCT, PCT_ACUM, RANK e CLASSE (vazio se o total e zero)"""
+    return curva_abc_recorte(df, 'NOME_FORNECEDOR', extras=('SALDO',))
+
+
+def compute_classe_abc(df):
+    """Series {NOME_FORNECEDOR: 'A'/'B'/'C'}"""
+    return classes_abc(df, 'NOME_FORNECEDOR')
+
+
+@memoizar_secao
+def compute_kpis(df):
+    """Totais, % pago, concentracao top 10 e ticket medio"""
+    df_forn = compute_resumo_fornecedores(df)
+    total_valor = df['VALOR_ORIGINAL'].sum()
+    total_pendente = df['SALDO'].sum()
+    total_pago = total_valor - total_pendente
+
+    # Concentracao top 10
+    df_top10 = df_forn['Total'].nlargest(10)
+
+    return {
+        'total_fornecedores': len(df_forn),
+        'qtd_titulos': len(df),
+        'total_valor': total_valor,
+        'total_pendente': total_pendente,
+        'total_pago': total_pago,
+        'pct_pago': (total_pago / total_valor * 100) if total_valor > 0 else 0,
+        'pct_top10': (df_top10.sum() / total_valor * 100) if total_valor > 0 else 0,
+        'ticket_medio': total_valor / len(df) if len(df) > 0 else 0,
+    }
+
+
+@memoizar_secao
+def compute_top_fornecedores(df, n=15):
+    """Top n fornecedores por valor total, com pago e pendente"""
+    df_forn = compute_resumo_fornecedores(df)
+    df_forn['Pago'] = df_forn['Total'] - df_forn['Pendente']
+    return df_forn.nlargest(n, 'Total').sort_values('Total', ascending=True)
+
+
+@memoizar_secao
+def compute_ticket_medio(df):
+    """(ticket medio geral, fornecedores, top 15 por ticket medio com 2+ titulos)"""
+    df_forn = compute_resumo_fornecedores(df)[['Fornecedor', 'Total', 'Qtd']]
+    df_forn['Ticket'] = df_forn['Total'] / df_forn['Qtd']
+    ticket_geral = df['VALOR_ORIGINAL'].sum() / len(df)
+    return ticket_geral, len(df_forn), df_forn[df_forn['Qtd'] >= 2].nlargest(15, 'Ticket')
+
+
+@memoizar_secao
+def compute_base_prazos(df):
+    """Titulos com o prazo concedido (emissao ate vencimento)"""
+    return df.assign(PRAZO_CONCEDIDO=dias_entre(df, 'VENCIMENTO', 'EMISSAO'))
+
+
+@memoizar_secao
+def compute_kpis_prazos(df_prazos):
+    """Prazo medio concedido e real, % pagos no prazo e quantidade de pagos"""
+    # Calcular prazo real (emissao ate pagamento) - apenas para pagos
+    df_pagos = df_prazos[df_prazos['SALDO'] == 0]
+    if 'DT_BAIXA' in df_pagos.columns:
+        df_pagos['PRAZO_REAL'] = dias_entre(df_pagos, 'DT_BAIXA', 'EMISSAO')
+    else:
+        df_pagos['PRAZO_REAL'] = None
+
+    # % pagos no prazo
+    if 'PRAZO_REAL' in df_pagos.columns and len(df_pagos) > 0:
+        df_pagos_valid = df_pagos[df_pagos['PRAZO_REAL'].notna() & df_pagos['PRAZO_CONCEDIDO'].notna()]
+        if len(df_pagos_valid) > 0:
+            pct_no_prazo = (df_pagos_valid['PRAZO_REAL'] <= df_pagos_valid['PRAZO_CONCEDIDO']).mean() * 100
         else:
-            classes[forn] = 'C'
-    return classes
+            pct_no_prazo = 0
+    else:
+        pct_no_prazo = 0
+
+    return {
+        'prazo_medio_concedido': df_prazos['PRAZO_CONCEDIDO'].mean(),
+        'prazo_medio_real': df_pagos['PRAZO_REAL'].mean() if 'PRAZO_REAL' in df_pagos.columns and len(df_pagos) > 0 else 0,
+        'pct_no_prazo': pct_no_prazo,
+        'qtd_pagos': len(df_pagos),
+    }
+
+
+def _prazo_por_fornecedor(df_prazos):
+    """Prazo concedido medio, valor e quantidade por fornecedor (3+ titulos)"""
+    df_forn_prazo = df_prazos.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'PRAZO_CONCEDIDO': 'mean',
+        'VALOR_ORIGINAL': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_forn_prazo.columns = ['Fornecedor', 'Prazo', 'Valor', 'Qtd']
+    return df_forn_prazo[df_forn_prazo['Qtd'] >= 3]
+
+
+@memoizar_secao
+def compute_mais_prazo(df_prazos):
+    """Top 10 fornecedores que dao mais prazo"""
+    return _prazo_por_fornecedor(df_prazos).nlargest(10, 'Prazo').sort_values('Prazo', ascending=True)
+
+
+@memoizar_secao
+def compute_menos_prazo(df_prazos):
+    """Top 10 fornecedores que dao menos prazo (ignorando titulos com prazo <= 2 dias)"""
+    df_prazos_pos = df_prazos[df_prazos['PRAZO_CONCEDIDO'] > 2]
+    return _prazo_por_fornecedor(df_prazos_pos).nsmallest(10, 'Prazo').sort_values('Prazo', ascending=True)
+
+
+@memoizar_secao
+def compute_pagamentos_no_dia(df_prazos):
+    """Titulos com prazo concedido = 0: totais, top 10 e detalhe por fornecedor (None se nao ha)"""
+    df_no_dia = df_prazos[df_prazos['PRAZO_CONCEDIDO'] == 0]
+    if len(df_no_dia) == 0:
+        return None
+
+    total_no_dia = df_no_dia['VALOR_ORIGINAL'].sum()
+    total_geral = df_prazos['VALOR_ORIGINAL'].sum()
+    resumo = {
+        'total_no_dia': total_no_dia,
+        'qtd_no_dia': len(df_no_dia),
+        'pct_no_dia': (total_no_dia / total_geral * 100) if total_geral > 0 else 0,
+    }
+
+    # Top 10 fornecedores com mais valor pago no dia
+    df_no_dia_forn = df_no_dia.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_no_dia_forn.columns = ['Fornecedor', 'Valor', 'Qtd']
+    df_no_dia_top = df_no_dia_forn.nlargest(10, 'Valor').sort_values('Valor', ascending=True)
+
+    # Detalhe por fornecedor
+    df_detalhe_grp = df_no_dia.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_detalhe_grp.columns = ['Fornecedor', 'Valor Total', 'Pendente', 'Qtd']
+    df_detalhe_grp['Pago'] = (df_detalhe_grp['Valor Total'] - df_detalhe_grp['Pendente']).clip(lower=0)
+    df_detalhe = df_detalhe_grp.sort_values('Valor Total', ascending=False).head(50)
+
+    return resumo, df_no_dia_top, df_detalhe
+
+
+@memoizar_secao
+def compute_resumo_curva_abc(df):
+    """Quantidade e valor por classe ABC e concentracao dos top 1/5/10/20"""
+    df_abc = compute_curva_abc(df)
+    total = df_abc['VALOR_ORIGINAL'].sum()
+    return {
+        'total': total,
+        'qtd_fornecedores': len(df_abc),
+        'classes': {
+            classe: (len(df_abc[df_abc['CLASSE'] == classe]), df_abc[df_abc['CLASSE'] == classe]['VALOR_ORIGINAL'].sum())
+            for classe in ('A', 'B', 'C')
+        },
+        'concentracao': {
+            n: df_abc.head(n)['VALOR_ORIGINAL'].sum() / total * 100
+            for n in [1, 5, 10, 20] if n <= len(df_abc)
+        },
+    }
+
+
+@memoizar_secao
+def compute_classe_detalhe(df, letra):
+    """Fornecedores de uma classe ABC com emitido, pago, pendente e percentuais"""
+    df_abc = compute_curva_abc(df)
+    df_classe = df_abc[df_abc['CLASSE'] == letra]
+
+    df_classe['PAGO'] = (df_classe['VALOR_ORIGINAL'] - df_classe['SALDO']).clip(lower=0)
+
+    df_classe = df_classe.sort_values('VALOR_ORIGINAL', ascending=False)
+    return df_classe[['NOME_FORNECEDOR', 'VALOR_ORIGINAL', 'PAGO', 'SALDO', 'PCT', 'PCT_ACUM']]
+
+
+@memoizar_secao
+def compute_fornecedores_por_filial(df):
+    """(multiplos grupos, fornecedores distintos/valor/pendente/pago por unidade); None sem filial"""
+    cubo = cubo_agregado(df)
+    multiplos = _detectar_multiplos_grupos_forn(cubo)
+
+    if 'FILIAL' not in cubo.dimensoes or 'NOME_FILIAL' not in cubo.dimensoes:
+        return None
+
+    # Agrupar por unidade (fornecedores distintos contados nas celulas do cubo)
+    por = ['GRUPO'] if multiplos else ['FILIAL', 'NOME_FILIAL']
+    df_grp = _por_unidade(cubo, multiplos).merge(cubo.distintos(por, 'NOME_FORNECEDOR'), on=por, how='left')
+    df_grp = df_grp[['LABEL', 'NOME_FORNECEDOR', 'VALOR_ORIGINAL', 'SALDO', 'QTD']]
+    df_grp.columns = ['LABEL', 'Fornecedores', 'Valor', 'Pendente', 'Titulos']
+    df_grp['Pago'] = df_grp['Valor'] - df_grp['Pendente']
+    return multiplos, df_grp
+
+
+@memoizar_secao
+def compute_matriz_filial_fornecedor(df):
+    """(multiplos grupos, top 10 fornecedores, pivot unidade x fornecedor); None sem dados"""
+    cubo = cubo_agregado(df)
+    multiplos = _detectar_multiplos_grupos_forn(cubo)
+
+    # Top 10 fornecedores
+    top10_forn = compute_resumo_fornecedores(df).nlargest(10, 'Total')['Fornecedor'].tolist()
+
+    if len(top10_forn) == 0 or 'NOME_FILIAL' not in cubo.dimensoes:
+        return None
+
+    # Pivot sobre o roll-up (unidade x fornecedor) dos top 10
+    df_matriz = _por_unidade(cubo, multiplos, ['NOME_FORNECEDOR'], {'NOME_FORNECEDOR': top10_forn})
+    pivot = df_matriz.pivot_table(
+        values='VALOR_ORIGINAL',
+        index='LABEL',
+        columns='NOME_FORNECEDOR',
+        aggfunc='sum',
+        fill_value=0, observed=True
+    )
+    return multiplos, tuple(top10_forn), pivot
+
+
+@memoizar_secao
+def compute_por_categoria(df):
+    """Top 12 categorias por valor com pago, pendente a vencer, vencido e fornecedores; None sem categoria"""
+    cubo = cubo_agregado(df)
+    if 'DESCRICAO' not in cubo.dimensoes:
+        return None
+
+    # Agrupar por categoria
+    df_cat = cubo.agregar('DESCRICAO')[['DESCRICAO', 'VALOR_ORIGINAL', 'SALDO']]
+    df_cat = df_cat.merge(cubo.distintos('DESCRICAO', 'NOME_FORNECEDOR'), on='DESCRICAO', how='left')
+    df_cat.columns = ['Categoria', 'Total', 'Pendente', 'Fornecedores']
+    df_cat['Pago'] = df_cat['Total'] - df_cat['Pendente']
+
+    # Vencido por categoria
+    if 'STATUS' in cubo.dimensoes:
+        df_vencido_cat = cubo.agregar('DESCRICAO', {'STATUS': 'Vencido'})[['DESCRICAO', 'SALDO']]
+        df_vencido_cat.columns = ['Categoria', 'Vencido']
+        df_cat = df_cat.merge(df_vencido_cat, on='Categoria', how='left')
+        df_cat['Vencido'] = df_cat['Vencido'].fillna(0)
+    else:
+        df_cat['Vencido'] = 0
+    df_cat['A_Vencer'] = (df_cat['Pendente'] - df_cat['Vencido']).clip(lower=0)
+
+    # Top 12
+    df_top = df_cat.nlargest(12, 'Total')
+    return df_top.sort_values('Total', ascending=True)
+
+
+@memoizar_secao
+def compute_fornecedores_categoria(df, categoria):
+    """Total, pendente e quantidade por fornecedor de uma categoria"""
+    df_cat = recorte(df, ('categoria', categoria), lambda d: d['DESCRICAO'] == categoria)
+    df_cat_forn = df_cat.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_cat_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
+    return df_cat_forn.sort_values('Total', ascending=False)
+
+
+@memoizar_secao
+def compute_fornecedores(df):
+    """Nomes dos fornecedores para consulta, em ordem alfabetica"""
+    return sorted([str(x) for x in df['NOME_FORNECEDOR'].unique().tolist()])
+
+
+@memoizar_secao
+def compute_consulta_fornecedor(df_forn):
+    """Totais, ticket, prazo concedido medio, atraso medio e filiais de um fornecedor"""
+    total_valor = df_forn['VALOR_ORIGINAL'].sum()
+    total_pendente = df_forn['SALDO'].sum()
+    total_pago = total_valor - total_pendente
+    qtd_titulos = len(df_forn)
+
+    # Atraso medio (dos pagos)
+    atraso_medio = 0
+    df_pagos_forn = df_forn[df_forn['SALDO'] == 0]
+    if 'DT_BAIXA' in df_pagos_forn.columns and len(df_pagos_forn) > 0:
+        df_pagos_forn['ATRASO'] = dias_entre(df_pagos_forn, 'DT_BAIXA', 'VENCIMENTO')
+        atraso_vals = df_pagos_forn[df_pagos_forn['ATRASO'] > 0]['ATRASO']
+        atraso_medio = atraso_vals.mean() if len(atraso_vals) > 0 else 0
+
+    return {
+        'total_valor': total_valor,
+        'total_pendente': total_pendente,
+        'total_pago': total_pago,
+        'qtd_titulos': qtd_titulos,
+        'pct_pago': (total_pago / total_valor * 100) if total_valor > 0 else 0,
+        'ticket_medio': total_valor / qtd_titulos if qtd_titulos > 0 else 0,
+        # Prazo medio concedido
+        'prazo_medio': dias_entre(df_forn, 'VENCIMENTO', 'EMISSAO').mean(),
+        'atraso_medio': atraso_medio,
+        # Filiais que compram
+        'filiais': df_forn['NOME_FILIAL'].unique().tolist() if 'NOME_FILIAL' in df_forn.columns else [],
+    }
+
+
+@memoizar_secao
+def compute_evolucao_fornecedor(df_forn):
+    """Emitido, pendente e pago por mes de emissao de um fornecedor"""
+    mes = chave_periodo(df_forn, 'EMISSAO', 'AAAAMM')
+    df_hist_grp = df_forn.assign(MES=mes)[mes != SEM_DATA].groupby('MES', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum'
+    }).reset_index()
+    df_hist_grp['MES'] = rotulo_mes(df_hist_grp['MES'])
+    df_hist_grp['PAGO'] = df_hist_grp['VALOR_ORIGINAL'] - df_hist_grp['SALDO']
+    return df_hist_grp
+
+
+@memoizar_secao
+def compute_titulos_fornecedor(df_forn):
+    """Titulos do fornecedor (so as colunas exibidas)"""
+    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO']
+    return df_forn[[c for c in colunas if c in df_forn.columns]]
+
+
+@memoizar_secao
+def compute_ranking(df, ordenar, qtd_exibir, filtro):
+    """Fornecedores com pago, % pago, vencido e classe ABC, filtrados, ordenados e limitados"""
+    df_rank = compute_resumo_fornecedores(df)
+    df_rank.columns = ['Fornecedor', 'Total', 'Pendente', 'Titulos']
+    df_rank['Pago'] = df_rank['Total'] - df_rank['Pendente']
+    df_rank['% Pago'] = ((df_rank['Pago']) / df_rank['Total'] * 100).round(1)
+
+    # Vencido por fornecedor
+    if 'STATUS' in df.columns:
+        df_venc = cubo_agregado(df).agregar('NOME_FORNECEDOR', {'STATUS': 'Vencido'})[['NOME_FORNECEDOR', 'SALDO']]
+        df_venc.columns = ['Fornecedor', 'Vencido']
+        df_rank = df_rank.merge(df_venc, on='Fornecedor', how='left')
+        df_rank['Vencido'] = df_rank['Vencido'].fillna(0)
+    else:
+        df_rank['Vencido'] = 0
+
+    # Classe ABC
+    classes = compute_classe_abc(df)
+    df_rank['Classe'] = df_rank['Fornecedor'].map(classes).fillna('C')
+
+    # Filtrar
+    if filtro == "Com Pendencia":
+        df_rank = df_rank[df_rank['Pendente'] > 0]
+    elif filtro == "Quitados":
+        df_rank = df_rank[df_rank['Pendente'] <= 0]
+
+    # Ordenar
+    if ordenar == "Valor Total":
+        df_rank = df_rank.sort_values('Total', ascending=False)
+    elif ordenar == "Valor Pago":
+        df_rank = df_rank.sort_values('Pago', ascending=False)
+    elif ordenar == "Vencido":
+        df_rank = df_rank.sort_values('Vencido', ascending=False)
+    else:
+        df_rank = df_rank.sort_values('Pendente', ascending=False)
+
+    return df_rank.head(qtd_exibir)
 
 
 # =============================================
@@ -115,7 +465,7 @@ def _render_alertas(df, cores):
 
     # 1. Concentracao excessiva (>30% em um fornecedor)
     total = df['VALOR_ORIGINAL'].sum()
-    df_forn = df.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum().sort_values(ascending=False)
+    df_forn = df.groupby('NOME_FORNECEDOR', observed=True)['VALOR_ORIGINAL'].sum().sort_values(ascending=False)
     if len(df_forn) > 0:
         maior_forn = df_forn.index[0]
         pct_maior = df_forn.iloc[0] / total * 100 if total > 0 else 0
@@ -128,10 +478,10 @@ def _render_alertas(df, cores):
             })
 
     # 2. Fornecedores novos com alto volume (>R$100k nos ultimos 60 dias)
-    df_novo = df.copy()
-    df_novo['PRIMEIRA_COMPRA'] = df_novo.groupby('NOME_FORNECEDOR')['EMISSAO'].transform('min')
+    df_novo = df.copy(deep=False)
+    df_novo['PRIMEIRA_COMPRA'] = df_novo.groupby('NOME_FORNECEDOR', observed=True)['EMISSAO'].transform('min')
     limite_novo = hoje - timedelta(days=60)
-    novos_alto_vol = df_novo[df_novo['PRIMEIRA_COMPRA'] >= limite_novo].groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum()
+    novos_alto_vol = df_novo[df_novo['PRIMEIRA_COMPRA'] >= limite_novo].groupby('NOME_FORNECEDOR', observed=True)['VALOR_ORIGINAL'].sum()
     novos_alto_vol = novos_alto_vol[novos_alto_vol > 100000]
     if len(novos_alto_vol) > 0:
         for forn, valor in novos_alto_vol.head(3).items():
@@ -147,8 +497,8 @@ def _render_alertas(df, cores):
     df_anterior = df[(df['EMISSAO'] >= hoje - timedelta(days=180)) & (df['EMISSAO'] < hoje - timedelta(days=90))]
 
     if len(df_atual) > 0 and len(df_anterior) > 0:
-        atual_grp = df_atual.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum()
-        anterior_grp = df_anterior.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum()
+        atual_grp = df_atual.groupby('NOME_FORNECEDOR', observed=True)['VALOR_ORIGINAL'].sum()
+        anterior_grp = df_anterior.groupby('NOME_FORNECEDOR', observed=True)['VALOR_ORIGINAL'].sum()
         comparativo = pd.DataFrame({'atual': atual_grp, 'anterior': anterior_grp}).fillna(0)
         comparativo['crescimento'] = ((comparativo['atual'] - comparativo['anterior']) / comparativo['anterior'].replace(0, 1)) * 100
         crescimento_alto = comparativo[(comparativo['crescimento'] > 50) & (comparativo['atual'] > 50000)]
@@ -162,10 +512,10 @@ def _render_alertas(df, cores):
             })
 
     # 4. Fornecedor com maior atraso medio
-    df_pagos = df[df['SALDO'] == 0].copy()
+    df_pagos = df[df['SALDO'] == 0]
     if 'DT_BAIXA' in df_pagos.columns and len(df_pagos) > 0:
-        df_pagos['ATRASO'] = (df_pagos['DT_BAIXA'] - df_pagos['VENCIMENTO']).dt.days
-        atraso_medio = df_pagos[df_pagos['ATRASO'] > 0].groupby('NOME_FORNECEDOR')['ATRASO'].mean()
+        df_pagos['ATRASO'] = dias_entre(df_pagos, 'DT_BAIXA', 'VENCIMENTO')
+        atraso_medio = df_pagos[df_pagos['ATRASO'] > 0].groupby('NOME_FORNECEDOR', observed=True)['ATRASO'].mean()
         if len(atraso_medio) > 0:
             pior_atraso = atraso_medio.nlargest(1)
             forn_atraso = pior_atraso.index[0]
@@ -209,19 +559,14 @@ def _render_alertas(df, cores):
 def _render_kpis(df, cores):
     """KPIs principais - foco em valores pagos/pendentes"""
 
-    total_fornecedores = df['NOME_FORNECEDOR'].nunique()
-    total_valor = df['VALOR_ORIGINAL'].sum()
-    total_pendente = df['SALDO'].sum()
-    total_pago = total_valor - total_pendente
-
-    pct_pago = (total_pago / total_valor * 100) if total_valor > 0 else 0
-
-    # Concentracao top 10
-    df_top10 = df.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum().nlargest(10)
-    pct_top10 = (df_top10.sum() / total_valor * 100) if total_valor > 0 else 0
-
-    # Ticket medio
-    ticket_medio = total_valor / len(df) if len(df) > 0 else 0
+    kpis = compute_kpis(df)
+    total_fornecedores = kpis['total_fornecedores']
+    total_valor = kpis['total_valor']
+    total_pendente = kpis['total_pendente']
+    total_pago = kpis['total_pago']
+    pct_pago = kpis['pct_pago']
+    pct_top10 = kpis['pct_top10']
+    ticket_medio = kpis['ticket_medio']
 
     col1, col2, col3, col4, col5, col6 = st.columns(6)
 
@@ -229,7 +574,7 @@ def _render_kpis(df, cores):
         st.metric(
             label="Fornecedores",
             value=formatar_numero(total_fornecedores),
-            delta=f"{formatar_numero(len(df))} titulos",
+            delta=f"{formatar_numero(kpis['qtd_titulos'])} titulos",
             delta_color="off"
         )
 
@@ -273,18 +618,8 @@ def _render_top_fornecedores(df, cores):
 
     st.markdown("##### Top 15 Fornecedores - Valor Total")
 
-    # Agrupar por fornecedor
-    df_forn = df.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
-    df_forn['Pago'] = df_forn['Total'] - df_forn['Pendente']
-
     # Top 15
-    df_top = df_forn.nlargest(15, 'Total')
-    df_top = df_top.sort_values('Total', ascending=True)
+    df_top = compute_top_fornecedores(df)
 
     fig = go.Figure()
 
@@ -341,16 +676,8 @@ def _render_ticket_medio(df, cores):
         st.info("Dados insuficientes")
         return
 
-    df_forn = df.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_forn.columns = ['Fornecedor', 'Total', 'Qtd']
-    df_forn['Ticket'] = df_forn['Total'] / df_forn['Qtd']
-
-    # Metricas gerais
-    ticket_geral = df['VALOR_ORIGINAL'].sum() / len(df)
-    total_fornecedores = len(df_forn)
+    # Metricas gerais e top 15 por ticket medio (min 2 titulos)
+    ticket_geral, total_fornecedores, df_top = compute_ticket_medio(df)
     total_titulos = len(df)
 
     col1, col2, col3 = st.columns(3)
@@ -358,9 +685,6 @@ def _render_ticket_medio(df, cores):
     col2.metric("Fornecedores", formatar_numero(total_fornecedores))
     col3.metric("Titulos", formatar_numero(total_titulos))
 
-    # Top 15 por ticket medio (min 2 titulos)
-    df_top = df_forn[df_forn['Qtd'] >= 2].nlargest(15, 'Ticket')
-
     if len(df_top) == 0:
         return
 
@@ -391,19 +715,12 @@ def _render_prazos_pagamento(df, cores):
     st.markdown("##### Prazos de Pagamento")
 
     # Calcular prazo concedido (emissao ate vencimento)
-    df_prazos = df.copy()
-    df_prazos['PRAZO_CONCEDIDO'] = (df_prazos['VENCIMENTO'] - df_prazos['EMISSAO']).dt.days
-
-    # Calcular prazo real (emissao ate pagamento) - apenas para pagos
-    df_pagos = df_prazos[df_prazos['SALDO'] == 0].copy()
-    if 'DT_BAIXA' in df_pagos.columns:
-        df_pagos['PRAZO_REAL'] = (df_pagos['DT_BAIXA'] - df_pagos['EMISSAO']).dt.days
-    else:
-        df_pagos['PRAZO_REAL'] = None
+    df_prazos = compute_base_prazos(df)
 
     # KPIs de prazo
-    prazo_medio_concedido = df_prazos['PRAZO_CONCEDIDO'].mean()
-    prazo_medio_real = df_pagos['PRAZO_REAL'].mean() if 'PRAZO_REAL' in df_pagos.columns and len(df_pagos) > 0 else 0
+    kpis = compute_kpis_prazos(df_prazos)
+    prazo_medio_concedido = kpis['prazo_medio_concedido']
+    prazo_medio_real = kpis['prazo_medio_real']
 
     col1, col2, col3, col4 = st.columns(4)
 
@@ -435,18 +752,11 @@ def _render_prazos_pagamento(df, cores):
 
     with col4:
         # % pagos no prazo
-        if 'PRAZO_REAL' in df_pagos.columns and len(df_pagos) > 0:
-            df_pagos_valid = df_pagos[df_pagos['PRAZO_REAL'].notna() & df_pagos['PRAZO_CONCEDIDO'].notna()]
-            if len(df_pagos_valid) > 0:
-                pct_no_prazo = (df_pagos_valid['PRAZO_REAL'] <= df_pagos_valid['PRAZO_CONCEDIDO']).mean() * 100
-            else:
-                pct_no_prazo = 0
-        else:
-            pct_no_prazo = 0
+        pct_no_prazo = kpis['pct_no_prazo']
         st.metric(
             label="Pagos no Prazo",
             value=f"{pct_no_prazo:.0f}%",
-            delta=f"{len(df_pagos)} titulos pagos",
+            delta=f"{kpis['qtd_pagos']} titulos pagos",
             delta_color="off"
         )
 
@@ -456,20 +766,8 @@ def _render_prazos_pagamento(df, cores):
     with col1:
         st.markdown("###### Fornecedores que dao mais prazo")
 
-        # Agrupar por fornecedor - prazo concedido
-        df_forn_prazo = df_prazos.groupby('NOME_FORNECEDOR').agg({
-            'PRAZO_CONCEDIDO': 'mean',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_forn_prazo.columns = ['Fornecedor', 'Prazo', 'Valor', 'Qtd']
-
-        # Filtrar fornecedores com pelo menos 3 titulos
-        df_forn_prazo = df_forn_prazo[df_forn_prazo['Qtd'] >= 3]
-
-        # Top 10 mais prazo
-        df_mais_prazo = df_forn_prazo.nlargest(10, 'Prazo')
-        df_mais_prazo = df_mais_prazo.sort_values('Prazo', ascending=True)
+        # Top 10 mais prazo (fornecedores com pelo menos 3 titulos)
+        df_mais_prazo = compute_mais_prazo(df_prazos)
 
         if len(df_mais_prazo) > 0:
             fig = go.Figure()
@@ -499,17 +797,7 @@ def _render_prazos_pagamento(df, cores):
         st.markdown("###### Fornecedores que dao menos prazo")
 
         # Recalcular excluindo titulos com prazo <= 2 dias
-        df_prazos_pos = df_prazos[df_prazos['PRAZO_CONCEDIDO'] > 2]
-        df_forn_prazo_pos = df_prazos_pos.groupby('NOME_FORNECEDOR').agg({
-            'PRAZO_CONCEDIDO': 'mean',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_forn_prazo_pos.columns = ['Fornecedor', 'Prazo', 'Valor', 'Qtd']
-        df_forn_prazo_pos = df_forn_prazo_pos[df_forn_prazo_pos['Qtd'] >= 3]
-
-        df_menos_prazo = df_forn_prazo_pos.nsmallest(10, 'Prazo')
-        df_menos_prazo = df_menos_prazo.sort_values('Prazo', ascending=True)
+        df_menos_prazo = compute_menos_prazo(df_prazos)
 
         if len(df_menos_prazo) > 0:
             fig = go.Figure()
@@ -536,27 +824,16 @@ def _render_prazos_pagamento(df, cores):
             st.info("Dados insuficientes")
 
     # Pagamentos no dia da emissao (prazo = 0)
-    df_no_dia = df_prazos[df_prazos['PRAZO_CONCEDIDO'] == 0]
+    no_dia = compute_pagamentos_no_dia(df_prazos)
 
-    if len(df_no_dia) > 0:
+    if no_dia is not None:
+        resumo_no_dia, df_no_dia_top, df_detalhe = no_dia
         st.markdown("###### Pagamentos no Dia da Emissao (prazo = 0 dias)")
 
-        total_no_dia = df_no_dia['VALOR_ORIGINAL'].sum()
-        total_geral = df_prazos['VALOR_ORIGINAL'].sum()
-        pct_no_dia = (total_no_dia / total_geral * 100) if total_geral > 0 else 0
-
         col1, col2, col3 = st.columns(3)
-        col1.metric("Valor Total no Dia", formatar_moeda(total_no_dia))
-        col2.metric("Titulos no Dia", formatar_numero(len(df_no_dia)))
-        col3.metric("% do Total Emitido", f"{pct_no_dia:.1f}%")
-
-        # Top 10 fornecedores com mais valor pago no dia
-        df_no_dia_forn = df_no_dia.groupby('NOME_FORNECEDOR').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_no_dia_forn.columns = ['Fornecedor', 'Valor', 'Qtd']
-        df_no_dia_top = df_no_dia_forn.nlargest(10, 'Valor').sort_values('Valor', ascending=True)
+        col1.metric("Valor Total no Dia", formatar_moeda(resumo_no_dia['total_no_dia']))
+        col2.metric("Titulos no Dia", formatar_numero(resumo_no_dia['qtd_no_dia']))
+        col3.metric("% do Total Emitido", f"{resumo_no_dia['pct_no_dia']:.1f}%")
 
         fig = go.Figure()
 
@@ -581,19 +858,10 @@ def _render_prazos_pagamento(df, cores):
         st.caption("Titulos emitidos com vencimento no mesmo dia da emissao (prazo concedido = 0 dias).")
 
     # Tabela comparativa - apenas titulos com prazo = 0
-    if len(df_no_dia) > 0:
+    if no_dia is not None:
         with st.expander("Ver detalhes por fornecedor"):
-            df_detalhe_grp = df_no_dia.groupby('NOME_FORNECEDOR').agg({
-                'VALOR_ORIGINAL': 'sum',
-                'SALDO': 'sum',
-                'NUMERO': 'count'
-            }).reset_index()
-
-            df_detalhe_grp.columns = ['Fornecedor', 'Valor Total', 'Pendente', 'Qtd']
-            df_detalhe_grp['Pago'] = (df_detalhe_grp['Valor Total'] - df_detalhe_grp['Pendente']).clip(lower=0)
-
             # Formatar
-            df_show = df_detalhe_grp.sort_values('Valor Total', ascending=False).head(50).copy()
+            df_show = df_detalhe
             df_show['Valor Total'] = df_show['Valor Total'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Pago'] = df_show['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -611,27 +879,17 @@ def _render_curva_abc(df, cores):
 
     st.markdown("##### Curva ABC e Concentracao")
 
-    df_abc = df.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum().sort_values(ascending=False).reset_index()
-    total = df_abc['VALOR_ORIGINAL'].sum()
-    if total == 0:
+    resumo = compute_resumo_curva_abc(df)
+    qtd_fornecedores = resumo['qtd_fornecedores']
+    if qtd_fornecedores == 0:
         st.info("Sem dados")
         return
-
-    df_abc['PCT'] = df_abc['VALOR_ORIGINAL'] / total * 100
-    df_abc['PCT_ACUM'] = df_abc['PCT'].cumsum()
-    df_abc['RANK'] = range(1, len(df_abc) + 1)
-
-    df_abc['CLASSE'] = df_abc['PCT_ACUM'].apply(
-        lambda x: 'A' if x <= 80 else ('B' if x <= 95 else 'C')
-    )
+    total = resumo['total']
 
     # Estatisticas por classe
-    qtd_a = len(df_abc[df_abc['CLASSE'] == 'A'])
-    qtd_b = len(df_abc[df_abc['CLASSE'] == 'B'])
-    qtd_c = len(df_abc[df_abc['CLASSE'] == 'C'])
-    val_a = df_abc[df_abc['CLASSE'] == 'A']['VALOR_ORIGINAL'].sum()
-    val_b = df_abc[df_abc['CLASSE'] == 'B']['VALOR_ORIGINAL'].sum()
-    val_c = df_abc[df_abc['CLASSE'] == 'C']['VALOR_ORIGINAL'].sum()
+    qtd_a, val_a = resumo['classes']['A']
+    qtd_b, val_b = resumo['classes']['B']
+    qtd_c, val_c = resumo['classes']['C']
 
     # Cards por classe + Concentracao
     col_a, col_b, col_c, col_conc = st.columns(4)
@@ -641,7 +899,7 @@ def _render_curva_abc(df, cores):
         (col_b, 'B', qtd_b, val_b, cores['alerta']),
         (col_c, 'C', qtd_c, val_c, cores['texto_secundario'])
     ]:
-        pct_forn = qtd / len(df_abc) * 100 if len(df_abc) > 0 else 0
+        pct_forn = qtd / qtd_fornecedores * 100 if qtd_fornecedores > 0 else 0
         pct_val = val / total * 100
 
         with col:
@@ -659,11 +917,8 @@ def _render_curva_abc(df, cores):
 
     with col_conc:
         conc_lines = ""
-        for n in [1, 5, 10, 20]:
-            if n <= len(df_abc):
-                val_top = df_abc.head(n)['VALOR_ORIGINAL'].sum()
-                pct = val_top / total * 100
-                conc_lines += f"<p style='color: {cores['texto_secundario']}; font-size: 0.75rem; margin: 0.1rem 0;'>Top {n}: <b>{pct:.1f}%</b></p>"
+        for n, pct in resumo['concentracao'].items():
+            conc_lines += f"<p style='color: {cores['texto_secundario']}; font-size: 0.75rem; margin: 0.1rem 0;'>Top {n}: <b>{pct:.1f}%</b></p>"
 
         st.markdown(f"""
         <div style="background: {cores['card']}; border-left: 4px solid {cores['sucesso']};
@@ -683,15 +938,7 @@ def _render_curva_abc(df, cores):
 
     if classe_sel != 'Selecione...':
         letra = classe_sel[-1]  # A, B ou C
-        df_classe = df_abc[df_abc['CLASSE'] == letra].copy()
-
-        # Buscar pendente (SALDO) por fornecedor
-        df_saldo = df.groupby('NOME_FORNECEDOR')['SALDO'].sum().reset_index()
-        df_classe = df_classe.merge(df_saldo, on='NOME_FORNECEDOR', how='left')
-        df_classe['PAGO'] = (df_classe['VALOR_ORIGINAL'] - df_classe['SALDO']).clip(lower=0)
-
-        df_classe = df_classe.sort_values('VALOR_ORIGINAL', ascending=False)
-        df_show = df_classe[['NOME_FORNECEDOR', 'VALOR_ORIGINAL', 'PAGO', 'SALDO', 'PCT', 'PCT_ACUM']].copy()
+        df_show = compute_classe_detalhe(df, letra)
         df_show.columns = ['Fornecedor', 'Valor Emitido', 'Pago', 'Pendente', '% do Total', '% Acumulado']
 
         df_show['Valor Emitido'] = df_show['Valor Emitido'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -706,28 +953,12 @@ def _render_curva_abc(df, cores):
 def _render_fornecedores_por_filial(df, cores):
     """Fornecedores por filial/grupo - quantidade e valor"""
 
-    multiplos = _detectar_multiplos_grupos_forn(df)
-
-    if 'FILIAL' not in df.columns or 'NOME_FILIAL' not in df.columns:
+    por_filial = compute_fornecedores_por_filial(df)
+    if por_filial is None:
         return
+    multiplos, df_grp = por_filial
 
-    if multiplos:
-        st.markdown("##### Fornecedores por Grupo")
-        df_aux = df.copy()
-        df_aux['LABEL'] = df_aux['FILIAL'].apply(lambda x: _get_nome_grupo_forn(x))
-    else:
-        st.markdown("##### Fornecedores por Filial")
-        df_aux = df.copy()
-        df_aux['LABEL'] = df_aux['FILIAL'].astype(int).astype(str) + ' - ' + df_aux['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-
-    # Agrupar por unidade
-    df_grp = df_aux.groupby('LABEL').agg(
-        Fornecedores=('NOME_FORNECEDOR', 'nunique'),
-        Valor=('VALOR_ORIGINAL', 'sum'),
-        Pendente=('SALDO', 'sum'),
-        Titulos=('NUMERO', 'count')
-    ).reset_index()
-    df_grp['Pago'] = df_grp['Valor'] - df_grp['Pendente']
+    st.markdown("##### Fornecedores por Grupo" if multiplos else "##### Fornecedores por Filial")
 
     col1, col2 = st.columns(2)
 
@@ -805,38 +1036,14 @@ def _render_fornecedores_por_filial(df, cores):
 def _render_matriz_filial_fornecedor(df, cores):
     """Matriz de relacionamento Filial x Fornecedor"""
 
-    multiplos = _detectar_multiplos_grupos_forn(df)
-
-    # Top 10 fornecedores
-    top10_forn = df.groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum().nlargest(10).index.tolist()
+    matriz = compute_matriz_filial_fornecedor(df)
 
-    if len(top10_forn) == 0 or 'NOME_FILIAL' not in df.columns:
+    if matriz is None:
         st.info("Dados insuficientes")
         return
+    multiplos, top10_forn, pivot = matriz
 
-    # Filtrar e criar pivot
-    df_matriz = df[df['NOME_FORNECEDOR'].isin(top10_forn)].copy()
-
-    if multiplos:
-        st.markdown("##### Matriz Grupo x Fornecedor")
-        df_matriz['GRUPO'] = df_matriz['FILIAL'].apply(lambda x: _get_nome_grupo_forn(x))
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='GRUPO',
-            columns='NOME_FORNECEDOR',
-            aggfunc='sum',
-            fill_value=0
-        )
-    else:
-        st.markdown("##### Matriz Filial x Fornecedor")
-        df_matriz['FILIAL_LABEL'] = df_matriz['FILIAL'].astype(int).astype(str) + ' - ' + df_matriz['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='FILIAL_LABEL',
-            columns='NOME_FORNECEDOR',
-            aggfunc='sum',
-            fill_value=0
-        )
+    st.markdown("##### Matriz Grupo x Fornecedor" if multiplos else "##### Matriz Filial x Fornecedor")
 
     if pivot.empty:
         st.info("Dados insuficientes para matriz")
@@ -881,33 +1088,12 @@ def _render_por_categoria(df, cores):
 
     st.markdown("##### Por Categoria")
 
-    if 'DESCRICAO' not in df.columns:
+    # Top 12
+    df_top = compute_por_categoria(df)
+    if df_top is None:
         st.info("Sem dados de categoria")
         return
 
-    # Agrupar por categoria
-    df_cat = df.groupby('DESCRICAO').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NOME_FORNECEDOR': 'nunique'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Total', 'Pendente', 'Fornecedores']
-    df_cat['Pago'] = df_cat['Total'] - df_cat['Pendente']
-
-    # Vencido por categoria
-    if 'STATUS' in df.columns:
-        df_vencido_cat = df[df['STATUS'] == 'Vencido'].groupby('DESCRICAO')['SALDO'].sum().reset_index()
-        df_vencido_cat.columns = ['Categoria', 'Vencido']
-        df_cat = df_cat.merge(df_vencido_cat, on='Categoria', how='left')
-        df_cat['Vencido'] = df_cat['Vencido'].fillna(0)
-    else:
-        df_cat['Vencido'] = 0
-    df_cat['A_Vencer'] = (df_cat['Pendente'] - df_cat['Vencido']).clip(lower=0)
-
-    # Top 12
-    df_top = df_cat.nlargest(12, 'Total')
-    df_top = df_top.sort_values('Total', ascending=True)
-
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -997,15 +1183,7 @@ def _render_por_categoria(df, cores):
         col_r3.metric("Fornecedores", f"{int(row_cat['Fornecedores'])} | {pct_pago:.0f}% pago")
 
         # Fornecedores da categoria selecionada
-        df_cat_forn = df[df['DESCRICAO'] == cat_sel].groupby('NOME_FORNECEDOR').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_cat_forn.columns = ['Fornecedor', 'Total', 'Pendente', 'Qtd']
-        df_cat_forn = df_cat_forn.sort_values('Total', ascending=False)
-
-        df_cat_show = df_cat_forn.copy()
+        df_cat_show = compute_fornecedores_categoria(df, cat_sel)
         df_cat_show['Fornecedor'] = df_cat_show['Fornecedor'].str[:25]
         df_cat_show['Total'] = df_cat_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
         df_cat_show['Pendente'] = df_cat_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -1018,7 +1196,7 @@ def _render_consulta_fornecedor(df, cores):
 
     st.markdown("##### Raio-X do Fornecedor")
 
-    fornecedores = sorted([str(x) for x in df['NOME_FORNECEDOR'].unique().tolist()])
+    fornecedores = compute_fornecedores(df)
 
     fornecedor_selecionado = st.selectbox(
         "Selecione um fornecedor",
@@ -1030,38 +1208,26 @@ def _render_consulta_fornecedor(df, cores):
         st.info("Selecione um fornecedor para ver detalhes")
         return
 
-    df_forn = df[df['NOME_FORNECEDOR'] == fornecedor_selecionado]
+    df_forn = recorte(df, ('fornecedor', fornecedor_selecionado), lambda d: d['NOME_FORNECEDOR'] == fornecedor_selecionado)
 
     # Metricas basicas
-    total_valor = df_forn['VALOR_ORIGINAL'].sum()
-    total_pendente = df_forn['SALDO'].sum()
-    total_pago = total_valor - total_pendente
-    qtd_titulos = len(df_forn)
-    pct_pago = (total_pago / total_valor * 100) if total_valor > 0 else 0
-    ticket_medio = total_valor / qtd_titulos if qtd_titulos > 0 else 0
+    consulta = compute_consulta_fornecedor(df_forn)
+    total_valor = consulta['total_valor']
+    total_pendente = consulta['total_pendente']
+    total_pago = consulta['total_pago']
+    qtd_titulos = consulta['qtd_titulos']
+    pct_pago = consulta['pct_pago']
+    ticket_medio = consulta['ticket_medio']
 
     # Classe ABC
-    classes = _calcular_classe_abc(df)
+    classes = compute_classe_abc(df)
     classe = classes.get(fornecedor_selecionado, 'C')
     cor_classe = {'A': cores['primaria'], 'B': cores['alerta'], 'C': cores['texto_secundario']}.get(classe, cores['texto'])
 
-    # Prazo medio concedido
-    df_forn_prazos = df_forn.copy()
-    df_forn_prazos['PRAZO_CONC'] = (df_forn_prazos['VENCIMENTO'] - df_forn_prazos['EMISSAO']).dt.days
-    prazo_medio = df_forn_prazos['PRAZO_CONC'].mean()
-
-    # Atraso medio (dos pagos)
-    atraso_medio = 0
-    df_pagos_forn = df_forn[df_forn['SALDO'] == 0].copy()
-    if 'DT_BAIXA' in df_pagos_forn.columns and len(df_pagos_forn) > 0:
-        df_pagos_forn['ATRASO'] = (df_pagos_forn['DT_BAIXA'] - df_pagos_forn['VENCIMENTO']).dt.days
-        atraso_vals = df_pagos_forn[df_pagos_forn['ATRASO'] > 0]['ATRASO']
-        atraso_medio = atraso_vals.mean() if len(atraso_vals) > 0 else 0
-
-    # Filiais que compram
-    filiais_forn = []
-    if 'NOME_FILIAL' in df_forn.columns:
-        filiais_forn = df_forn['NOME_FILIAL'].unique().tolist()
+    # Prazo medio concedido, atraso medio (dos pagos) e filiais que compram
+    prazo_medio = consulta['prazo_medio']
+    atraso_medio = consulta['atraso_medio']
+    filiais_forn = consulta['filiais']
 
     # Linha 1: KPIs principais
     col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -1094,13 +1260,7 @@ def _render_consulta_fornecedor(df, cores):
     tab1, tab2 = st.tabs(["Evolucao", "Titulos"])
 
     with tab1:
-        df_hist = df_forn.copy()
-        df_hist['MES'] = df_hist['EMISSAO'].dt.to_period('M').astype(str)
-        df_hist_grp = df_hist.groupby('MES').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum'
-        }).reset_index()
-        df_hist_grp['PAGO'] = df_hist_grp['VALOR_ORIGINAL'] - df_hist_grp['SALDO']
+        df_hist_grp = compute_evolucao_fornecedor(df_forn)
 
         if len(df_hist_grp) > 1:
             fig = go.Figure()
@@ -1129,9 +1289,7 @@ def _render_consulta_fornecedor(df, cores):
             st.info("Historico insuficiente para grafico")
 
     with tab2:
-        colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO']
-        colunas_disp = [c for c in colunas if c in df_forn.columns]
-        df_tab = df_forn[colunas_disp].copy()
+        df_tab = compute_titulos_fornecedor(df_forn)
 
         for col in ['EMISSAO', 'VENCIMENTO']:
             if col in df_tab.columns:
@@ -1178,48 +1336,10 @@ def _render_ranking(df, cores):
         filtro = st.selectbox("Filtrar", ["Todos", "Com Pendencia", "Quitados"], key="rank_filtro")
 
     # Preparar dados
-    df_rank = df.groupby('NOME_FORNECEDOR').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_rank.columns = ['Fornecedor', 'Total', 'Pendente', 'Titulos']
-    df_rank['Pago'] = df_rank['Total'] - df_rank['Pendente']
-    df_rank['% Pago'] = ((df_rank['Pago']) / df_rank['Total'] * 100).round(1)
-
-    # Vencido por fornecedor
-    if 'STATUS' in df.columns:
-        df_venc = df[df['STATUS'] == 'Vencido'].groupby('NOME_FORNECEDOR')['SALDO'].sum().reset_index()
-        df_venc.columns = ['Fornecedor', 'Vencido']
-        df_rank = df_rank.merge(df_venc, on='Fornecedor', how='left')
-        df_rank['Vencido'] = df_rank['Vencido'].fillna(0)
-    else:
-        df_rank['Vencido'] = 0
-
-    # Classe ABC
-    classes = _calcular_classe_abc(df)
-    df_rank['Classe'] = df_rank['Fornecedor'].map(classes).fillna('C')
-
-    # Filtrar
-    if filtro == "Com Pendencia":
-        df_rank = df_rank[df_rank['Pendente'] > 0]
-    elif filtro == "Quitados":
-        df_rank = df_rank[df_rank['Pendente'] <= 0]
-
-    # Ordenar
-    if ordenar == "Valor Total":
-        df_rank = df_rank.sort_values('Total', ascending=False)
-    elif ordenar == "Valor Pago":
-        df_rank = df_rank.sort_values('Pago', ascending=False)
-    elif ordenar == "Vencido":
-        df_rank = df_rank.sort_values('Vencido', ascending=False)
-    else:
-        df_rank = df_rank.sort_values('Pendente', ascending=False)
-
-    df_rank = df_rank.head(qtd_exibir)
+    df_rank = compute_ranking(df, ordenar, qtd_exibir, filtro)
 
     # Formatar
-    df_show = df_rank.copy()
+    df_show = df_rank.copy(deep=False)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pago'] = df_show['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -13,12 +13,18 @@ Conciliacao: Se Grupo A paga para Grupo B, entao B deve ter a receber de A.
   Positiva = falta lancamento no A Receber | Negativa = falta no A Pagar
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from components.abas import render_abas
 from config.theme import get_cores
-from data.loader import carregar_dados
-from data.loader_receber import carregar_dados_receber
+from data.loader import carregar_dados, versao_dados
+from data.conciliacao_ic import conciliar_titulos
+from data.loader_receber import carregar_dados_receber, versao_dados_receber
+from data.periodo import fatiar_periodo
+from data.registro import registro_datasets
+from data.secoes import memoizar_secao, registrar_frame
 from utils.formatters import formatar_moeda, formatar_numero
 
 
@@ -34,105 +40,101 @@ _PREFIXO_GRUPO = {
     5: 'Progresso Agricola',       # FBO (Fazenda Ouro Branco)
 }
 
-# Padroes para identificar o grupo do DESTINO (fornecedor/cliente)
-# Ordem importa: mais especifico primeiro
-_DESTINO_PADROES = [
-    # --- Progresso Agroindustrial (filiais 2xx) ---
-    ('PROGRESSO AGROINDUST', 'Progresso Agroindustrial'),
-
-    # --- Progresso Agricola (filiais 1xx) ---
-    ('PROGRESSO MATRIZ', 'Progresso Agricola'),
-    ('PROGRESSO AGRICOLA', 'Progresso Agricola'),
-    ('FAZENDA PENINSULA', 'Progresso Agricola'),
-    ('PENINSULA', 'Progresso Agricola'),
-    ('IMPERIAL', 'Progresso Agricola'),
-    ('RAINHA DA SERRA', 'Progresso Agricola'),
-    ('FAZENDA OURO BRANCO', 'Progresso Agricola'),
-    ('OURO BRANCO INSUMOS', 'Progresso Agricola'),
-    ('SEMENTES OURO BRANCO', 'Progresso Agricola'),
-    ('OURO BRANCO', 'Progresso Agricola'),
-    ('FAZENDA TROPICAL', 'Progresso Agricola'),
-    ('HOTEL TROPICAL', 'Progresso Agricola'),
-    ('POUSADA TROPICAL', 'Progresso Agricola'),
-
-    # --- Familia Sanders (pessoas fisicas do grupo) ---
-    ('CORNELIO', 'Familia Sanders'),
-    ('GREICY', 'Familia Sanders'),
-    ('GREGORY SANDERS', 'Familia Sanders'),
-    ('GUEBERSON SANDERS', 'Familia Sanders'),
-
-    # --- Outros (filiais 3xx-8xx) ---
-    ('BRASIL AGRICOLA', 'Outros'),
-    ('TROPICAL AGROPART', 'Progresso Agricola'),
-    ('PROGRESSO FBO', 'Progresso Agricola'),
-    ('AG3 AGRO', 'Outros'),
-    ('CG3 AGRO', 'Outros'),
-    ('SDS PARTICIPACOES', 'Outros'),
-    # TROPICAL generico (apos padroes especificos acima) - filial 105 = 1xx
-    ('TROPICAL', 'Progresso Agricola'),
-]
-
 # Ordem fixa para exibicao
 ORDEM_GRUPOS = ['Progresso Agroindustrial', 'Progresso Agricola', 'Familia Sanders', 'Outros']
 
 # Limiar em R$ para considerar um par como divergente
 _LIMIAR_DIVERGENCIA = 1000
 
+# Conciliacao por titulo: diferenca maxima de valor (R$) e de emissao/vencimento (dias)
+_TOLERANCIA_TITULO = 1.0
+_JANELA_TITULO_DIAS = 15
+
+# GRUPO_ORIGEM e GRUPO_DESTINO compartilham as categorias (na ordem de exibicao)
+_TIPO_GRUPO = pd.CategoricalDtype(ORDEM_GRUPOS)
+
+# Codigo da categoria por prefixo centenario; prefixos fora da tabela -> Outros
+_GRUPO_POR_PREFIXO = np.array(
+    [ORDEM_GRUPOS.index(_PREFIXO_GRUPO.get(p, 'Outros')) for p in range(max(_PREFIXO_GRUPO) + 1)], dtype='int8'
+)
+
 
 # =====================================================================
 # FUNCOES DE IDENTIFICACAO
 # =====================================================================
 
-def _grupo_por_codigo(cod_filial):
-    """Grupo IC pelo prefixo centenario do codigo da filial.
-    1xx -> Progresso Agricola, 2xx -> Progresso Agroindustrial, demais -> Outros.
-    """
-    if pd.isna(cod_filial):
-        return 'Outros'
-    try:
-        prefixo = int(float(cod_filial)) // 100
-    except (ValueError, TypeError):
-        return 'Outros'
-    return _PREFIXO_GRUPO.get(prefixo, 'Outros')
-
-
-def _grupo_por_nome(nome):
-    """Identifica o grupo IC pelo nome do fornecedor/cliente.
-    Retorna None se nao for intercompany.
+def _grupo_por_codigo(filiais):
+    """Grupo IC (categorico) pelo prefixo centenario do codigo da filial, via tabela de prefixos.
+    1xx -> Progresso Agricola, 2xx -> Progresso Agroindustrial, demais (e sem filial) -> Outros.
     """
-    if pd.isna(nome):
-        return None
-    nome_upper = str(nome).upper()
-    for padrao, grupo in _DESTINO_PADROES:
-        if padrao in nome_upper:
-            return grupo
-    return None
+    prefixo = pd.to_numeric(filiais, errors='coerce').to_numpy(dtype='float64', na_value=np.nan) // 100
+    na_tabela = (prefixo >= 0) & (prefixo < len(_GRUPO_POR_PREFIXO))
+    codigos = np.full(len(prefixo), ORDEM_GRUPOS.index('Outros'), dtype='int8')
+    codigos[na_tabela] = _GRUPO_POR_PREFIXO[prefixo[na_tabela].astype('int64')]
+    return pd.Categorical.from_codes(codigos, dtype=_TIPO_GRUPO)
 
 
 # =====================================================================
 # CARGA E PROCESSAMENTO
 # =====================================================================
 
+def _construir_dados_intercompany(df_pagar_raw, df_receber_raw):
+    """Filtra os titulos intercompany e deriva as colunas de grupo (uma vez por versao dos dados)"""
+    # Filtrar: apenas intercompany (destino eh entidade do grupo).
+    # Grupo DESTINO (fornecedor/cliente) -> pelo nome, ja classificado na ingestao (GRUPO_DESTINO)
+    df_pagar = df_pagar_raw[df_pagar_raw['GRUPO_DESTINO'].notna()]
+    df_receber = df_receber_raw[df_receber_raw['GRUPO_DESTINO'].notna()]
+
+    # Grupo ORIGEM (quem registra o titulo) -> pelo codigo da filial; as duas colunas de
+    # grupo com as mesmas categorias nas duas bases
+    df_pagar = df_pagar.assign(
+        GRUPO_ORIGEM=_grupo_por_codigo(df_pagar['FILIAL']),
+        GRUPO_DESTINO=df_pagar['GRUPO_DESTINO'].astype(_TIPO_GRUPO),
+    )
+    df_receber = df_receber.assign(
+        GRUPO_ORIGEM=_grupo_por_codigo(df_receber['FILIAL']),
+        GRUPO_DESTINO=df_receber['GRUPO_DESTINO'].astype(_TIPO_GRUPO),
+    )
+
+    return df_pagar, df_receber
+
+
 def carregar_dados_intercompany():
     """Carrega dados de A Pagar e A Receber, filtra intercompany e adiciona grupos."""
     df_pagar_raw, _ = carregar_dados()
     df_receber_raw, _ = carregar_dados_receber()
 
-    # Grupo ORIGEM (quem registra o titulo) -> pelo codigo da filial
-    df_pagar_raw['GRUPO_ORIGEM'] = df_pagar_raw['FILIAL'].apply(_grupo_por_codigo)
-    df_receber_raw['GRUPO_ORIGEM'] = df_receber_raw['FILIAL'].apply(_grupo_por_codigo)
+    versao = (versao_dados(), versao_dados_receber())
+    return registro_datasets().obter(
+        'intercompany', versao, lambda: _construir_dados_intercompany(df_pagar_raw, df_receber_raw), max_versoes=2
+    )
 
-    # Grupo DESTINO (fornecedor/cliente) -> pelo nome
-    df_pagar_raw['GRUPO_DESTINO'] = df_pagar_raw['NOME_FORNECEDOR'].apply(_grupo_por_nome)
-    df_receber_raw['GRUPO_DESTINO'] = df_receber_raw['NOME_CLIENTE'].apply(_grupo_por_nome)
 
-    # Filtrar: apenas intercompany (destino eh entidade do grupo)
-    df_pagar = df_pagar_raw[df_pagar_raw['GRUPO_DESTINO'].notna()].copy()
-    df_receber = df_receber_raw[df_receber_raw['GRUPO_DESTINO'].notna()].copy()
+def carregar_periodo_intercompany(data_inicio, data_fim):
+    """Dados intercompany recortados pelo periodo, registrados com a chave (versoes dos dados, periodo)"""
+    df_pagar, df_receber = carregar_dados_intercompany()
 
-    return df_pagar, df_receber
+    if data_inicio is not None and data_fim is not None:
+        df_pagar = fatiar_periodo(df_pagar, data_inicio, data_fim)
+        df_receber = fatiar_periodo(df_receber, data_inicio, data_fim)
 
+    chave = (versao_dados(), versao_dados_receber(), data_inicio, data_fim)
+    return (registrar_frame(df_pagar, ('intercompany_pagar',) + chave),
+            registrar_frame(df_receber, ('intercompany_receber',) + chave))
 
+
+def carregar_conciliacao_titulos():
+    """Pares e pendencias da conciliacao por titulo (historico completo, uma vez por versao dos dados)"""
+    df_pagar, df_receber = carregar_dados_intercompany()
+
+    versao = (versao_dados(), versao_dados_receber())
+    return registro_datasets().obter(
+        'conciliacao_titulos', versao,
+        lambda: conciliar_titulos(df_pagar, df_receber, _TOLERANCIA_TITULO, _JANELA_TITULO_DIAS), max_versoes=2
+    )
+
+
+@memoizar_secao
 def calcular_conciliacao(df_pagar, df_receber):
     """Concilia A Pagar vs A Receber por pares de grupos.
 
@@ -140,7 +142,7 @@ def calcular_conciliacao(df_pagar, df_receber):
     DIFERENCA = SALDO_PAGAR - SALDO_RECEBER
     """
     # A PAGAR: GRUPO_ORIGEM paga para GRUPO_DESTINO
-    pagar_resumo = df_pagar.groupby(['GRUPO_ORIGEM', 'GRUPO_DESTINO']).agg({
+    pagar_resumo = df_pagar.groupby(['GRUPO_ORIGEM', 'GRUPO_DESTINO'], observed=True).agg({
         'SALDO': 'sum',
         'VALOR_ORIGINAL': 'sum',
         'NUMERO': 'count'
@@ -149,13 +151,17 @@ def calcular_conciliacao(df_pagar, df_receber):
 
     # A RECEBER: GRUPO_ORIGEM recebe de GRUPO_DESTINO
     # Invertendo: se X recebe de Y, entao Y paga para X
-    receber_resumo = df_receber.groupby(['GRUPO_DESTINO', 'GRUPO_ORIGEM']).agg({
+    receber_resumo = df_receber.groupby(['GRUPO_DESTINO', 'GRUPO_ORIGEM'], observed=True).agg({
         'SALDO': 'sum',
         'VALOR_ORIGINAL': 'sum',
         'NUMERO': 'count'
     }).reset_index()
     receber_resumo.columns = ['DE', 'PARA', 'SALDO_RECEBER', 'VALOR_RECEBER', 'QTD_RECEBER']
 
+    # GRUPO_DESTINO e categorico: chaves como texto para o merge outer
+    for resumo in (pagar_resumo, receber_resumo):
+        resumo[['DE', 'PARA']] = resumo[['DE', 'PARA']].astype(str)
+
     conciliacao = pd.merge(pagar_resumo, receber_resumo, on=['DE', 'PARA'], how='outer').fillna(0)
     conciliacao['DIFERENCA'] = conciliacao['SALDO_PAGAR'] - conciliacao['SALDO_RECEBER']
     conciliacao['DIFERENCA_ABS'] = conciliacao['DIFERENCA'].abs()
@@ -205,32 +211,290 @@ def _resumo_grupos(df_pagar, df_receber):
     return pd.DataFrame(rows)
 
 
+def _ordenar_grupos(rotulos):
+    """Rotulos na ORDEM_GRUPOS, seguidos dos que nao estao nela"""
+    ordem = [g for g in ORDEM_GRUPOS if g in rotulos]
+    return ordem + [g for g in rotulos if g not in ordem]
+
+
+# =====================================================================
+# CALCULOS DAS SECOES
+# =====================================================================
+
+@memoizar_secao
+def compute_kpis(df_pagar, df_receber):
+    """Totais A Pagar/A Receber, quantidades e pares conciliados/divergentes"""
+    conciliacao = calcular_conciliacao(df_pagar, df_receber)
+    total_pares = len(conciliacao)
+    pares_ok = len(conciliacao[conciliacao['DIFERENCA_ABS'] < _LIMIAR_DIVERGENCIA])
+    return {
+        'total_pagar': df_pagar['SALDO'].sum(),
+        'total_receber': df_receber['SALDO'].sum(),
+        'qtd_pagar': len(df_pagar),
+        'qtd_receber': len(df_receber),
+        'total_pares': total_pares,
+        'pares_ok': pares_ok,
+        'pares_divergentes': len(conciliacao[conciliacao['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA]),
+    }
+
+
+@memoizar_secao
+def compute_resumo_por_grupo(df_pagar, df_receber):
+    """Resumo de cada grupo (pendente, pago, quantidades) com os pares divergentes em que aparece"""
+    conciliacao = calcular_conciliacao(df_pagar, df_receber)
+    df_resumo = _resumo_grupos(df_pagar, df_receber)
+
+    grupos_data = []
+    for _, row in df_resumo.iterrows():
+        grupo = row['Grupo']
+        conc_grupo = conciliacao[(conciliacao['DE'] == grupo) | (conciliacao['PARA'] == grupo)]
+        divergentes = len(conc_grupo[conc_grupo['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA])
+
+        grupos_data.append({
+            'grupo': grupo,
+            'paga': row['Paga'],
+            'recebe': row['Recebe'],
+            'pago_pagar': row['Pago_Pagar'],
+            'pago_receber': row['Pago_Receber'],
+            'qtd_pagar': int(row['Qtd_Pagar']),
+            'qtd_receber': int(row['Qtd_Receber']),
+            'divergentes': divergentes,
+        })
+    return grupos_data
+
+
+@memoizar_secao
+def compute_situacao_filial(df_pagar, df_receber):
+    """Pendente e recebido/pago por filial de origem (A Pagar + A Receber); None sem filial"""
+    filial_col = 'NOME_FILIAL'
+    if filial_col not in df_pagar.columns or filial_col not in df_receber.columns:
+        return None
+
+    # A Pagar por filial
+    pagar_fil = df_pagar.groupby(filial_col, observed=True).agg(
+        {'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'}).reset_index()
+    pagar_fil['RECEBIDO'] = pagar_fil['VALOR_ORIGINAL'] - pagar_fil['SALDO']
+    pagar_fil['TIPO_OP'] = 'A Pagar'
+
+    # A Receber por filial
+    receber_fil = df_receber.groupby(filial_col, observed=True).agg(
+        {'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'}).reset_index()
+    receber_fil['RECEBIDO'] = receber_fil['VALOR_ORIGINAL'] - receber_fil['SALDO']
+    receber_fil['TIPO_OP'] = 'A Receber'
+
+    # Consolidar por filial (somar A Pagar + A Receber)
+    df_filial = pd.concat([pagar_fil, receber_fil], ignore_index=True)
+    df_filial_agg = df_filial.groupby(filial_col, observed=True).agg(
+        {'SALDO': 'sum', 'RECEBIDO': 'sum'}).reset_index()
+    df_filial_agg.columns = ['Filial', 'Pendente', 'Recebido']
+    return df_filial_agg[(df_filial_agg['Pendente'] > 0) | (df_filial_agg['Recebido'] > 0)]
+
+
+@memoizar_secao
+def compute_por_tipo(df_pagar, df_receber):
+    """Saldo, valor e quantidade A Pagar x A Receber por TIPO, com a diferenca; None sem TIPO"""
+    tipo_pagar = pd.DataFrame()
+    tipo_receber = pd.DataFrame()
+
+    if 'TIPO' in df_pagar.columns:
+        tipo_pagar = df_pagar.groupby('TIPO', observed=True).agg({
+            'SALDO': 'sum',
+            'VALOR_ORIGINAL': 'sum',
+            'NUMERO': 'count'
+        }).reset_index()
+        tipo_pagar.columns = ['TIPO', 'SALDO_PAGAR', 'VALOR_PAGAR', 'QTD_PAGAR']
+
+    if 'TIPO' in df_receber.columns:
+        tipo_receber = df_receber.groupby('TIPO', observed=True).agg({
+            'SALDO': 'sum',
+            'VALOR_ORIGINAL': 'sum',
+            'NUMERO': 'count'
+        }).reset_index()
+        tipo_receber.columns = ['TIPO', 'SALDO_RECEBER', 'VALOR_RECEBER', 'QTD_RECEBER']
+
+    if len(tipo_pagar) == 0 and len(tipo_receber) == 0:
+        return None
+
+    df_tipo = pd.merge(tipo_pagar, tipo_receber, on='TIPO', how='outer').fillna(0)
+    df_tipo['DIFERENCA'] = df_tipo['SALDO_PAGAR'] - df_tipo['SALDO_RECEBER']
+    df_tipo['DIFERENCA_ABS'] = df_tipo['DIFERENCA'].abs()
+    return df_tipo.sort_values('SALDO_PAGAR', ascending=False)
+
+
+@memoizar_secao
+def compute_tipo_grupo(df):
+    """Pivot TIPO x GRUPO_DESTINO do saldo, com coluna Total; None sem TIPO"""
+    if 'TIPO' not in df.columns:
+        return None
+    tipo_grupo = df.groupby(['TIPO', 'GRUPO_DESTINO'], observed=True).agg(
+        {'SALDO': 'sum'}).reset_index()
+    pivot = tipo_grupo.pivot_table(
+        index='TIPO', columns='GRUPO_DESTINO', values='SALDO',
+        aggfunc='sum', fill_value=0, observed=True
+    )
+    pivot.columns = pivot.columns.astype(str)
+    pivot = pivot[_ordenar_grupos(pivot.columns)]
+    pivot['Total'] = pivot.sum(axis=1)
+    return pivot.sort_values('Total', ascending=False)
+
+
+@memoizar_secao
+def compute_maiores_divergencias(conciliacao):
+    """Top 15 pares com |diferenca| acima do limiar, com o rotulo do par"""
+    top_div = conciliacao[conciliacao['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA].nlargest(
+        15, 'DIFERENCA_ABS')
+    top_div['PAR'] = top_div['DE'] + ' -> ' + top_div['PARA']
+    return top_div
+
+
+@memoizar_secao
+def compute_tabela_conciliacao(conciliacao, filtro_status, filtro_de, filtro_para, ordenar):
+    """Pares da conciliacao filtrados por status/De/Para e ordenados"""
+    df_show = conciliacao
+
+    if filtro_status == "Divergentes":
+        df_show = df_show[df_show['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA]
+    elif filtro_status == "Conciliados":
+        df_show = df_show[df_show['DIFERENCA_ABS'] < _LIMIAR_DIVERGENCIA]
+
+    if filtro_de != 'Todos':
+        df_show = df_show[df_show['DE'] == filtro_de]
+    if filtro_para != 'Todos':
+        df_show = df_show[df_show['PARA'] == filtro_para]
+
+    if ordenar == "Maior Divergencia":
+        df_show = df_show.sort_values('DIFERENCA_ABS', ascending=False)
+    elif ordenar == "Maior Valor Pagar":
+        df_show = df_show.sort_values('SALDO_PAGAR', ascending=False)
+    else:
+        df_show = df_show.sort_values('SALDO_RECEBER', ascending=False)
+
+    return df_show[['DE', 'PARA', 'QTD_PAGAR', 'SALDO_PAGAR', 'QTD_RECEBER',
+                    'SALDO_RECEBER', 'DIFERENCA']]
+
+
+@memoizar_secao
+def compute_conciliacao_titulos(df_pagar, df_receber):
+    """(pares, pendencias) da conciliacao por titulo restritos aos titulos do periodo"""
+    pares, pendencias = carregar_conciliacao_titulos()
+
+    # Conciliacao feita no historico completo; exibe os titulos do periodo selecionado
+    no_periodo = pares['ID_PAGAR'].isin(df_pagar.index) | pares['ID_RECEBER'].isin(df_receber.index)
+    pares = pares[no_periodo.to_numpy()]
+    pend_pagar = pendencias[(pendencias['LADO'] == 'Pagar') & pendencias['ID'].isin(df_pagar.index)]
+    pend_receber = pendencias[(pendencias['LADO'] == 'Receber') & pendencias['ID'].isin(df_receber.index)]
+    return pares, pd.concat([pend_pagar, pend_receber], ignore_index=True)
+
+
+@memoizar_secao
+def compute_pendencias(pendencias, filtro_lado, filtro_situacao, filtro_grupo):
+    """Titulos sem par filtrados por lado, situacao e grupo, do maior valor para o menor"""
+    df_show = pendencias
+    if filtro_lado != 'Todos':
+        df_show = df_show[df_show['LADO'] == filtro_lado]
+    if filtro_situacao != 'Todos':
+        df_show = df_show[df_show['SITUACAO'] == filtro_situacao]
+    if filtro_grupo != 'Todos':
+        df_show = df_show[(df_show['DE'] == filtro_grupo) | (df_show['PARA'] == filtro_grupo)]
+    return df_show.sort_values('VALOR_ORIGINAL', ascending=False)
+
+
+@memoizar_secao
+def compute_matriz(df):
+    """Pivot GRUPO_ORIGEM x GRUPO_DESTINO do saldo, na ordem dos grupos"""
+    matriz = df.pivot_table(
+        index='GRUPO_ORIGEM',
+        columns='GRUPO_DESTINO',
+        values='SALDO',
+        aggfunc='sum',
+        fill_value=0,
+        observed=True
+    )
+    matriz.columns = matriz.columns.astype(str)
+
+    # Reordenar por ORDEM_GRUPOS
+    return matriz.reindex(index=_ordenar_grupos(matriz.index), columns=_ordenar_grupos(matriz.columns), fill_value=0)
+
+
+@memoizar_secao
+def compute_comparativo(df_pagar, df_receber):
+    """A pagar, a receber e saldo por grupo, na ordem dos grupos invertida (grafico horizontal)"""
+    df_comp = _resumo_grupos(df_pagar, df_receber)
+    df_comp['Saldo'] = df_comp['Recebe'] - df_comp['Paga']
+
+    df_comp['_ordem'] = df_comp['Grupo'].apply(
+        lambda x: ORDEM_GRUPOS.index(x) if x in ORDEM_GRUPOS else len(ORDEM_GRUPOS))
+    return df_comp.sort_values('_ordem', ascending=False)
+
+
+@memoizar_secao
+def compute_opcoes_detalhes(df):
+    """Opcoes dos filtros de detalhes: (grupos de origem, grupos de destino, tipos)"""
+    grupos_origem = ['Todos'] + sorted(df['GRUPO_ORIGEM'].dropna().unique().tolist())
+    grupos_destino = ['Todos'] + sorted(df['GRUPO_DESTINO'].dropna().unique().tolist())
+    tipos = ['Todos'] + sorted(df['TIPO'].dropna().unique().tolist()) if 'TIPO' in df.columns else ['Todos']
+    return tuple(grupos_origem), tuple(grupos_destino), tuple(tipos)
+
+
+@memoizar_secao
+def compute_detalhes(df, filtro_grupo_orig, filtro_grupo_dest, filtro_status, filtro_tipo, ordenar):
+    """Titulos filtrados por grupos, status e tipo, ordenados"""
+    df_show = df
+
+    if filtro_grupo_orig != 'Todos':
+        df_show = df_show[df_show['GRUPO_ORIGEM'] == filtro_grupo_orig]
+    if filtro_grupo_dest != 'Todos':
+        df_show = df_show[df_show['GRUPO_DESTINO'] == filtro_grupo_dest]
+    if filtro_status == 'Pendente':
+        df_show = df_show[df_show['SALDO'] > 0]
+    elif filtro_status == 'Vencido':
+        df_show = df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)]
+    if filtro_tipo != 'Todos' and 'TIPO' in df_show.columns:
+        df_show = df_show[df_show['TIPO'] == filtro_tipo]
+
+    if ordenar == "Maior Pendente":
+        df_show = df_show.sort_values('SALDO', ascending=False)
+    elif ordenar == "Mais Recente":
+        df_show = df_show.sort_values('EMISSAO', ascending=False)
+    else:
+        df_show = df_show.sort_values('EMISSAO', ascending=True)
+    return df_show
+
+
+@memoizar_secao
+def compute_metricas_detalhes(df_show):
+    """Quantidade, saldo total e vencidos dos titulos exibidos"""
+    return {
+        'qtd': len(df_show),
+        'saldo': df_show['SALDO'].sum(),
+        'vencidos': len(df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)]),
+    }
+
+
 # =====================================================================
 # RENDERIZACAO PRINCIPAL
 # =====================================================================
 
-def render_intercompany_unificado(data_inicio=None, data_fim=None):
-    """Renderiza a pagina unificada de Intercompany."""
-    cores = get_cores()
+def render_intercompany_unificado(data_inicio=None, data_fim=None, dados=None):
+    """Renderiza a pagina unificada de Intercompany.
 
-    df_pagar, df_receber = carregar_dados_intercompany()
+    dados: (df_pagar, df_receber) ja carregados e recortados pela pagina; sem eles a
+    funcao le o dataset intercompany e aplica o filtro de data (carregar_periodo_intercompany).
+    """
+    cores = get_cores()
 
-    # Filtro de data
-    if data_inicio is not None and data_fim is not None:
-        ts_inicio = pd.Timestamp(data_inicio)
-        ts_fim = pd.Timestamp(data_fim) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-        if 'EMISSAO' in df_pagar.columns:
-            df_pagar = df_pagar[(df_pagar['EMISSAO'] >= ts_inicio) & (df_pagar['EMISSAO'] <= ts_fim)]
-        if 'EMISSAO' in df_receber.columns:
-            df_receber = df_receber[(df_receber['EMISSAO'] >= ts_inicio) & (df_receber['EMISSAO'] <= ts_fim)]
+    if dados is not None:
+        df_pagar, df_receber = dados
+    else:
+        df_pagar, df_receber = carregar_periodo_intercompany(data_inicio, data_fim)
 
     conciliacao = calcular_conciliacao(df_pagar, df_receber)
 
     # ========== METRICAS PRINCIPAIS (header) ==========
-    total_pagar = df_pagar['SALDO'].sum()
-    total_receber = df_receber['SALDO'].sum()
-    diferenca_liq = total_pagar - total_receber
-    pares_divergentes = len(conciliacao[conciliacao['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA])
+    kpis = compute_kpis(df_pagar, df_receber)
+    total_pagar = kpis['total_pagar']
+    total_receber = kpis['total_receber']
+    pares_divergentes = kpis['pares_divergentes']
 
     st.markdown(f"""
     <div style="background: linear-gradient(135deg, {cores['primaria']}15, {cores['card']});
@@ -251,14 +515,14 @@ def render_intercompany_unificado(data_inicio=None, data_fim=None):
                     <p style="color: {cores['perigo']}; font-size: 1.3rem; font-weight: 700; margin: 0.2rem 0;">
                         {formatar_moeda(total_pagar)}</p>
                     <p style="color: {cores['texto_secundario']}; font-size: 0.65rem; margin: 0;">
-                        {len(df_pagar)} titulos</p>
+                        {kpis['qtd_pagar']} titulos</p>
                 </div>
                 <div style="text-align: center; padding: 1rem; background: {cores['sucesso']}15; border-radius: 10px; min-width: 130px;">
                     <p style="color: {cores['sucesso']}; font-size: 0.7rem; font-weight: 600; margin: 0;">A RECEBER IC</p>
                     <p style="color: {cores['sucesso']}; font-size: 1.3rem; font-weight: 700; margin: 0.2rem 0;">
                         {formatar_moeda(total_receber)}</p>
                     <p style="color: {cores['texto_secundario']}; font-size: 0.65rem; margin: 0;">
-                        {len(df_receber)} titulos</p>
+                        {kpis['qtd_receber']} titulos</p>
                 </div>
                 <div style="text-align: center; padding: 1rem; background: {cores['alerta']}15; border-radius: 10px; min-width: 130px;">
                     <p style="color: {cores['alerta']}; font-size: 0.7rem; font-weight: 600; margin: 0;">DIVERGENTES</p>
@@ -272,31 +536,23 @@ def render_intercompany_unificado(data_inicio=None, data_fim=None):
     </div>
     """, unsafe_allow_html=True)
 
-    # Tabs
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "Visao Geral", "Por Tipo de Documento", "Conciliacao",
-        "Matriz", "Detalhes A Pagar", "Detalhes A Receber"
-    ])
-
-    with tab1:
-        _render_visao_geral(df_pagar, df_receber, conciliacao, cores)
-    with tab2:
-        _render_por_tipo(df_pagar, df_receber, cores)
-    with tab3:
-        _render_conciliacao(conciliacao, cores)
-    with tab4:
-        _render_matriz(df_pagar, df_receber, cores)
-    with tab5:
-        _render_detalhes_pagar(df_pagar, cores)
-    with tab6:
-        _render_detalhes_receber(df_receber, cores)
+    # Abas (so a ativa executa)
+    render_abas({
+        "Visao Geral": lambda: _render_visao_geral(df_pagar, df_receber, cores),
+        "Por Tipo de Documento": lambda: _render_por_tipo(df_pagar, df_receber, cores),
+        "Conciliacao": lambda: _render_conciliacao(conciliacao, cores),
+        "Conciliacao por Titulo": lambda: _render_conciliacao_titulos(df_pagar, df_receber, cores),
+        "Matriz": lambda: _render_matriz(df_pagar, df_receber, cores),
+        "Detalhes A Pagar": lambda: _render_detalhes_pagar(df_pagar, cores),
+        "Detalhes A Receber": lambda: _render_detalhes_receber(df_receber, cores),
+    }, key="aba_intercompany")
 
 
 # =====================================================================
 # TAB 1 - VISAO GERAL
 # =====================================================================
 
-def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
+def _render_visao_geral(df_pagar, df_receber, cores):
     """Visao Geral: KPIs com criterios explicados, resumo por grupo, indicadores de saude."""
 
     # --- Criterios dos Totalizadores ---
@@ -334,24 +590,7 @@ def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
     # --- KPIs por Grupo ---
     st.markdown("##### Resumo por Grupo")
 
-    df_resumo = _resumo_grupos(df_pagar, df_receber)
-
-    grupos_data = []
-    for _, row in df_resumo.iterrows():
-        grupo = row['Grupo']
-        conc_grupo = conciliacao[(conciliacao['DE'] == grupo) | (conciliacao['PARA'] == grupo)]
-        divergentes = len(conc_grupo[conc_grupo['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA])
-
-        grupos_data.append({
-            'grupo': grupo,
-            'paga': row['Paga'],
-            'recebe': row['Recebe'],
-            'pago_pagar': row['Pago_Pagar'],
-            'pago_receber': row['Pago_Receber'],
-            'qtd_pagar': int(row['Qtd_Pagar']),
-            'qtd_receber': int(row['Qtd_Receber']),
-            'divergentes': divergentes,
-        })
+    grupos_data = compute_resumo_por_grupo(df_pagar, df_receber)
 
     cols = st.columns(len(ORDEM_GRUPOS))
     for i, gd in enumerate(grupos_data):
@@ -407,7 +646,7 @@ def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
 
     with col1:
         st.markdown("##### A Pagar por Grupo")
-        df_pagar_g = df_grupos[['Grupo', 'Pago', 'Pendente Pagar']].copy()
+        df_pagar_g = df_grupos[['Grupo', 'Pago', 'Pendente Pagar']]
         df_pagar_g = df_pagar_g[(df_pagar_g['Pago'] > 0) | (df_pagar_g['Pendente Pagar'] > 0)]
         df_pagar_g = df_pagar_g.sort_values('Pendente Pagar', ascending=True)
 
@@ -450,7 +689,7 @@ def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
 
     with col2:
         st.markdown("##### A Receber por Grupo")
-        df_receber_g = df_grupos[['Grupo', 'Recebido', 'Pendente Receber']].copy()
+        df_receber_g = df_grupos[['Grupo', 'Recebido', 'Pendente Receber']]
         df_receber_g = df_receber_g[(df_receber_g['Recebido'] > 0) | (df_receber_g['Pendente Receber'] > 0)]
         df_receber_g = df_receber_g.sort_values('Pendente Receber', ascending=True)
 
@@ -498,26 +737,8 @@ def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
     st.caption("Valores ja recebidos/pagos vs pendentes, agrupados por filial de origem")
 
     # Combinar A Pagar e A Receber para visao completa por filial
-    filial_col = 'NOME_FILIAL'
-    if filial_col in df_pagar.columns and filial_col in df_receber.columns:
-        # A Pagar por filial
-        pagar_fil = df_pagar.groupby(filial_col).agg(
-            {'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'}).reset_index()
-        pagar_fil['RECEBIDO'] = pagar_fil['VALOR_ORIGINAL'] - pagar_fil['SALDO']
-        pagar_fil['TIPO_OP'] = 'A Pagar'
-
-        # A Receber por filial
-        receber_fil = df_receber.groupby(filial_col).agg(
-            {'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'}).reset_index()
-        receber_fil['RECEBIDO'] = receber_fil['VALOR_ORIGINAL'] - receber_fil['SALDO']
-        receber_fil['TIPO_OP'] = 'A Receber'
-
-        # Consolidar por filial (somar A Pagar + A Receber)
-        df_filial = pd.concat([pagar_fil, receber_fil], ignore_index=True)
-        df_filial_agg = df_filial.groupby(filial_col).agg(
-            {'SALDO': 'sum', 'RECEBIDO': 'sum'}).reset_index()
-        df_filial_agg.columns = ['Filial', 'Pendente', 'Recebido']
-        df_filial_agg = df_filial_agg[(df_filial_agg['Pendente'] > 0) | (df_filial_agg['Recebido'] > 0)]
+    df_filial_agg = compute_situacao_filial(df_pagar, df_receber)
+    if df_filial_agg is not None:
 
         col1, col2 = st.columns(2)
 
@@ -584,8 +805,9 @@ def _render_visao_geral(df_pagar, df_receber, conciliacao, cores):
     # --- Indicador de saude geral ---
     st.markdown("##### Indicador de Saude da Conciliacao")
 
-    total_pares = len(conciliacao)
-    pares_ok = len(conciliacao[conciliacao['DIFERENCA_ABS'] < _LIMIAR_DIVERGENCIA])
+    kpis = compute_kpis(df_pagar, df_receber)
+    total_pares = kpis['total_pares']
+    pares_ok = kpis['pares_ok']
     pares_div = total_pares - pares_ok
     pct_ok = (pares_ok / total_pares * 100) if total_pares > 0 else 0
 
@@ -636,30 +858,9 @@ def _render_por_tipo(df_pagar, df_receber, cores):
     st.caption("Segregacao dos valores intercompany por tipo de documento (NF, DP, FAT, etc.)")
 
     # --- Tabela resumo por TIPO ---
-    tipo_pagar = pd.DataFrame()
-    tipo_receber = pd.DataFrame()
+    df_tipo = compute_por_tipo(df_pagar, df_receber)
 
-    if 'TIPO' in df_pagar.columns:
-        tipo_pagar = df_pagar.groupby('TIPO').agg({
-            'SALDO': 'sum',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        tipo_pagar.columns = ['TIPO', 'SALDO_PAGAR', 'VALOR_PAGAR', 'QTD_PAGAR']
-
-    if 'TIPO' in df_receber.columns:
-        tipo_receber = df_receber.groupby('TIPO').agg({
-            'SALDO': 'sum',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        tipo_receber.columns = ['TIPO', 'SALDO_RECEBER', 'VALOR_RECEBER', 'QTD_RECEBER']
-
-    if len(tipo_pagar) > 0 or len(tipo_receber) > 0:
-        df_tipo = pd.merge(tipo_pagar, tipo_receber, on='TIPO', how='outer').fillna(0)
-        df_tipo['DIFERENCA'] = df_tipo['SALDO_PAGAR'] - df_tipo['SALDO_RECEBER']
-        df_tipo['DIFERENCA_ABS'] = df_tipo['DIFERENCA'].abs()
-        df_tipo = df_tipo.sort_values('SALDO_PAGAR', ascending=False)
+    if df_tipo is not None:
 
         # KPIs por tipo
         col1, col2, col3 = st.columns(3)
@@ -754,7 +955,7 @@ def _render_por_tipo(df_pagar, df_receber, cores):
         # Tabela detalhada
         st.markdown("##### Tabela por Tipo de Documento")
 
-        df_tab = df_tipo[['TIPO', 'QTD_PAGAR', 'SALDO_PAGAR', 'QTD_RECEBER', 'SALDO_RECEBER', 'DIFERENCA']].copy()
+        df_tab = df_tipo[['TIPO', 'QTD_PAGAR', 'SALDO_PAGAR', 'QTD_RECEBER', 'SALDO_RECEBER', 'DIFERENCA']]
         df_tab['QTD_PAGAR'] = df_tab['QTD_PAGAR'].astype(int)
         df_tab['QTD_RECEBER'] = df_tab['QTD_RECEBER'].astype(int)
 
@@ -785,23 +986,13 @@ def _render_por_tipo(df_pagar, df_receber, cores):
         col_tg1, col_tg2 = st.columns(2)
 
         with col_tg1:
-            if 'TIPO' in df_pagar.columns:
-                tipo_grupo_pagar = df_pagar.groupby(['TIPO', 'GRUPO_DESTINO']).agg(
-                    {'SALDO': 'sum'}).reset_index()
-                pivot_pagar = tipo_grupo_pagar.pivot_table(
-                    index='TIPO', columns='GRUPO_DESTINO', values='SALDO',
-                    aggfunc='sum', fill_value=0
-                )
-                cols_order = [g for g in ORDEM_GRUPOS if g in pivot_pagar.columns]
-                cols_order += [c for c in pivot_pagar.columns if c not in cols_order]
-                pivot_pagar = pivot_pagar[cols_order]
-                pivot_pagar['Total'] = pivot_pagar.sum(axis=1)
-                pivot_pagar = pivot_pagar.sort_values('Total', ascending=False)
+            pivot_pagar = compute_tipo_grupo(df_pagar)
+            if pivot_pagar is not None:
 
                 st.markdown(f"<p style='color: {cores['perigo']}; font-weight: 600; font-size: 0.85rem;'>"
                             "A Pagar por Tipo x Grupo Destino</p>", unsafe_allow_html=True)
 
-                pivot_fmt = pivot_pagar.copy()
+                pivot_fmt = pivot_pagar.copy(deep=False)
                 for col in pivot_fmt.columns:
                     pivot_fmt[col] = pivot_fmt[col].apply(lambda x: formatar_moeda(x) if x > 0 else '-')
 
@@ -809,23 +1000,13 @@ def _render_por_tipo(df_pagar, df_receber, cores):
                 st.caption("Quem recebe o pagamento, por tipo de documento")
 
         with col_tg2:
-            if 'TIPO' in df_receber.columns:
-                tipo_grupo_receber = df_receber.groupby(['TIPO', 'GRUPO_DESTINO']).agg(
-                    {'SALDO': 'sum'}).reset_index()
-                pivot_receber = tipo_grupo_receber.pivot_table(
-                    index='TIPO', columns='GRUPO_DESTINO', values='SALDO',
-                    aggfunc='sum', fill_value=0
-                )
-                cols_order = [g for g in ORDEM_GRUPOS if g in pivot_receber.columns]
-                cols_order += [c for c in pivot_receber.columns if c not in cols_order]
-                pivot_receber = pivot_receber[cols_order]
-                pivot_receber['Total'] = pivot_receber.sum(axis=1)
-                pivot_receber = pivot_receber.sort_values('Total', ascending=False)
+            pivot_receber = compute_tipo_grupo(df_receber)
+            if pivot_receber is not None:
 
                 st.markdown(f"<p style='color: {cores['sucesso']}; font-weight: 600; font-size: 0.85rem;'>"
                             "A Receber por Tipo x Grupo Destino</p>", unsafe_allow_html=True)
 
-                pivot_fmt = pivot_receber.copy()
+                pivot_fmt = pivot_receber.copy(deep=False)
                 for col in pivot_fmt.columns:
                     pivot_fmt[col] = pivot_fmt[col].apply(lambda x: formatar_moeda(x) if x > 0 else '-')
 
@@ -887,9 +1068,7 @@ def _render_conciliacao(conciliacao, cores):
     with col1:
         st.markdown("##### Maiores Divergencias")
 
-        top_div = conciliacao[conciliacao['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA].nlargest(
-            15, 'DIFERENCA_ABS').copy()
-        top_div['PAR'] = top_div['DE'] + ' -> ' + top_div['PARA']
+        top_div = compute_maiores_divergencias(conciliacao)
 
         if len(top_div) > 0:
             colors = [cores['perigo'] if x > 0 else cores['sucesso'] for x in top_div['DIFERENCA']]
@@ -964,27 +1143,7 @@ def _render_conciliacao(conciliacao, cores):
             ["Maior Divergencia", "Maior Valor Pagar", "Maior Valor Receber"],
             key="conc_ordem")
 
-    df_show = conciliacao.copy()
-
-    if filtro_status == "Divergentes":
-        df_show = df_show[df_show['DIFERENCA_ABS'] >= _LIMIAR_DIVERGENCIA]
-    elif filtro_status == "Conciliados":
-        df_show = df_show[df_show['DIFERENCA_ABS'] < _LIMIAR_DIVERGENCIA]
-
-    if filtro_de != 'Todos':
-        df_show = df_show[df_show['DE'] == filtro_de]
-    if filtro_para != 'Todos':
-        df_show = df_show[df_show['PARA'] == filtro_para]
-
-    if ordenar == "Maior Divergencia":
-        df_show = df_show.sort_values('DIFERENCA_ABS', ascending=False)
-    elif ordenar == "Maior Valor Pagar":
-        df_show = df_show.sort_values('SALDO_PAGAR', ascending=False)
-    else:
-        df_show = df_show.sort_values('SALDO_RECEBER', ascending=False)
-
-    df_tab = df_show[['DE', 'PARA', 'QTD_PAGAR', 'SALDO_PAGAR', 'QTD_RECEBER',
-                       'SALDO_RECEBER', 'DIFERENCA']].copy()
+    df_tab = compute_tabela_conciliacao(conciliacao, filtro_status, filtro_de, filtro_para, ordenar)
     df_tab['QTD_PAGAR'] = df_tab['QTD_PAGAR'].astype(int)
     df_tab['QTD_RECEBER'] = df_tab['QTD_RECEBER'].astype(int)
     df_tab['SALDO_PAGAR'] = df_tab['SALDO_PAGAR'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -997,6 +1156,81 @@ def _render_conciliacao(conciliacao, cores):
     st.caption(f"{len(df_tab)} pares exibidos")
 
 
+def _render_conciliacao_titulos(df_pagar, df_receber, cores):
+    """Conciliacao titulo a titulo: A Pagar sem A Receber correspondente (e vice-versa)."""
+
+    st.markdown("##### Conciliacao por Titulo")
+    st.caption(
+        f"Cada A Pagar e pareado com o A Receber do grupo de destino pelo par de grupos, "
+        f"valor (tolerancia de {formatar_moeda(_TOLERANCIA_TITULO, completo=True)}), emissao e vencimento "
+        f"(ate {_JANELA_TITULO_DIAS} dias) e numero do documento quando os dois lados tem."
+    )
+
+    pares, pendencias = compute_conciliacao_titulos(df_pagar, df_receber)
+
+    sem_par = pendencias[pendencias['SITUACAO'] == 'Sem par']
+    ambiguos = pendencias[pendencias['SITUACAO'] == 'Ambiguo']
+    saldo_divergente = pares[pares['DIF_SALDO'].abs() >= _TOLERANCIA_TITULO]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Titulos Conciliados", formatar_numero(len(pares)))
+    col2.metric("A Pagar sem A Receber", formatar_numero((sem_par['LADO'] == 'Pagar').sum()),
+                formatar_moeda(sem_par.loc[sem_par['LADO'] == 'Pagar', 'SALDO'].sum()), delta_color="off")
+    col3.metric("A Receber sem A Pagar", formatar_numero((sem_par['LADO'] == 'Receber').sum()),
+                formatar_moeda(sem_par.loc[sem_par['LADO'] == 'Receber', 'SALDO'].sum()), delta_color="off")
+    col4.metric("Ambiguos", formatar_numero(len(ambiguos)))
+
+    st.divider()
+
+    # --- Pendencias ---
+    st.markdown("##### Titulos sem Par")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filtro_lado = st.selectbox("Lado", ["Todos", "Pagar", "Receber"], key="conc_tit_lado")
+    with col2:
+        filtro_situacao = st.selectbox("Situacao", ["Todos", "Sem par", "Ambiguo"], key="conc_tit_situacao")
+    with col3:
+        grupos = ['Todos'] + [g for g in ORDEM_GRUPOS if g in set(pendencias['DE']) | set(pendencias['PARA'])]
+        filtro_grupo = st.selectbox("Grupo", grupos, key="conc_tit_grupo")
+
+    df_show = compute_pendencias(pendencias, filtro_lado, filtro_situacao, filtro_grupo)
+
+    colunas = ['LADO', 'DE', 'PARA', 'NOME_FILIAL', 'NUMERO', 'EMISSAO', 'VENCIMENTO',
+               'VALOR_ORIGINAL', 'SALDO', 'SITUACAO', 'CANDIDATAS']
+    df_tab = df_show[[c for c in colunas if c in df_show.columns]].head(500)
+    for col in ['EMISSAO', 'VENCIMENTO']:
+        if col in df_tab.columns:
+            df_tab[col] = pd.to_datetime(df_tab[col], errors='coerce').dt.strftime('%d/%m/%Y')
+    for col in ['VALOR_ORIGINAL', 'SALDO']:
+        if col in df_tab.columns:
+            df_tab[col] = df_tab[col].apply(lambda x: formatar_moeda(x, completo=True))
+
+    nomes = {
+        'LADO': 'Lado', 'DE': 'De', 'PARA': 'Para', 'NOME_FILIAL': 'Filial', 'NUMERO': 'Numero',
+        'EMISSAO': 'Emissao', 'VENCIMENTO': 'Vencimento', 'VALOR_ORIGINAL': 'Valor', 'SALDO': 'Saldo',
+        'SITUACAO': 'Situacao', 'CANDIDATAS': 'Candidatos'
+    }
+    df_tab.columns = [nomes.get(c, c) for c in df_tab.columns]
+
+    st.dataframe(df_tab, use_container_width=True, hide_index=True, height=400)
+    st.caption(f"{len(df_tab)} de {len(df_show)} titulos | Ambiguo = mais de um titulo do outro lado "
+               f"atende aos criterios sem que um deles seja o melhor")
+
+    # --- Pares com saldo divergente ---
+    if len(saldo_divergente) > 0:
+        with st.expander(f"Pares conciliados com saldo divergente ({len(saldo_divergente)})"):
+            df_div = saldo_divergente.sort_values('DIF_SALDO', key=abs, ascending=False).head(500)
+            df_div = df_div[['DE', 'PARA', 'NUMERO_PAGAR', 'NUMERO_RECEBER', 'VALOR_PAGAR',
+                             'SALDO_PAGAR', 'SALDO_RECEBER', 'DIF_SALDO']]
+            for col in ['VALOR_PAGAR', 'SALDO_PAGAR', 'SALDO_RECEBER', 'DIF_SALDO']:
+                df_div[col] = df_div[col].apply(lambda x: formatar_moeda(x, completo=True))
+            df_div.columns = ['De', 'Para', 'Numero Pagar', 'Numero Receber', 'Valor',
+                              'Saldo Pagar', 'Saldo Receber', 'Diferenca']
+            st.dataframe(df_div, use_container_width=True, hide_index=True, height=300)
+            st.caption("Baixa registrada em um lado e nao no outro")
+
+
 # =====================================================================
 # TAB 4 - MATRIZ
 # =====================================================================
@@ -1012,22 +1246,7 @@ def _render_matriz(df_pagar, df_receber, cores):
         st.markdown(f"<p style='color: {cores['perigo']}; font-weight: 600;'>"
                     "A PAGAR: Quem paga para quem</p>", unsafe_allow_html=True)
 
-        matriz_pagar = df_pagar.pivot_table(
-            index='GRUPO_ORIGEM',
-            columns='GRUPO_DESTINO',
-            values='SALDO',
-            aggfunc='sum',
-            fill_value=0
-        )
-
-        # Reordenar por ORDEM_GRUPOS
-        idx_order = [g for g in ORDEM_GRUPOS if g in matriz_pagar.index]
-        col_order = [g for g in ORDEM_GRUPOS if g in matriz_pagar.columns]
-        idx_order += [g for g in matriz_pagar.index if g not in idx_order]
-        col_order += [g for g in matriz_pagar.columns if g not in col_order]
-        matriz_pagar = matriz_pagar.reindex(index=idx_order, columns=col_order, fill_value=0)
-
-        matriz_pagar_fmt = matriz_pagar.copy()
+        matriz_pagar_fmt = compute_matriz(df_pagar)
         for col in matriz_pagar_fmt.columns:
             matriz_pagar_fmt[col] = matriz_pagar_fmt[col].apply(
                 lambda x: formatar_moeda(x) if x > 0 else '-')
@@ -1039,21 +1258,7 @@ def _render_matriz(df_pagar, df_receber, cores):
         st.markdown(f"<p style='color: {cores['sucesso']}; font-weight: 600;'>"
                     "A RECEBER: Quem recebe de quem</p>", unsafe_allow_html=True)
 
-        matriz_receber = df_receber.pivot_table(
-            index='GRUPO_ORIGEM',
-            columns='GRUPO_DESTINO',
-            values='SALDO',
-            aggfunc='sum',
-            fill_value=0
-        )
-
-        idx_order = [g for g in ORDEM_GRUPOS if g in matriz_receber.index]
-        col_order = [g for g in ORDEM_GRUPOS if g in matriz_receber.columns]
-        idx_order += [g for g in matriz_receber.index if g not in idx_order]
-        col_order += [g for g in matriz_receber.columns if g not in col_order]
-        matriz_receber = matriz_receber.reindex(index=idx_order, columns=col_order, fill_value=0)
-
-        matriz_receber_fmt = matriz_receber.copy()
+        matriz_receber_fmt = compute_matriz(df_receber)
         for col in matriz_receber_fmt.columns:
             matriz_receber_fmt[col] = matriz_receber_fmt[col].apply(
                 lambda x: formatar_moeda(x) if x > 0 else '-')
@@ -1066,13 +1271,8 @@ def _render_matriz(df_pagar, df_receber, cores):
     # Comparativo por grupo (barras horizontais espelhadas) - inclui grupos sem filial
     st.markdown("##### Comparativo por Grupo")
 
-    df_comp = _resumo_grupos(df_pagar, df_receber)
-    df_comp['Saldo'] = df_comp['Recebe'] - df_comp['Paga']
-
-    # Ordenar pela ORDEM_GRUPOS (invertido para grafico horizontal)
-    df_comp['_ordem'] = df_comp['Grupo'].apply(
-        lambda x: ORDEM_GRUPOS.index(x) if x in ORDEM_GRUPOS else len(ORDEM_GRUPOS))
-    df_comp = df_comp.sort_values('_ordem', ascending=False)
+    # Ordenado pela ORDEM_GRUPOS (invertido para grafico horizontal)
+    df_comp = compute_comparativo(df_pagar, df_receber)
 
     fig = go.Figure()
 
@@ -1115,7 +1315,7 @@ def _render_matriz(df_pagar, df_receber, cores):
     st.plotly_chart(fig, use_container_width=True)
 
     # Tabela resumo comparativo
-    df_comp_tab = df_comp[['Grupo', 'Paga', 'Recebe', 'Saldo']].copy()
+    df_comp_tab = df_comp[['Grupo', 'Paga', 'Recebe', 'Saldo']]
     df_comp_tab['Paga'] = df_comp_tab['Paga'].apply(lambda x: formatar_moeda(x, completo=True))
     df_comp_tab['Recebe'] = df_comp_tab['Recebe'].apply(lambda x: formatar_moeda(x, completo=True))
     df_comp_tab['Saldo'] = df_comp_tab['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -1135,60 +1335,38 @@ def _render_detalhes_pagar(df_pagar, cores):
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
+    grupos_origem, grupos_destino, tipos = compute_opcoes_detalhes(df_pagar)
+
     with col1:
-        grupos_origem = ['Todos'] + sorted(df_pagar['GRUPO_ORIGEM'].dropna().unique().tolist())
         filtro_grupo_orig = st.selectbox("Grupo Origem", grupos_origem, key="pagar_grupo_orig")
 
     with col2:
-        grupos_destino = ['Todos'] + sorted(df_pagar['GRUPO_DESTINO'].dropna().unique().tolist())
         filtro_grupo_dest = st.selectbox("Paga Para", grupos_destino, key="pagar_grupo_dest")
 
     with col3:
         filtro_status = st.selectbox("Status", ['Todos', 'Pendente', 'Vencido'], key="pagar_status")
 
     with col4:
-        if 'TIPO' in df_pagar.columns:
-            tipos = ['Todos'] + sorted(df_pagar['TIPO'].dropna().unique().tolist())
-        else:
-            tipos = ['Todos']
         filtro_tipo = st.selectbox("Tipo Doc", tipos, key="pagar_tipo")
 
     with col5:
         ordenar = st.selectbox("Ordenar", ["Maior Pendente", "Mais Recente", "Mais Antigo"], key="pagar_ordem")
 
-    df_show = df_pagar.copy()
-
-    if filtro_grupo_orig != 'Todos':
-        df_show = df_show[df_show['GRUPO_ORIGEM'] == filtro_grupo_orig]
-    if filtro_grupo_dest != 'Todos':
-        df_show = df_show[df_show['GRUPO_DESTINO'] == filtro_grupo_dest]
-    if filtro_status == 'Pendente':
-        df_show = df_show[df_show['SALDO'] > 0]
-    elif filtro_status == 'Vencido':
-        df_show = df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)]
-    if filtro_tipo != 'Todos' and 'TIPO' in df_show.columns:
-        df_show = df_show[df_show['TIPO'] == filtro_tipo]
-
-    if ordenar == "Maior Pendente":
-        df_show = df_show.sort_values('SALDO', ascending=False)
-    elif ordenar == "Mais Recente":
-        df_show = df_show.sort_values('EMISSAO', ascending=False)
-    else:
-        df_show = df_show.sort_values('EMISSAO', ascending=True)
+    df_show = compute_detalhes(df_pagar, filtro_grupo_orig, filtro_grupo_dest, filtro_status, filtro_tipo, ordenar)
 
     # Metricas
+    metricas = compute_metricas_detalhes(df_show)
     col1, col2, col3 = st.columns(3)
-    col1.metric("Titulos", formatar_numero(len(df_show)))
-    col2.metric("Saldo Total", formatar_moeda(df_show['SALDO'].sum()))
-    col3.metric("Vencidos", formatar_numero(
-        len(df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)])))
+    col1.metric("Titulos", formatar_numero(metricas['qtd']))
+    col2.metric("Saldo Total", formatar_moeda(metricas['saldo']))
+    col3.metric("Vencidos", formatar_numero(metricas['vencidos']))
 
     st.divider()
 
     colunas = ['GRUPO_ORIGEM', 'NOME_FILIAL', 'NOME_FORNECEDOR', 'GRUPO_DESTINO',
                'TIPO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO', 'STATUS']
     colunas_disp = [c for c in colunas if c in df_show.columns]
-    df_tab = df_show[colunas_disp].head(500).copy()
+    df_tab = df_show[colunas_disp].head(500)
 
     for col in ['EMISSAO', 'VENCIMENTO']:
         if col in df_tab.columns:
@@ -1226,60 +1404,38 @@ def _render_detalhes_receber(df_receber, cores):
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
+    grupos_origem, grupos_destino, tipos = compute_opcoes_detalhes(df_receber)
+
     with col1:
-        grupos_origem = ['Todos'] + sorted(df_receber['GRUPO_ORIGEM'].dropna().unique().tolist())
         filtro_grupo_orig = st.selectbox("Grupo Origem", grupos_origem, key="receber_grupo_orig")
 
     with col2:
-        grupos_destino = ['Todos'] + sorted(df_receber['GRUPO_DESTINO'].dropna().unique().tolist())
         filtro_grupo_dest = st.selectbox("Recebe De", grupos_destino, key="receber_grupo_dest")
 
     with col3:
         filtro_status = st.selectbox("Status", ['Todos', 'Pendente', 'Vencido'], key="receber_status")
 
     with col4:
-        if 'TIPO' in df_receber.columns:
-            tipos = ['Todos'] + sorted(df_receber['TIPO'].dropna().unique().tolist())
-        else:
-            tipos = ['Todos']
         filtro_tipo = st.selectbox("Tipo Doc", tipos, key="receber_tipo")
 
     with col5:
         ordenar = st.selectbox("Ordenar", ["Maior Pendente", "Mais Recente", "Mais Antigo"], key="receber_ordem")
 
-    df_show = df_receber.copy()
-
-    if filtro_grupo_orig != 'Todos':
-        df_show = df_show[df_show['GRUPO_ORIGEM'] == filtro_grupo_orig]
-    if filtro_grupo_dest != 'Todos':
-        df_show = df_show[df_show['GRUPO_DESTINO'] == filtro_grupo_dest]
-    if filtro_status == 'Pendente':
-        df_show = df_show[df_show['SALDO'] > 0]
-    elif filtro_status == 'Vencido':
-        df_show = df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)]
-    if filtro_tipo != 'Todos' and 'TIPO' in df_show.columns:
-        df_show = df_show[df_show['TIPO'] == filtro_tipo]
-
-    if ordenar == "Maior Pendente":
-        df_show = df_show.sort_values('SALDO', ascending=False)
-    elif ordenar == "Mais Recente":
-        df_show = df_show.sort_values('EMISSAO', ascending=False)
-    else:
-        df_show = df_show.sort_values('EMISSAO', ascending=True)
+    df_show = compute_detalhes(df_receber, filtro_grupo_orig, filtro_grupo_dest, filtro_status, filtro_tipo, ordenar)
 
     # Metricas
+    metricas = compute_metricas_detalhes(df_show)
     col1, col2, col3 = st.columns(3)
-    col1.metric("Titulos", formatar_numero(len(df_show)))
-    col2.metric("Saldo Total", formatar_moeda(df_show['SALDO'].sum()))
-    col3.metric("Vencidos", formatar_numero(
-        len(df_show[(df_show['SALDO'] > 0) & (df_show['DIAS_VENC'] < 0)])))
+    col1.metric("Titulos", formatar_numero(metricas['qtd']))
+    col2.metric("Saldo Total", formatar_moeda(metricas['saldo']))
+    col3.metric("Vencidos", formatar_numero(metricas['vencidos']))
 
     st.divider()
 
     colunas = ['GRUPO_ORIGEM', 'NOME_FILIAL', 'NOME_CLIENTE', 'GRUPO_DESTINO',
                'TIPO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO', 'STATUS']
     colunas_disp = [c for c in colunas if c in df_show.columns]
-    df_tab = df_show[colunas_disp].head(500).copy()
+    df_tab = df_show[colunas_disp].head(500)
 
     for col in ['EMISSAO', 'VENCIMENTO']:
         if col in df_tab.columns:
@@ -4,12 +4,13 @@ Aba Juros e Cambio - Analise de juros pagos e operacoes em dolar/real
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime
 
 from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.periodo import SEM_DATA, chave_periodo, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def _get_nome_grupo(cod_filial):
@@ -24,15 +25,24 @@ def _detectar_multiplos_grupos(df):
     return grupos > 1
 
 
-def render_juros_cambio(df):
-    """Renderiza a aba de Juros e Cambio - separado em duas secoes"""
-    cores = get_cores()
+def _agrupar_por_filial(df, agregacoes):
+    """(multiplos grupos?, agregacao por grupo ou por filial 'codigo - nome')"""
+    usar_grupo = 'FILIAL' in df.columns and _detectar_multiplos_grupos(df)
 
-    if len(df) == 0:
-        st.info("Nenhum dado disponivel.")
-        return
+    if usar_grupo:
+        rotulo = df['FILIAL'].apply(_get_nome_grupo)
+    elif 'FILIAL' in df.columns and 'NOME_FILIAL' in df.columns:
+        rotulo = df['FILIAL'].astype(int).astype(str) + ' - ' + df['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
+    else:
+        rotulo = df['NOME_FILIAL']
 
-    df = df.copy()
+    return usar_grupo, df.assign(_AGRUP=rotulo).groupby('_AGRUP', observed=True).agg(agregacoes).reset_index()
+
+
+@memoizar_secao
+def compute_base_juros_cambio(df):
+    """(titulos com juros/multa/cambio numericos, titulos com juros, operacoes em dolar, em real)"""
+    df = df.copy(deep=False)
 
     # Garantir colunas necessarias
     colunas_necessarias = ['VALOR_JUROS', 'VALOR_MULTA', 'TX_MOEDA', 'VALOR_REAL']
@@ -46,6 +56,26 @@ def render_juros_cambio(df):
     df_com_juros = df[df['VALOR_JUROS'] > 0]
     df_dolar = df[df['TX_MOEDA'] > 1]  # Operacoes em dolar
     df_real = df[df['TX_MOEDA'] <= 1]  # Operacoes em real
+    return df, df_com_juros, df_dolar, df_real
+
+
+@memoizar_secao
+def compute_opcoes_filtros(df):
+    """Opcoes dos filtros de categoria e fornecedor"""
+    categorias = ['Todas'] + sorted([str(x) for x in df['DESCRICAO'].dropna().unique().tolist()])
+    fornecedores = ['Todos'] + sorted([str(x) for x in df['NOME_FORNECEDOR'].dropna().unique().tolist()])
+    return categorias, fornecedores
+
+
+def render_juros_cambio(df):
+    """Renderiza a aba de Juros e Cambio - separado em duas secoes"""
+    cores = get_cores()
+
+    if len(df) == 0:
+        st.info("Nenhum dado disponivel.")
+        return
+
+    df, df_com_juros, df_dolar, df_real = compute_base_juros_cambio(df)
 
     # ========== DUAS ABAS INTERNAS ==========
     tab_juros, tab_cambio = st.tabs(["Juros e Multas", "Operacoes em Dolar"])
@@ -61,6 +91,139 @@ def render_juros_cambio(df):
 # SECAO 1: JUROS E MULTAS
 # ============================================================
 
+_AGREGACOES_JUROS = {
+    'VALOR_JUROS': 'sum',
+    'VALOR_MULTA': 'sum',
+    'VALOR_ORIGINAL': 'sum',
+    'NUMERO': 'count'
+}
+
+
+def _mascara_juros(df, filtro_categoria, filtro_fornecedor, tipo_custo):
+    """Mascara booleana de df com os filtros de categoria, fornecedor e tipo de custo"""
+    mask = pd.Series(True, index=df.index)
+
+    if filtro_categoria != 'Todas':
+        mask &= df['DESCRICAO'] == filtro_categoria
+
+    if filtro_fornecedor != 'Todos':
+        mask &= df['NOME_FORNECEDOR'] == filtro_fornecedor
+
+    if tipo_custo == "Apenas Juros":
+        mask &= df['VALOR_JUROS'] > 0
+    elif tipo_custo == "Apenas Multas":
+        mask &= df['VALOR_MULTA'] > 0
+    return mask
+
+
+def _custos_por(df_agg, rotulo):
+    """Renomeia a agregacao de juros/multas e ordena por custo total (so quem tem custo)"""
+    df_agg.columns = [rotulo, 'Juros', 'Multa', 'Principal', 'Qtd']
+    df_agg['Total'] = df_agg['Juros'] + df_agg['Multa']
+    df_agg['% Custo'] = (df_agg['Total'] / df_agg['Principal'] * 100).round(2)
+    return df_agg[df_agg['Total'] > 0].sort_values('Total', ascending=False)
+
+
+@memoizar_secao
+def compute_kpis_juros(df):
+    """Totais de juros, multas e principal e contagem de titulos com cada custo"""
+    return {
+        'total_juros': df['VALOR_JUROS'].sum(),
+        'total_multa': df['VALOR_MULTA'].sum(),
+        'total_principal': df['VALOR_ORIGINAL'].sum(),
+        'qtd_com_juros': len(df[df['VALOR_JUROS'] > 0]),
+        'qtd_com_multa': len(df[df['VALOR_MULTA'] > 0]),
+        'qtd_total': len(df),
+    }
+
+
+@memoizar_secao
+def compute_fornecedores_juros(df):
+    """10 fornecedores com maior custo de juros + multas"""
+    df_forn = df.groupby('NOME_FORNECEDOR', observed=True).agg(_AGREGACOES_JUROS).reset_index()
+    return _custos_por(df_forn, 'Fornecedor').head(10)
+
+
+@memoizar_secao
+def compute_evolucao_juros(df):
+    """Juros, multas, principal e % de juros por mes de emissao"""
+    df_temp = df.copy(deep=False)
+    df_temp['MES'] = chave_periodo(df_temp, 'EMISSAO', 'AAAAMM')
+
+    df_mes = df_temp[df_temp['MES'] != SEM_DATA].groupby('MES', observed=True).agg(_AGREGACOES_JUROS).reset_index()
+    df_mes['MES'] = rotulo_mes(df_mes['MES'])
+    df_mes['PCT_JUROS'] = (df_mes['VALOR_JUROS'] / df_mes['VALOR_ORIGINAL'] * 100).round(2)
+    return df_mes
+
+
+@memoizar_secao
+def compute_categorias_juros(df):
+    """10 categorias com maior custo de juros + multas"""
+    df_cat = df.groupby('DESCRICAO', observed=True).agg(_AGREGACOES_JUROS).reset_index()
+    return _custos_por(df_cat, 'Categoria').head(10)
+
+
+@memoizar_secao
+def compute_filiais_juros(df):
+    """(multiplos grupos?, custo de juros + multas por grupo/filial)"""
+    usar_grupo, df_fil = _agrupar_por_filial(df, _AGREGACOES_JUROS)
+    return usar_grupo, _custos_por(df_fil, 'Filial')
+
+
+@memoizar_secao
+def compute_valores_juros(df):
+    """Valores de juros dos titulos com juros"""
+    return df.loc[df['VALOR_JUROS'] > 0, 'VALOR_JUROS']
+
+
+@memoizar_secao
+def compute_maiores_juros(df):
+    """5 titulos com maior juros e o % sobre o principal"""
+    df_top_juros = df.nlargest(5, 'VALOR_JUROS')[['NOME_FORNECEDOR', 'VALOR_JUROS', 'VALOR_ORIGINAL', 'EMISSAO']]
+    df_top_juros['% Juros'] = (df_top_juros['VALOR_JUROS'] / df_top_juros['VALOR_ORIGINAL'] * 100).round(2)
+    return df_top_juros
+
+
+@memoizar_secao
+def compute_maiores_pct_juros(df):
+    """5 titulos com maior % de juros sobre o principal"""
+    df_filtrado_temp = df[df['VALOR_JUROS'] > 0]
+    df_filtrado_temp['PCT_JUROS'] = (df_filtrado_temp['VALOR_JUROS'] / df_filtrado_temp['VALOR_ORIGINAL'] * 100)
+    return df_filtrado_temp.nlargest(5, 'PCT_JUROS')[['NOME_FORNECEDOR', 'PCT_JUROS', 'VALOR_JUROS', 'VALOR_ORIGINAL']]
+
+
+@memoizar_secao
+def compute_juros_e_multas(df):
+    """(quantidade, custo total, 5 maiores por juros) dos titulos com juros e multa"""
+    df_ambos = df[(df['VALOR_JUROS'] > 0) & (df['VALOR_MULTA'] > 0)]
+    total_ambos = df_ambos['VALOR_JUROS'].sum() + df_ambos['VALOR_MULTA'].sum()
+
+    df_ambos_show = df_ambos.nlargest(5, 'VALOR_JUROS')[['NOME_FORNECEDOR', 'VALOR_JUROS', 'VALOR_MULTA', 'VALOR_ORIGINAL']]
+    df_ambos_show['Total'] = df_ambos_show['VALOR_JUROS'] + df_ambos_show['VALOR_MULTA']
+    return len(df_ambos), total_ambos, df_ambos_show
+
+
+_ORDEM_TITULOS_JUROS = {
+    "Maior juros": 'VALOR_JUROS',
+    "Maior multa": 'VALOR_MULTA',
+    "Maior valor": 'VALOR_ORIGINAL',
+    "Maior % juros": 'PCT_JUROS',
+}
+
+
+@memoizar_secao
+def compute_titulos_juros(df, ordenar):
+    """Ate 100 titulos com juros/multas na ordem escolhida, com o % de juros"""
+    df_show = df.copy(deep=False)
+    df_show['PCT_JUROS'] = (df_show['VALOR_JUROS'] / df_show['VALOR_ORIGINAL'] * 100)
+    df_show = df_show.sort_values(_ORDEM_TITULOS_JUROS.get(ordenar, 'EMISSAO'), ascending=False).head(100)
+
+    colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO',
+               'VALOR_ORIGINAL', 'VALOR_JUROS', 'VALOR_MULTA', 'PCT_JUROS', 'SALDO', 'STATUS']
+    colunas_disp = [c for c in colunas if c in df_show.columns]
+    return df_show[colunas_disp]
+
+
 def _render_secao_juros(df, df_com_juros, cores):
     """Secao dedicada a analise de juros e multas - com filtros e analises avancadas"""
 
@@ -71,12 +234,12 @@ def _render_secao_juros(df, df_com_juros, cores):
     # Listas de filtros baseadas apenas em titulos com juros/multa
     df_base_filtro = df_com_juros if len(df_com_juros) > 0 else df
 
+    categorias, fornecedores = compute_opcoes_filtros(df_base_filtro)
+
     with col1:
-        categorias = ['Todas'] + sorted([str(x) for x in df_base_filtro['DESCRICAO'].dropna().unique().tolist()])
         filtro_categoria = st.selectbox("Categoria", categorias, key="juros_categoria")
 
     with col2:
-        fornecedores = ['Todos'] + sorted([str(x) for x in df_base_filtro['NOME_FORNECEDOR'].dropna().unique().tolist()])
         filtro_fornecedor = st.selectbox("Fornecedor", fornecedores, key="juros_fornecedor")
 
     with col3:
@@ -84,32 +247,23 @@ def _render_secao_juros(df, df_com_juros, cores):
         tipo_custo = st.selectbox("Tipo de Custo", ["Todos", "Apenas Juros", "Apenas Multas", "Juros + Multas"], key="juros_tipo")
 
     # Aplicar filtros (partir dos titulos com juros/multa)
-    df_filtrado = df_com_juros.copy()
-
-    if filtro_categoria != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO'] == filtro_categoria]
-
-    if filtro_fornecedor != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['NOME_FORNECEDOR'] == filtro_fornecedor]
-
-    if tipo_custo == "Apenas Juros":
-        df_filtrado = df_filtrado[df_filtrado['VALOR_JUROS'] > 0]
-    elif tipo_custo == "Apenas Multas":
-        df_filtrado = df_filtrado[df_filtrado['VALOR_MULTA'] > 0]
+    filtros = (filtro_categoria, filtro_fornecedor, tipo_custo)
+    df_filtrado = recorte(df_com_juros, ('juros',) + filtros, lambda d: _mascara_juros(d, *filtros))
 
     df_com_custos = df_filtrado
 
     st.divider()
 
     # ========== KPIs ==========
-    total_juros = df_filtrado['VALOR_JUROS'].sum()
-    total_multa = df_filtrado['VALOR_MULTA'].sum()
+    kpis = compute_kpis_juros(df_filtrado)
+    total_juros = kpis['total_juros']
+    total_multa = kpis['total_multa']
     total_custos = total_juros + total_multa
-    total_principal = df_filtrado['VALOR_ORIGINAL'].sum()
+    total_principal = kpis['total_principal']
 
-    qtd_com_juros = len(df_filtrado[df_filtrado['VALOR_JUROS'] > 0])
-    qtd_com_multa = len(df_filtrado[df_filtrado['VALOR_MULTA'] > 0])
-    qtd_total = len(df_filtrado)
+    qtd_com_juros = kpis['qtd_com_juros']
+    qtd_com_multa = kpis['qtd_com_multa']
+    qtd_total = kpis['qtd_total']
 
     pct_juros = (total_juros / total_principal * 100) if total_principal > 0 else 0
     pct_multa = (total_multa / total_principal * 100) if total_principal > 0 else 0
@@ -170,16 +324,7 @@ def _render_secao_juros(df, df_com_juros, cores):
     with col1:
         st.markdown("##### Top Fornecedores com Juros")
 
-        df_forn = df_filtrado.groupby('NOME_FORNECEDOR').agg({
-            'VALOR_JUROS': 'sum',
-            'VALOR_MULTA': 'sum',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_forn.columns = ['Fornecedor', 'Juros', 'Multa', 'Principal', 'Qtd']
-        df_forn['Total'] = df_forn['Juros'] + df_forn['Multa']
-        df_forn['% Custo'] = (df_forn['Total'] / df_forn['Principal'] * 100).round(2)
-        df_forn = df_forn[df_forn['Total'] > 0].sort_values('Total', ascending=False).head(10)
+        df_forn = compute_fornecedores_juros(df_filtrado)
 
         if len(df_forn) > 0:
             fig = go.Figure()
@@ -212,17 +357,7 @@ def _render_secao_juros(df, df_com_juros, cores):
     with col2:
         st.markdown("##### Evolucao Mensal")
 
-        df_temp = df_filtrado.copy()
-        df_temp['MES'] = df_temp['EMISSAO'].dt.to_period('M')
-
-        df_mes = df_temp.groupby('MES').agg({
-            'VALOR_JUROS': 'sum',
-            'VALOR_MULTA': 'sum',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_mes['MES'] = df_mes['MES'].astype(str)
-        df_mes['PCT_JUROS'] = (df_mes['VALOR_JUROS'] / df_mes['VALOR_ORIGINAL'] * 100).round(2)
+        df_mes = compute_evolucao_juros(df_filtrado)
 
         if len(df_mes) >= 2:
             fig = go.Figure()
@@ -272,16 +407,7 @@ def _render_secao_juros(df, df_com_juros, cores):
     with col1:
         st.markdown("##### Por Categoria")
 
-        df_cat = df_filtrado.groupby('DESCRICAO').agg({
-            'VALOR_JUROS': 'sum',
-            'VALOR_MULTA': 'sum',
-            'VALOR_ORIGINAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_cat.columns = ['Categoria', 'Juros', 'Multa', 'Principal', 'Qtd']
-        df_cat['Total'] = df_cat['Juros'] + df_cat['Multa']
-        df_cat['% Custo'] = (df_cat['Total'] / df_cat['Principal'] * 100).round(2)
-        df_cat = df_cat[df_cat['Total'] > 0].sort_values('Total', ascending=False).head(10)
+        df_cat = compute_categorias_juros(df_filtrado)
 
         if len(df_cat) > 0:
             fig = go.Figure(go.Bar(
@@ -303,43 +429,12 @@ def _render_secao_juros(df, df_com_juros, cores):
             st.plotly_chart(fig, use_container_width=True)
 
     with col2:
-        _usar_grupo_juros = 'FILIAL' in df_filtrado.columns and _detectar_multiplos_grupos(df_filtrado)
+        _usar_grupo_juros, df_fil = compute_filiais_juros(df_filtrado)
 
         if _usar_grupo_juros:
             st.markdown("##### Por Grupo")
-            df_filtrado_grupo = df_filtrado.copy()
-            df_filtrado_grupo['GRUPO'] = df_filtrado_grupo['FILIAL'].apply(_get_nome_grupo)
-            df_fil = df_filtrado_grupo.groupby('GRUPO').agg({
-                'VALOR_JUROS': 'sum',
-                'VALOR_MULTA': 'sum',
-                'VALOR_ORIGINAL': 'sum',
-                'NUMERO': 'count'
-            }).reset_index()
-            df_fil.columns = ['Filial', 'Juros', 'Multa', 'Principal', 'Qtd']
         else:
             st.markdown("##### Por Filial")
-            if 'FILIAL' in df_filtrado.columns and 'NOME_FILIAL' in df_filtrado.columns:
-                df_filtrado_fil = df_filtrado.copy()
-                df_filtrado_fil['_LABEL'] = df_filtrado_fil['FILIAL'].astype(int).astype(str) + ' - ' + df_filtrado_fil['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-                df_fil = df_filtrado_fil.groupby('_LABEL').agg({
-                    'VALOR_JUROS': 'sum',
-                    'VALOR_MULTA': 'sum',
-                    'VALOR_ORIGINAL': 'sum',
-                    'NUMERO': 'count'
-                }).reset_index()
-                df_fil.columns = ['Filial', 'Juros', 'Multa', 'Principal', 'Qtd']
-            else:
-                df_fil = df_filtrado.groupby('NOME_FILIAL').agg({
-                    'VALOR_JUROS': 'sum',
-                    'VALOR_MULTA': 'sum',
-                    'VALOR_ORIGINAL': 'sum',
-                    'NUMERO': 'count'
-                }).reset_index()
-                df_fil.columns = ['Filial', 'Juros', 'Multa', 'Principal', 'Qtd']
-
-        df_fil['Total'] = df_fil['Juros'] + df_fil['Multa']
-        df_fil['% Custo'] = (df_fil['Total'] / df_fil['Principal'] * 100).round(2)
-        df_fil = df_fil[df_fil['Total'] > 0].sort_values('Total', ascending=False)
 
         if len(df_fil) > 0:
             fig = go.Figure(go.Pie(
@@ -371,17 +466,17 @@ def _render_secao_juros(df, df_com_juros, cores):
         # Distribuicao de juros
         st.markdown("###### Distribuicao dos Juros")
 
-        df_com_juros_filter = df_filtrado[df_filtrado['VALOR_JUROS'] > 0]
+        valores_juros = compute_valores_juros(df_filtrado)
 
-        if len(df_com_juros_filter) > 0:
+        if len(valores_juros) > 0:
             fig = go.Figure(go.Histogram(
-                x=df_com_juros_filter['VALOR_JUROS'],
+                x=valores_juros,
                 nbinsx=20,
                 marker_color=cores['perigo'],
                 opacity=0.7
             ))
 
-            media_juros = df_com_juros_filter['VALOR_JUROS'].mean()
+            media_juros = valores_juros.mean()
             fig.add_vline(x=media_juros, line_dash="dash", line_color=cores['info'],
                           annotation_text=f"Media: {formatar_moeda(media_juros)}")
 
@@ -398,8 +493,7 @@ def _render_secao_juros(df, df_com_juros, cores):
         # Maiores juros
         st.markdown("###### Maiores Juros Pagos")
 
-        df_top_juros = df_filtrado.nlargest(5, 'VALOR_JUROS')[['NOME_FORNECEDOR', 'VALOR_JUROS', 'VALOR_ORIGINAL', 'EMISSAO']]
-        df_top_juros['% Juros'] = (df_top_juros['VALOR_JUROS'] / df_top_juros['VALOR_ORIGINAL'] * 100).round(2)
+        df_top_juros = compute_maiores_juros(df_filtrado)
         df_top_juros['VALOR_JUROS'] = df_top_juros['VALOR_JUROS'].apply(lambda x: formatar_moeda(x, completo=True))
         df_top_juros['VALOR_ORIGINAL'] = df_top_juros['VALOR_ORIGINAL'].apply(lambda x: formatar_moeda(x, completo=True))
         df_top_juros['EMISSAO'] = pd.to_datetime(df_top_juros['EMISSAO']).dt.strftime('%d/%m/%Y')
@@ -412,9 +506,7 @@ def _render_secao_juros(df, df_com_juros, cores):
         # Maior % de juros sobre principal
         st.markdown("###### Maior % Juros/Principal")
 
-        df_filtrado_temp = df_filtrado[df_filtrado['VALOR_JUROS'] > 0].copy()
-        df_filtrado_temp['PCT_JUROS'] = (df_filtrado_temp['VALOR_JUROS'] / df_filtrado_temp['VALOR_ORIGINAL'] * 100)
-        df_top_pct = df_filtrado_temp.nlargest(5, 'PCT_JUROS')[['NOME_FORNECEDOR', 'PCT_JUROS', 'VALOR_JUROS', 'VALOR_ORIGINAL']]
+        df_top_pct = compute_maiores_pct_juros(df_filtrado)
         df_top_pct['PCT_JUROS'] = df_top_pct['PCT_JUROS'].apply(lambda x: f"{x:.2f}%")
         df_top_pct['VALOR_JUROS'] = df_top_pct['VALOR_JUROS'].apply(lambda x: formatar_moeda(x, completo=True))
         df_top_pct['VALOR_ORIGINAL'] = df_top_pct['VALOR_ORIGINAL'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -461,15 +553,11 @@ def _render_secao_juros(df, df_com_juros, cores):
         # Titulos com ambos (juros e multa)
         st.markdown("###### Titulos com Juros E Multas")
 
-        df_ambos = df_filtrado[(df_filtrado['VALOR_JUROS'] > 0) & (df_filtrado['VALOR_MULTA'] > 0)]
-        qtd_ambos = len(df_ambos)
-        total_ambos = df_ambos['VALOR_JUROS'].sum() + df_ambos['VALOR_MULTA'].sum()
+        qtd_ambos, total_ambos, df_ambos_show = compute_juros_e_multas(df_filtrado)
 
         st.metric("Titulos com Juros + Multa", qtd_ambos, f"Total: {formatar_moeda(total_ambos)}")
 
-        if len(df_ambos) > 0:
-            df_ambos_show = df_ambos.nlargest(5, 'VALOR_JUROS')[['NOME_FORNECEDOR', 'VALOR_JUROS', 'VALOR_MULTA', 'VALOR_ORIGINAL']]
-            df_ambos_show['Total'] = df_ambos_show['VALOR_JUROS'] + df_ambos_show['VALOR_MULTA']
+        if qtd_ambos > 0:
             df_ambos_show['VALOR_JUROS'] = df_ambos_show['VALOR_JUROS'].apply(lambda x: formatar_moeda(x, completo=True))
             df_ambos_show['VALOR_MULTA'] = df_ambos_show['VALOR_MULTA'].apply(lambda x: formatar_moeda(x, completo=True))
             df_ambos_show['Total'] = df_ambos_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -486,7 +574,7 @@ def _render_secao_juros(df, df_com_juros, cores):
     tab_forn, tab_cat, tab_fil, tab_titulos = st.tabs(["Por Fornecedor", "Por Categoria", "Por Filial", "Titulos"])
 
     with tab_forn:
-        df_tab_forn = df_forn.copy()
+        df_tab_forn = df_forn.copy(deep=False)
         df_tab_forn['Juros'] = df_tab_forn['Juros'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_forn['Multa'] = df_tab_forn['Multa'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_forn['Total'] = df_tab_forn['Total'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -497,7 +585,7 @@ def _render_secao_juros(df, df_com_juros, cores):
                      use_container_width=True, hide_index=True, height=350)
 
     with tab_cat:
-        df_tab_cat = df_cat.copy()
+        df_tab_cat = df_cat.copy(deep=False)
         df_tab_cat['Juros'] = df_tab_cat['Juros'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_cat['Multa'] = df_tab_cat['Multa'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_cat['Total'] = df_tab_cat['Total'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -508,7 +596,7 @@ def _render_secao_juros(df, df_com_juros, cores):
                      use_container_width=True, hide_index=True, height=350)
 
     with tab_fil:
-        df_tab_fil = df_fil.copy()
+        df_tab_fil = df_fil.copy(deep=False)
         df_tab_fil['Juros'] = df_tab_fil['Juros'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_fil['Multa'] = df_tab_fil['Multa'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_fil['Total'] = df_tab_fil['Total'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -523,26 +611,7 @@ def _render_secao_juros(df, df_com_juros, cores):
         with col1:
             ordenar = st.selectbox("Ordenar por", ["Maior juros", "Maior multa", "Maior valor", "Mais recente", "Maior % juros"], key="juros_ordem")
 
-        df_show = df_com_custos.copy()
-        df_show['PCT_JUROS'] = (df_show['VALOR_JUROS'] / df_show['VALOR_ORIGINAL'] * 100)
-
-        if ordenar == "Maior juros":
-            df_show = df_show.sort_values('VALOR_JUROS', ascending=False)
-        elif ordenar == "Maior multa":
-            df_show = df_show.sort_values('VALOR_MULTA', ascending=False)
-        elif ordenar == "Maior valor":
-            df_show = df_show.sort_values('VALOR_ORIGINAL', ascending=False)
-        elif ordenar == "Maior % juros":
-            df_show = df_show.sort_values('PCT_JUROS', ascending=False)
-        else:
-            df_show = df_show.sort_values('EMISSAO', ascending=False)
-
-        df_show = df_show.head(100)
-
-        colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO',
-                   'VALOR_ORIGINAL', 'VALOR_JUROS', 'VALOR_MULTA', 'PCT_JUROS', 'SALDO', 'STATUS']
-        colunas_disp = [c for c in colunas if c in df_show.columns]
-        df_tab = df_show[colunas_disp].copy()
+        df_tab = compute_titulos_juros(df_com_custos, ordenar)
 
         for col in ['EMISSAO', 'VENCIMENTO']:
             if col in df_tab.columns:
@@ -578,6 +647,120 @@ def _render_secao_juros(df, df_com_juros, cores):
 # SECAO 2: OPERACOES EM DOLAR
 # ============================================================
 
+_AGREGACOES_CAMBIO = {
+    'VALOR_ORIGINAL': 'sum',
+    'VALOR_REAL': 'sum',
+    'TX_MOEDA': 'mean',
+    'SALDO': 'sum',
+    'NUMERO': 'count'
+}
+
+
+def _mascara_cambio(df, filtro_categoria, filtro_fornecedor, filtro_status):
+    """Mascara booleana de df com os filtros de categoria, fornecedor e status"""
+    mask = pd.Series(True, index=df.index)
+
+    if filtro_categoria != 'Todas':
+        mask &= df['DESCRICAO'] == filtro_categoria
+
+    if filtro_fornecedor != 'Todos':
+        mask &= df['NOME_FORNECEDOR'] == filtro_fornecedor
+
+    if filtro_status == 'Pendentes':
+        mask &= df['SALDO'] > 0
+    elif filtro_status == 'Pagos':
+        mask &= df['SALDO'] == 0
+    elif filtro_status == 'Vencidos':
+        mask &= df['STATUS'] == 'Vencido'
+    return mask
+
+
+@memoizar_secao
+def compute_kpis_cambio(df):
+    """Totais em USD/BRL, saldo, taxas media/min/max e contagem de pendentes e pagos"""
+    return {
+        'total_usd': df['VALOR_ORIGINAL'].sum(),
+        'total_brl': df['VALOR_REAL'].sum(),
+        'total_saldo': df['SALDO'].sum(),
+        'tx_media': df['TX_MOEDA'].mean() if len(df) > 0 else 0,
+        'tx_min': df['TX_MOEDA'].min() if len(df) > 0 else 0,
+        'tx_max': df['TX_MOEDA'].max() if len(df) > 0 else 0,
+        'qtd_pendentes': len(df[df['SALDO'] > 0]),
+        'qtd_pagos': len(df[df['SALDO'] == 0]),
+    }
+
+
+@memoizar_secao
+def compute_categorias_cambio(df):
+    """10 categorias com maior valor em USD"""
+    df_cat = df.groupby('DESCRICAO', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'VALOR_REAL': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_cat.columns = ['Categoria', 'USD', 'BRL', 'Qtd']
+    return df_cat.sort_values('USD', ascending=False).head(10)
+
+
+@memoizar_secao
+def compute_evolucao_cambio(df):
+    """Valor em USD/BRL, taxa media e quantidade por mes de emissao"""
+    df_temp = df.copy(deep=False)
+    df_temp['MES'] = chave_periodo(df_temp, 'EMISSAO', 'AAAAMM')
+
+    df_mes = df_temp[df_temp['MES'] != SEM_DATA].groupby('MES', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'VALOR_REAL': 'sum',
+        'TX_MOEDA': 'mean',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_mes['MES'] = rotulo_mes(df_mes['MES'])
+    return df_mes
+
+
+@memoizar_secao
+def compute_fornecedores_cambio(df):
+    """10 fornecedores com maior valor em USD, com pago e % pago"""
+    df_forn = df.groupby('NOME_FORNECEDOR', observed=True).agg(_AGREGACOES_CAMBIO).reset_index()
+    df_forn.columns = ['Fornecedor', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
+    df_forn['Pago'] = df_forn['BRL'] - df_forn['Saldo']
+    df_forn['% Pago'] = (df_forn['Pago'] / df_forn['BRL'] * 100).round(1)
+    return df_forn.sort_values('USD', ascending=False).head(10)
+
+
+@memoizar_secao
+def compute_filiais_cambio(df):
+    """(multiplos grupos?, valor em USD/BRL por grupo/filial)"""
+    usar_grupo, df_fil = _agrupar_por_filial(df, _AGREGACOES_CAMBIO)
+    df_fil.columns = ['Filial', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
+    return usar_grupo, df_fil.sort_values('USD', ascending=False)
+
+
+@memoizar_secao
+def compute_taxas_extremas(df):
+    """(5 maiores, 5 menores) taxas de cambio"""
+    colunas = ['NOME_FORNECEDOR', 'TX_MOEDA', 'VALOR_ORIGINAL', 'EMISSAO']
+    return df.nlargest(5, 'TX_MOEDA')[colunas], df.nsmallest(5, 'TX_MOEDA')[colunas]
+
+
+_ORDEM_TITULOS_CAMBIO = {
+    "Maior valor USD": 'VALOR_ORIGINAL',
+    "Maior taxa": 'TX_MOEDA',
+    "Maior saldo": 'SALDO',
+}
+
+
+@memoizar_secao
+def compute_titulos_cambio(df, ordenar):
+    """Ate 100 operacoes em dolar na ordem escolhida"""
+    df_show = df.sort_values(_ORDEM_TITULOS_CAMBIO.get(ordenar, 'EMISSAO'), ascending=False).head(100)
+
+    colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO',
+               'VALOR_ORIGINAL', 'TX_MOEDA', 'VALOR_REAL', 'SALDO', 'STATUS']
+    colunas_disp = [c for c in colunas if c in df_show.columns]
+    return df_show[colunas_disp]
+
+
 def _render_secao_cambio(df, df_dolar, df_real, cores):
     """Secao dedicada a operacoes em moeda estrangeira (dolar) - com filtros e analises"""
 
@@ -589,14 +772,14 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     st.markdown("##### Filtros")
     col1, col2, col3 = st.columns(3)
 
+    categorias, fornecedores = compute_opcoes_filtros(df_dolar)
+
     with col1:
         # Filtro de categoria
-        categorias = ['Todas'] + sorted([str(x) for x in df_dolar['DESCRICAO'].dropna().unique().tolist()])
         filtro_categoria = st.selectbox("Categoria", categorias, key="dolar_categoria")
 
     with col2:
         # Filtro de fornecedor
-        fornecedores = ['Todos'] + sorted([str(x) for x in df_dolar['NOME_FORNECEDOR'].dropna().unique().tolist()])
         filtro_fornecedor = st.selectbox("Fornecedor", fornecedores, key="dolar_fornecedor")
 
     with col3:
@@ -605,32 +788,21 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
         filtro_status = st.selectbox("Status", status_opcoes, key="dolar_status")
 
     # Aplicar filtros
-    df_filtrado = df_dolar.copy()
-
-    if filtro_categoria != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO'] == filtro_categoria]
-
-    if filtro_fornecedor != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['NOME_FORNECEDOR'] == filtro_fornecedor]
-
-    if filtro_status == 'Pendentes':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] > 0]
-    elif filtro_status == 'Pagos':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] == 0]
-    elif filtro_status == 'Vencidos':
-        df_filtrado = df_filtrado[df_filtrado['STATUS'] == 'Vencido']
+    filtros = (filtro_categoria, filtro_fornecedor, filtro_status)
+    df_filtrado = recorte(df_dolar, ('cambio',) + filtros, lambda d: _mascara_cambio(d, *filtros))
 
     st.divider()
 
     # ========== KPIs (com dados filtrados) ==========
-    total_usd = df_filtrado['VALOR_ORIGINAL'].sum()
-    total_brl = df_filtrado['VALOR_REAL'].sum()
-    total_saldo = df_filtrado['SALDO'].sum()
+    kpis = compute_kpis_cambio(df_filtrado)
+    total_usd = kpis['total_usd']
+    total_brl = kpis['total_brl']
+    total_saldo = kpis['total_saldo']
     total_pago = total_brl - total_saldo
 
-    tx_media = df_filtrado['TX_MOEDA'].mean() if len(df_filtrado) > 0 else 0
-    tx_min = df_filtrado['TX_MOEDA'].min() if len(df_filtrado) > 0 else 0
-    tx_max = df_filtrado['TX_MOEDA'].max() if len(df_filtrado) > 0 else 0
+    tx_media = kpis['tx_media']
+    tx_min = kpis['tx_min']
+    tx_max = kpis['tx_max']
 
     # Variacao cambial (diferenca entre taxa max e min)
     variacao = ((tx_max - tx_min) / tx_min * 100) if tx_min > 0 else 0
@@ -652,7 +824,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     col3.metric(
         "Saldo Pendente",
         formatar_moeda(total_saldo),
-        f"{len(df_filtrado[df_filtrado['SALDO'] > 0])} pendentes"
+        f"{kpis['qtd_pendentes']} pendentes"
     )
 
     col4.metric(
@@ -670,7 +842,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     col6.metric(
         "Ja Pago",
         formatar_moeda(total_pago),
-        f"{len(df_filtrado[df_filtrado['SALDO'] == 0])} pagos"
+        f"{kpis['qtd_pagos']} pagos"
     )
 
     st.divider()
@@ -683,13 +855,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     with col1:
         st.markdown("##### Distribuicao por Categoria")
 
-        df_cat = df_filtrado.groupby('DESCRICAO').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'VALOR_REAL': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_cat.columns = ['Categoria', 'USD', 'BRL', 'Qtd']
-        df_cat = df_cat.sort_values('USD', ascending=False).head(10)
+        df_cat = compute_categorias_cambio(df_filtrado)
 
         if len(df_cat) > 0:
             fig = go.Figure(go.Bar(
@@ -713,16 +879,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     with col2:
         st.markdown("##### Evolucao Mensal")
 
-        df_temp = df_filtrado.copy()
-        df_temp['MES'] = df_temp['EMISSAO'].dt.to_period('M')
-
-        df_mes = df_temp.groupby('MES').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'VALOR_REAL': 'sum',
-            'TX_MOEDA': 'mean',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_mes['MES'] = df_mes['MES'].astype(str)
+        df_mes = compute_evolucao_cambio(df_filtrado)
 
         if len(df_mes) >= 2:
             fig = go.Figure()
@@ -766,17 +923,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     with col1:
         st.markdown("##### Top Fornecedores em Dolar")
 
-        df_forn = df_filtrado.groupby('NOME_FORNECEDOR').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'VALOR_REAL': 'sum',
-            'TX_MOEDA': 'mean',
-            'SALDO': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
-        df_forn.columns = ['Fornecedor', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
-        df_forn['Pago'] = df_forn['BRL'] - df_forn['Saldo']
-        df_forn['% Pago'] = (df_forn['Pago'] / df_forn['BRL'] * 100).round(1)
-        df_forn = df_forn.sort_values('USD', ascending=False).head(10)
+        df_forn = compute_fornecedores_cambio(df_filtrado)
 
         # Grafico
         fig = go.Figure()
@@ -807,44 +954,12 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
-        _usar_grupo_cambio = 'FILIAL' in df_filtrado.columns and _detectar_multiplos_grupos(df_filtrado)
+        _usar_grupo_cambio, df_fil = compute_filiais_cambio(df_filtrado)
 
         if _usar_grupo_cambio:
             st.markdown("##### Por Grupo")
-            df_filtrado_grupo = df_filtrado.copy()
-            df_filtrado_grupo['GRUPO'] = df_filtrado_grupo['FILIAL'].apply(_get_nome_grupo)
-            df_fil = df_filtrado_grupo.groupby('GRUPO').agg({
-                'VALOR_ORIGINAL': 'sum',
-                'VALOR_REAL': 'sum',
-                'TX_MOEDA': 'mean',
-                'SALDO': 'sum',
-                'NUMERO': 'count'
-            }).reset_index()
-            df_fil.columns = ['Filial', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
         else:
             st.markdown("##### Por Filial")
-            if 'FILIAL' in df_filtrado.columns and 'NOME_FILIAL' in df_filtrado.columns:
-                df_filtrado_fil = df_filtrado.copy()
-                df_filtrado_fil['_LABEL'] = df_filtrado_fil['FILIAL'].astype(int).astype(str) + ' - ' + df_filtrado_fil['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-                df_fil = df_filtrado_fil.groupby('_LABEL').agg({
-                    'VALOR_ORIGINAL': 'sum',
-                    'VALOR_REAL': 'sum',
-                    'TX_MOEDA': 'mean',
-                    'SALDO': 'sum',
-                    'NUMERO': 'count'
-                }).reset_index()
-                df_fil.columns = ['Filial', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
-            else:
-                df_fil = df_filtrado.groupby('NOME_FILIAL').agg({
-                    'VALOR_ORIGINAL': 'sum',
-                    'VALOR_REAL': 'sum',
-                    'TX_MOEDA': 'mean',
-                    'SALDO': 'sum',
-                    'NUMERO': 'count'
-                }).reset_index()
-                df_fil.columns = ['Filial', 'USD', 'BRL', 'Taxa Media', 'Saldo', 'Qtd']
-
-        df_fil = df_fil.sort_values('USD', ascending=False)
 
         if len(df_fil) > 0:
             fig = go.Figure(go.Pie(
@@ -899,7 +1014,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
         # Maiores taxas
         st.markdown("###### Maiores Taxas Pagas")
 
-        df_top_taxa = df_filtrado.nlargest(5, 'TX_MOEDA')[['NOME_FORNECEDOR', 'TX_MOEDA', 'VALOR_ORIGINAL', 'EMISSAO']]
+        df_top_taxa, df_low_taxa = compute_taxas_extremas(df_filtrado)
         df_top_taxa['TX_MOEDA'] = df_top_taxa['TX_MOEDA'].apply(lambda x: f"R$ {x:.4f}")
         df_top_taxa['VALOR_ORIGINAL'] = df_top_taxa['VALOR_ORIGINAL'].apply(lambda x: f"$ {x:,.2f}")
         df_top_taxa['EMISSAO'] = pd.to_datetime(df_top_taxa['EMISSAO']).dt.strftime('%d/%m/%Y')
@@ -911,7 +1026,6 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
         # Menores taxas
         st.markdown("###### Menores Taxas Pagas")
 
-        df_low_taxa = df_filtrado.nsmallest(5, 'TX_MOEDA')[['NOME_FORNECEDOR', 'TX_MOEDA', 'VALOR_ORIGINAL', 'EMISSAO']]
         df_low_taxa['TX_MOEDA'] = df_low_taxa['TX_MOEDA'].apply(lambda x: f"R$ {x:.4f}")
         df_low_taxa['VALOR_ORIGINAL'] = df_low_taxa['VALOR_ORIGINAL'].apply(lambda x: f"$ {x:,.2f}")
         df_low_taxa['EMISSAO'] = pd.to_datetime(df_low_taxa['EMISSAO']).dt.strftime('%d/%m/%Y')
@@ -927,7 +1041,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
     tab_forn, tab_cat, tab_titulos = st.tabs(["Por Fornecedor", "Por Categoria", "Titulos"])
 
     with tab_forn:
-        df_tab_forn = df_forn.copy()
+        df_tab_forn = df_forn.copy(deep=False)
         df_tab_forn['USD'] = df_tab_forn['USD'].apply(lambda x: f"$ {x:,.2f}")
         df_tab_forn['BRL'] = df_tab_forn['BRL'].apply(lambda x: formatar_moeda(x, completo=True))
         df_tab_forn['Saldo'] = df_tab_forn['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -939,7 +1053,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
                      use_container_width=True, hide_index=True, height=350)
 
     with tab_cat:
-        df_tab_cat = df_cat.copy()
+        df_tab_cat = df_cat.copy(deep=False)
         df_tab_cat['USD'] = df_tab_cat['USD'].apply(lambda x: f"$ {x:,.2f}")
         df_tab_cat['BRL'] = df_tab_cat['BRL'].apply(lambda x: formatar_moeda(x, completo=True))
 
@@ -950,22 +1064,7 @@ def _render_secao_cambio(df, df_dolar, df_real, cores):
         with col1:
             ordenar = st.selectbox("Ordenar por", ["Maior valor USD", "Maior taxa", "Mais recente", "Maior saldo"], key="dolar_ordem")
 
-        df_show = df_filtrado.copy()
-        if ordenar == "Maior valor USD":
-            df_show = df_show.sort_values('VALOR_ORIGINAL', ascending=False)
-        elif ordenar == "Maior taxa":
-            df_show = df_show.sort_values('TX_MOEDA', ascending=False)
-        elif ordenar == "Maior saldo":
-            df_show = df_show.sort_values('SALDO', ascending=False)
-        else:
-            df_show = df_show.sort_values('EMISSAO', ascending=False)
-
-        df_show = df_show.head(100)
-
-        colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO',
-                   'VALOR_ORIGINAL', 'TX_MOEDA', 'VALOR_REAL', 'SALDO', 'STATUS']
-        colunas_disp = [c for c in colunas if c in df_show.columns]
-        df_tab = df_show[colunas_disp].copy()
+        df_tab = compute_titulos_cambio(df_filtrado, ordenar)
 
         for col in ['EMISSAO', 'VENCIMENTO']:
             if col in df_tab.columns:
@@ -9,6 +9,8 @@ from datetime import datetime
 
 from config.theme import get_cores
 from components.charts import criar_layout
+from data.cubo import cubo_agregado
+from data.secoes import memoizar_secao
 from utils.formatters import formatar_moeda, formatar_numero
 
 
@@ -50,19 +52,14 @@ def render_tipo_documento(df):
         st.warning("Coluna TIPO nao encontrada.")
         return
 
-    df = df.copy()
-
-    # Preparar dados
-    df_pendentes = df[df['SALDO'] > 0]
-    df_pagos = df[df['SALDO'] == 0]
-    df_vencidos = df[df['STATUS'] == 'Vencido']
-
     # ========== KPIs ==========
-    total_tipos = df['TIPO'].nunique()
-    tipo_mais_comum = df['TIPO'].value_counts().idxmax() if len(df) > 0 else 'N/A'
-    pct_tipo_top = df['TIPO'].value_counts().iloc[0] / len(df) * 100 if len(df) > 0 else 0
-    total_valor = df['VALOR_ORIGINAL'].sum()
-    total_pendente = df_pendentes['SALDO'].sum()
+    kpis = compute_kpis(df)
+    total_tipos = kpis['total_tipos']
+    tipo_mais_comum = kpis['tipo_mais_comum']
+    pct_tipo_top = kpis['pct_tipo_top']
+    total_valor = kpis['total_valor']
+    total_pendente = kpis['total_pendente']
+    qtd_vencidos = kpis['qtd_vencidos']
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -70,7 +67,7 @@ def render_tipo_documento(df):
     col2.metric("Tipo Mais Comum", tipo_mais_comum, f"{pct_tipo_top:.1f}%")
     col3.metric("Valor Total", formatar_moeda(total_valor))
     col4.metric("Pendente", formatar_moeda(total_pendente))
-    col5.metric("Titulos Vencidos", formatar_numero(len(df_vencidos)))
+    col5.metric("Titulos Vencidos", formatar_numero(qtd_vencidos))
 
     st.divider()
 
@@ -90,7 +87,7 @@ def render_tipo_documento(df):
         _render_status_por_tipo(df, cores)
 
     with col2:
-        _render_vencidos_por_tipo(df_vencidos, cores)
+        _render_vencidos_por_tipo(df, cores)
 
     st.divider()
 
@@ -100,19 +97,42 @@ def render_tipo_documento(df):
     st.divider()
 
     # ========== TABELA DETALHADA ==========
-    _render_tabela_tipos(df, df_pendentes, df_vencidos, cores)
+    _render_tabela_tipos(df, cores)
+
+
+@memoizar_secao
+def compute_kpis(df):
+    """Quantidade de tipos, tipo mais comum (e % dos titulos), valor, pendente e vencidos"""
+    cubo = cubo_agregado(df)
+    df_tipos = cubo.agregar('TIPO')
+    total = cubo.total()
+
+    tipo_top = df_tipos.loc[df_tipos['QTD'].idxmax()] if len(df_tipos) > 0 else None
+    return {
+        'total_tipos': len(df_tipos),
+        'tipo_mais_comum': tipo_top['TIPO'] if tipo_top is not None else 'N/A',
+        'pct_tipo_top': tipo_top['QTD'] / len(df) * 100 if tipo_top is not None else 0,
+        'total_valor': total['VALOR_ORIGINAL'],
+        'total_pendente': total['SALDO_PENDENTE'],
+        'qtd_vencidos': int(cubo.total({'STATUS': 'Vencido'})['QTD']),
+    }
+
+
+@memoizar_secao
+def compute_distribuicao_valor(df):
+    """Valor original por tipo, do maior para o menor, com a descricao do tipo"""
+    df_grp = cubo_agregado(df).agregar('TIPO')[['TIPO', 'VALOR_ORIGINAL']].sort_values('VALOR_ORIGINAL', ascending=False)
+
+    # Adicionar descricao
+    df_grp['DESC'] = df_grp['TIPO'].map(lambda x: f"{x} - {TIPOS_DESC.get(x, x)}")
+    return df_grp
 
 
 def _render_distribuicao_valor(df, cores):
     """Distribuicao por valor"""
     st.markdown("##### Distribuicao por Valor")
 
-    df_grp = df.groupby('TIPO').agg({
-        'VALOR_ORIGINAL': 'sum'
-    }).sort_values('VALOR_ORIGINAL', ascending=False).reset_index()
-
-    # Adicionar descricao
-    df_grp['DESC'] = df_grp['TIPO'].map(lambda x: f"{x} - {TIPOS_DESC.get(x, x)}")
+    df_grp = compute_distribuicao_valor(df)
 
     cores_grafico = [cores['primaria'], cores['info'], cores['sucesso'], cores['alerta'],
                     '#8b5cf6', '#ec4899', '#06b6d4', '#84cc16', '#f97316', '#6366f1']
@@ -137,15 +157,22 @@ def _render_distribuicao_valor(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_distribuicao_quantidade(df, cores):
-    """Distribuicao por quantidade"""
-    st.markdown("##### Distribuicao por Quantidade")
-
-    df_grp = df.groupby('TIPO').size().sort_values(ascending=False).reset_index()
+@memoizar_secao
+def compute_distribuicao_quantidade(df):
+    """Quantidade de titulos por tipo, da maior para a menor"""
+    df_grp = cubo_agregado(df).agregar('TIPO')[['TIPO', 'QTD']].sort_values('QTD', ascending=False)
     df_grp.columns = ['Tipo', 'Qtd']
 
     # Adicionar descricao
     df_grp['Label'] = df_grp['Tipo'].map(lambda x: f"{x}")
+    return df_grp
+
+
+def _render_distribuicao_quantidade(df, cores):
+    """Distribuicao por quantidade"""
+    st.markdown("##### Distribuicao por Quantidade")
+
+    df_grp = compute_distribuicao_quantidade(df)
 
     fig = go.Figure(go.Bar(
         x=df_grp['Label'],
@@ -166,33 +193,33 @@ def _render_distribuicao_quantidade(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_status_por_tipo(df, cores):
-    """Status por tipo de documento - barras horizontais proporcionais"""
-    st.markdown("##### Status por Tipo")
+def _agrupar_status(s):
+    """Simplifica o status em Pago, Vencido ou A Vencer"""
+    if s == 'Pago':
+        return 'Pago'
+    elif s == 'Vencido':
+        return 'Vencido'
+    return 'A Vencer'
+
+
+@memoizar_secao
+def compute_status_por_tipo(df):
+    """(valor, % do tipo) por tipo x status simplificado dos 8 maiores tipos; None sem dados"""
+    cubo = cubo_agregado(df)
 
     # Top 8 tipos por valor
-    tipos = df.groupby('TIPO')['VALOR_ORIGINAL'].sum().nlargest(8).index.tolist()
-    df_filtrado = df[df['TIPO'].isin(tipos)]
+    tipos = cubo.agregar('TIPO').nlargest(8, 'VALOR_ORIGINAL')['TIPO'].tolist()
+    df_filtrado = cubo.agregar(['TIPO', 'STATUS'], {'TIPO': tipos})
 
     if len(df_filtrado) == 0:
-        st.info("Sem dados")
-        return
+        return None
 
-    # Simplificar status para 3 grupos
-    def agrupar_status(s):
-        if s == 'Pago':
-            return 'Pago'
-        elif s == 'Vencido':
-            return 'Vencido'
-        return 'A Vencer'
-
-    df_filtrado = df_filtrado.copy()
-    df_filtrado['STATUS_GRUPO'] = df_filtrado['STATUS'].apply(agrupar_status)
+    df_filtrado['STATUS_GRUPO'] = df_filtrado['STATUS'].astype(object).map(_agrupar_status)
 
     # Pivot: tipo x status_grupo
     pivot = df_filtrado.pivot_table(
         values='VALOR_ORIGINAL', index='TIPO', columns='STATUS_GRUPO',
-        aggfunc='sum', fill_value=0
+        aggfunc='sum', fill_value=0, observed=True
     )
 
     # Ordenar por total
@@ -203,6 +230,20 @@ def _render_status_por_tipo(df, cores):
     # Calcular percentuais
     totais = pivot.sum(axis=1)
     pivot_pct = pivot.div(totais, axis=0) * 100
+    return pivot, pivot_pct
+
+
+def _render_status_por_tipo(df, cores):
+    """Status por tipo de documento - barras horizontais proporcionais"""
+    st.markdown("##### Status por Tipo")
+
+    resultado = compute_status_por_tipo(df)
+
+    if resultado is None:
+        st.info("Sem dados")
+        return
+
+    pivot, pivot_pct = resultado
 
     ordem_status = ['Pago', 'A Vencer', 'Vencido']
     cores_status = {
@@ -241,20 +282,27 @@ def _render_status_por_tipo(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_vencidos_por_tipo(df_vencidos, cores):
+@memoizar_secao
+def compute_vencidos_por_tipo(df):
+    """8 tipos com maior saldo vencido; None sem vencidos"""
+    df_grp = cubo_agregado(df).agregar('TIPO', {'STATUS': 'Vencido'})
+    if len(df_grp) == 0:
+        return None
+
+    df_grp = df_grp[['TIPO', 'SALDO', 'QTD']].sort_values('SALDO', ascending=False).head(8)
+    df_grp.columns = ['Tipo', 'Saldo', 'Qtd']
+    return df_grp
+
+
+def _render_vencidos_por_tipo(df, cores):
     """Vencidos por tipo"""
     st.markdown("##### Valor Vencido por Tipo")
 
-    if len(df_vencidos) == 0:
+    df_grp = compute_vencidos_por_tipo(df)
+    if df_grp is None:
         st.success("Sem titulos vencidos!")
         return
 
-    df_grp = df_vencidos.groupby('TIPO').agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).sort_values('SALDO', ascending=False).head(8).reset_index()
-    df_grp.columns = ['Tipo', 'Saldo', 'Qtd']
-
     fig = go.Figure(go.Bar(
         y=df_grp['Tipo'],
         x=df_grp['Saldo'],
@@ -274,16 +322,40 @@ def _render_vencidos_por_tipo(df_vencidos, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_tipos_disponiveis(df):
+    """Tipos com titulos, do mais ao menos frequente; None sem a coluna de categoria"""
+    cubo = cubo_agregado(df)
+    if 'DESCRICAO' not in cubo.dimensoes:
+        return None
+
+    df_tipos = cubo.agregar('TIPO')
+    return df_tipos[df_tipos['QTD'] > 0].sort_values('QTD', ascending=False)['TIPO'].tolist()
+
+
+@memoizar_secao
+def compute_categorias_por_tipo(df, tipo_sel):
+    """(quantidade de titulos do tipo, quantidade/valor/pendente/pago por categoria do tipo)"""
+    cubo = cubo_agregado(df)
+    qtd_tipo = int(cubo.total({'TIPO': tipo_sel})['QTD'])
+
+    # Agrupar por categoria
+    df_cat = cubo.agregar('DESCRICAO', {'TIPO': tipo_sel})[['DESCRICAO', 'QTD', 'VALOR_ORIGINAL', 'SALDO']]
+    df_cat.columns = ['Categoria', 'Qtd', 'Valor Total', 'Pendente']
+    df_cat['Pago'] = (df_cat['Valor Total'] - df_cat['Pendente']).clip(lower=0)
+    return qtd_tipo, df_cat.sort_values('Qtd', ascending=False)
+
+
 def _render_categorias_por_tipo(df, cores):
     """Quantidade de documentos por categoria para cada tipo"""
     st.markdown("##### Categorias por Tipo de Documento")
 
-    if 'DESCRICAO' not in df.columns:
+    tipos_disp = compute_tipos_disponiveis(df)
+
+    if tipos_disp is None:
         st.info("Coluna de categoria nao disponivel.")
         return
 
-    tipos_disp = df['TIPO'].value_counts().index.tolist()
-
     if len(tipos_disp) == 0:
         st.info("Nenhum tipo de documento disponivel.")
         return
@@ -300,21 +372,12 @@ def _render_categorias_por_tipo(df, cores):
     # Salvar seleção no session_state
     st.session_state['tipo_doc_cat_valor'] = tipo_sel
 
-    df_tipo = df[df['TIPO'] == tipo_sel]
+    qtd_tipo, df_cat = compute_categorias_por_tipo(df, tipo_sel)
 
-    if len(df_tipo) == 0:
+    if qtd_tipo == 0:
         st.info(f"Nenhum titulo do tipo {tipo_sel}.")
         return
 
-    # Agrupar por categoria
-    df_cat = df_tipo.groupby('DESCRICAO').agg({
-        'VALOR_ORIGINAL': ['count', 'sum'],
-        'SALDO': 'sum'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Qtd', 'Valor Total', 'Pendente']
-    df_cat['Pago'] = (df_cat['Valor Total'] - df_cat['Pendente']).clip(lower=0)
-    df_cat = df_cat.sort_values('Qtd', ascending=False)
-
     col1, col2 = st.columns(2)
 
     with col1:
@@ -345,38 +408,30 @@ def _render_categorias_por_tipo(df, cores):
     with col2:
         # Tabela completa
         st.markdown(f"###### Todas as Categorias - {tipo_sel}")
-        df_show = df_cat.copy()
+        df_show = df_cat.copy(deep=False)
         df_show['Valor Total'] = df_show['Valor Total'].apply(lambda x: formatar_moeda(x, completo=True))
         df_show['Pago'] = df_show['Pago'].apply(lambda x: formatar_moeda(x, completo=True))
         df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
 
         st.dataframe(df_show, use_container_width=True, hide_index=True, height=320)
-        st.caption(f"{len(df_cat)} categorias no tipo {tipo_sel} | {formatar_numero(len(df_tipo))} titulos")
+        st.caption(f"{len(df_cat)} categorias no tipo {tipo_sel} | {formatar_numero(qtd_tipo)} titulos")
 
 
-def _render_tabela_tipos(df, df_pendentes, df_vencidos, cores):
-    """Tabela resumo por tipo de documento"""
-    st.markdown("##### Resumo por Tipo de Documento")
+@memoizar_secao
+def compute_tabela_tipos(df):
+    """Quantidade, total, saldo, pago, vencido e % pago por tipo, do maior total para o menor"""
+    cubo = cubo_agregado(df)
 
-    # Agrupar dados
-    df_grp = df.groupby('TIPO').agg({
-        'VALOR_ORIGINAL': ['count', 'sum'],
-        'SALDO': 'sum'
-    }).reset_index()
-    df_grp.columns = ['Tipo', 'Qtd', 'Total', 'Saldo']
+    # Agrupar dados (Pago = valor dos titulos quitados)
+    df_grp = cubo.agregar('TIPO')[['TIPO', 'QTD', 'VALOR_ORIGINAL', 'SALDO', 'VALOR_QUITADO']]
+    df_grp.columns = ['Tipo', 'Qtd', 'Total', 'Saldo', 'Pago']
 
     # Calcular vencidos
-    df_venc_grp = df_vencidos.groupby('TIPO')['SALDO'].sum().reset_index()
+    df_venc_grp = cubo.agregar('TIPO', {'STATUS': 'Vencido'})[['TIPO', 'SALDO']]
     df_venc_grp.columns = ['Tipo', 'Vencido']
     df_grp = df_grp.merge(df_venc_grp, on='Tipo', how='left')
     df_grp['Vencido'] = df_grp['Vencido'].fillna(0)
 
-    # Calcular pagos
-    df_pago = df[df['SALDO'] == 0].groupby('TIPO')['VALOR_ORIGINAL'].sum().reset_index()
-    df_pago.columns = ['Tipo', 'Pago']
-    df_grp = df_grp.merge(df_pago, on='Tipo', how='left')
-    df_grp['Pago'] = df_grp['Pago'].fillna(0)
-
     # Taxa de pagamento
     df_grp['Taxa_Pago'] = (df_grp['Pago'] / df_grp['Total'] * 100).round(1)
 
@@ -385,9 +440,15 @@ def _render_tabela_tipos(df, df_pendentes, df_vencidos, cores):
 
     # Adicionar descricao
     df_grp['Descricao'] = df_grp['Tipo'].map(lambda x: TIPOS_DESC.get(x, '-'))
+    return df_grp
+
+
+def _render_tabela_tipos(df, cores):
+    """Tabela resumo por tipo de documento"""
+    st.markdown("##### Resumo por Tipo de Documento")
 
     # Formatar
-    df_show = df_grp.copy()
+    df_show = compute_tabela_tipos(df)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Saldo'] = df_show['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Vencido'] = df_show['Vencido'].apply(lambda x: formatar_moeda(x, completo=True))
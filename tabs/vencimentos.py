@@ -9,8 +9,11 @@ from datetime import datetime, timedelta
 
 from config.theme import get_cores
 from components.charts import criar_layout
+from data.cubo import cubo_agregado
+from data.fluxo_caixa import projetar_fluxo
+from data.periodo import chave_periodo, dia_ref
+from data.secoes import memoizar_secao, recorte
 from utils.formatters import formatar_moeda, formatar_numero
-from utils.data_helpers import get_df_pendentes, get_df_vencidos
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
 
 
@@ -23,8 +26,8 @@ def render_vencimentos(df):
         st.warning("Nenhum dado disponivel.")
         return
 
-    df_pendentes = get_df_pendentes(df)
-    df_vencidos = get_df_vencidos(df)
+    df_pendentes = recorte(df, 'pendentes', lambda d: d['SALDO'] > 0)
+    df_vencidos = recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido')
 
     # ========== RESUMO GERAL ==========
     _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje)
@@ -48,7 +51,7 @@ def render_vencimentos(df):
         _render_filial_aging(df_pendentes, df_vencidos, cores)
 
     with col2:
-        _render_por_categoria(df_pendentes, df_vencidos, cores)
+        _render_por_categoria(df, cores)
 
     st.divider()
 
@@ -70,11 +73,15 @@ def render_vencimentos(df):
 # =============================================================================
 # RESUMO GERAL (melhorado com ticket medio e atraso medio)
 # =============================================================================
-def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
-    """Resumo geral dos vencimentos"""
+@memoizar_secao
+def compute_pendentes_e_vencidos(df_pendentes, df_vencidos):
+    """Pendentes + vencidos sem linhas repetidas"""
+    return pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
 
-    hoje_date = hoje.date()
 
+@memoizar_secao
+def compute_resumo_geral(df_pendentes, df_vencidos, hoje_date):
+    """Totais pendente/vencido, proximos 30 e 31-60 dias, ticket e atraso medio dos vencidos"""
     total_pendente = df_pendentes['SALDO'].sum() + df_vencidos['SALDO'].sum()
     qtd_pendente = len(df_pendentes) + len(df_vencidos)
 
@@ -96,6 +103,29 @@ def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
 
     pct_vencido = (total_vencido / total_pendente * 100) if total_pendente > 0 else 0
 
+    ticket_medio_vencido = (total_vencido / qtd_vencidos) if qtd_vencidos > 0 else 0
+    dias_atraso_medio = 0
+    if len(df_vencidos) > 0 and 'DIAS_ATRASO' in df_vencidos.columns:
+        dias_atraso_medio = df_vencidos['DIAS_ATRASO'].mean()
+
+    return {
+        'total_pendente': total_pendente, 'qtd_pendente': qtd_pendente,
+        'total_vencido': total_vencido, 'qtd_vencidos': qtd_vencidos, 'pct_vencido': pct_vencido,
+        'valor_30d': valor_30d, 'qtd_30d': qtd_30d,
+        'valor_31_60d': valor_31_60d, 'qtd_31_60d': qtd_31_60d,
+        'ticket_medio_vencido': ticket_medio_vencido, 'dias_atraso_medio': dias_atraso_medio,
+    }
+
+
+def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
+    """Resumo geral dos vencimentos"""
+
+    r = compute_resumo_geral(df_pendentes, df_vencidos, hoje.date())
+    total_pendente, qtd_pendente = r['total_pendente'], r['qtd_pendente']
+    total_vencido, qtd_vencidos, pct_vencido = r['total_vencido'], r['qtd_vencidos'], r['pct_vencido']
+    valor_30d, qtd_30d = r['valor_30d'], r['qtd_30d']
+    valor_31_60d, qtd_31_60d = r['valor_31_60d'], r['qtd_31_60d']
+
     # Cards principais
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; margin-bottom: 1rem;">
@@ -132,11 +162,9 @@ def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
     """, unsafe_allow_html=True)
 
     # Indicadores complementares
-    ticket_medio_vencido = (total_vencido / qtd_vencidos) if qtd_vencidos > 0 else 0
-    dias_atraso_medio = 0
-    if len(df_vencidos) > 0 and 'DIAS_ATRASO' in df_vencidos.columns:
-        dias_atraso_medio = df_vencidos['DIAS_ATRASO'].mean()
-    titulos_vencidos = len(df_vencidos)
+    ticket_medio_vencido = r['ticket_medio_vencido']
+    dias_atraso_medio = r['dias_atraso_medio']
+    titulos_vencidos = qtd_vencidos
 
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 0.75rem; margin-bottom: 0.5rem;">
@@ -172,35 +200,21 @@ def _render_calendario_30d(df_pendentes, df_vencidos, cores, hoje):
 
     hoje_date = hoje.date()
 
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
 
     if len(df_all) == 0:
         st.info("Sem dados")
         return
 
-    data_fim = hoje_date + timedelta(days=30)
-    df_futuro = df_all[
-        (df_all['VENCIMENTO'] >= pd.Timestamp(hoje_date)) &
-        (df_all['VENCIMENTO'] <= pd.Timestamp(data_fim))
-    ].copy()
+    # Hoje + 30 dias, dia a dia (data/fluxo_caixa.py)
+    df_dia = projetar_fluxo(df_all, hoje_date, horizonte=31, granularidade='dia')
+    df_dia = df_dia.rename(columns={'INICIO': 'Dia', 'VALOR': 'Valor', 'QTD': 'Qtd'})
 
-    if len(df_futuro) == 0:
+    if df_dia['Qtd'].sum() == 0:
         st.info("Nenhum vencimento nos proximos 30 dias")
         return
 
-    df_futuro['DIA'] = df_futuro['VENCIMENTO'].dt.date
-
-    df_dia = df_futuro.groupby('DIA').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_dia.columns = ['Dia', 'Valor', 'Qtd']
-
-    # Preencher todos os dias
-    datas = [hoje_date + timedelta(days=i) for i in range(31)]
-    all_days = pd.DataFrame({'Dia': datas})
-    df_dia = all_days.merge(df_dia, on='Dia', how='left').fillna(0)
-    df_dia['Label'] = df_dia['Dia'].apply(lambda d: d.strftime('%d/%m'))
+    df_dia['Label'] = df_dia['Dia'].dt.strftime('%d/%m')
 
     # Cores por intensidade
     max_val = df_dia['Valor'].max() if df_dia['Valor'].max() > 0 else 1
@@ -256,66 +270,74 @@ def _render_calendario_30d(df_pendentes, df_vencidos, cores, hoje):
 # =============================================================================
 # AGING COMPLETO (mantido)
 # =============================================================================
+_LABELS_FAIXA = {
+    '1_Venc +60 dias': '+60 dias vencido',
+    '2_Venc 31-60 dias': '31-60 dias vencido',
+    '3_Venc 16-30 dias': '16-30 dias vencido',
+    '4_Venc 8-15 dias': '8-15 dias vencido',
+    '5_Venc 1-7 dias': '1-7 dias vencido',
+    '6_Vence em 7 dias': 'Vence em 7 dias',
+    '7_Vence em 8-30 dias': 'Vence em 8-30 dias',
+    '8_Vence em 31-60 dias': 'Vence em 31-60 dias',
+    '9_Vence em +60 dias': 'Vence em +60 dias',
+    '9_Sem data': 'Sem data'
+}
+
+
+def _faixa_vencimento(venc, hoje_date):
+    if pd.isna(venc):
+        return '9_Sem data'
+
+    venc = venc.date() if hasattr(venc, 'date') else venc
+    diff = (venc - hoje_date).days
+
+    if diff < -60:
+        return '1_Venc +60 dias'
+    elif diff < -30:
+        return '2_Venc 31-60 dias'
+    elif diff < -15:
+        return '3_Venc 16-30 dias'
+    elif diff < -7:
+        return '4_Venc 8-15 dias'
+    elif diff < 0:
+        return '5_Venc 1-7 dias'
+    elif diff <= 7:
+        return '6_Vence em 7 dias'
+    elif diff <= 30:
+        return '7_Vence em 8-30 dias'
+    elif diff <= 60:
+        return '8_Vence em 31-60 dias'
+    else:
+        return '9_Vence em +60 dias'
+
+
+@memoizar_secao
+def compute_aging_completo(df_all, hoje_date):
+    """Saldo e quantidade por faixa de vencimento (Faixa, Valor, Qtd, Label)"""
+    df_all = df_all.copy(deep=False)
+    df_all['FAIXA'] = df_all['VENCIMENTO'].apply(_faixa_vencimento, hoje_date=hoje_date)
+
+    df_grp = df_all.groupby('FAIXA', observed=True).agg({
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).sort_index().reset_index()
+    df_grp.columns = ['Faixa', 'Valor', 'Qtd']
+    df_grp['Label'] = df_grp['Faixa'].map(_LABELS_FAIXA)
+    return df_grp
+
+
 def _render_aging_completo(df_pendentes, df_vencidos, cores, hoje):
     """Aging completo - vencidos e a vencer"""
 
     st.markdown("##### Aging - Distribuicao por Faixa de Vencimento")
 
-    hoje_date = hoje.date()
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
 
     if len(df_all) == 0:
         st.info("Sem dados")
         return
 
-    def faixa_vencimento(row):
-        if pd.isna(row.get('VENCIMENTO')):
-            return '9_Sem data'
-
-        venc = row['VENCIMENTO'].date() if hasattr(row['VENCIMENTO'], 'date') else row['VENCIMENTO']
-        diff = (venc - hoje_date).days
-
-        if diff < -60:
-            return '1_Venc +60 dias'
-        elif diff < -30:
-            return '2_Venc 31-60 dias'
-        elif diff < -15:
-            return '3_Venc 16-30 dias'
-        elif diff < -7:
-            return '4_Venc 8-15 dias'
-        elif diff < 0:
-            return '5_Venc 1-7 dias'
-        elif diff <= 7:
-            return '6_Vence em 7 dias'
-        elif diff <= 30:
-            return '7_Vence em 8-30 dias'
-        elif diff <= 60:
-            return '8_Vence em 31-60 dias'
-        else:
-            return '9_Vence em +60 dias'
-
-    df_all['FAIXA'] = df_all.apply(faixa_vencimento, axis=1)
-
-    df_grp = df_all.groupby('FAIXA').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).sort_index().reset_index()
-    df_grp.columns = ['Faixa', 'Valor', 'Qtd']
-
-    labels = {
-        '1_Venc +60 dias': '+60 dias vencido',
-        '2_Venc 31-60 dias': '31-60 dias vencido',
-        '3_Venc 16-30 dias': '16-30 dias vencido',
-        '4_Venc 8-15 dias': '8-15 dias vencido',
-        '5_Venc 1-7 dias': '1-7 dias vencido',
-        '6_Vence em 7 dias': 'Vence em 7 dias',
-        '7_Vence em 8-30 dias': 'Vence em 8-30 dias',
-        '8_Vence em 31-60 dias': 'Vence em 31-60 dias',
-        '9_Vence em +60 dias': 'Vence em +60 dias',
-        '9_Sem data': 'Sem data'
-    }
-    df_grp['Label'] = df_grp['Faixa'].map(labels)
+    df_grp = compute_aging_completo(df_all, hoje.date())
 
     cores_faixas = {
         '1_Venc +60 dias': '#7f1d1d',
@@ -371,51 +393,44 @@ def _detectar_multiplos_grupos(df):
 # =============================================================================
 # FILIAL x AGING (NOVO - vinculado ao filtro geral)
 # =============================================================================
-def _render_filial_aging(df_pendentes, df_vencidos, cores):
-    """Aging por Filial/Grupo - vinculado ao filtro geral"""
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+def _faixa_simples(venc, hoje_date):
+    if pd.isna(venc):
+        return 'Outros'
+    venc = venc.date() if hasattr(venc, 'date') else venc
+    diff = (venc - hoje_date).days
+    if diff < 0:
+        return 'Vencido'
+    elif diff <= 30:
+        return '0-30 dias'
+    elif diff <= 60:
+        return '31-60 dias'
+    else:
+        return '60+ dias'
 
-    if len(df_all) == 0:
-        st.info("Sem dados")
-        return
 
+@memoizar_secao
+def compute_filial_aging(df_all, hoje_date):
+    """(multiplos grupos?, pivot AGRUPAMENTO x faixa de aging com as 12 maiores linhas);
+    pivot None sem NOME_FILIAL quando ha um grupo so"""
+    df_all = df_all.copy(deep=False)
     multiplos = _detectar_multiplos_grupos(df_all)
-    hoje_date = datetime.now().date()
 
     if multiplos:
-        st.markdown("##### Aging por Grupo")
         df_all['AGRUPAMENTO'] = df_all['FILIAL'].apply(
             lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
     else:
-        st.markdown("##### Aging por Filial")
         if 'NOME_FILIAL' not in df_all.columns:
-            st.info("Dados de filial nao disponiveis")
-            return
+            return multiplos, None
         df_all['AGRUPAMENTO'] = (
             df_all['FILIAL'].astype(int).astype(str) + ' - ' +
             df_all['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
         )
 
     # Classificar em faixas de aging
-    def faixa_simples(row):
-        if pd.isna(row.get('VENCIMENTO')):
-            return 'Outros'
-        venc = row['VENCIMENTO'].date() if hasattr(row['VENCIMENTO'], 'date') else row['VENCIMENTO']
-        diff = (venc - hoje_date).days
-        if diff < 0:
-            return 'Vencido'
-        elif diff <= 30:
-            return '0-30 dias'
-        elif diff <= 60:
-            return '31-60 dias'
-        else:
-            return '60+ dias'
-
-    df_all['FAIXA'] = df_all.apply(faixa_simples, axis=1)
+    df_all['FAIXA'] = df_all['VENCIMENTO'].apply(_faixa_simples, hoje_date=hoje_date)
 
     # Pivot por agrupamento x faixa
-    df_pivot = df_all.groupby(['AGRUPAMENTO', 'FAIXA'])['SALDO'].sum().unstack(fill_value=0).reset_index()
+    df_pivot = df_all.groupby(['AGRUPAMENTO', 'FAIXA'], observed=True)['SALDO'].sum().unstack(fill_value=0).reset_index()
 
     for col in ['Vencido', '0-30 dias', '31-60 dias', '60+ dias']:
         if col not in df_pivot.columns:
@@ -426,6 +441,27 @@ def _render_filial_aging(df_pendentes, df_vencidos, cores):
 
     if len(df_pivot) > 12:
         df_pivot = df_pivot.tail(12)
+    return multiplos, df_pivot
+
+
+def _render_filial_aging(df_pendentes, df_vencidos, cores):
+    """Aging por Filial/Grupo - vinculado ao filtro geral"""
+
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+
+    if len(df_all) == 0:
+        st.info("Sem dados")
+        return
+
+    multiplos, df_pivot = compute_filial_aging(df_all, datetime.now().date())
+
+    if multiplos:
+        st.markdown("##### Aging por Grupo")
+    else:
+        st.markdown("##### Aging por Filial")
+        if df_pivot is None:
+            st.info("Dados de filial nao disponiveis")
+            return
 
     fig = go.Figure()
 
@@ -467,29 +503,22 @@ def _render_filial_aging(df_pendentes, df_vencidos, cores):
 # =============================================================================
 # POR CATEGORIA (mantido)
 # =============================================================================
-def _render_por_categoria(df_pendentes, df_vencidos, cores):
-    """Saldo pendente por categoria (DESCRICAO) - Vencido vs A Vencer"""
+@memoizar_secao
+def compute_por_categoria(df):
+    """Saldo pendente, vencido e a vencer por categoria (12 maiores); None sem pendentes"""
+    cubo = cubo_agregado(df)
 
-    st.markdown("##### Por Categoria")
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
-
-    if len(df_all) == 0 or 'DESCRICAO' not in df_all.columns:
-        st.info("Sem dados de categoria")
-        return
+    # Vencidos tem saldo > 0: os pendentes ja incluem os vencidos
+    if cubo.total()['QTD_PENDENTE'] == 0 or 'DESCRICAO' not in cubo.dimensoes:
+        return None
 
-    df_cat = df_all.groupby('DESCRICAO').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
+    df_cat = cubo.agregar('DESCRICAO')
+    df_cat = df_cat[df_cat['QTD_PENDENTE'] > 0][['DESCRICAO', 'SALDO_PENDENTE', 'QTD_PENDENTE']]
     df_cat.columns = ['Categoria', 'Valor', 'Qtd']
 
-    if len(df_vencidos) > 0 and 'DESCRICAO' in df_vencidos.columns:
-        df_venc_cat = df_vencidos.groupby('DESCRICAO')['SALDO'].sum().reset_index()
-        df_venc_cat.columns = ['Categoria', 'Vencido']
-        df_cat = df_cat.merge(df_venc_cat, on='Categoria', how='left')
-    else:
-        df_cat['Vencido'] = 0
+    df_venc_cat = cubo.agregar('DESCRICAO', {'STATUS': 'Vencido'})[['DESCRICAO', 'SALDO']]
+    df_venc_cat.columns = ['Categoria', 'Vencido']
+    df_cat = df_cat.merge(df_venc_cat, on='Categoria', how='left')
 
     df_cat['Vencido'] = df_cat['Vencido'].fillna(0)
     df_cat['A_Vencer'] = df_cat['Valor'] - df_cat['Vencido']
@@ -498,6 +527,18 @@ def _render_por_categoria(df_pendentes, df_vencidos, cores):
 
     if len(df_cat) > 12:
         df_cat = df_cat.tail(12)
+    return df_cat
+
+
+def _render_por_categoria(df, cores):
+    """Saldo pendente por categoria (DESCRICAO) - Vencido vs A Vencer"""
+
+    st.markdown("##### Por Categoria")
+
+    df_cat = compute_por_categoria(df)
+    if df_cat is None:
+        st.info("Sem dados de categoria")
+        return
 
     fig = go.Figure()
 
@@ -541,6 +582,12 @@ def _render_por_categoria(df_pendentes, df_vencidos, cores):
 # =============================================================================
 # VENCIDOS CRITICOS (NOVO)
 # =============================================================================
+@memoizar_secao
+def compute_vencidos_criticos(df_vencidos, n=15):
+    """Os n vencidos de maior saldo"""
+    return df_vencidos.nlargest(n, 'SALDO')
+
+
 def _render_vencidos_criticos(df_vencidos, cores):
     """Top titulos vencidos - maiores valores com dias de atraso"""
 
@@ -551,11 +598,11 @@ def _render_vencidos_criticos(df_vencidos, cores):
         st.success("Nenhum titulo vencido!")
         return
 
-    df_top = df_vencidos.nlargest(15, 'SALDO').copy()
+    df_top = compute_vencidos_criticos(df_vencidos)
 
     colunas = ['NOME_FORNECEDOR', 'NOME_FILIAL', 'TIPO', 'NUMERO', 'VENCIMENTO', 'DIAS_ATRASO', 'VALOR_ORIGINAL', 'SALDO']
     colunas_disp = [c for c in colunas if c in df_top.columns]
-    df_show = df_top[colunas_disp].copy()
+    df_show = df_top[colunas_disp]
 
     if 'NOME_FORNECEDOR' in df_show.columns:
         df_show['NOME_FORNECEDOR'] = df_show['NOME_FORNECEDOR'].str[:30]
@@ -591,6 +638,19 @@ def _render_vencidos_criticos(df_vencidos, cores):
 # =============================================================================
 # CONCENTRACAO VENCIDOS (NOVO)
 # =============================================================================
+@memoizar_secao
+def compute_concentracao_vencidos(df_vencidos):
+    """(10 fornecedores de maior saldo vencido em ordem crescente, total vencido)"""
+    df_forn = df_vencidos.groupby('NOME_FORNECEDOR', observed=True).agg({
+        'SALDO': 'sum',
+        'DIAS_ATRASO': 'mean',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_forn.columns = ['Fornecedor', 'Vencido', 'Atraso_Medio', 'Qtd']
+    df_forn = df_forn.sort_values('Vencido', ascending=True).tail(10)
+    return df_forn, df_vencidos['SALDO'].sum()
+
+
 def _render_concentracao_vencidos(df_vencidos, cores):
     """Top fornecedores com maior valor vencido - concentracao de risco"""
 
@@ -600,15 +660,7 @@ def _render_concentracao_vencidos(df_vencidos, cores):
         st.success("Nenhum titulo vencido!")
         return
 
-    df_forn = df_vencidos.groupby('NOME_FORNECEDOR').agg({
-        'SALDO': 'sum',
-        'DIAS_ATRASO': 'mean',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_forn.columns = ['Fornecedor', 'Vencido', 'Atraso_Medio', 'Qtd']
-    df_forn = df_forn.sort_values('Vencido', ascending=True).tail(10)
-
-    total_vencido = df_vencidos['SALDO'].sum()
+    df_forn, total_vencido = compute_concentracao_vencidos(df_vencidos)
 
     def cor_atraso(d):
         if d > 30:
@@ -669,41 +721,18 @@ def _render_fluxo_semanal(df_pendentes, cores, hoje):
 
     hoje_date = hoje.date()
 
-    df_futuro = df_pendentes[df_pendentes['VENCIMENTO'] >= pd.Timestamp(hoje_date)].copy()
-
-    if len(df_futuro) == 0:
+    if not (chave_periodo(df_pendentes, 'VENCIMENTO') >= dia_ref(hoje_date)).any():
         st.info("Nenhum vencimento futuro")
         return
 
-    def get_semana(data):
-        if pd.isna(data):
-            return None
-        data_date = data.date() if hasattr(data, 'date') else data
-        dias = (data_date - hoje_date).days
-        if dias < 0:
-            return None
-        return min(dias // 7 + 1, 8)
-
-    df_futuro['SEMANA'] = df_futuro['VENCIMENTO'].apply(get_semana)
-    df_futuro = df_futuro[df_futuro['SEMANA'].notna()]
-
-    df_sem = df_futuro.groupby('SEMANA').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_sem.columns = ['Semana', 'Valor', 'Qtd']
-
-    todas_semanas = pd.DataFrame({'Semana': range(1, 9)})
-    df_sem = todas_semanas.merge(df_sem, on='Semana', how='left').fillna(0)
-
-    # Acumulado
-    df_sem['Acumulado'] = df_sem['Valor'].cumsum()
+    # Semanas a partir de hoje; vencimentos depois da 8a semana entram na S8
+    df_sem = projetar_fluxo(df_pendentes, hoje_date, horizonte=8, incluir_alem=True)
+    df_sem = df_sem.rename(columns={'VALOR': 'Valor', 'QTD': 'Qtd', 'ACUMULADO': 'Acumulado'})
 
-    labels = []
-    for i in range(1, 9):
-        inicio = hoje_date + timedelta(days=(i - 1) * 7)
-        fim = inicio + timedelta(days=6)
-        labels.append(f"S{i}\n{inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')}")
+    labels = [
+        f"S{i}\n{inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')}"
+        for i, inicio, fim in zip(df_sem['PERIODO'], df_sem['INICIO'], df_sem['FIM'])
+    ]
 
     cores_semana = [
         cores['perigo'], cores['alerta'], '#f59e0b', '#84cc16',
@@ -762,6 +791,44 @@ def _render_fluxo_semanal(df_pendentes, cores, hoje):
 # =============================================================================
 # DETALHAMENTO (mantido)
 # =============================================================================
+@memoizar_secao
+def compute_opcoes_detalhamento(df_all):
+    """Opcoes de filial e categoria (None sem DESCRICAO) do detalhamento"""
+    filiais = ['Todas'] + sorted([str(x) for x in df_all['NOME_FILIAL'].unique() if pd.notna(x)])
+    categorias = None
+    if 'DESCRICAO' in df_all.columns:
+        categorias = ['Todas'] + sorted([str(x) for x in df_all['DESCRICAO'].unique() if pd.notna(x)])
+    return filiais, categorias
+
+
+@memoizar_secao
+def compute_detalhamento(df_pendentes, df_vencidos, status, filtro_filial, filtro_categoria, ordenar):
+    """Ate 100 titulos do status/filial/categoria escolhidos, na ordem pedida"""
+    # Aplicar filtros
+    if status == "Vencidos":
+        df_show = df_vencidos.copy(deep=False)
+    elif status == "A Vencer":
+        df_show = df_pendentes.copy(deep=False)
+    else:
+        df_show = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+
+    if filtro_filial != 'Todas':
+        df_show = df_show[df_show['NOME_FILIAL'] == filtro_filial]
+
+    if filtro_categoria != 'Todas' and 'DESCRICAO' in df_show.columns:
+        df_show = df_show[df_show['DESCRICAO'] == filtro_categoria]
+
+    # Ordenar
+    if ordenar == "Maior valor":
+        df_show = df_show.sort_values('SALDO', ascending=False)
+    elif ordenar == "Vencimento":
+        df_show = df_show.sort_values('VENCIMENTO')
+    else:
+        df_show = df_show.sort_values('NOME_FORNECEDOR')
+
+    return df_show.head(100)
+
+
 def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
     """Detalhamento com filtros"""
 
@@ -776,14 +843,14 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
             key="venc_status"
         )
 
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+    filiais, categorias = compute_opcoes_detalhamento(df_all)
+
     with col2:
-        df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
-        filiais = ['Todas'] + sorted([str(x) for x in df_all['NOME_FILIAL'].unique() if pd.notna(x)])
         filtro_filial = st.selectbox("Filial", filiais, key="venc_filial")
 
     with col3:
-        if 'DESCRICAO' in df_all.columns:
-            categorias = ['Todas'] + sorted([str(x) for x in df_all['DESCRICAO'].unique() if pd.notna(x)])
+        if categorias is not None:
             filtro_categoria = st.selectbox("Categoria", categorias, key="venc_categoria")
         else:
             filtro_categoria = 'Todas'
@@ -795,29 +862,7 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
             key="venc_ordem"
         )
 
-    # Aplicar filtros
-    if status == "Vencidos":
-        df_show = df_vencidos.copy()
-    elif status == "A Vencer":
-        df_show = df_pendentes.copy()
-    else:
-        df_show = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
-
-    if filtro_filial != 'Todas':
-        df_show = df_show[df_show['NOME_FILIAL'] == filtro_filial]
-
-    if filtro_categoria != 'Todas' and 'DESCRICAO' in df_show.columns:
-        df_show = df_show[df_show['DESCRICAO'] == filtro_categoria]
-
-    # Ordenar
-    if ordenar == "Maior valor":
-        df_show = df_show.sort_values('SALDO', ascending=False)
-    elif ordenar == "Vencimento":
-        df_show = df_show.sort_values('VENCIMENTO')
-    else:
-        df_show = df_show.sort_values('NOME_FORNECEDOR')
-
-    df_show = df_show.head(100)
+    df_show = compute_detalhamento(df_pendentes, df_vencidos, status, filtro_filial, filtro_categoria, ordenar)
 
     if len(df_show) == 0:
         st.info("Nenhum titulo encontrado")
@@ -830,7 +875,7 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
     # Tabela
     colunas = ['NOME_FILIAL', 'NOME_FORNECEDOR', 'TIPO', 'NUMERO', 'DESCRICAO', 'VENCIMENTO', 'SALDO', 'STATUS']
     colunas_disp = [c for c in colunas if c in df_show.columns]
-    df_tab = df_show[colunas_disp].copy()
+    df_tab = df_show[colunas_disp]
 
     if 'VENCIMENTO' in df_tab.columns:
         df_tab['VENCIMENTO'] = pd.to_datetime(df_tab['VENCIMENTO']).dt.strftime('%d/%m/%Y')
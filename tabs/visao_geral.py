@@ -8,8 +8,11 @@ from datetime import datetime, timedelta
 import pandas as pd
 
 from config.theme import get_cores
-from config.settings import GRUPOS_FILIAIS, get_grupo_filial
 from components.charts import criar_layout
+from data.cubo import cubo_agregado
+from data.fluxo_caixa import periodo_por_titulo, projetar_fluxo
+from data.periodo import SEM_DATA, chave_periodo, dia_ref, rotulo_mes, soma_faixa, somas_acumuladas
+from data.secoes import memoizar_secao, recorte
 from utils.formatters import formatar_moeda, formatar_numero
 
 
@@ -24,24 +27,11 @@ def render_visao_geral(df, df_pendentes=None, df_vencidos=None, metricas=None):
 
     # Se nao recebeu os dados, calcular internamente
     if df_pendentes is None:
-        df_pendentes = df[df['SALDO'] > 0]
+        df_pendentes = recorte(df, 'pendentes', lambda d: d['SALDO'] > 0)
     if df_vencidos is None:
-        df_vencidos = df[df['STATUS'] == 'Vencido']
+        df_vencidos = recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido')
     if metricas is None:
-        total = df['VALOR_ORIGINAL'].sum()
-        pago = total - df['SALDO'].sum()
-        pendente = df['SALDO'].sum()
-        vencido = df_vencidos['SALDO'].sum()
-        metricas = {
-            'total': total,
-            'pago': pago,
-            'pendente': pendente,
-            'vencido': vencido,
-            'pct_pago': (pago / total * 100) if total > 0 else 0,
-            'dias_atraso': df_vencidos['DIAS_ATRASO'].mean() if len(df_vencidos) > 0 else 0,
-            'qtd_total': len(df),
-            'qtd_vencidos': len(df_vencidos)
-        }
+        metricas = compute_metricas(df, df_vencidos)
 
     pct_vencido = (metricas['vencido'] / metricas['pendente'] * 100) if metricas['pendente'] > 0 else 0
 
@@ -108,7 +98,7 @@ def render_visao_geral(df, df_pendentes=None, df_vencidos=None, metricas=None):
     st.divider()
 
     # ========== TOP CATEGORIAS ==========
-    _render_top_categorias(df_pendentes, cores)
+    _render_top_categorias(df, cores)
 
     st.divider()
 
@@ -119,7 +109,7 @@ def render_visao_geral(df, df_pendentes=None, df_vencidos=None, metricas=None):
         _render_fluxo_caixa(df_pendentes, cores, hoje)
 
     with col2:
-        _render_top_fornecedores(df_pendentes, cores)
+        _render_top_fornecedores(df, cores)
 
     st.divider()
 
@@ -129,7 +119,39 @@ def render_visao_geral(df, df_pendentes=None, df_vencidos=None, metricas=None):
     st.divider()
 
     # ========== TABELA POR FILIAL/GRUPO ==========
-    _render_tabela_filiais(df, df_pendentes, df_vencidos, cores)
+    _render_tabela_filiais(df, cores)
+
+
+@memoizar_secao
+def compute_metricas(df, df_vencidos):
+    """Metricas dos cards quando a pagina nao as calculou"""
+    total = df['VALOR_ORIGINAL'].sum()
+    pago = total - df['SALDO'].sum()
+    pendente = df['SALDO'].sum()
+    vencido = df_vencidos['SALDO'].sum()
+    return {
+        'total': total,
+        'pago': pago,
+        'pendente': pendente,
+        'vencido': vencido,
+        'pct_pago': (pago / total * 100) if total > 0 else 0,
+        'dias_atraso': df_vencidos['DIAS_ATRASO'].mean() if len(df_vencidos) > 0 else 0,
+        'qtd_total': len(df),
+        'qtd_vencidos': len(df_vencidos)
+    }
+
+
+@memoizar_secao
+def compute_alertas_vencimentos(df_pendentes, hoje_date):
+    """(valor, qtd) que vence hoje, amanha e de hoje ate 7 dias"""
+    # Saldo acumulado por dia de vencimento: cada janela sao duas buscas binarias
+    dias, acumulado = somas_acumuladas(chave_periodo(df_pendentes, 'VENCIMENTO'), df_pendentes['SALDO'])
+    dia_hoje = dia_ref(hoje_date)
+    return {
+        'hoje': soma_faixa(dias, acumulado, dia_hoje, dia_hoje),
+        'amanha': soma_faixa(dias, acumulado, dia_hoje + 1, dia_hoje + 1),
+        'semana': soma_faixa(dias, acumulado, dia_hoje, dia_hoje + 7),
+    }
 
 
 def _render_alertas_vencimentos(df_pendentes, df_vencidos, cores, hoje):
@@ -139,23 +161,10 @@ def _render_alertas_vencimentos(df_pendentes, df_vencidos, cores, hoje):
     amanha = hoje_date + timedelta(days=1)
     fim_semana = hoje_date + timedelta(days=7)
 
-    if len(df_pendentes) > 0:
-        df_hoje = df_pendentes[df_pendentes['VENCIMENTO'].dt.normalize() == pd.Timestamp(hoje_date)]
-        df_amanha = df_pendentes[df_pendentes['VENCIMENTO'].dt.normalize() == pd.Timestamp(amanha)]
-        df_semana = df_pendentes[
-            (df_pendentes['VENCIMENTO'].dt.normalize() >= pd.Timestamp(hoje_date)) &
-            (df_pendentes['VENCIMENTO'].dt.normalize() <= pd.Timestamp(fim_semana))
-        ]
-    else:
-        df_hoje = df_amanha = df_semana = pd.DataFrame()
-
-    valor_hoje = df_hoje['SALDO'].sum() if len(df_hoje) > 0 else 0
-    valor_amanha = df_amanha['SALDO'].sum() if len(df_amanha) > 0 else 0
-    valor_semana = df_semana['SALDO'].sum() if len(df_semana) > 0 else 0
-
-    qtd_hoje = len(df_hoje)
-    qtd_amanha = len(df_amanha)
-    qtd_semana = len(df_semana)
+    alertas = compute_alertas_vencimentos(df_pendentes, hoje_date)
+    valor_hoje, qtd_hoje = alertas['hoje']
+    valor_amanha, qtd_amanha = alertas['amanha']
+    valor_semana, qtd_semana = alertas['semana']
 
     label_semana = f"Hoje ate {fim_semana.strftime('%d/%m')}"
 
@@ -192,9 +201,9 @@ def _render_alertas_vencimentos(df_pendentes, df_vencidos, cores, hoje):
     """, unsafe_allow_html=True)
 
 
-def _render_aging_cards(df_pendentes, cores):
-    """Cards de aging por faixa de vencimento"""
-
+@memoizar_secao
+def compute_aging_cards(df_pendentes):
+    """Saldo e quantidade vencidos e a vencer em ate 7, 15 e 30 dias"""
     vencido = df_pendentes[df_pendentes['STATUS'] == 'Vencido']['SALDO'].sum()
     qtd_vencido = len(df_pendentes[df_pendentes['STATUS'] == 'Vencido'])
 
@@ -211,6 +220,22 @@ def _render_aging_cards(df_pendentes, cores):
     qtd_15d = len(ate_15d)
     vence_30d = ate_30d['SALDO'].sum() if len(ate_30d) > 0 else 0
     qtd_30d = len(ate_30d)
+    return {
+        'vencido': (vencido, qtd_vencido),
+        '7d': (vence_7d, qtd_7d),
+        '15d': (vence_15d, qtd_15d),
+        '30d': (vence_30d, qtd_30d),
+    }
+
+
+def _render_aging_cards(df_pendentes, cores):
+    """Cards de aging por faixa de vencimento"""
+
+    aging = compute_aging_cards(df_pendentes)
+    vencido, qtd_vencido = aging['vencido']
+    vence_7d, qtd_7d = aging['7d']
+    vence_15d, qtd_15d = aging['15d']
+    vence_30d, qtd_30d = aging['30d']
 
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 0.75rem;">
@@ -254,39 +279,25 @@ def _render_aging_cards(df_pendentes, cores):
     """, unsafe_allow_html=True)
 
 
-def _get_nome_grupo(cod_filial):
-    """Retorna nome do grupo a partir do codigo da filial"""
-    grupo_id = get_grupo_filial(int(cod_filial))
-    return GRUPOS_FILIAIS.get(grupo_id, f"Grupo {grupo_id}")
+def _detectar_multiplos_grupos(cubo, medida='QTD'):
+    """Detecta se os dados (celulas com `medida` > 0) contem filiais de multiplos grupos"""
+    return cubo.qtd_grupos(medida) > 1
 
 
-def _detectar_multiplos_grupos(df):
-    """Detecta se os dados contem filiais de multiplos grupos"""
-    if 'FILIAL' not in df.columns or len(df) == 0:
-        return False
-    grupos = df['FILIAL'].dropna().apply(lambda x: get_grupo_filial(int(x))).nunique()
-    return grupos > 1
-
-
-def _render_por_filial(df_pendentes, cores):
+def _render_por_filial(cubo, cores):
     """Saldo por Filial - agrupa por Grupo quando vendo todas as filiais"""
 
-    if len(df_pendentes) == 0:
+    if cubo.total()['QTD_PENDENTE'] == 0:
         st.info("Sem saldo pendente")
         return
 
-    multiplos_grupos = _detectar_multiplos_grupos(df_pendentes)
+    multiplos_grupos = _detectar_multiplos_grupos(cubo, 'QTD_PENDENTE')
 
     if multiplos_grupos:
         # Agrupar por GRUPO
         st.markdown("##### Saldo por Grupo")
-        df_temp = df_pendentes.copy()
-        df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-
-        df_grp = df_temp.groupby('GRUPO').agg({
-            'SALDO': 'sum',
-            'VALOR_ORIGINAL': 'count'
-        }).reset_index()
+        df_grp = cubo.agregar('GRUPO')
+        df_grp = df_grp[df_grp['QTD_PENDENTE'] > 0][['GRUPO', 'SALDO_PENDENTE', 'QTD_PENDENTE']]
         df_grp.columns = ['Grupo', 'Saldo', 'Qtd']
         df_grp = df_grp.sort_values('Saldo', ascending=True)
 
@@ -311,10 +322,8 @@ def _render_por_filial(df_pendentes, cores):
     else:
         # Agrupar por filial individual (dentro de um grupo)
         st.markdown("##### Saldo por Filial")
-        df_filial = df_pendentes.groupby(['FILIAL', 'NOME_FILIAL']).agg({
-            'SALDO': 'sum',
-            'VALOR_ORIGINAL': 'count'
-        }).reset_index()
+        df_filial = cubo.agregar(['FILIAL', 'NOME_FILIAL'])
+        df_filial = df_filial[df_filial['QTD_PENDENTE'] > 0][['FILIAL', 'NOME_FILIAL', 'SALDO_PENDENTE', 'QTD_PENDENTE']]
         df_filial.columns = ['Cod', 'Nome', 'Saldo', 'Qtd']
         df_filial['Filial'] = df_filial['Cod'].astype(int).astype(str) + ' - ' + df_filial['Nome'].str.split(' - ').str[-1].str.strip()
         df_filial = df_filial.sort_values('Saldo', ascending=True)
@@ -342,22 +351,29 @@ def _render_por_filial(df_pendentes, cores):
         st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_top_categorias(df_pendentes, cores):
+@memoizar_secao
+def compute_top_categorias(df):
+    """10 categorias de maior saldo pendente; None sem saldo pendente"""
+    cubo = cubo_agregado(df)
+    if cubo.total()['QTD_PENDENTE'] == 0:
+        return None
+
+    df_cat = cubo.agregar('DESCRICAO')
+    df_cat = df_cat[df_cat['QTD_PENDENTE'] > 0][['DESCRICAO', 'SALDO_PENDENTE', 'QTD_PENDENTE']]
+    df_cat.columns = ['Categoria', 'Saldo', 'Qtd']
+    return df_cat.sort_values('Saldo', ascending=False).head(10)
+
+
+def _render_top_categorias(df, cores):
     """Top categorias por saldo"""
 
     st.markdown("##### Saldo por Categoria")
 
-    if len(df_pendentes) == 0:
+    df_cat = compute_top_categorias(df)
+    if df_cat is None:
         st.info("Sem saldo pendente")
         return
 
-    df_cat = df_pendentes.groupby('DESCRICAO').agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Saldo', 'Qtd']
-    df_cat = df_cat.sort_values('Saldo', ascending=False).head(10)
-
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
@@ -379,34 +395,36 @@ def _render_top_categorias(df_pendentes, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_pago_pendente_filial(df):
+    """(multiplos grupos?, pago e saldo por GRUPO ou NOME_FILIAL); None sem dados"""
+    cubo = cubo_agregado(df)
+    if len(cubo) == 0:
+        return None
+
+    multiplos_grupos = _detectar_multiplos_grupos(cubo)
+    if not multiplos_grupos and 'NOME_FILIAL' not in cubo.dimensoes:
+        return None
+
+    df_agg = cubo.agregar('GRUPO' if multiplos_grupos else 'NOME_FILIAL')
+    df_agg['PAGO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
+    df_agg = df_agg[(df_agg['PAGO'] > 0) | (df_agg['SALDO'] > 0)]
+    return multiplos_grupos, df_agg
+
+
 def _render_pago_pendente_filial(df, cores):
     """Graficos de Pago e Pendente - por Grupo ou por Filial conforme filtro"""
 
-    if len(df) == 0:
+    resultado = compute_pago_pendente_filial(df)
+    if resultado is None:
         return
-
-    multiplos_grupos = _detectar_multiplos_grupos(df)
+    multiplos_grupos, df_agg = resultado
 
     if multiplos_grupos:
-        # Agrupar por GRUPO
-        df_temp = df.copy()
-        df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-        df_agg = df_temp.groupby('GRUPO').agg({
-            'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'
-        }).reset_index()
-        df_agg['PAGO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
-        df_agg = df_agg[(df_agg['PAGO'] > 0) | (df_agg['SALDO'] > 0)]
         label_col = 'GRUPO'
         titulo_pago = '##### Pago por Grupo'
         titulo_pend = '##### Pendente por Grupo'
     else:
-        if 'NOME_FILIAL' not in df.columns:
-            return
-        df_agg = df.groupby('NOME_FILIAL').agg({
-            'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'
-        }).reset_index()
-        df_agg['PAGO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
-        df_agg = df_agg[(df_agg['PAGO'] > 0) | (df_agg['SALDO'] > 0)]
         label_col = 'NOME_FILIAL'
         titulo_pago = '##### Pago por Filial'
         titulo_pend = '##### Pendente por Filial'
@@ -462,6 +480,30 @@ def _render_pago_pendente_filial(df, cores):
             st.info("Nenhum titulo pendente")
 
 
+@memoizar_secao
+def compute_fluxo_caixa(df_pendentes, hoje_date):
+    """(ha vencimento futuro?, projecao das proximas 8 semanas ou None se nao ha nenhum nelas)"""
+    if not (chave_periodo(df_pendentes, 'VENCIMENTO') >= dia_ref(hoje_date)).any():
+        return False, None
+
+    # Semana de cada titulo pendente (1..8; 0 = vencido, sem data ou alem de 8 semanas)
+    if not (periodo_por_titulo(df_pendentes, hoje_date, horizonte=8) > 0).any():
+        return True, None
+
+    df_sem = projetar_fluxo(df_pendentes, hoje_date, horizonte=8)
+    return True, df_sem.rename(columns={'VALOR': 'Valor', 'QTD': 'Qtd'})
+
+
+@memoizar_secao
+def compute_detalhe_semana(df_pendentes, hoje_date, num_semana):
+    """Titulos pendentes que vencem na semana `num_semana`, do maior saldo para o menor"""
+    semana = periodo_por_titulo(df_pendentes, hoje_date, horizonte=8)
+    df_detalhe = df_pendentes[semana == num_semana]
+    colunas = ['NOME_FORNECEDOR', 'TIPO', 'NUMERO', 'VENCIMENTO', 'SALDO', 'NOME_FILIAL', 'DESCRICAO']
+    colunas_disp = [c for c in colunas if c in df_detalhe.columns]
+    return df_detalhe[colunas_disp].sort_values('SALDO', ascending=False)
+
+
 def _render_fluxo_caixa(df_pendentes, cores, hoje):
     """Fluxo de caixa - vencimentos futuros por semana"""
 
@@ -473,42 +515,20 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
 
     hoje_date = hoje.date() if hasattr(hoje, 'date') else hoje
 
-    df_futuro = df_pendentes[df_pendentes['VENCIMENTO'] >= pd.Timestamp(hoje_date)].copy()
-
-    if len(df_futuro) == 0:
+    tem_futuro, df_sem = compute_fluxo_caixa(df_pendentes, hoje_date)
+    if not tem_futuro:
         st.success("Nenhum vencimento futuro pendente")
         return
-
-    limite = pd.Timestamp(hoje_date + timedelta(days=56))
-    df_futuro = df_futuro[df_futuro['VENCIMENTO'] < limite].copy()
-
-    if len(df_futuro) == 0:
+    if df_sem is None:
         st.success("Nenhum vencimento nas proximas 8 semanas")
         return
 
-    df_futuro['SEMANA'] = df_futuro['VENCIMENTO'].apply(
-        lambda d: (d.date() - hoje_date).days // 7 + 1 if pd.notna(d) else None
-    )
-    df_futuro = df_futuro[df_futuro['SEMANA'].notna()]
-
-    df_sem = df_futuro.groupby('SEMANA').agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).reset_index()
-    df_sem.columns = ['Semana', 'Valor', 'Qtd']
-
-    todas_semanas = pd.DataFrame({'Semana': range(1, 9)})
-    df_sem = todas_semanas.merge(df_sem, on='Semana', how='left').fillna(0)
-
     # Gerar labels e mapeamento semana -> periodo
     labels = []
     semana_labels = {}
-    for i in range(1, 9):
-        inicio = hoje_date + timedelta(days=(i-1)*7)
-        fim = hoje_date + timedelta(days=i*7 - 1)
-        label = f"S{i} ({inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')})"
+    for i, inicio, fim in zip(df_sem['PERIODO'], df_sem['INICIO'], df_sem['FIM']):
         labels.append(f"S{i}\n{inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')}")
-        semana_labels[i] = label
+        semana_labels[int(i)] = f"S{i} ({inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')})"
 
     cores_semana = [
         cores['perigo'], cores['alerta'], '#f59e0b', '#84cc16',
@@ -540,8 +560,7 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
     st.caption(f"**Total proximas 8 semanas:** {formatar_moeda(total_futuro)} | Vencimentos alem de 8 semanas nao sao exibidos.")
 
     # Detalhamento por semana
-    semanas_com_dados = [int(s) for s in df_futuro['SEMANA'].unique()]
-    semanas_com_dados.sort()
+    semanas_com_dados = [int(s) for s in df_sem.loc[df_sem['Qtd'] > 0, 'PERIODO']]
     opcoes = {semana_labels[s]: s for s in semanas_com_dados if s in semana_labels}
 
     if opcoes:
@@ -551,13 +570,9 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
             key="fluxo_semana_detalhe"
         )
         num_semana = opcoes[semana_sel]
-        df_detalhe = df_futuro[df_futuro['SEMANA'] == num_semana].copy()
-
-        if len(df_detalhe) > 0:
-            colunas = ['NOME_FORNECEDOR', 'TIPO', 'NUMERO', 'VENCIMENTO', 'SALDO', 'NOME_FILIAL', 'DESCRICAO']
-            colunas_disp = [c for c in colunas if c in df_detalhe.columns]
-            df_show = df_detalhe[colunas_disp].sort_values('SALDO', ascending=False).copy()
+        df_show = compute_detalhe_semana(df_pendentes, hoje_date, num_semana)
 
+        if len(df_show) > 0:
             if 'NOME_FORNECEDOR' in df_show.columns:
                 df_show['NOME_FORNECEDOR'] = df_show['NOME_FORNECEDOR'].str[:30]
             if 'NOME_FILIAL' in df_show.columns:
@@ -580,20 +595,30 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
             st.dataframe(df_show, use_container_width=True, hide_index=True, height=300)
 
 
-def _render_top_fornecedores(df_pendentes, cores):
+@memoizar_secao
+def compute_top_fornecedores(df):
+    """10 fornecedores de maior saldo pendente, em ordem crescente; None sem pendente"""
+    cubo = cubo_agregado(df)
+    if cubo.total()['QTD_PENDENTE'] == 0:
+        return None
+
+    df_forn = cubo.agregar('NOME_FORNECEDOR')
+    df_forn = df_forn[df_forn['QTD_PENDENTE'] > 0][['NOME_FORNECEDOR', 'SALDO_PENDENTE']]
+    df_forn.columns = ['Fornecedor', 'Pendente']
+    df_forn = df_forn.nlargest(10, 'Pendente')
+    return df_forn.sort_values('Pendente', ascending=True)
+
+
+def _render_top_fornecedores(df, cores):
     """Top 10 fornecedores com maior valor pendente a pagar"""
 
     st.markdown("##### Top 10 Fornecedores - Pendente a Pagar")
 
-    if len(df_pendentes) == 0:
+    df_forn = compute_top_fornecedores(df)
+    if df_forn is None:
         st.info("Sem pendente a pagar")
         return
 
-    df_forn = df_pendentes.groupby('NOME_FORNECEDOR')['SALDO'].sum().reset_index()
-    df_forn.columns = ['Fornecedor', 'Pendente']
-    df_forn = df_forn.nlargest(10, 'Pendente')
-    df_forn = df_forn.sort_values('Pendente', ascending=True)
-
     if len(df_forn) == 0:
         st.info("Sem dados")
         return
@@ -622,28 +647,32 @@ def _render_top_fornecedores(df_pendentes, cores):
     st.caption("Top 10 fornecedores rankeados pelo valor pendente a pagar.")
 
 
+@memoizar_secao
+def compute_evolucao_mensal(df):
+    """Emitido, pago, saldo e % pago dos ultimos 12 meses de emissao; None sem EMISSAO_AAAAMM"""
+    cubo = cubo_agregado(df)
+    if 'EMISSAO_AAAAMM' not in cubo.dimensoes:
+        return None
+
+    df_mes = cubo.agregar('EMISSAO_AAAAMM')
+    df_mes = df_mes[df_mes['EMISSAO_AAAAMM'] != SEM_DATA].sort_values('EMISSAO_AAAAMM')
+
+    df_mes['MES'] = rotulo_mes(df_mes['EMISSAO_AAAAMM']).to_numpy()
+    df_mes['Pago'] = df_mes['VALOR_ORIGINAL'] - df_mes['SALDO']
+    df_mes['Taxa'] = (df_mes['Pago'] / df_mes['VALOR_ORIGINAL'] * 100).fillna(0)
+    return df_mes.tail(12)
+
+
 def _render_evolucao_mensal(df, cores):
     """Evolucao mensal de emissao e pagamento"""
 
     st.markdown("##### Evolucao Mensal")
 
-    if 'EMISSAO' not in df.columns:
+    df_mes = compute_evolucao_mensal(df)
+    if df_mes is None:
         st.info("Dados de evolucao nao disponiveis")
         return
 
-    df_temp = df.copy()
-    df_temp['MES'] = df_temp['EMISSAO'].dt.to_period('M')
-
-    df_mes = df_temp.groupby('MES').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum'
-    }).reset_index()
-
-    df_mes['MES'] = df_mes['MES'].astype(str)
-    df_mes['Pago'] = df_mes['VALOR_ORIGINAL'] - df_mes['SALDO']
-    df_mes['Taxa'] = (df_mes['Pago'] / df_mes['VALOR_ORIGINAL'] * 100).fillna(0)
-    df_mes = df_mes.tail(12)
-
     if len(df_mes) < 2:
         st.info("Dados insuficientes para evolucao")
         return
@@ -688,63 +717,35 @@ def _render_evolucao_mensal(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
-    """Tabela detalhada - por Grupo quando vendo todas, por filial quando filtrado"""
-
-    if len(df) == 0:
-        st.info("Sem dados")
-        return
+@memoizar_secao
+def compute_tabela_filiais(df):
+    """(multiplos grupos?, resumo por GRUPO ou FILIAL com pago, saldo, vencido e %); None sem dados"""
+    cubo = cubo_agregado(df)
+    if len(cubo) == 0:
+        return None
 
-    multiplos_grupos = _detectar_multiplos_grupos(df)
+    multiplos_grupos = _detectar_multiplos_grupos(cubo)
 
     if multiplos_grupos:
-        st.markdown("##### Resumo por Grupo")
-
-        df_temp = df.copy()
-        df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-
-        df_resumo = df_temp.groupby('GRUPO').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum',
-            'NUMERO': 'count',
-            'FILIAL': 'nunique'
-        }).reset_index()
+        df_resumo = cubo.agregar('GRUPO')[['GRUPO', 'VALOR_ORIGINAL', 'SALDO', 'QTD']]
+        df_filiais = cubo.distintos('GRUPO', 'FILIAL')
+        df_resumo = df_resumo.merge(df_filiais, on='GRUPO', how='left')
         df_resumo.columns = ['Grupo', 'Total', 'Saldo', 'Titulos', 'Filiais']
 
         # Vencidos por grupo
-        df_venc_temp = df_vencidos.copy()
-        if len(df_venc_temp) > 0:
-            df_venc_temp['GRUPO'] = df_venc_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-            df_venc_grp = df_venc_temp.groupby('GRUPO')['SALDO'].sum().reset_index()
-            df_venc_grp.columns = ['Grupo', 'Vencido']
-            df_resumo = df_resumo.merge(df_venc_grp, on='Grupo', how='left')
-        else:
-            df_resumo['Vencido'] = 0.0
+        df_venc_grp = cubo.agregar('GRUPO', {'STATUS': 'Vencido'})[['GRUPO', 'SALDO']]
+        df_venc_grp.columns = ['Grupo', 'Vencido']
+        df_resumo = df_resumo.merge(df_venc_grp, on='Grupo', how='left')
         df_resumo['Vencido'] = df_resumo['Vencido'].fillna(0)
 
         df_resumo['Pago'] = df_resumo['Total'] - df_resumo['Saldo']
         df_resumo['% Pago'] = (df_resumo['Pago'] / df_resumo['Total'] * 100).round(1)
         df_resumo['% Vencido'] = (df_resumo['Vencido'] / df_resumo['Saldo'] * 100).fillna(0).round(1)
         df_resumo = df_resumo.sort_values('Saldo', ascending=False)
-
-        df_display = df_resumo[['Grupo', 'Filiais', 'Titulos', 'Total', 'Pago', 'Saldo', 'Vencido', '% Pago', '% Vencido']].copy()
-        df_display['Total'] = df_display['Total'].apply(formatar_moeda)
-        df_display['Pago'] = df_display['Pago'].apply(formatar_moeda)
-        df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
-        df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
-        df_display['% Pago'] = df_display['% Pago'].apply(lambda x: f"{x:.1f}%")
-        df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
-        df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
     else:
-        st.markdown("##### Resumo por Filial")
-
-        df_resumo = df.groupby(['FILIAL', 'NOME_FILIAL']).agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum',
-            'NUMERO': 'count'
-        }).reset_index()
+        df_resumo = cubo.agregar(['FILIAL', 'NOME_FILIAL'])[['FILIAL', 'NOME_FILIAL', 'VALOR_ORIGINAL', 'SALDO', 'QTD']]
 
-        df_venc_filial = df_vencidos.groupby('FILIAL')['SALDO'].sum().reset_index()
+        df_venc_filial = cubo.agregar('FILIAL', {'STATUS': 'Vencido'})[['FILIAL', 'SALDO']]
         df_venc_filial.columns = ['FILIAL', 'Vencido']
 
         df_resumo = df_resumo.merge(df_venc_filial, on='FILIAL', how='left')
@@ -758,19 +759,36 @@ def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
             'FILIAL': 'Cod',
             'NOME_FILIAL': 'Filial',
             'VALOR_ORIGINAL': 'Total',
-            'SALDO': 'Pendente',
-            'NUMERO': 'Titulos'
+            'SALDO': 'Saldo',
+            'QTD': 'Titulos'
         })
         df_resumo = df_resumo.sort_values('Saldo', ascending=False)
+    return multiplos_grupos, df_resumo
 
-        df_display = df_resumo[['Cod', 'Filial', 'Titulos', 'Total', 'Pago', 'Saldo', 'Vencido', '% Pago', '% Vencido']].copy()
-        df_display['Total'] = df_display['Total'].apply(formatar_moeda)
-        df_display['Pago'] = df_display['Pago'].apply(formatar_moeda)
-        df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
-        df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
-        df_display['% Pago'] = df_display['% Pago'].apply(lambda x: f"{x:.1f}%")
-        df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
-        df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
+
+def _render_tabela_filiais(df, cores):
+    """Tabela detalhada - por Grupo quando vendo todas, por filial quando filtrado"""
+
+    resultado = compute_tabela_filiais(df)
+    if resultado is None:
+        st.info("Sem dados")
+        return
+    multiplos_grupos, df_resumo = resultado
+
+    if multiplos_grupos:
+        st.markdown("##### Resumo por Grupo")
+        df_display = df_resumo[['Grupo', 'Filiais', 'Titulos', 'Total', 'Pago', 'Saldo', 'Vencido', '% Pago', '% Vencido']]
+    else:
+        st.markdown("##### Resumo por Filial")
+        df_display = df_resumo[['Cod', 'Filial', 'Titulos', 'Total', 'Pago', 'Saldo', 'Vencido', '% Pago', '% Vencido']]
+
+    df_display['Total'] = df_display['Total'].apply(formatar_moeda)
+    df_display['Pago'] = df_display['Pago'].apply(formatar_moeda)
+    df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
+    df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
+    df_display['% Pago'] = df_display['% Pago'].apply(lambda x: f"{x:.1f}%")
+    df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
+    df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
 
     st.dataframe(
         df_display,
@@ -5,12 +5,15 @@ Layout flat alinhado com tabs/adiantamentos.py (espelho pagar -> receber)
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.periodo import SEM_DATA, chave_periodo, dia_ref, rotulo_mes
+from data.secoes import memoizar_secao
+from data.vinculos import baixas_vinculadas
 
 
 def render_adiantamentos_receber(df_adiant, df_baixas):
@@ -19,21 +22,7 @@ def render_adiantamentos_receber(df_adiant, df_baixas):
     hoje = datetime.now()
 
     # ========== PREPARAR DADOS ==========
-    df_ad = df_adiant.copy() if len(df_adiant) > 0 else pd.DataFrame()
-    df_bx = df_baixas.copy() if len(df_baixas) > 0 else pd.DataFrame()
-
-    # Correlacionar baixas com adiantamentos
-    if len(df_ad) > 0 and len(df_bx) > 0 and 'FILIAL' in df_ad.columns and 'NUMERO' in df_ad.columns:
-        chaves_ad = set(zip(df_ad['FILIAL'], df_ad['NUMERO'].astype(str)))
-        mask_match = df_bx.apply(lambda r: (r['FILIAL'], str(r['NUMERO'])) in chaves_ad, axis=1)
-        df_bx = df_bx[mask_match].copy()
-
-    # Converter datas
-    for col in ['EMISSAO', 'VENCIMENTO']:
-        if len(df_ad) > 0 and col in df_ad.columns:
-            df_ad[col] = pd.to_datetime(df_ad[col], errors='coerce')
-    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns:
-        df_bx['DT_BAIXA'] = pd.to_datetime(df_bx['DT_BAIXA'], errors='coerce')
+    df_ad, df_bx = compute_base_adiantamentos(df_adiant, df_baixas, hoje.date())
 
     # Identificar coluna de cliente (NOME_FORNECEDOR ou NOME_CLIENTE)
     col_cliente = 'NOME_FORNECEDOR' if 'NOME_FORNECEDOR' in df_ad.columns else 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_ad.columns else None
@@ -42,19 +31,13 @@ def render_adiantamentos_receber(df_adiant, df_baixas):
         st.info("Nenhum adiantamento encontrado no periodo.")
         return
 
-    # Calcular dias pendente
-    if 'EMISSAO' in df_ad.columns:
-        df_ad['DIAS_PENDENTE'] = (hoje - df_ad['EMISSAO']).dt.days
-
     # Calcular totais gerais
-    total_adiantado = df_ad['VALOR_ORIGINAL'].sum()
-    saldo_pendente = df_ad['SALDO'].sum() if 'SALDO' in df_ad.columns else 0
+    kpis = compute_kpis(df_ad, df_bx)
+    total_adiantado = kpis['total_adiantado']
+    saldo_pendente = kpis['saldo_pendente']
     total_compensado = total_adiantado - saldo_pendente
-    qtd_pendentes = len(df_ad[df_ad['SALDO'] > 0]) if 'SALDO' in df_ad.columns else 0
-
-    prazo_medio = 0
-    if len(df_bx) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
-        prazo_medio = pd.to_numeric(df_bx['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    qtd_pendentes = kpis['qtd_pendentes']
+    prazo_medio = kpis['prazo_medio']
 
     # ========== 1. KPIs PRINCIPAIS ==========
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -125,6 +108,237 @@ def _get_label_filial(row):
     return f"{cod} - {sufixo}" if cod else sufixo
 
 
+# ==========================================================================
+# Calculos
+# ==========================================================================
+
+@memoizar_secao
+def compute_base_adiantamentos(df_adiant, df_baixas, hoje_date):
+    """(adiantamentos, baixas vinculadas a eles) com datas convertidas e dias pendente"""
+    df_ad = df_adiant.copy(deep=False) if len(df_adiant) > 0 else pd.DataFrame()
+    df_bx = df_baixas.copy(deep=False) if len(df_baixas) > 0 else pd.DataFrame()
+
+    # Correlacionar baixas com adiantamentos (CHAVE_TITULO gravada na ingestao)
+    if len(df_ad) > 0 and len(df_bx) > 0 and 'FILIAL' in df_ad.columns and 'NUMERO' in df_ad.columns:
+        df_bx = baixas_vinculadas(df_ad, df_bx)
+
+    # Converter datas
+    for col in ['EMISSAO', 'VENCIMENTO']:
+        if len(df_ad) > 0 and col in df_ad.columns:
+            df_ad[col] = pd.to_datetime(df_ad[col], errors='coerce')
+    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns:
+        df_bx['DT_BAIXA'] = pd.to_datetime(df_bx['DT_BAIXA'], errors='coerce')
+
+    # Calcular dias pendente
+    if len(df_ad) > 0 and 'EMISSAO' in df_ad.columns:
+        df_ad['DIAS_PENDENTE'] = (pd.Timestamp(hoje_date) - df_ad['EMISSAO']).dt.days
+    return df_ad, df_bx
+
+
+@memoizar_secao
+def compute_kpis(df_ad, df_bx):
+    """Total adiantado, saldo e titulos pendentes e prazo medio ate a baixa"""
+    prazo_medio = 0
+    if len(df_bx) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
+        prazo_medio = pd.to_numeric(df_bx['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    return {
+        'total_adiantado': df_ad['VALOR_ORIGINAL'].sum(),
+        'saldo_pendente': df_ad['SALDO'].sum() if 'SALDO' in df_ad.columns else 0,
+        'qtd_pendentes': len(df_ad[df_ad['SALDO'] > 0]) if 'SALDO' in df_ad.columns else 0,
+        'prazo_medio': prazo_medio,
+    }
+
+
+@memoizar_secao
+def compute_fluxo_mensal(df_ad, df_bx):
+    """Adiantado, compensado e liquido dos ultimos 12 meses com movimento"""
+    df_ad_mes = df_ad.copy(deep=False)
+    df_ad_mes['MES'] = chave_periodo(df_ad_mes, 'EMISSAO', 'AAAAMM')
+    adiant_mes = df_ad_mes.groupby('MES', observed=True)['VALOR_ORIGINAL'].sum().drop(SEM_DATA, errors='ignore')
+
+    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
+        df_bx_mes = df_bx.copy(deep=False)
+        df_bx_mes['MES'] = chave_periodo(df_bx_mes, 'DT_BAIXA', 'AAAAMM')
+        baixa_mes = df_bx_mes.groupby('MES', observed=True)['VALOR_BAIXA'].sum().drop(SEM_DATA, errors='ignore')
+    else:
+        baixa_mes = pd.Series(dtype=float)
+
+    meses = sorted(set(adiant_mes.index.tolist() + baixa_mes.index.tolist()))[-12:]
+    df_fluxo = pd.DataFrame({
+        'MES': rotulo_mes(meses).tolist(),
+        'Adiantado': [adiant_mes.get(m, 0) for m in meses],
+        'Compensado': [baixa_mes.get(m, 0) for m in meses]
+    })
+    df_fluxo['Liquido'] = df_fluxo['Adiantado'] - df_fluxo['Compensado']
+    return df_fluxo
+
+
+@memoizar_secao
+def compute_ultimos_90_dias(df_ad, df_bx, hoje_date):
+    """(adiantado, compensado) com emissao/baixa nos ultimos 90 dias, contando hoje"""
+    inicio = dia_ref(hoje_date) - 89
+    adiant_3m = df_ad.loc[chave_periodo(df_ad, 'EMISSAO') >= inicio, 'VALOR_ORIGINAL'].sum()
+
+    comp_3m = 0
+    if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
+        comp_3m = df_bx.loc[chave_periodo(df_bx, 'DT_BAIXA') >= inicio, 'VALOR_BAIXA'].sum()
+    return adiant_3m, comp_3m
+
+
+@memoizar_secao
+def compute_por_cliente(df_ad, col_cliente):
+    """Total, pendente, compensado e quantidade de adiantamentos por cliente"""
+    df_cli = df_ad.groupby(col_cliente, observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'EMISSAO': 'count'
+    }).reset_index()
+    df_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
+    df_cli['Compensado'] = df_cli['Total'] - df_cli['Pendente']
+    return df_cli
+
+
+@memoizar_secao
+def compute_por_filial(df_ad):
+    """(multiplos grupos?, 12 maiores filiais/grupos por total adiantado em ordem crescente)"""
+    multiplos_grupos = _detectar_multiplos_grupos(df_ad)
+
+    df_temp = df_ad.copy(deep=False)
+    if multiplos_grupos:
+        df_temp['_AGRUP'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x))
+    else:
+        df_temp['_AGRUP'] = df_temp.apply(_get_label_filial, axis=1)
+
+    df_fil = df_temp.groupby('_AGRUP', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'EMISSAO': 'count'
+    }).reset_index()
+    df_fil.columns = ['Filial', 'Total', 'Pendente', 'Qtd']
+    df_fil['Compensado'] = df_fil['Total'] - df_fil['Pendente']
+    df_fil = df_fil.sort_values('Total', ascending=False)
+
+    return multiplos_grupos, df_fil.head(12).sort_values('Total', ascending=True)
+
+
+def _faixa_prazo(d):
+    if pd.isna(d) or d < 0:
+        return 'N/A'
+    d = int(d)
+    if d <= 15:
+        return 'Ate 15d'
+    elif d <= 30:
+        return '16-30d'
+    elif d <= 60:
+        return '31-60d'
+    elif d <= 90:
+        return '61-90d'
+    elif d <= 180:
+        return '91-180d'
+    return '180+d'
+
+
+@memoizar_secao
+def compute_prazos_faixa(df_bx):
+    """Valor e quantidade de baixas por faixa de prazo desde a emissao"""
+    df_temp = df_bx.copy(deep=False)
+    df_temp['PRAZO'] = pd.to_numeric(df_temp['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
+
+    df_temp['FAIXA'] = df_temp['PRAZO'].apply(_faixa_prazo)
+    ordem = ['Ate 15d', '16-30d', '31-60d', '61-90d', '91-180d', '180+d']
+
+    df_faixa = df_temp.groupby('FAIXA', observed=True).agg({
+        'VALOR_BAIXA': 'sum' if 'VALOR_BAIXA' in df_temp.columns else 'count',
+        'PRAZO': 'count'
+    }).reindex(ordem, fill_value=0).reset_index()
+    df_faixa.columns = ['Faixa', 'Valor', 'Qtd']
+    return df_faixa
+
+
+@memoizar_secao
+def compute_prazo_mensal(df_bx):
+    """Prazo medio das baixas por mes da baixa (ultimos 12 meses)"""
+    df_evol = df_bx.copy(deep=False)
+    df_evol['MES'] = chave_periodo(df_evol, 'DT_BAIXA', 'AAAAMM')
+    df_evol['PRAZO'] = pd.to_numeric(df_evol['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
+
+    df_prazo_mes = df_evol.groupby('MES', observed=True)['PRAZO'].mean().drop(SEM_DATA, errors='ignore').tail(12).reset_index()
+    df_prazo_mes.columns = ['MES', 'Prazo']
+    df_prazo_mes['MES'] = rotulo_mes(df_prazo_mes['MES'])
+    return df_prazo_mes
+
+
+@memoizar_secao
+def compute_clientes(df_ad, col_cliente):
+    """Clientes com adiantamento, em ordem alfabetica"""
+    return sorted(df_ad[col_cliente].dropna().unique().tolist())
+
+
+@memoizar_secao
+def compute_consulta_cliente(df_ad, df_bx, col_cliente, cliente):
+    """(total, saldo, % compensado, prazo medio, quantidade, 30 titulos mais recentes) do cliente"""
+    df_sel = df_ad[df_ad[col_cliente] == cliente]
+    df_bx_sel = df_bx[df_bx[col_cliente] == cliente] if len(df_bx) > 0 and col_cliente in df_bx.columns else pd.DataFrame()
+
+    total_cli = df_sel['VALOR_ORIGINAL'].sum()
+    saldo_cli = df_sel['SALDO'].sum() if 'SALDO' in df_sel.columns else 0
+    pct_comp = ((total_cli - saldo_cli) / total_cli * 100) if total_cli > 0 else 0
+
+    # Prazo de quitacao FIFO (emissao ate a baixa que completa o adiantamento)
+    prazo_cli = 0
+    if 'DIAS_ATE_QUITAR' in df_sel.columns and df_sel['DIAS_ATE_QUITAR'].notna().any():
+        prazo_cli = df_sel['DIAS_ATE_QUITAR'].mean()
+    elif len(df_bx_sel) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx_sel.columns:
+        prazo_cli = pd.to_numeric(df_bx_sel['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+
+    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'EMISSAO', 'VALOR_ORIGINAL', 'SALDO', 'DIAS_ATE_QUITAR']
+    colunas_disp = [c for c in colunas if c in df_sel.columns]
+    df_tab = df_sel[colunas_disp].sort_values('EMISSAO', ascending=False).head(30)
+    return total_cli, saldo_cli, pct_comp, prazo_cli, len(df_sel), df_tab
+
+
+@memoizar_secao
+def compute_ranking(df_ad, df_bx, col_cliente):
+    """Total, pendente, compensado, % compensado e prazo medio por cliente"""
+    df_cli = compute_por_cliente(df_ad, col_cliente)
+    df_cli['Pct_Comp'] = (df_cli['Compensado'] / df_cli['Total'] * 100).fillna(0).round(1)
+
+    # Prazo medio
+    if len(df_bx) > 0 and col_cliente in df_bx.columns and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
+        prazo_cli = df_bx.groupby(col_cliente, observed=True)['DIF_DIAS_EMIS_BAIXA'].apply(
+            lambda x: pd.to_numeric(x, errors='coerce').mean()
+        )
+        df_cli['Prazo_Medio'] = df_cli['Cliente'].map(prazo_cli).fillna(0)
+    else:
+        df_cli['Prazo_Medio'] = 0
+    return df_cli
+
+
+_ORDEM_RANKING = {
+    "Maior Pendente": ('Pendente', False),
+    "Maior Total": ('Total', False),
+    "Menor % Compensado": ('Pct_Comp', True),
+    "Maior Prazo": ('Prazo_Medio', False),
+}
+
+
+@memoizar_secao
+def compute_ranking_exibir(df_ad, df_bx, col_cliente, ordenar, filtro, busca):
+    """Ate 100 clientes do ranking com o filtro e a busca, na ordem escolhida"""
+    df_exibir = compute_ranking(df_ad, df_bx, col_cliente)
+
+    if filtro == "Com Pendencia":
+        df_exibir = df_exibir[df_exibir['Pendente'] > 0]
+    elif filtro == "Quitados":
+        df_exibir = df_exibir[df_exibir['Pendente'] <= 0]
+
+    if busca:
+        df_exibir = df_exibir[df_exibir['Cliente'].str.upper().str.contains(busca.upper(), na=False)]
+
+    col_sort, asc = _ORDEM_RANKING[ordenar]
+    return df_exibir.sort_values(col_sort, ascending=asc).head(100)
+
+
 # ==========================================================================
 # Secoes
 # ==========================================================================
@@ -140,24 +354,7 @@ def _render_fluxo_mensal(df_ad, df_bx, cores, hoje):
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        df_ad_mes = df_ad.copy()
-        df_ad_mes['MES'] = df_ad_mes['EMISSAO'].dt.to_period('M').astype(str)
-        adiant_mes = df_ad_mes.groupby('MES')['VALOR_ORIGINAL'].sum()
-
-        if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
-            df_bx_mes = df_bx.copy()
-            df_bx_mes['MES'] = df_bx_mes['DT_BAIXA'].dt.to_period('M').astype(str)
-            baixa_mes = df_bx_mes.groupby('MES')['VALOR_BAIXA'].sum()
-        else:
-            baixa_mes = pd.Series(dtype=float)
-
-        meses = sorted(set(adiant_mes.index.tolist() + baixa_mes.index.tolist()))[-12:]
-        df_fluxo = pd.DataFrame({
-            'MES': meses,
-            'Adiantado': [adiant_mes.get(m, 0) for m in meses],
-            'Compensado': [baixa_mes.get(m, 0) for m in meses]
-        })
-        df_fluxo['Liquido'] = df_fluxo['Adiantado'] - df_fluxo['Compensado']
+        df_fluxo = compute_fluxo_mensal(df_ad, df_bx)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -186,13 +383,7 @@ def _render_fluxo_mensal(df_ad, df_bx, cores, hoje):
 
     with col2:
         st.markdown("###### Ultimos 3 meses")
-        df_3m = df_ad[df_ad['EMISSAO'] >= hoje - timedelta(days=90)]
-        adiant_3m = df_3m['VALOR_ORIGINAL'].sum()
-
-        comp_3m = 0
-        if len(df_bx) > 0 and 'DT_BAIXA' in df_bx.columns and 'VALOR_BAIXA' in df_bx.columns:
-            df_bx_3m = df_bx[df_bx['DT_BAIXA'] >= hoje - timedelta(days=90)]
-            comp_3m = df_bx_3m['VALOR_BAIXA'].sum()
+        adiant_3m, comp_3m = compute_ultimos_90_dias(df_ad, df_bx, hoje.date())
 
         liquido_3m = adiant_3m - comp_3m
 
@@ -224,13 +415,7 @@ def _render_top_clientes(df_ad, col_cliente, cores):
         st.info("Coluna de cliente nao disponivel.")
         return
 
-    df_cli = df_ad.groupby(col_cliente).agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'EMISSAO': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
-    df_cli['Compensado'] = df_cli['Total'] - df_cli['Pendente']
+    df_cli = compute_por_cliente(df_ad, col_cliente)
 
     if len(df_cli) == 0:
         st.success("Nenhum adiantamento encontrado.")
@@ -308,27 +493,12 @@ def _render_por_filial(df_ad, cores):
     if 'NOME_FILIAL' not in df_ad.columns:
         return
 
-    multiplos_grupos = _detectar_multiplos_grupos(df_ad)
+    multiplos_grupos, df_top = compute_por_filial(df_ad)
 
     if multiplos_grupos:
         st.markdown("##### Por Grupo")
-        df_temp = df_ad.copy()
-        df_temp['_AGRUP'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x))
     else:
         st.markdown("##### Por Filial")
-        df_temp = df_ad.copy()
-        df_temp['_AGRUP'] = df_temp.apply(_get_label_filial, axis=1)
-
-    df_fil = df_temp.groupby('_AGRUP').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'EMISSAO': 'count'
-    }).reset_index()
-    df_fil.columns = ['Filial', 'Total', 'Pendente', 'Qtd']
-    df_fil['Compensado'] = df_fil['Total'] - df_fil['Pendente']
-    df_fil = df_fil.sort_values('Total', ascending=False)
-
-    df_top = df_fil.head(12).sort_values('Total', ascending=True)
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -367,33 +537,7 @@ def _render_prazos(df_bx, cores):
     with col1:
         st.markdown("###### Distribuicao por Faixa de Prazo")
 
-        df_temp = df_bx.copy()
-        df_temp['PRAZO'] = pd.to_numeric(df_temp['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
-
-        def faixa_prazo(d):
-            if pd.isna(d) or d < 0:
-                return 'N/A'
-            d = int(d)
-            if d <= 15:
-                return 'Ate 15d'
-            elif d <= 30:
-                return '16-30d'
-            elif d <= 60:
-                return '31-60d'
-            elif d <= 90:
-                return '61-90d'
-            elif d <= 180:
-                return '91-180d'
-            return '180+d'
-
-        df_temp['FAIXA'] = df_temp['PRAZO'].apply(faixa_prazo)
-        ordem = ['Ate 15d', '16-30d', '31-60d', '61-90d', '91-180d', '180+d']
-
-        df_faixa = df_temp.groupby('FAIXA').agg({
-            'VALOR_BAIXA': 'sum' if 'VALOR_BAIXA' in df_temp.columns else 'count',
-            'PRAZO': 'count'
-        }).reindex(ordem, fill_value=0).reset_index()
-        df_faixa.columns = ['Faixa', 'Valor', 'Qtd']
+        df_faixa = compute_prazos_faixa(df_bx)
 
         cores_faixas = [cores['sucesso'], cores['info'], '#22d3ee', cores['alerta'], '#f97316', cores['perigo']]
 
@@ -416,12 +560,7 @@ def _render_prazos(df_bx, cores):
         st.markdown("###### Evolucao do Prazo Medio")
 
         if 'DT_BAIXA' in df_bx.columns:
-            df_evol = df_bx.copy()
-            df_evol['MES'] = df_evol['DT_BAIXA'].dt.to_period('M').astype(str)
-            df_evol['PRAZO'] = pd.to_numeric(df_evol['DIF_DIAS_EMIS_BAIXA'], errors='coerce')
-
-            df_prazo_mes = df_evol.groupby('MES')['PRAZO'].mean().tail(12).reset_index()
-            df_prazo_mes.columns = ['MES', 'Prazo']
+            df_prazo_mes = compute_prazo_mensal(df_bx)
 
             if len(df_prazo_mes) > 1:
                 fig = go.Figure()
@@ -454,7 +593,7 @@ def _render_consulta_cliente(df_ad, df_bx, col_cliente, cores):
     if col_cliente is None or col_cliente not in df_ad.columns:
         return
 
-    clientes = sorted(df_ad[col_cliente].dropna().unique().tolist())
+    clientes = compute_clientes(df_ad, col_cliente)
     cliente_sel = st.selectbox(
         "Selecione um cliente",
         options=['Selecione...'] + clientes,
@@ -464,34 +603,23 @@ def _render_consulta_cliente(df_ad, df_bx, col_cliente, cores):
     if cliente_sel == 'Selecione...':
         return
 
-    df_sel = df_ad[df_ad[col_cliente] == cliente_sel]
-    df_bx_sel = df_bx[df_bx[col_cliente] == cliente_sel] if len(df_bx) > 0 and col_cliente in df_bx.columns else pd.DataFrame()
-
-    total_cli = df_sel['VALOR_ORIGINAL'].sum()
-    saldo_cli = df_sel['SALDO'].sum() if 'SALDO' in df_sel.columns else 0
-    pct_comp = ((total_cli - saldo_cli) / total_cli * 100) if total_cli > 0 else 0
-
-    prazo_cli = 0
-    if len(df_bx_sel) > 0 and 'DIF_DIAS_EMIS_BAIXA' in df_bx_sel.columns:
-        prazo_cli = pd.to_numeric(df_bx_sel['DIF_DIAS_EMIS_BAIXA'], errors='coerce').mean()
+    total_cli, saldo_cli, pct_comp, prazo_cli, qtd_cli, df_tab = compute_consulta_cliente(df_ad, df_bx, col_cliente, cliente_sel)
 
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Adiantado", formatar_moeda(total_cli), f"{len(df_sel)} titulos")
+    col1.metric("Total Adiantado", formatar_moeda(total_cli), f"{qtd_cli} titulos")
     col2.metric("Saldo Pendente", formatar_moeda(saldo_cli))
     col3.metric("% Compensado", f"{pct_comp:.1f}%")
     col4.metric("Prazo Medio", f"{prazo_cli:.0f}d" if prazo_cli > 0 else "-")
 
     # Tabela de titulos
-    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'EMISSAO', 'VALOR_ORIGINAL', 'SALDO']
-    colunas_disp = [c for c in colunas if c in df_sel.columns]
-    df_tab = df_sel[colunas_disp].sort_values('EMISSAO', ascending=False).head(30).copy()
-
     if 'EMISSAO' in df_tab.columns:
         df_tab['EMISSAO'] = pd.to_datetime(df_tab['EMISSAO'], errors='coerce').dt.strftime('%d/%m/%Y')
     if 'VALOR_ORIGINAL' in df_tab.columns:
         df_tab['VALOR_ORIGINAL'] = df_tab['VALOR_ORIGINAL'].apply(lambda x: formatar_moeda(x, completo=True))
     if 'SALDO' in df_tab.columns:
         df_tab['SALDO'] = df_tab['SALDO'].apply(lambda x: formatar_moeda(x, completo=True))
+    if 'DIAS_ATE_QUITAR' in df_tab.columns:
+        df_tab['DIAS_ATE_QUITAR'] = df_tab['DIAS_ATE_QUITAR'].apply(lambda x: f"{int(x)}d" if pd.notna(x) else '-')
 
     nomes = {
         'NOME_FILIAL': 'Filial',
@@ -499,7 +627,8 @@ def _render_consulta_cliente(df_ad, df_bx, col_cliente, cores):
         'NUMERO': 'Numero Doc',
         'EMISSAO': 'Emissao',
         'VALOR_ORIGINAL': 'Valor',
-        'SALDO': 'Pendente'
+        'SALDO': 'Pendente',
+        'DIAS_ATE_QUITAR': 'Quitado em'
     }
     df_tab.columns = [nomes.get(c, c) for c in df_tab.columns]
 
@@ -513,24 +642,6 @@ def _render_tabela_ranking(df_ad, df_bx, col_cliente, cores):
     if col_cliente is None or col_cliente not in df_ad.columns:
         return
 
-    df_cli = df_ad.groupby(col_cliente).agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'EMISSAO': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
-    df_cli['Compensado'] = df_cli['Total'] - df_cli['Pendente']
-    df_cli['Pct_Comp'] = (df_cli['Compensado'] / df_cli['Total'] * 100).fillna(0).round(1)
-
-    # Prazo medio
-    if len(df_bx) > 0 and col_cliente in df_bx.columns and 'DIF_DIAS_EMIS_BAIXA' in df_bx.columns:
-        prazo_cli = df_bx.groupby(col_cliente)['DIF_DIAS_EMIS_BAIXA'].apply(
-            lambda x: pd.to_numeric(x, errors='coerce').mean()
-        )
-        df_cli['Prazo_Medio'] = df_cli['Cliente'].map(prazo_cli).fillna(0)
-    else:
-        df_cli['Prazo_Medio'] = 0
-
     # Filtros
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -548,27 +659,10 @@ def _render_tabela_ranking(df_ad, df_bx, col_cliente, cores):
     with col3:
         busca = st.text_input("Buscar cliente", key="adto_rec_rank_busca")
 
-    df_exibir = df_cli.copy()
-
-    if filtro == "Com Pendencia":
-        df_exibir = df_exibir[df_exibir['Pendente'] > 0]
-    elif filtro == "Quitados":
-        df_exibir = df_exibir[df_exibir['Pendente'] <= 0]
-
-    if busca:
-        df_exibir = df_exibir[df_exibir['Cliente'].str.upper().str.contains(busca.upper(), na=False)]
-
-    sort_map = {
-        "Maior Pendente": ('Pendente', False),
-        "Maior Total": ('Total', False),
-        "Menor % Compensado": ('Pct_Comp', True),
-        "Maior Prazo": ('Prazo_Medio', False),
-    }
-    col_sort, asc = sort_map[ordenar]
-    df_exibir = df_exibir.sort_values(col_sort, ascending=asc).head(100)
+    df_exibir = compute_ranking_exibir(df_ad, df_bx, col_cliente, ordenar, filtro, busca)
 
     # Formatar
-    df_show = df_exibir.copy()
+    df_show = df_exibir.copy(deep=False)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Compensado'] = df_show['Compensado'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -587,4 +681,4 @@ def _render_tabela_ranking(df_ad, df_bx, col_cliente, cores):
             )
         }
     )
-    st.caption(f"Exibindo {len(df_show)} de {len(df_cli)} clientes")
+    st.caption(f"Exibindo {len(df_show)} de {len(compute_por_cliente(df_ad, col_cliente))} clientes")
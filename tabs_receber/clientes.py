@@ -12,6 +12,9 @@ from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
+from data.abc import classes_abc, curva_abc_recorte
+from data.periodo import SEM_DATA, chave_periodo, dias_entre, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def render_clientes(df):
@@ -85,44 +88,397 @@ def _detectar_multiplos_grupos_cli(df):
     grupos = df['FILIAL'].dropna().apply(lambda x: get_grupo_filial(int(x))).nunique()
     return grupos > 1
 
-def _calcular_classe_abc(df):
-    """Retorna dict {NOME_CLIENTE: 'A'/'B'/'C'}"""
-    df_abc = df.groupby('NOME_CLIENTE')['VALOR_ORIGINAL'].sum().sort_values(ascending=False)
-    total = df_abc.sum()
-    if total == 0:
-        return {}
-    pct_acum = (df_abc / total * 100).cumsum()
-    classes = {}
-    for cli, pct in pct_acum.items():
-        if pct <= 80:
-            classes[cli] = 'A'
-        elif pct <= 95:
-            classes[cli] = 'B'
-        else:
-            classes[cli] = 'C'
-    return classes
+@memoizar_secao
+def compute_resumo_clientes(df):
+    """Total, pendente e quantidade de titulos por cliente"""
+    df_cli = df.groupby('NOME_CLIENTE', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'CLIENTE': 'count'
+    }).reset_index()
+    df_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
+    return df_cli
 
 
-# =============================================
-# SECOES
-# =============================================
+def compute_curva_abc(df):
+    """Clientes por valor decrescente com PCT, PCT_ACUM, RANK e CLASSE (vazio se o total e zero)"""
+    return curva_abc_recorte(df, 'NOME_CLIENTE', extras=('SALDO',))
+
+
+def compute_classe_abc(df):
+    """Series {NOME_CLIENTE: 'A'/'B'/'C'}"""
+    return classes_abc(df, 'NOME_CLIENTE')
 
-def _render_kpis(df, cores):
-    """KPIs principais - foco em valores recebidos/pendentes"""
 
-    total_clientes = df['NOME_CLIENTE'].nunique()
+@memoizar_secao
+def compute_kpis(df):
+    """Totais, % recebido, concentracao top 10 e ticket medio"""
     total_valor = df['VALOR_ORIGINAL'].sum()
     total_pendente = df['SALDO'].sum()
     total_recebido = total_valor - total_pendente
 
-    pct_recebido = (total_recebido / total_valor * 100) if total_valor > 0 else 0
-
     # Concentracao top 10
-    df_top10 = df.groupby('NOME_CLIENTE')['VALOR_ORIGINAL'].sum().nlargest(10)
-    pct_top10 = (df_top10.sum() / total_valor * 100) if total_valor > 0 else 0
+    df_top10 = df.groupby('NOME_CLIENTE', observed=True)['VALOR_ORIGINAL'].sum().nlargest(10)
+
+    return {
+        'total_clientes': df['NOME_CLIENTE'].nunique(),
+        'qtd_titulos': len(df),
+        'total_valor': total_valor,
+        'total_pendente': total_pendente,
+        'total_recebido': total_recebido,
+        'pct_recebido': (total_recebido / total_valor * 100) if total_valor > 0 else 0,
+        'pct_top10': (df_top10.sum() / total_valor * 100) if total_valor > 0 else 0,
+        'ticket_medio': total_valor / len(df) if len(df) > 0 else 0,
+    }
+
+
+@memoizar_secao
+def compute_top_clientes(df, n=15):
+    """Top n clientes por valor total, com recebido e pendente"""
+    df_cli = compute_resumo_clientes(df)
+    df_cli['Recebido'] = df_cli['Total'] - df_cli['Pendente']
+    return df_cli.nlargest(n, 'Total').sort_values('Total', ascending=True)
+
+
+@memoizar_secao
+def compute_ticket_medio(df):
+    """(ticket medio geral, clientes, top 15 por ticket medio com 2+ titulos)"""
+    df_cli = compute_resumo_clientes(df)[['Cliente', 'Total', 'Qtd']]
+    df_cli['Ticket'] = df_cli['Total'] / df_cli['Qtd']
+    ticket_geral = df['VALOR_ORIGINAL'].sum() / len(df)
+    return ticket_geral, len(df_cli), df_cli[df_cli['Qtd'] >= 2].nlargest(15, 'Ticket')
+
+
+@memoizar_secao
+def compute_base_prazos(df):
+    """Titulos com o prazo concedido (emissao ate vencimento)"""
+    return df.assign(PRAZO_CONCEDIDO=dias_entre(df, 'VENCIMENTO', 'EMISSAO'))
+
+
+@memoizar_secao
+def compute_kpis_prazos(df_prazos):
+    """Prazo medio concedido e real, % recebidos no prazo e quantidade de recebidos"""
+    # Calcular prazo real (emissao ate recebimento) - apenas para recebidos
+    df_recebidos = df_prazos[df_prazos['SALDO'] == 0]
+    if 'DT_BAIXA' in df_recebidos.columns:
+        df_recebidos['PRAZO_REAL'] = dias_entre(df_recebidos, 'DT_BAIXA', 'EMISSAO')
+    else:
+        df_recebidos['PRAZO_REAL'] = None
+
+    # % recebidos no prazo
+    if 'PRAZO_REAL' in df_recebidos.columns and len(df_recebidos) > 0:
+        df_rec_valid = df_recebidos[df_recebidos['PRAZO_REAL'].notna() & df_recebidos['PRAZO_CONCEDIDO'].notna()]
+        if len(df_rec_valid) > 0:
+            pct_no_prazo = (df_rec_valid['PRAZO_REAL'] <= df_rec_valid['PRAZO_CONCEDIDO']).mean() * 100
+        else:
+            pct_no_prazo = 0
+    else:
+        pct_no_prazo = 0
+
+    return {
+        'prazo_medio_concedido': df_prazos['PRAZO_CONCEDIDO'].mean(),
+        'prazo_medio_real': df_recebidos['PRAZO_REAL'].mean() if 'PRAZO_REAL' in df_recebidos.columns and len(df_recebidos) > 0 else 0,
+        'pct_no_prazo': pct_no_prazo,
+        'qtd_recebidos': len(df_recebidos),
+    }
+
+
+def _prazo_por_cliente(df_prazos):
+    """Prazo concedido medio, valor e quantidade por cliente (3+ titulos)"""
+    df_cli_prazo = df_prazos.groupby('NOME_CLIENTE', observed=True).agg({
+        'PRAZO_CONCEDIDO': 'mean',
+        'VALOR_ORIGINAL': 'sum',
+        'CLIENTE': 'count'
+    }).reset_index()
+    df_cli_prazo.columns = ['Cliente', 'Prazo', 'Valor', 'Qtd']
+    return df_cli_prazo[df_cli_prazo['Qtd'] >= 3]
 
-    # Ticket medio
-    ticket_medio = total_valor / len(df) if len(df) > 0 else 0
+
+@memoizar_secao
+def compute_mais_prazo(df_prazos):
+    """Top 10 clientes com maior prazo concedido"""
+    return _prazo_por_cliente(df_prazos).nlargest(10, 'Prazo').sort_values('Prazo', ascending=True)
+
+
+@memoizar_secao
+def compute_menos_prazo(df_prazos):
+    """Top 10 clientes com menor prazo concedido (ignorando titulos com prazo <= 2 dias)"""
+    df_prazos_pos = df_prazos[df_prazos['PRAZO_CONCEDIDO'] > 2]
+    return _prazo_por_cliente(df_prazos_pos).nsmallest(10, 'Prazo').sort_values('Prazo', ascending=True)
+
+
+@memoizar_secao
+def compute_vencimentos_no_dia(df_prazos):
+    """Titulos com prazo concedido = 0: totais, top 10 e detalhe por cliente (None se nao ha)"""
+    df_no_dia = df_prazos[df_prazos['PRAZO_CONCEDIDO'] == 0]
+    if len(df_no_dia) == 0:
+        return None
+
+    total_no_dia = df_no_dia['VALOR_ORIGINAL'].sum()
+    total_geral = df_prazos['VALOR_ORIGINAL'].sum()
+    resumo = {
+        'total_no_dia': total_no_dia,
+        'qtd_no_dia': len(df_no_dia),
+        'pct_no_dia': (total_no_dia / total_geral * 100) if total_geral > 0 else 0,
+    }
+
+    # Top 10 clientes com mais valor no dia
+    df_no_dia_cli = df_no_dia.groupby('NOME_CLIENTE', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'CLIENTE': 'count'
+    }).reset_index()
+    df_no_dia_cli.columns = ['Cliente', 'Valor', 'Qtd']
+    df_no_dia_top = df_no_dia_cli.nlargest(10, 'Valor').sort_values('Valor', ascending=True)
+
+    # Detalhe por cliente
+    df_detalhe_grp = df_no_dia.groupby('NOME_CLIENTE', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'CLIENTE': 'count'
+    }).reset_index()
+    df_detalhe_grp.columns = ['Cliente', 'Valor Total', 'Pendente', 'Qtd']
+    df_detalhe_grp['Recebido'] = (df_detalhe_grp['Valor Total'] - df_detalhe_grp['Pendente']).clip(lower=0)
+    df_detalhe = df_detalhe_grp.sort_values('Valor Total', ascending=False).head(50)
+
+    return resumo, df_no_dia_top, df_detalhe
+
+
+@memoizar_secao
+def compute_resumo_curva_abc(df):
+    """Quantidade e valor por classe ABC e concentracao dos top 1/5/10/20"""
+    df_abc = compute_curva_abc(df)
+    total = df_abc['VALOR_ORIGINAL'].sum()
+    return {
+        'total': total,
+        'qtd_clientes': len(df_abc),
+        'classes': {
+            classe: (len(df_abc[df_abc['CLASSE'] == classe]), df_abc[df_abc['CLASSE'] == classe]['VALOR_ORIGINAL'].sum())
+            for classe in ('A', 'B', 'C')
+        },
+        'concentracao': {
+            n: df_abc.head(n)['VALOR_ORIGINAL'].sum() / total * 100
+            for n in [1, 5, 10, 20] if n <= len(df_abc)
+        },
+    }
+
+
+@memoizar_secao
+def compute_classe_detalhe(df, letra):
+    """Clientes de uma classe ABC com emitido, recebido, pendente e percentuais"""
+    df_abc = compute_curva_abc(df)
+    df_classe = df_abc[df_abc['CLASSE'] == letra]
+
+    df_classe['RECEBIDO'] = (df_classe['VALOR_ORIGINAL'] - df_classe['SALDO']).clip(lower=0)
+
+    df_classe = df_classe.sort_values('VALOR_ORIGINAL', ascending=False)
+    return df_classe[['NOME_CLIENTE', 'VALOR_ORIGINAL', 'RECEBIDO', 'SALDO', 'PCT', 'PCT_ACUM']]
+
+
+def _rotulo_unidade(df, multiplos):
+    """Rotulo da unidade de cada titulo: nome do grupo ou 'codigo - filial'"""
+    if multiplos:
+        return df['FILIAL'].apply(lambda x: _get_nome_grupo_cli(x))
+    return df['FILIAL'].astype(int).astype(str) + ' - ' + df['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
+
+
+@memoizar_secao
+def compute_clientes_por_filial(df):
+    """(multiplos grupos, clientes distintos/valor/pendente/recebido por unidade); None sem filial"""
+    multiplos = _detectar_multiplos_grupos_cli(df)
+
+    if 'FILIAL' not in df.columns or 'NOME_FILIAL' not in df.columns:
+        return None
+
+    # Agrupar por unidade
+    df_grp = df.assign(LABEL=_rotulo_unidade(df, multiplos)).groupby('LABEL', observed=True).agg(
+        Clientes=('NOME_CLIENTE', 'nunique'),
+        Valor=('VALOR_ORIGINAL', 'sum'),
+        Pendente=('SALDO', 'sum'),
+        Titulos=('CLIENTE', 'count')
+    ).reset_index()
+    df_grp['Recebido'] = df_grp['Valor'] - df_grp['Pendente']
+    return multiplos, df_grp
+
+
+@memoizar_secao
+def compute_matriz_filial_cliente(df):
+    """(multiplos grupos, top 10 clientes, pivot unidade x cliente); None sem dados"""
+    multiplos = _detectar_multiplos_grupos_cli(df)
+
+    # Top 10 clientes
+    top10_cli = df.groupby('NOME_CLIENTE', observed=True)['VALOR_ORIGINAL'].sum().nlargest(10).index.tolist()
+
+    if len(top10_cli) == 0 or 'NOME_FILIAL' not in df.columns:
+        return None
+
+    # Filtrar e criar pivot
+    df_matriz = df[df['NOME_CLIENTE'].isin(top10_cli)]
+    indice = 'GRUPO' if multiplos else 'FILIAL_LABEL'
+    pivot = df_matriz.assign(**{indice: _rotulo_unidade(df_matriz, multiplos)}).pivot_table(
+        values='VALOR_ORIGINAL',
+        index=indice,
+        columns='NOME_CLIENTE',
+        aggfunc='sum',
+        fill_value=0, observed=True
+    )
+    return multiplos, tuple(top10_cli), pivot
+
+
+@memoizar_secao
+def compute_por_categoria(df):
+    """Top 12 categorias por valor com recebido, pendente a vencer, vencido e clientes; None sem categoria"""
+    if 'DESCRICAO' not in df.columns:
+        return None
+
+    # Agrupar por categoria
+    df_cat = df.groupby('DESCRICAO', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NOME_CLIENTE': 'nunique'
+    }).reset_index()
+    df_cat.columns = ['Categoria', 'Total', 'Pendente', 'Clientes']
+    df_cat['Recebido'] = df_cat['Total'] - df_cat['Pendente']
+
+    # Vencido por categoria
+    if 'STATUS' in df.columns:
+        df_vencido_cat = df[df['STATUS'] == 'Vencido'].groupby('DESCRICAO', observed=True)['SALDO'].sum().reset_index()
+        df_vencido_cat.columns = ['Categoria', 'Vencido']
+        df_cat = df_cat.merge(df_vencido_cat, on='Categoria', how='left')
+        df_cat['Vencido'] = df_cat['Vencido'].fillna(0)
+    else:
+        df_cat['Vencido'] = 0
+    df_cat['A_Vencer'] = (df_cat['Pendente'] - df_cat['Vencido']).clip(lower=0)
+
+    # Top 12
+    df_top = df_cat.nlargest(12, 'Total')
+    return df_top.sort_values('Total', ascending=True)
+
+
+@memoizar_secao
+def compute_clientes_categoria(df, categoria):
+    """Total, pendente e quantidade por cliente de uma categoria"""
+    df_cat = recorte(df, ('categoria', categoria), lambda d: d['DESCRICAO'] == categoria)
+    df_cat_cli = df_cat.groupby('NOME_CLIENTE', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'CLIENTE': 'count'
+    }).reset_index()
+    df_cat_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
+    return df_cat_cli.sort_values('Total', ascending=False)
+
+
+@memoizar_secao
+def compute_clientes(df):
+    """Nomes dos clientes para consulta, em ordem alfabetica"""
+    return sorted([str(x) for x in df['NOME_CLIENTE'].unique().tolist()])
+
+
+@memoizar_secao
+def compute_consulta_cliente(df_cli):
+    """Totais, ticket, prazo concedido medio, atraso medio e filiais de um cliente"""
+    total_valor = df_cli['VALOR_ORIGINAL'].sum()
+    total_pendente = df_cli['SALDO'].sum()
+    total_recebido = total_valor - total_pendente
+    qtd_titulos = len(df_cli)
+
+    # Atraso medio (dos recebidos)
+    atraso_medio = 0
+    df_rec_cli = df_cli[df_cli['SALDO'] == 0]
+    if 'DT_BAIXA' in df_rec_cli.columns and len(df_rec_cli) > 0:
+        df_rec_cli['ATRASO'] = dias_entre(df_rec_cli, 'DT_BAIXA', 'VENCIMENTO')
+        atraso_vals = df_rec_cli[df_rec_cli['ATRASO'] > 0]['ATRASO']
+        atraso_medio = atraso_vals.mean() if len(atraso_vals) > 0 else 0
+
+    return {
+        'total_valor': total_valor,
+        'total_pendente': total_pendente,
+        'total_recebido': total_recebido,
+        'qtd_titulos': qtd_titulos,
+        'pct_recebido': (total_recebido / total_valor * 100) if total_valor > 0 else 0,
+        'ticket_medio': total_valor / qtd_titulos if qtd_titulos > 0 else 0,
+        # Prazo medio concedido
+        'prazo_medio': dias_entre(df_cli, 'VENCIMENTO', 'EMISSAO').mean(),
+        'atraso_medio': atraso_medio,
+        # Filiais que vendem para este cliente
+        'filiais': df_cli['NOME_FILIAL'].unique().tolist() if 'NOME_FILIAL' in df_cli.columns else [],
+    }
+
+
+@memoizar_secao
+def compute_evolucao_cliente(df_cli):
+    """Emitido, pendente e recebido por mes de emissao de um cliente"""
+    mes = chave_periodo(df_cli, 'EMISSAO', 'AAAAMM')
+    df_hist_grp = df_cli.assign(MES=mes)[mes != SEM_DATA].groupby('MES', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum'
+    }).reset_index()
+    df_hist_grp['MES'] = rotulo_mes(df_hist_grp['MES'])
+    df_hist_grp['RECEBIDO'] = df_hist_grp['VALOR_ORIGINAL'] - df_hist_grp['SALDO']
+    return df_hist_grp
+
+
+@memoizar_secao
+def compute_titulos_cliente(df_cli):
+    """Titulos do cliente (so as colunas exibidas)"""
+    colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO']
+    return df_cli[[c for c in colunas if c in df_cli.columns]]
+
+
+@memoizar_secao
+def compute_ranking(df, ordenar, qtd_exibir, filtro):
+    """Clientes com recebido, % recebido, vencido e classe ABC, filtrados, ordenados e limitados"""
+    df_rank = compute_resumo_clientes(df)
+    df_rank.columns = ['Cliente', 'Total', 'Pendente', 'Titulos']
+    df_rank['Recebido'] = df_rank['Total'] - df_rank['Pendente']
+    df_rank['% Recebido'] = ((df_rank['Recebido']) / df_rank['Total'] * 100).round(1)
+
+    # Vencido por cliente
+    if 'STATUS' in df.columns:
+        df_venc = df[df['STATUS'] == 'Vencido'].groupby('NOME_CLIENTE', observed=True)['SALDO'].sum().reset_index()
+        df_venc.columns = ['Cliente', 'Vencido']
+        df_rank = df_rank.merge(df_venc, on='Cliente', how='left')
+        df_rank['Vencido'] = df_rank['Vencido'].fillna(0)
+    else:
+        df_rank['Vencido'] = 0
+
+    # Classe ABC
+    classes = compute_classe_abc(df)
+    df_rank['Classe'] = df_rank['Cliente'].map(classes).fillna('C')
+
+    # Filtrar
+    if filtro == "Com Pendencia":
+        df_rank = df_rank[df_rank['Pendente'] > 0]
+    elif filtro == "Quitados":
+        df_rank = df_rank[df_rank['Pendente'] <= 0]
+
+    # Ordenar
+    if ordenar == "Valor Total":
+        df_rank = df_rank.sort_values('Total', ascending=False)
+    elif ordenar == "Valor Recebido":
+        df_rank = df_rank.sort_values('Recebido', ascending=False)
+    elif ordenar == "Vencido":
+        df_rank = df_rank.sort_values('Vencido', ascending=False)
+    else:
+        df_rank = df_rank.sort_values('Pendente', ascending=False)
+
+    return df_rank.head(qtd_exibir)
+
+
+# =============================================
+# SECOES
+# =============================================
+
+def _render_kpis(df, cores):
+    """KPIs principais - foco em valores recebidos/pendentes"""
+
+    kpis = compute_kpis(df)
+    total_clientes = kpis['total_clientes']
+    total_valor = kpis['total_valor']
+    total_pendente = kpis['total_pendente']
+    total_recebido = kpis['total_recebido']
+    pct_recebido = kpis['pct_recebido']
+    pct_top10 = kpis['pct_top10']
+    ticket_medio = kpis['ticket_medio']
 
     col1, col2, col3, col4, col5, col6 = st.columns(6)
 
@@ -130,7 +486,7 @@ def _render_kpis(df, cores):
         st.metric(
             label="Clientes",
             value=formatar_numero(total_clientes),
-            delta=f"{formatar_numero(len(df))} titulos",
+            delta=f"{formatar_numero(kpis['qtd_titulos'])} titulos",
             delta_color="off"
         )
 
@@ -174,18 +530,8 @@ def _render_top_clientes(df, cores):
 
     st.markdown("##### Top 15 Clientes - Valor Total")
 
-    # Agrupar por cliente
-    df_cli = df.groupby('NOME_CLIENTE').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'CLIENTE': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
-    df_cli['Recebido'] = df_cli['Total'] - df_cli['Pendente']
-
     # Top 15
-    df_top = df_cli.nlargest(15, 'Total')
-    df_top = df_top.sort_values('Total', ascending=True)
+    df_top = compute_top_clientes(df)
 
     fig = go.Figure()
 
@@ -242,16 +588,8 @@ def _render_ticket_medio(df, cores):
         st.info("Dados insuficientes")
         return
 
-    df_cli = df.groupby('NOME_CLIENTE').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'CLIENTE': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Total', 'Qtd']
-    df_cli['Ticket'] = df_cli['Total'] / df_cli['Qtd']
-
-    # Metricas gerais
-    ticket_geral = df['VALOR_ORIGINAL'].sum() / len(df)
-    total_clientes = len(df_cli)
+    # Metricas gerais e top 15 por ticket medio (min 2 titulos)
+    ticket_geral, total_clientes, df_top = compute_ticket_medio(df)
     total_titulos = len(df)
 
     col1, col2, col3 = st.columns(3)
@@ -259,9 +597,6 @@ def _render_ticket_medio(df, cores):
     col2.metric("Clientes", formatar_numero(total_clientes))
     col3.metric("Titulos", formatar_numero(total_titulos))
 
-    # Top 15 por ticket medio (min 2 titulos)
-    df_top = df_cli[df_cli['Qtd'] >= 2].nlargest(15, 'Ticket')
-
     if len(df_top) == 0:
         return
 
@@ -292,19 +627,12 @@ def _render_prazos_recebimento(df, cores):
     st.markdown("##### Prazos de Recebimento")
 
     # Calcular prazo concedido (emissao ate vencimento)
-    df_prazos = df.copy()
-    df_prazos['PRAZO_CONCEDIDO'] = (df_prazos['VENCIMENTO'] - df_prazos['EMISSAO']).dt.days
-
-    # Calcular prazo real (emissao ate recebimento) - apenas para recebidos
-    df_recebidos = df_prazos[df_prazos['SALDO'] == 0].copy()
-    if 'DT_BAIXA' in df_recebidos.columns:
-        df_recebidos['PRAZO_REAL'] = (df_recebidos['DT_BAIXA'] - df_recebidos['EMISSAO']).dt.days
-    else:
-        df_recebidos['PRAZO_REAL'] = None
+    df_prazos = compute_base_prazos(df)
 
     # KPIs de prazo
-    prazo_medio_concedido = df_prazos['PRAZO_CONCEDIDO'].mean()
-    prazo_medio_real = df_recebidos['PRAZO_REAL'].mean() if 'PRAZO_REAL' in df_recebidos.columns and len(df_recebidos) > 0 else 0
+    kpis = compute_kpis_prazos(df_prazos)
+    prazo_medio_concedido = kpis['prazo_medio_concedido']
+    prazo_medio_real = kpis['prazo_medio_real']
 
     col1, col2, col3, col4 = st.columns(4)
 
@@ -336,18 +664,11 @@ def _render_prazos_recebimento(df, cores):
 
     with col4:
         # % recebidos no prazo
-        if 'PRAZO_REAL' in df_recebidos.columns and len(df_recebidos) > 0:
-            df_rec_valid = df_recebidos[df_recebidos['PRAZO_REAL'].notna() & df_recebidos['PRAZO_CONCEDIDO'].notna()]
-            if len(df_rec_valid) > 0:
-                pct_no_prazo = (df_rec_valid['PRAZO_REAL'] <= df_rec_valid['PRAZO_CONCEDIDO']).mean() * 100
-            else:
-                pct_no_prazo = 0
-        else:
-            pct_no_prazo = 0
+        pct_no_prazo = kpis['pct_no_prazo']
         st.metric(
             label="Recebidos no Prazo",
             value=f"{pct_no_prazo:.0f}%",
-            delta=f"{len(df_recebidos)} titulos recebidos",
+            delta=f"{kpis['qtd_recebidos']} titulos recebidos",
             delta_color="off"
         )
 
@@ -357,20 +678,8 @@ def _render_prazos_recebimento(df, cores):
     with col1:
         st.markdown("###### Clientes com maior prazo concedido")
 
-        # Agrupar por cliente - prazo concedido
-        df_cli_prazo = df_prazos.groupby('NOME_CLIENTE').agg({
-            'PRAZO_CONCEDIDO': 'mean',
-            'VALOR_ORIGINAL': 'sum',
-            'CLIENTE': 'count'
-        }).reset_index()
-        df_cli_prazo.columns = ['Cliente', 'Prazo', 'Valor', 'Qtd']
-
-        # Filtrar clientes com pelo menos 3 titulos
-        df_cli_prazo = df_cli_prazo[df_cli_prazo['Qtd'] >= 3]
-
-        # Top 10 mais prazo
-        df_mais_prazo = df_cli_prazo.nlargest(10, 'Prazo')
-        df_mais_prazo = df_mais_prazo.sort_values('Prazo', ascending=True)
+        # Top 10 mais prazo (clientes com pelo menos 3 titulos)
+        df_mais_prazo = compute_mais_prazo(df_prazos)
 
         if len(df_mais_prazo) > 0:
             fig = go.Figure()
@@ -400,17 +709,7 @@ def _render_prazos_recebimento(df, cores):
         st.markdown("###### Clientes com menor prazo concedido")
 
         # Recalcular excluindo titulos com prazo <= 2 dias
-        df_prazos_pos = df_prazos[df_prazos['PRAZO_CONCEDIDO'] > 2]
-        df_cli_prazo_pos = df_prazos_pos.groupby('NOME_CLIENTE').agg({
-            'PRAZO_CONCEDIDO': 'mean',
-            'VALOR_ORIGINAL': 'sum',
-            'CLIENTE': 'count'
-        }).reset_index()
-        df_cli_prazo_pos.columns = ['Cliente', 'Prazo', 'Valor', 'Qtd']
-        df_cli_prazo_pos = df_cli_prazo_pos[df_cli_prazo_pos['Qtd'] >= 3]
-
-        df_menos_prazo = df_cli_prazo_pos.nsmallest(10, 'Prazo')
-        df_menos_prazo = df_menos_prazo.sort_values('Prazo', ascending=True)
+        df_menos_prazo = compute_menos_prazo(df_prazos)
 
         if len(df_menos_prazo) > 0:
             fig = go.Figure()
@@ -437,27 +736,16 @@ def _render_prazos_recebimento(df, cores):
             st.info("Dados insuficientes")
 
     # Vencimentos no dia da emissao (prazo = 0)
-    df_no_dia = df_prazos[df_prazos['PRAZO_CONCEDIDO'] == 0]
+    no_dia = compute_vencimentos_no_dia(df_prazos)
 
-    if len(df_no_dia) > 0:
+    if no_dia is not None:
+        resumo_no_dia, df_no_dia_top, df_detalhe = no_dia
         st.markdown("###### Vencimentos no Dia da Emissao (prazo = 0 dias)")
 
-        total_no_dia = df_no_dia['VALOR_ORIGINAL'].sum()
-        total_geral = df_prazos['VALOR_ORIGINAL'].sum()
-        pct_no_dia = (total_no_dia / total_geral * 100) if total_geral > 0 else 0
-
         col1, col2, col3 = st.columns(3)
-        col1.metric("Valor Total no Dia", formatar_moeda(total_no_dia))
-        col2.metric("Titulos no Dia", formatar_numero(len(df_no_dia)))
-        col3.metric("% do Total Emitido", f"{pct_no_dia:.1f}%")
-
-        # Top 10 clientes com mais valor no dia
-        df_no_dia_cli = df_no_dia.groupby('NOME_CLIENTE').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'CLIENTE': 'count'
-        }).reset_index()
-        df_no_dia_cli.columns = ['Cliente', 'Valor', 'Qtd']
-        df_no_dia_top = df_no_dia_cli.nlargest(10, 'Valor').sort_values('Valor', ascending=True)
+        col1.metric("Valor Total no Dia", formatar_moeda(resumo_no_dia['total_no_dia']))
+        col2.metric("Titulos no Dia", formatar_numero(resumo_no_dia['qtd_no_dia']))
+        col3.metric("% do Total Emitido", f"{resumo_no_dia['pct_no_dia']:.1f}%")
 
         fig = go.Figure()
 
@@ -482,19 +770,10 @@ def _render_prazos_recebimento(df, cores):
         st.caption("Titulos emitidos com vencimento no mesmo dia da emissao (prazo concedido = 0 dias).")
 
     # Tabela comparativa - apenas titulos com prazo = 0
-    if len(df_no_dia) > 0:
+    if no_dia is not None:
         with st.expander("Ver detalhes por cliente"):
-            df_detalhe_grp = df_no_dia.groupby('NOME_CLIENTE').agg({
-                'VALOR_ORIGINAL': 'sum',
-                'SALDO': 'sum',
-                'CLIENTE': 'count'
-            }).reset_index()
-
-            df_detalhe_grp.columns = ['Cliente', 'Valor Total', 'Pendente', 'Qtd']
-            df_detalhe_grp['Recebido'] = (df_detalhe_grp['Valor Total'] - df_detalhe_grp['Pendente']).clip(lower=0)
-
             # Formatar
-            df_show = df_detalhe_grp.sort_values('Valor Total', ascending=False).head(50).copy()
+            df_show = df_detalhe
             df_show['Valor Total'] = df_show['Valor Total'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Recebido'] = df_show['Recebido'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -512,27 +791,17 @@ def _render_curva_abc(df, cores):
 
     st.markdown("##### Curva ABC e Concentracao")
 
-    df_abc = df.groupby('NOME_CLIENTE')['VALOR_ORIGINAL'].sum().sort_values(ascending=False).reset_index()
-    total = df_abc['VALOR_ORIGINAL'].sum()
-    if total == 0:
+    resumo = compute_resumo_curva_abc(df)
+    qtd_clientes = resumo['qtd_clientes']
+    if qtd_clientes == 0:
         st.info("Sem dados")
         return
-
-    df_abc['PCT'] = df_abc['VALOR_ORIGINAL'] / total * 100
-    df_abc['PCT_ACUM'] = df_abc['PCT'].cumsum()
-    df_abc['RANK'] = range(1, len(df_abc) + 1)
-
-    df_abc['CLASSE'] = df_abc['PCT_ACUM'].apply(
-        lambda x: 'A' if x <= 80 else ('B' if x <= 95 else 'C')
-    )
+    total = resumo['total']
 
     # Estatisticas por classe
-    qtd_a = len(df_abc[df_abc['CLASSE'] == 'A'])
-    qtd_b = len(df_abc[df_abc['CLASSE'] == 'B'])
-    qtd_c = len(df_abc[df_abc['CLASSE'] == 'C'])
-    val_a = df_abc[df_abc['CLASSE'] == 'A']['VALOR_ORIGINAL'].sum()
-    val_b = df_abc[df_abc['CLASSE'] == 'B']['VALOR_ORIGINAL'].sum()
-    val_c = df_abc[df_abc['CLASSE'] == 'C']['VALOR_ORIGINAL'].sum()
+    qtd_a, val_a = resumo['classes']['A']
+    qtd_b, val_b = resumo['classes']['B']
+    qtd_c, val_c = resumo['classes']['C']
 
     # Cards por classe + Concentracao
     col_a, col_b, col_c, col_conc = st.columns(4)
@@ -542,7 +811,7 @@ def _render_curva_abc(df, cores):
         (col_b, 'B', qtd_b, val_b, cores['alerta']),
         (col_c, 'C', qtd_c, val_c, cores['texto_secundario'])
     ]:
-        pct_cli = qtd / len(df_abc) * 100 if len(df_abc) > 0 else 0
+        pct_cli = qtd / qtd_clientes * 100 if qtd_clientes > 0 else 0
         pct_val = val / total * 100
 
         with col:
@@ -560,11 +829,8 @@ def _render_curva_abc(df, cores):
 
     with col_conc:
         conc_lines = ""
-        for n in [1, 5, 10, 20]:
-            if n <= len(df_abc):
-                val_top = df_abc.head(n)['VALOR_ORIGINAL'].sum()
-                pct = val_top / total * 100
-                conc_lines += f"<p style='color: {cores['texto_secundario']}; font-size: 0.75rem; margin: 0.1rem 0;'>Top {n}: <b>{pct:.1f}%</b></p>"
+        for n, pct in resumo['concentracao'].items():
+            conc_lines += f"<p style='color: {cores['texto_secundario']}; font-size: 0.75rem; margin: 0.1rem 0;'>Top {n}: <b>{pct:.1f}%</b></p>"
 
         st.markdown(f"""
         <div style="background: {cores['card']}; border-left: 4px solid {cores['sucesso']};
@@ -584,15 +850,7 @@ def _render_curva_abc(df, cores):
 
     if classe_sel != 'Selecione...':
         letra = classe_sel[-1]  # A, B ou C
-        df_classe = df_abc[df_abc['CLASSE'] == letra].copy()
-
-        # Buscar pendente (SALDO) por cliente
-        df_saldo = df.groupby('NOME_CLIENTE')['SALDO'].sum().reset_index()
-        df_classe = df_classe.merge(df_saldo, on='NOME_CLIENTE', how='left')
-        df_classe['RECEBIDO'] = (df_classe['VALOR_ORIGINAL'] - df_classe['SALDO']).clip(lower=0)
-
-        df_classe = df_classe.sort_values('VALOR_ORIGINAL', ascending=False)
-        df_show = df_classe[['NOME_CLIENTE', 'VALOR_ORIGINAL', 'RECEBIDO', 'SALDO', 'PCT', 'PCT_ACUM']].copy()
+        df_show = compute_classe_detalhe(df, letra)
         df_show.columns = ['Cliente', 'Valor Emitido', 'Recebido', 'Pendente', '% do Total', '% Acumulado']
 
         df_show['Valor Emitido'] = df_show['Valor Emitido'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -607,28 +865,12 @@ def _render_curva_abc(df, cores):
 def _render_clientes_por_filial(df, cores):
     """Clientes por filial/grupo - quantidade e valor"""
 
-    multiplos = _detectar_multiplos_grupos_cli(df)
-
-    if 'FILIAL' not in df.columns or 'NOME_FILIAL' not in df.columns:
+    por_filial = compute_clientes_por_filial(df)
+    if por_filial is None:
         return
+    multiplos, df_grp = por_filial
 
-    if multiplos:
-        st.markdown("##### Clientes por Grupo")
-        df_aux = df.copy()
-        df_aux['LABEL'] = df_aux['FILIAL'].apply(lambda x: _get_nome_grupo_cli(x))
-    else:
-        st.markdown("##### Clientes por Filial")
-        df_aux = df.copy()
-        df_aux['LABEL'] = df_aux['FILIAL'].astype(int).astype(str) + ' - ' + df_aux['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-
-    # Agrupar por unidade
-    df_grp = df_aux.groupby('LABEL').agg(
-        Clientes=('NOME_CLIENTE', 'nunique'),
-        Valor=('VALOR_ORIGINAL', 'sum'),
-        Pendente=('SALDO', 'sum'),
-        Titulos=('CLIENTE', 'count')
-    ).reset_index()
-    df_grp['Recebido'] = df_grp['Valor'] - df_grp['Pendente']
+    st.markdown("##### Clientes por Grupo" if multiplos else "##### Clientes por Filial")
 
     col1, col2 = st.columns(2)
 
@@ -706,38 +948,14 @@ def _render_clientes_por_filial(df, cores):
 def _render_matriz_filial_cliente(df, cores):
     """Matriz de relacionamento Filial x Cliente"""
 
-    multiplos = _detectar_multiplos_grupos_cli(df)
+    matriz = compute_matriz_filial_cliente(df)
 
-    # Top 10 clientes
-    top10_cli = df.groupby('NOME_CLIENTE')['VALOR_ORIGINAL'].sum().nlargest(10).index.tolist()
-
-    if len(top10_cli) == 0 or 'NOME_FILIAL' not in df.columns:
+    if matriz is None:
         st.info("Dados insuficientes")
         return
+    multiplos, top10_cli, pivot = matriz
 
-    # Filtrar e criar pivot
-    df_matriz = df[df['NOME_CLIENTE'].isin(top10_cli)].copy()
-
-    if multiplos:
-        st.markdown("##### Matriz Grupo x Cliente")
-        df_matriz['GRUPO'] = df_matriz['FILIAL'].apply(lambda x: _get_nome_grupo_cli(x))
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='GRUPO',
-            columns='NOME_CLIENTE',
-            aggfunc='sum',
-            fill_value=0
-        )
-    else:
-        st.markdown("##### Matriz Filial x Cliente")
-        df_matriz['FILIAL_LABEL'] = df_matriz['FILIAL'].astype(int).astype(str) + ' - ' + df_matriz['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-        pivot = df_matriz.pivot_table(
-            values='VALOR_ORIGINAL',
-            index='FILIAL_LABEL',
-            columns='NOME_CLIENTE',
-            aggfunc='sum',
-            fill_value=0
-        )
+    st.markdown("##### Matriz Grupo x Cliente" if multiplos else "##### Matriz Filial x Cliente")
 
     if pivot.empty:
         st.info("Dados insuficientes para matriz")
@@ -782,33 +1000,12 @@ def _render_por_categoria(df, cores):
 
     st.markdown("##### Por Categoria")
 
-    if 'DESCRICAO' not in df.columns:
+    # Top 12
+    df_top = compute_por_categoria(df)
+    if df_top is None:
         st.info("Sem dados de categoria")
         return
 
-    # Agrupar por categoria
-    df_cat = df.groupby('DESCRICAO').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NOME_CLIENTE': 'nunique'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Total', 'Pendente', 'Clientes']
-    df_cat['Recebido'] = df_cat['Total'] - df_cat['Pendente']
-
-    # Vencido por categoria
-    if 'STATUS' in df.columns:
-        df_vencido_cat = df[df['STATUS'] == 'Vencido'].groupby('DESCRICAO')['SALDO'].sum().reset_index()
-        df_vencido_cat.columns = ['Categoria', 'Vencido']
-        df_cat = df_cat.merge(df_vencido_cat, on='Categoria', how='left')
-        df_cat['Vencido'] = df_cat['Vencido'].fillna(0)
-    else:
-        df_cat['Vencido'] = 0
-    df_cat['A_Vencer'] = (df_cat['Pendente'] - df_cat['Vencido']).clip(lower=0)
-
-    # Top 12
-    df_top = df_cat.nlargest(12, 'Total')
-    df_top = df_top.sort_values('Total', ascending=True)
-
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -898,15 +1095,7 @@ def _render_por_categoria(df, cores):
         col_r3.metric("Clientes", f"{int(row_cat['Clientes'])} | {pct_rec:.0f}% recebido")
 
         # Clientes da categoria selecionada
-        df_cat_cli = df[df['DESCRICAO'] == cat_sel].groupby('NOME_CLIENTE').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum',
-            'CLIENTE': 'count'
-        }).reset_index()
-        df_cat_cli.columns = ['Cliente', 'Total', 'Pendente', 'Qtd']
-        df_cat_cli = df_cat_cli.sort_values('Total', ascending=False)
-
-        df_cat_show = df_cat_cli.copy()
+        df_cat_show = compute_clientes_categoria(df, cat_sel)
         df_cat_show['Cliente'] = df_cat_show['Cliente'].str[:25]
         df_cat_show['Total'] = df_cat_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
         df_cat_show['Pendente'] = df_cat_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -919,7 +1108,7 @@ def _render_consulta_cliente(df, cores):
 
     st.markdown("##### Raio-X do Cliente")
 
-    clientes = sorted([str(x) for x in df['NOME_CLIENTE'].unique().tolist()])
+    clientes = compute_clientes(df)
 
     cliente_selecionado = st.selectbox(
         "Selecione um cliente",
@@ -931,38 +1120,26 @@ def _render_consulta_cliente(df, cores):
         st.info("Selecione um cliente para ver detalhes")
         return
 
-    df_cli = df[df['NOME_CLIENTE'] == cliente_selecionado]
+    df_cli = recorte(df, ('cliente', cliente_selecionado), lambda d: d['NOME_CLIENTE'] == cliente_selecionado)
 
     # Metricas basicas
-    total_valor = df_cli['VALOR_ORIGINAL'].sum()
-    total_pendente = df_cli['SALDO'].sum()
-    total_recebido = total_valor - total_pendente
-    qtd_titulos = len(df_cli)
-    pct_recebido = (total_recebido / total_valor * 100) if total_valor > 0 else 0
-    ticket_medio = total_valor / qtd_titulos if qtd_titulos > 0 else 0
+    consulta = compute_consulta_cliente(df_cli)
+    total_valor = consulta['total_valor']
+    total_pendente = consulta['total_pendente']
+    total_recebido = consulta['total_recebido']
+    qtd_titulos = consulta['qtd_titulos']
+    pct_recebido = consulta['pct_recebido']
+    ticket_medio = consulta['ticket_medio']
 
     # Classe ABC
-    classes = _calcular_classe_abc(df)
+    classes = compute_classe_abc(df)
     classe = classes.get(cliente_selecionado, 'C')
     cor_classe = {'A': cores['primaria'], 'B': cores['alerta'], 'C': cores['texto_secundario']}.get(classe, cores['texto'])
 
-    # Prazo medio concedido
-    df_cli_prazos = df_cli.copy()
-    df_cli_prazos['PRAZO_CONC'] = (df_cli_prazos['VENCIMENTO'] - df_cli_prazos['EMISSAO']).dt.days
-    prazo_medio = df_cli_prazos['PRAZO_CONC'].mean()
-
-    # Atraso medio (dos recebidos)
-    atraso_medio = 0
-    df_rec_cli = df_cli[df_cli['SALDO'] == 0].copy()
-    if 'DT_BAIXA' in df_rec_cli.columns and len(df_rec_cli) > 0:
-        df_rec_cli['ATRASO'] = (df_rec_cli['DT_BAIXA'] - df_rec_cli['VENCIMENTO']).dt.days
-        atraso_vals = df_rec_cli[df_rec_cli['ATRASO'] > 0]['ATRASO']
-        atraso_medio = atraso_vals.mean() if len(atraso_vals) > 0 else 0
-
-    # Filiais que vendem para este cliente
-    filiais_cli = []
-    if 'NOME_FILIAL' in df_cli.columns:
-        filiais_cli = df_cli['NOME_FILIAL'].unique().tolist()
+    # Prazo medio concedido, atraso medio (dos recebidos) e filiais que vendem para o cliente
+    prazo_medio = consulta['prazo_medio']
+    atraso_medio = consulta['atraso_medio']
+    filiais_cli = consulta['filiais']
 
     # Linha 1: KPIs principais
     col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -995,13 +1172,7 @@ def _render_consulta_cliente(df, cores):
     tab1, tab2 = st.tabs(["Evolucao", "Titulos"])
 
     with tab1:
-        df_hist = df_cli.copy()
-        df_hist['MES'] = df_hist['EMISSAO'].dt.to_period('M').astype(str)
-        df_hist_grp = df_hist.groupby('MES').agg({
-            'VALOR_ORIGINAL': 'sum',
-            'SALDO': 'sum'
-        }).reset_index()
-        df_hist_grp['RECEBIDO'] = df_hist_grp['VALOR_ORIGINAL'] - df_hist_grp['SALDO']
+        df_hist_grp = compute_evolucao_cliente(df_cli)
 
         if len(df_hist_grp) > 1:
             fig = go.Figure()
@@ -1030,9 +1201,7 @@ def _render_consulta_cliente(df, cores):
             st.info("Historico insuficiente para grafico")
 
     with tab2:
-        colunas = ['NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO', 'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO']
-        colunas_disp = [c for c in colunas if c in df_cli.columns]
-        df_tab = df_cli[colunas_disp].copy()
+        df_tab = compute_titulos_cliente(df_cli)
 
         for col in ['EMISSAO', 'VENCIMENTO']:
             if col in df_tab.columns:
@@ -1079,48 +1248,10 @@ def _render_ranking(df, cores):
         filtro = st.selectbox("Filtrar", ["Todos", "Com Pendencia", "Quitados"], key="rank_filtro_rec")
 
     # Preparar dados
-    df_rank = df.groupby('NOME_CLIENTE').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'CLIENTE': 'count'
-    }).reset_index()
-    df_rank.columns = ['Cliente', 'Total', 'Pendente', 'Titulos']
-    df_rank['Recebido'] = df_rank['Total'] - df_rank['Pendente']
-    df_rank['% Recebido'] = ((df_rank['Recebido']) / df_rank['Total'] * 100).round(1)
-
-    # Vencido por cliente
-    if 'STATUS' in df.columns:
-        df_venc = df[df['STATUS'] == 'Vencido'].groupby('NOME_CLIENTE')['SALDO'].sum().reset_index()
-        df_venc.columns = ['Cliente', 'Vencido']
-        df_rank = df_rank.merge(df_venc, on='Cliente', how='left')
-        df_rank['Vencido'] = df_rank['Vencido'].fillna(0)
-    else:
-        df_rank['Vencido'] = 0
-
-    # Classe ABC
-    classes = _calcular_classe_abc(df)
-    df_rank['Classe'] = df_rank['Cliente'].map(classes).fillna('C')
-
-    # Filtrar
-    if filtro == "Com Pendencia":
-        df_rank = df_rank[df_rank['Pendente'] > 0]
-    elif filtro == "Quitados":
-        df_rank = df_rank[df_rank['Pendente'] <= 0]
-
-    # Ordenar
-    if ordenar == "Valor Total":
-        df_rank = df_rank.sort_values('Total', ascending=False)
-    elif ordenar == "Valor Recebido":
-        df_rank = df_rank.sort_values('Recebido', ascending=False)
-    elif ordenar == "Vencido":
-        df_rank = df_rank.sort_values('Vencido', ascending=False)
-    else:
-        df_rank = df_rank.sort_values('Pendente', ascending=False)
-
-    df_rank = df_rank.head(qtd_exibir)
+    df_rank = compute_ranking(df, ordenar, qtd_exibir, filtro)
 
     # Formatar
-    df_show = df_rank.copy()
+    df_show = df_rank.copy(deep=False)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Recebido'] = df_show['Recebido'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
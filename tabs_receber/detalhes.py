@@ -7,6 +7,9 @@ import plotly.graph_objects as go
 from datetime import datetime
 
 from config.theme import get_cores
+from data.busca import buscar
+from data.periodo import dias_entre
+from data.secoes import memoizar_secao, recorte
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero, to_excel
 
@@ -22,6 +25,8 @@ def render_detalhes_receber(df):
         st.warning("Nenhum dado disponivel para consulta.")
         return
 
+    opcoes = compute_opcoes_filtros(df)
+
     # ========== FILTROS ==========
     with st.container():
         col1, col2, col3, col4 = st.columns(4)
@@ -29,7 +34,7 @@ def render_detalhes_receber(df):
         with col1:
             filtro_status = st.multiselect(
                 "Status",
-                options=sorted(df['STATUS'].dropna().unique().tolist()),
+                options=opcoes['status'],
                 default=[],
                 key="det_status_rec",
                 placeholder="Todos"
@@ -38,7 +43,7 @@ def render_detalhes_receber(df):
         with col2:
             filtro_filial = st.multiselect(
                 "Filial",
-                options=sorted(df['NOME_FILIAL'].dropna().unique().tolist()),
+                options=opcoes['filiais'],
                 default=[],
                 key="det_filial_rec",
                 placeholder="Todas"
@@ -47,7 +52,7 @@ def render_detalhes_receber(df):
         with col3:
             filtro_categoria = st.multiselect(
                 "Categoria",
-                options=sorted(df['DESCRICAO'].dropna().unique().tolist()),
+                options=opcoes['categorias'],
                 default=[],
                 key="det_categoria_rec",
                 placeholder="Todas"
@@ -74,16 +79,13 @@ def render_detalhes_receber(df):
             apenas_baixados = st.checkbox("Baixados", value=False, key="det_baixados_rec")
 
         with col4:
-            if 'DT_BAIXA' in df.columns:
-                df_baixas_valid = df[df['DT_BAIXA'].notna()]
-                if len(df_baixas_valid) > 0:
-                    dt_min = df_baixas_valid['DT_BAIXA'].min().date()
-                    dt_max = df_baixas_valid['DT_BAIXA'].max().date()
-                    filtro_dt_baixa = st.date_input(
-                        "Data Baixa",
-                        value=(dt_min, dt_max),
-                        key="det_dt_baixa_rec"
-                    )
+            if opcoes['dt_baixa'] is not None:
+                dt_min, dt_max = opcoes['dt_baixa']
+                filtro_dt_baixa = st.date_input(
+                    "Data Baixa",
+                    value=(dt_min, dt_max),
+                    key="det_dt_baixa_rec"
+                )
 
     # Aplicar filtros
     df_filtrado = _aplicar_filtros(df)
@@ -91,14 +93,11 @@ def render_detalhes_receber(df):
     # ========== RESUMO ==========
     col1, col2, col3, col4, col5 = st.columns(5)
 
-    valor_total = df_filtrado['VALOR_ORIGINAL'].sum()
-    saldo_total = df_filtrado['SALDO'].sum()
-    qtd_vencidos = len(df_filtrado[df_filtrado['STATUS'] == 'Vencido'])
-
-    col1.metric("Títulos", formatar_numero(len(df_filtrado)))
-    col2.metric("Valor Total", formatar_moeda(valor_total))
-    col3.metric("Saldo Pendente", formatar_moeda(saldo_total))
-    col4.metric("Vencidos", formatar_numero(qtd_vencidos))
+    resumo = compute_resumo(df_filtrado)
+    col1.metric("Títulos", formatar_numero(resumo['qtd']))
+    col2.metric("Valor Total", formatar_moeda(resumo['total']))
+    col3.metric("Saldo Pendente", formatar_moeda(resumo['saldo']))
+    col4.metric("Vencidos", formatar_numero(resumo['vencidos']))
 
     col5.download_button(
         label="Exportar",
@@ -123,50 +122,98 @@ def render_detalhes_receber(df):
         _render_indicadores(df, cores)
 
 
-def _aplicar_filtros(df):
-    """Aplica os filtros"""
-    df_filtrado = df.copy()
+@memoizar_secao
+def compute_opcoes_filtros(df):
+    """Opcoes dos multiselects e intervalo de DT_BAIXA (None sem baixas)"""
+    def opcoes(col):
+        return sorted(df[col].dropna().unique().tolist())
+
+    dt_baixa = None
+    if 'DT_BAIXA' in df.columns and df['DT_BAIXA'].notna().any():
+        dt_baixa = (df['DT_BAIXA'].min().date(), df['DT_BAIXA'].max().date())
+    return {
+        'status': opcoes('STATUS'),
+        'filiais': opcoes('NOME_FILIAL'),
+        'categorias': opcoes('DESCRICAO'),
+        'dt_baixa': dt_baixa,
+    }
+
+
+def _filtros_sessao():
+    """Filtros da aba lidos do session_state (tupla hashable, parte da chave do recorte)"""
+    estado = st.session_state
+    return (
+        tuple(estado.get('det_status_rec') or ()),
+        tuple(estado.get('det_filial_rec') or ()),
+        tuple(estado.get('det_categoria_rec') or ()),
+        estado.get('det_busca_rec', ''),
+        estado.get('det_saldo_rec', False),
+        estado.get('det_reneg_rec', False),
+        estado.get('det_baixados_rec', False),
+        estado.get('det_dt_baixa_rec'),
+    )
+
+
+def _mascara_filtros(df, filtros):
+    """Mascara booleana de df com os filtros da aba (ver _filtros_sessao)"""
+    status, filiais, categorias, busca, apenas_saldo, apenas_reneg, apenas_baixados, dt_baixa = filtros
+    mask = pd.Series(True, index=df.index)
 
-    if st.session_state.get('det_status_rec'):
-        df_filtrado = df_filtrado[df_filtrado['STATUS'].isin(st.session_state.det_status_rec)]
+    if status:
+        mask &= df['STATUS'].isin(status)
 
-    if st.session_state.get('det_filial_rec'):
-        df_filtrado = df_filtrado[df_filtrado['NOME_FILIAL'].isin(st.session_state.det_filial_rec)]
+    if filiais:
+        mask &= df['NOME_FILIAL'].isin(filiais)
 
-    if st.session_state.get('det_categoria_rec'):
-        df_filtrado = df_filtrado[df_filtrado['DESCRICAO'].isin(st.session_state.det_categoria_rec)]
+    if categorias:
+        mask &= df['DESCRICAO'].isin(categorias)
 
-    busca = st.session_state.get('det_busca_rec', '')
     if busca:
-        df_filtrado = df_filtrado[
-            df_filtrado['NOME_CLIENTE'].str.contains(busca, case=False, na=False)
-        ]
+        mask &= buscar(df['NOME_CLIENTE'], busca)
 
-    if st.session_state.get('det_saldo_rec', False):
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] > 0]
+    if apenas_saldo:
+        mask &= df['SALDO'] > 0
 
     # Filtro de renegociados
-    if st.session_state.get('det_reneg_rec', False):
-        if 'RENEGOCIADO' in df_filtrado.columns:
-            df_filtrado = df_filtrado[df_filtrado['RENEGOCIADO'] == True]
+    if apenas_reneg and 'RENEGOCIADO' in df.columns:
+        mask &= df['RENEGOCIADO'] == True
 
     # Filtro de baixados
-    if st.session_state.get('det_baixados_rec', False):
-        if 'DT_BAIXA' in df_filtrado.columns:
-            df_filtrado = df_filtrado[df_filtrado['DT_BAIXA'].notna()]
+    if apenas_baixados and 'DT_BAIXA' in df.columns:
+        mask &= df['DT_BAIXA'].notna()
 
     # Filtro por data de baixa
-    dt_baixa = st.session_state.get('det_dt_baixa_rec')
-    if dt_baixa and 'DT_BAIXA' in df_filtrado.columns:
+    if dt_baixa and 'DT_BAIXA' in df.columns:
         if isinstance(dt_baixa, tuple) and len(dt_baixa) == 2:
-            df_filtrado = df_filtrado[
-                (df_filtrado['DT_BAIXA'] >= pd.Timestamp(dt_baixa[0])) &
-                (df_filtrado['DT_BAIXA'] <= pd.Timestamp(dt_baixa[1]))
-            ]
+            mask &= (df['DT_BAIXA'] >= pd.Timestamp(dt_baixa[0])) & (df['DT_BAIXA'] <= pd.Timestamp(dt_baixa[1]))
 
+    return mask
+
+
+def _aplicar_filtros(df):
+    """Aplica os filtros (recorte registrado com os filtros na chave)"""
+    filtros = _filtros_sessao()
+    df_filtrado = recorte(df, ('detalhes_receber',) + filtros, lambda d: _mascara_filtros(d, filtros))
+    return compute_titulos_ordenados(df_filtrado)
+
+
+@memoizar_secao
+def compute_titulos_ordenados(df_filtrado):
+    """Titulos ordenados por vencimento"""
     return df_filtrado.sort_values('VENCIMENTO', ascending=True)
 
 
+@memoizar_secao
+def compute_resumo(df_filtrado):
+    """Totais do resultado dos filtros"""
+    return {
+        'qtd': len(df_filtrado),
+        'total': df_filtrado['VALOR_ORIGINAL'].sum(),
+        'saldo': df_filtrado['SALDO'].sum(),
+        'vencidos': int((df_filtrado['STATUS'] == 'Vencido').sum()),
+    }
+
+
 def _render_tabela(df_filtrado):
     """Renderiza tabela de títulos"""
 
@@ -191,7 +238,7 @@ def _render_tabela(df_filtrado):
     if 'DSO' in df_filtrado.columns:
         colunas.append('DSO')
 
-    df_show = df_filtrado[[c for c in colunas if c in df_filtrado.columns]].copy()
+    df_show = df_filtrado[[c for c in colunas if c in df_filtrado.columns]]
 
     # Formatar datas
     df_show['EMISSAO'] = pd.to_datetime(df_show['EMISSAO'], errors='coerce').dt.strftime('%d/%m/%Y')
@@ -247,6 +294,14 @@ def _render_tabela(df_filtrado):
     st.caption(f"Total: {len(df_show)} títulos")
 
 
+@memoizar_secao
+def compute_saldo_por(df_filtrado, coluna, n=None):
+    """SALDO somado por `coluna`, do maior para o menor (top n se informado)"""
+    serie = df_filtrado.groupby(coluna, observed=True)['SALDO'].sum()
+    serie = serie.nlargest(n) if n else serie.sort_values(ascending=False)
+    return serie.reset_index()
+
+
 def _render_graficos(df_filtrado, cores):
     """Renderiza gráficos"""
 
@@ -259,8 +314,7 @@ def _render_graficos(df_filtrado, cores):
     with col1:
         st.markdown("##### Por Status")
 
-        df_status = df_filtrado.groupby('STATUS')['SALDO'].sum().reset_index()
-        df_status = df_status.sort_values('SALDO', ascending=False)
+        df_status = compute_saldo_por(df_filtrado, 'STATUS')
 
         cores_status = {
             'Vencido': cores['perigo'],
@@ -292,7 +346,7 @@ def _render_graficos(df_filtrado, cores):
     with col2:
         st.markdown("##### Top 10 Clientes")
 
-        df_cli = df_filtrado.groupby('NOME_CLIENTE')['SALDO'].sum().nlargest(10).reset_index()
+        df_cli = compute_saldo_por(df_filtrado, 'NOME_CLIENTE', 10)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -317,8 +371,7 @@ def _render_graficos(df_filtrado, cores):
     with col1:
         st.markdown("##### Por Filial")
 
-        df_filial = df_filtrado.groupby('NOME_FILIAL')['SALDO'].sum().reset_index()
-        df_filial = df_filial.sort_values('SALDO', ascending=False)
+        df_filial = compute_saldo_por(df_filtrado, 'NOME_FILIAL')
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -340,7 +393,7 @@ def _render_graficos(df_filtrado, cores):
     with col2:
         st.markdown("##### Top 10 Categorias")
 
-        df_cat = df_filtrado.groupby('DESCRICAO')['SALDO'].sum().nlargest(10).reset_index()
+        df_cat = compute_saldo_por(df_filtrado, 'DESCRICAO', 10)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -361,16 +414,16 @@ def _render_graficos(df_filtrado, cores):
         st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_indicadores(df, cores):
-    """Renderiza indicadores"""
-
-    df_recebidos = df[df['SALDO'] == 0].copy()
+@memoizar_secao
+def compute_indicadores(df):
+    """DSO, pontualidade, concentracao top 10, ticket, aging e inadimplencia"""
+    df_recebidos = df[df['SALDO'] == 0]
 
     dso = 0
     taxa_pontual = 0
     if len(df_recebidos) > 0 and 'DT_BAIXA' in df_recebidos.columns:
         df_recebidos['DT_BAIXA'] = pd.to_datetime(df_recebidos['DT_BAIXA'], errors='coerce')
-        df_recebidos['DIAS_RECEB'] = (df_recebidos['DT_BAIXA'] - df_recebidos['EMISSAO']).dt.days
+        df_recebidos['DIAS_RECEB'] = dias_entre(df_recebidos, 'DT_BAIXA', 'EMISSAO')
         df_recebidos_valid = df_recebidos[df_recebidos['DIAS_RECEB'] > 0]
         if len(df_recebidos_valid) > 0:
             dso = df_recebidos_valid['DIAS_RECEB'].mean()
@@ -378,7 +431,7 @@ def _render_indicadores(df, cores):
             taxa_pontual = df_recebidos_valid['PONTUAL'].sum() / len(df_recebidos_valid) * 100
 
     total_geral = df['VALOR_ORIGINAL'].sum()
-    top10_valor = df.groupby('NOME_CLIENTE')['VALOR_ORIGINAL'].sum().nlargest(10).sum()
+    top10_valor = df.groupby('NOME_CLIENTE', observed=True)['VALOR_ORIGINAL'].sum().nlargest(10).sum()
     concentracao = (top10_valor / total_geral * 100) if total_geral > 0 else 0
 
     ticket_medio = df['VALOR_ORIGINAL'].mean() if len(df) > 0 else 0
@@ -390,6 +443,47 @@ def _render_indicadores(df, cores):
     total_vencido = df_vencidos['SALDO'].sum()
     taxa_inadimplencia = (total_vencido / total_saldo * 100) if total_saldo > 0 else 0
 
+    return {
+        'dso': dso,
+        'taxa_pontual': taxa_pontual,
+        'concentracao': concentracao,
+        'ticket_medio': ticket_medio,
+        'aging_medio': aging_medio,
+        'taxa_inadimplencia': taxa_inadimplencia,
+    }
+
+
+def _faixa_valor(v):
+    if v <= 1000: return '< 1K'
+    elif v <= 5000: return '1K-5K'
+    elif v <= 10000: return '5K-10K'
+    elif v <= 50000: return '10K-50K'
+    else: return '> 50K'
+
+
+@memoizar_secao
+def compute_faixas_valor(df):
+    """Quantidade de titulos por faixa de VALOR_ORIGINAL, na ordem das faixas"""
+    df_faixa = df.copy(deep=False)
+    df_faixa['FAIXA'] = df_faixa['VALOR_ORIGINAL'].apply(_faixa_valor)
+
+    ordem = ['< 1K', '1K-5K', '5K-10K', '10K-50K', '> 50K']
+    df_agg = df_faixa.groupby('FAIXA', observed=True).size().reset_index(name='Qtd')
+    df_agg['Ordem'] = df_agg['FAIXA'].apply(lambda x: ordem.index(x) if x in ordem else 99)
+    return df_agg.sort_values('Ordem')
+
+
+def _render_indicadores(df, cores):
+    """Renderiza indicadores"""
+
+    ind = compute_indicadores(df)
+    dso = ind['dso']
+    taxa_pontual = ind['taxa_pontual']
+    concentracao = ind['concentracao']
+    ticket_medio = ind['ticket_medio']
+    aging_medio = ind['aging_medio']
+    taxa_inadimplencia = ind['taxa_inadimplencia']
+
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -435,20 +529,7 @@ def _render_indicadores(df, cores):
     with col2:
         st.markdown("##### Faixas de Valor")
 
-        def classificar(v):
-            if v <= 1000: return '< 1K'
-            elif v <= 5000: return '1K-5K'
-            elif v <= 10000: return '5K-10K'
-            elif v <= 50000: return '10K-50K'
-            else: return '> 50K'
-
-        df_faixa = df.copy()
-        df_faixa['FAIXA'] = df_faixa['VALOR_ORIGINAL'].apply(classificar)
-
-        ordem = ['< 1K', '1K-5K', '5K-10K', '10K-50K', '> 50K']
-        df_agg = df_faixa.groupby('FAIXA').size().reset_index(name='Qtd')
-        df_agg['Ordem'] = df_agg['FAIXA'].apply(lambda x: ordem.index(x) if x in ordem else 99)
-        df_agg = df_agg.sort_values('Ordem')
+        df_agg = compute_faixas_valor(df)
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
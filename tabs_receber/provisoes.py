@@ -4,12 +4,13 @@ Aba FAT / FT / PR - Faturamentos e Provisoes excluidos dos totalizadores - Conta
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime
 
 from config.theme import get_cores
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
+from data.periodo import SEM_DATA, chave_periodo, rotulo_mes
+from data.secoes import memoizar_secao, recorte
 
 
 def _get_nome_grupo(cod_filial):
@@ -36,26 +37,26 @@ def render_provisoes_receber(df):
         return
 
     # Filtro interno por tipo
-    tipos_disp = sorted(df['TIPO'].str.strip().unique()) if 'TIPO' in df.columns else []
+    tipos_disp = compute_tipos_disponiveis(df)
     tipo_sel = st.selectbox("Filtrar por tipo", ['Todos'] + tipos_disp, key='prov_rec_tipo_filtro')
 
     if tipo_sel != 'Todos':
-        df = df[df['TIPO'].str.strip() == tipo_sel]
+        df = recorte(df, ('tipo', tipo_sel), lambda d: d['TIPO'].str.strip() == tipo_sel)
 
     if len(df) == 0:
         st.info(f"Nenhum titulo {tipo_sel} no periodo.")
         return
 
     # Calcular vencidos
-    hoje = datetime.now()
-    df_vencidos = df[df['STATUS'] == 'Vencido'] if 'STATUS' in df.columns else pd.DataFrame()
-    total_vencido = df_vencidos['SALDO'].sum() if len(df_vencidos) > 0 else 0
+    df_vencidos = recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido') if 'STATUS' in df.columns else pd.DataFrame()
+    kpis = compute_kpis(df, df_vencidos)
+    total_vencido = kpis['total_vencido']
     qtd_vencido = len(df_vencidos)
 
-    total_emitido = df['VALOR_ORIGINAL'].sum()
-    total_pendente = df['SALDO'].sum()
-    total_recebido = max(total_emitido - total_pendente, 0)
-    pct_recebido = (total_recebido / total_emitido * 100) if total_emitido > 0 else 0
+    total_emitido = kpis['total_emitido']
+    total_pendente = kpis['total_pendente']
+    total_recebido = kpis['total_recebido']
+    pct_recebido = kpis['pct_recebido']
 
     # ========== KPIs ==========
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -97,6 +98,159 @@ def render_provisoes_receber(df):
     _render_detalhes(df, cores)
 
 
+# ==========================================================================
+# Calculos
+# ==========================================================================
+
+def _agregar(df, coluna, rotulo):
+    """Emitido, pendente, quantidade e recebido agrupados por `coluna`"""
+    df_agg = df.groupby(coluna, observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_agg.columns = [rotulo, 'Emitido', 'Pendente', 'Qtd']
+    df_agg['Recebido'] = (df_agg['Emitido'] - df_agg['Pendente']).clip(lower=0)
+    return df_agg
+
+
+def _tops(df_agg):
+    """Top 10 por emitido, recebido e pendente (None se nao ha grupos)"""
+    if len(df_agg) == 0:
+        return None
+    return (
+        df_agg.nlargest(10, 'Emitido').sort_values('Emitido', ascending=True),
+        df_agg[df_agg['Recebido'] > 0].nlargest(10, 'Recebido').sort_values('Recebido', ascending=True),
+        df_agg[df_agg['Pendente'] > 0].nlargest(10, 'Pendente').sort_values('Pendente', ascending=True),
+    )
+
+
+@memoizar_secao
+def compute_tipos_disponiveis(df):
+    return sorted(df['TIPO'].str.strip().unique()) if 'TIPO' in df.columns else []
+
+
+@memoizar_secao
+def compute_kpis(df, df_vencidos):
+    total_emitido = df['VALOR_ORIGINAL'].sum()
+    total_pendente = df['SALDO'].sum()
+    total_recebido = max(total_emitido - total_pendente, 0)
+    return {
+        'total_emitido': total_emitido,
+        'total_pendente': total_pendente,
+        'total_recebido': total_recebido,
+        'pct_recebido': (total_recebido / total_emitido * 100) if total_emitido > 0 else 0,
+        'total_vencido': df_vencidos['SALDO'].sum() if len(df_vencidos) > 0 else 0,
+    }
+
+
+@memoizar_secao
+def compute_top_clientes(df):
+    return _tops(_agregar(df, 'NOME_CLIENTE', 'Cliente'))
+
+
+@memoizar_secao
+def compute_por_categoria(df):
+    return _tops(_agregar(df, 'DESCRICAO', 'Categoria'))
+
+
+@memoizar_secao
+def compute_por_filial(df):
+    """(multiplos_grupos, df_fil) recebido vs pendente por grupo ou filial"""
+    multiplos_grupos = _detectar_multiplos_grupos(df)
+    if multiplos_grupos:
+        agrup = df['FILIAL'].apply(_get_nome_grupo)
+    elif 'FILIAL' in df.columns:
+        agrup = df['FILIAL'].astype(int).astype(str) + ' - ' + df['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
+    else:
+        agrup = df['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
+
+    df_fil = _agregar(df.assign(_AGRUP=agrup), '_AGRUP', 'Filial')
+    return multiplos_grupos, df_fil.sort_values('Emitido', ascending=True)
+
+
+@memoizar_secao
+def compute_vencidos(df_vencidos):
+    df_cli = df_vencidos.groupby('NOME_CLIENTE', observed=True).agg({
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reset_index()
+    df_cli.columns = ['Cliente', 'Vencido', 'Qtd']
+
+    # Dias de atraso medio
+    if 'DIAS_ATRASO' in df_vencidos.columns:
+        df_atraso = df_vencidos.groupby('NOME_CLIENTE', observed=True)['DIAS_ATRASO'].mean().reset_index()
+        df_atraso.columns = ['Cliente', 'Atraso_Medio']
+        df_cli = df_cli.merge(df_atraso, on='Cliente', how='left')
+    else:
+        df_cli['Atraso_Medio'] = 0
+
+    return df_cli.nlargest(10, 'Vencido').sort_values('Vencido', ascending=True)
+
+
+@memoizar_secao
+def compute_evolucao_mensal(df):
+    """Ultimos 12 meses de emissao (None com menos de 2 meses)"""
+    mes = chave_periodo(df, 'EMISSAO', 'AAAAMM')
+
+    meses_disp = sorted(mes[mes != SEM_DATA].unique())
+    if len(meses_disp) < 2:
+        return None
+
+    ultimos = meses_disp[-12:]
+
+    df_mes = df.assign(MES=mes)[mes.isin(ultimos)].groupby('MES', observed=True).agg({
+        'VALOR_ORIGINAL': 'sum',
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).reindex(ultimos, fill_value=0).reset_index()
+    df_mes.columns = ['MES', 'Emitido', 'Pendente', 'Qtd']
+    df_mes['Recebido'] = (df_mes['Emitido'] - df_mes['Pendente']).clip(lower=0)
+    df_mes['MES'] = rotulo_mes(df_mes['MES'])
+    return df_mes
+
+
+@memoizar_secao
+def compute_resumo_tipo(df):
+    df_tipo = _agregar(df, 'TIPO', 'Tipo')
+    df_tipo['% Recebido'] = (df_tipo['Recebido'] / df_tipo['Emitido'] * 100).round(1)
+    return df_tipo.sort_values('Emitido', ascending=False)
+
+
+def _mascara_status(df, filtro_status):
+    if filtro_status == 'Vencido' and 'STATUS' in df.columns:
+        return df['STATUS'] == 'Vencido'
+    if filtro_status == 'Pendente':
+        return df['SALDO'] > 0
+    if filtro_status == 'Recebido':
+        return df['SALDO'] <= 0
+    return pd.Series(True, index=df.index)
+
+
+@memoizar_secao
+def compute_detalhes(df, filtro_status, ordenar, qtd_exibir):
+    """Titulos filtrados por status, ordenados e limitados (so as colunas exibidas)"""
+    df_filtrado = recorte(df, ('status', filtro_status), lambda d: _mascara_status(d, filtro_status))
+
+    if ordenar == 'Pendente':
+        df_filtrado = df_filtrado.sort_values('SALDO', ascending=False)
+    elif ordenar == 'Valor Original':
+        df_filtrado = df_filtrado.sort_values('VALOR_ORIGINAL', ascending=False)
+    elif ordenar == 'Vencimento' and 'VENCIMENTO' in df_filtrado.columns:
+        df_filtrado = df_filtrado.sort_values('VENCIMENTO', ascending=True)
+
+    if qtd_exibir != 'Todos':
+        df_filtrado = df_filtrado.head(int(qtd_exibir))
+
+    colunas = ['NOME_CLIENTE', 'NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO',
+               'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO', 'STATUS']
+    return df_filtrado[[c for c in colunas if c in df_filtrado.columns]]
+
+
+# ==========================================================================
+# Secoes
+# ==========================================================================
+
 def _render_top_clientes(df, cores):
     """Top 10 clientes - 3 graficos: emitido, recebido, pendente"""
     st.markdown("##### Top 10 Clientes")
@@ -105,23 +259,18 @@ def _render_top_clientes(df, cores):
         st.info("Sem dados de clientes")
         return
 
-    df_cli = df.groupby('NOME_CLIENTE').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Emitido', 'Pendente', 'Qtd']
-    df_cli['Recebido'] = (df_cli['Emitido'] - df_cli['Pendente']).clip(lower=0)
+    tops = compute_top_clientes(df)
 
-    if len(df_cli) == 0:
+    if tops is None:
         st.info("Nenhum cliente encontrado.")
         return
+    top_emitido, top_recebido, top_pendente = tops
 
     col1, col2, col3 = st.columns(3)
 
     with col1:
         st.markdown("###### Por Emitido")
-        df_top = df_cli.nlargest(10, 'Emitido').sort_values('Emitido', ascending=True)
+        df_top = top_emitido
 
         fig = go.Figure(go.Bar(
             y=df_top['Cliente'].str[:25], x=df_top['Emitido'],
@@ -139,7 +288,7 @@ def _render_top_clientes(df, cores):
 
     with col2:
         st.markdown("###### Por Recebido")
-        df_top = df_cli[df_cli['Recebido'] > 0].nlargest(10, 'Recebido').sort_values('Recebido', ascending=True)
+        df_top = top_recebido
 
         if len(df_top) > 0:
             fig = go.Figure(go.Bar(
@@ -160,7 +309,7 @@ def _render_top_clientes(df, cores):
 
     with col3:
         st.markdown("###### Por Pendente")
-        df_top = df_cli[df_cli['Pendente'] > 0].nlargest(10, 'Pendente').sort_values('Pendente', ascending=True)
+        df_top = top_pendente
 
         if len(df_top) > 0:
             fig = go.Figure(go.Bar(
@@ -188,23 +337,18 @@ def _render_por_categoria(df, cores):
         st.info("Sem dados de categoria")
         return
 
-    df_cat = df.groupby('DESCRICAO').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Emitido', 'Pendente', 'Qtd']
-    df_cat['Recebido'] = (df_cat['Emitido'] - df_cat['Pendente']).clip(lower=0)
+    tops = compute_por_categoria(df)
 
-    if len(df_cat) == 0:
+    if tops is None:
         st.info("Nenhuma categoria encontrada.")
         return
+    top_emitido, top_recebido, top_pendente = tops
 
     col1, col2, col3 = st.columns(3)
 
     with col1:
         st.markdown("###### Por Emitido")
-        df_top = df_cat.nlargest(10, 'Emitido').sort_values('Emitido', ascending=True)
+        df_top = top_emitido
 
         fig = go.Figure(go.Bar(
             y=df_top['Categoria'].str[:25], x=df_top['Emitido'],
@@ -222,7 +366,7 @@ def _render_por_categoria(df, cores):
 
     with col2:
         st.markdown("###### Por Recebido")
-        df_top = df_cat[df_cat['Recebido'] > 0].nlargest(10, 'Recebido').sort_values('Recebido', ascending=True)
+        df_top = top_recebido
 
         if len(df_top) > 0:
             fig = go.Figure(go.Bar(
@@ -243,7 +387,7 @@ def _render_por_categoria(df, cores):
 
     with col3:
         st.markdown("###### Por Pendente")
-        df_top = df_cat[df_cat['Pendente'] > 0].nlargest(10, 'Pendente').sort_values('Pendente', ascending=True)
+        df_top = top_pendente
 
         if len(df_top) > 0:
             fig = go.Figure(go.Bar(
@@ -270,28 +414,12 @@ def _render_por_filial(df, cores):
         st.info("Coluna de filial nao disponivel")
         return
 
-    multiplos_grupos = _detectar_multiplos_grupos(df)
+    multiplos_grupos, df_fil = compute_por_filial(df)
 
     if multiplos_grupos:
         st.markdown("###### Por Grupo")
-        df_temp = df.copy()
-        df_temp['_AGRUP'] = df_temp['FILIAL'].apply(_get_nome_grupo)
     else:
         st.markdown("###### Por Filial")
-        df_temp = df.copy()
-        if 'FILIAL' in df_temp.columns:
-            df_temp['_AGRUP'] = df_temp['FILIAL'].astype(int).astype(str) + ' - ' + df_temp['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-        else:
-            df_temp['_AGRUP'] = df_temp['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
-
-    df_fil = df_temp.groupby('_AGRUP').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_fil.columns = ['Filial', 'Emitido', 'Pendente', 'Qtd']
-    df_fil['Recebido'] = (df_fil['Emitido'] - df_fil['Pendente']).clip(lower=0)
-    df_fil = df_fil.sort_values('Emitido', ascending=True)
 
     fig = go.Figure()
 
@@ -338,26 +466,11 @@ def _render_vencidos(df_vencidos, cores):
         st.success("Nenhum titulo vencido!")
         return
 
-    nome_col = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_vencidos.columns else None
-    if not nome_col:
+    if 'NOME_CLIENTE' not in df_vencidos.columns:
         st.info("Sem dados")
         return
 
-    df_cli = df_vencidos.groupby(nome_col).agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_cli.columns = ['Cliente', 'Vencido', 'Qtd']
-
-    # Dias de atraso medio
-    if 'DIAS_ATRASO' in df_vencidos.columns:
-        df_atraso = df_vencidos.groupby(nome_col)['DIAS_ATRASO'].mean().reset_index()
-        df_atraso.columns = ['Cliente', 'Atraso_Medio']
-        df_cli = df_cli.merge(df_atraso, on='Cliente', how='left')
-    else:
-        df_cli['Atraso_Medio'] = 0
-
-    df_cli = df_cli.nlargest(10, 'Vencido').sort_values('Vencido', ascending=True)
+    df_cli = compute_vencidos(df_vencidos)
 
     def cor_atraso(d):
         if d > 30:
@@ -400,25 +513,11 @@ def _render_evolucao_mensal(df, cores):
         st.info("Sem dados de emissao.")
         return
 
-    df_temp = df.copy()
-    df_temp['MES'] = df_temp['EMISSAO'].dt.to_period('M')
-
-    meses_disp = sorted(df_temp['MES'].dropna().unique())
-    if len(meses_disp) < 2:
+    df_mes = compute_evolucao_mensal(df)
+    if df_mes is None:
         st.info("Dados insuficientes para evolucao mensal.")
         return
 
-    ultimos = meses_disp[-12:]
-
-    df_mes = df_temp[df_temp['MES'].isin(ultimos)].groupby('MES').agg({
-        'VALOR_ORIGINAL': 'sum',
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reindex(ultimos, fill_value=0).reset_index()
-    df_mes.columns = ['MES', 'Emitido', 'Pendente', 'Qtd']
-    df_mes['Recebido'] = (df_mes['Emitido'] - df_mes['Pendente']).clip(lower=0)
-    df_mes['MES'] = df_mes['MES'].astype(str)
-
     col1, col2 = st.columns([2, 1])
 
     with col1:
@@ -451,17 +550,7 @@ def _render_evolucao_mensal(df, cores):
     with col2:
         st.markdown("###### Resumo por Tipo")
         if 'TIPO' in df.columns:
-            df_tipo = df.groupby('TIPO').agg({
-                'VALOR_ORIGINAL': 'sum',
-                'SALDO': 'sum',
-                'NUMERO': 'count'
-            }).reset_index()
-            df_tipo.columns = ['Tipo', 'Emitido', 'Pendente', 'Qtd']
-            df_tipo['Recebido'] = (df_tipo['Emitido'] - df_tipo['Pendente']).clip(lower=0)
-            df_tipo['% Recebido'] = (df_tipo['Recebido'] / df_tipo['Emitido'] * 100).round(1)
-            df_tipo = df_tipo.sort_values('Emitido', ascending=False)
-
-            df_show = df_tipo.copy()
+            df_show = compute_resumo_tipo(df)
             df_show['Emitido'] = df_show['Emitido'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Recebido'] = df_show['Recebido'].apply(lambda x: formatar_moeda(x, completo=True))
             df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
@@ -487,29 +576,7 @@ def _render_detalhes(df, cores):
     with col3:
         qtd_exibir = st.selectbox("Exibir", [20, 50, 100, 'Todos'], key='prov_rec_det_qtd')
 
-    df_filtrado = df.copy()
-
-    if filtro_status == 'Vencido' and 'STATUS' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['STATUS'] == 'Vencido']
-    elif filtro_status == 'Pendente':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] > 0]
-    elif filtro_status == 'Recebido':
-        df_filtrado = df_filtrado[df_filtrado['SALDO'] <= 0]
-
-    if ordenar == 'Pendente':
-        df_filtrado = df_filtrado.sort_values('SALDO', ascending=False)
-    elif ordenar == 'Valor Original':
-        df_filtrado = df_filtrado.sort_values('VALOR_ORIGINAL', ascending=False)
-    elif ordenar == 'Vencimento' and 'VENCIMENTO' in df_filtrado.columns:
-        df_filtrado = df_filtrado.sort_values('VENCIMENTO', ascending=True)
-
-    if qtd_exibir != 'Todos':
-        df_filtrado = df_filtrado.head(int(qtd_exibir))
-
-    colunas = ['NOME_CLIENTE', 'NOME_FILIAL', 'TIPO', 'NUMERO', 'DESCRICAO',
-               'EMISSAO', 'VENCIMENTO', 'VALOR_ORIGINAL', 'SALDO', 'STATUS']
-    colunas_disp = [c for c in colunas if c in df_filtrado.columns]
-    df_show = df_filtrado[colunas_disp].copy()
+    df_show = compute_detalhes(df, filtro_status, ordenar, qtd_exibir)
 
     if 'NOME_CLIENTE' in df_show.columns:
         df_show['NOME_CLIENTE'] = df_show['NOME_CLIENTE'].str[:30]
@@ -10,6 +10,7 @@ from datetime import datetime
 from config.theme import get_cores
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
+from data.secoes import memoizar_secao, recorte
 
 
 # Descricao dos tipos de documento
@@ -47,19 +48,17 @@ def render_tipo_documento(df):
         st.warning("Coluna TIPO nao encontrada.")
         return
 
-    df = df.copy()
-
     # Preparar dados
-    df_pendentes = df[df['SALDO'] > 0]
-    df_recebidos = df[df['SALDO'] == 0]
-    df_vencidos = df[df['STATUS'] == 'Vencido']
+    df_pendentes = recorte(df, 'pendentes', lambda d: d['SALDO'] > 0)
+    df_vencidos = recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido')
 
     # ========== KPIs ==========
-    total_tipos = df['TIPO'].nunique()
-    tipo_mais_comum = df['TIPO'].value_counts().idxmax()
-    pct_tipo_top = df['TIPO'].value_counts().iloc[0] / len(df) * 100
-    total_valor = df['VALOR_ORIGINAL'].sum()
-    total_pendente = df_pendentes['SALDO'].sum()
+    kpis = compute_kpis(df, df_pendentes)
+    total_tipos = kpis['total_tipos']
+    tipo_mais_comum = kpis['tipo_mais_comum']
+    pct_tipo_top = kpis['pct_tipo_top']
+    total_valor = kpis['total_valor']
+    total_pendente = kpis['total_pendente']
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -97,19 +96,39 @@ def render_tipo_documento(df):
     st.divider()
 
     # ========== TABELA DETALHADA ==========
-    _render_tabela_tipos(df, df_pendentes, df_vencidos, cores)
-
+    _render_tabela_tipos(df, df_vencidos, cores)
+
+
+@memoizar_secao
+def compute_kpis(df, df_pendentes):
+    """Quantidade de tipos, tipo mais comum (e % dos titulos), valor total e pendente"""
+    contagem = df['TIPO'].value_counts()
+    return {
+        'total_tipos': df['TIPO'].nunique(),
+        'tipo_mais_comum': contagem.idxmax(),
+        'pct_tipo_top': contagem.iloc[0] / len(df) * 100,
+        'total_valor': df['VALOR_ORIGINAL'].sum(),
+        'total_pendente': df_pendentes['SALDO'].sum(),
+    }
 
-def _render_distribuicao_valor(df, cores):
-    """Distribuicao por valor"""
-    st.markdown("##### Distribuicao por Valor")
 
-    df_grp = df.groupby('TIPO').agg({
+@memoizar_secao
+def compute_distribuicao_valor(df):
+    """Valor original por tipo, do maior para o menor, com a descricao do tipo"""
+    df_grp = df.groupby('TIPO', observed=True).agg({
         'VALOR_ORIGINAL': 'sum'
     }).sort_values('VALOR_ORIGINAL', ascending=False).reset_index()
 
     # Adicionar descricao
     df_grp['DESC'] = df_grp['TIPO'].map(lambda x: f"{x} - {TIPOS_DESC.get(x, x)}")
+    return df_grp
+
+
+def _render_distribuicao_valor(df, cores):
+    """Distribuicao por valor"""
+    st.markdown("##### Distribuicao por Valor")
+
+    df_grp = compute_distribuicao_valor(df)
 
     cores_grafico = [cores['sucesso'], cores['info'], cores['primaria'], cores['alerta'],
                     '#8b5cf6', '#ec4899', '#06b6d4', '#84cc16', '#f97316', '#6366f1']
@@ -134,15 +153,22 @@ def _render_distribuicao_valor(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_distribuicao_quantidade(df, cores):
-    """Distribuicao por quantidade"""
-    st.markdown("##### Distribuicao por Quantidade")
-
-    df_grp = df.groupby('TIPO').size().sort_values(ascending=False).reset_index()
+@memoizar_secao
+def compute_distribuicao_quantidade(df):
+    """Quantidade de titulos por tipo, da maior para a menor"""
+    df_grp = df.groupby('TIPO', observed=True).size().sort_values(ascending=False).reset_index()
     df_grp.columns = ['Tipo', 'Qtd']
 
     # Adicionar descricao
     df_grp['Label'] = df_grp['Tipo'].map(lambda x: f"{x}")
+    return df_grp
+
+
+def _render_distribuicao_quantidade(df, cores):
+    """Distribuicao por quantidade"""
+    st.markdown("##### Distribuicao por Quantidade")
+
+    df_grp = compute_distribuicao_quantidade(df)
 
     fig = go.Figure(go.Bar(
         x=df_grp['Label'],
@@ -163,33 +189,32 @@ def _render_distribuicao_quantidade(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_status_por_tipo(df, cores):
-    """Status por tipo de documento - barras horizontais proporcionais"""
-    st.markdown("##### Status por Tipo")
+def _agrupar_status(s):
+    """Simplifica o status em Recebido, Vencido ou A Vencer"""
+    if s == 'Recebido':
+        return 'Recebido'
+    elif s == 'Vencido':
+        return 'Vencido'
+    return 'A Vencer'
+
 
+@memoizar_secao
+def compute_status_por_tipo(df):
+    """(valor, % do tipo) por tipo x status simplificado dos 8 maiores tipos; None sem dados"""
     # Top 8 tipos por valor
-    tipos = df.groupby('TIPO')['VALOR_ORIGINAL'].sum().nlargest(8).index.tolist()
+    tipos = df.groupby('TIPO', observed=True)['VALOR_ORIGINAL'].sum().nlargest(8).index.tolist()
     df_filtrado = df[df['TIPO'].isin(tipos)]
 
     if len(df_filtrado) == 0:
-        st.info("Sem dados")
-        return
-
-    # Simplificar status para 3 grupos
-    def agrupar_status(s):
-        if s == 'Recebido':
-            return 'Recebido'
-        elif s == 'Vencido':
-            return 'Vencido'
-        return 'A Vencer'
+        return None
 
-    df_filtrado = df_filtrado.copy()
-    df_filtrado['STATUS_GRUPO'] = df_filtrado['STATUS'].apply(agrupar_status)
+    df_filtrado = df_filtrado.copy(deep=False)
+    df_filtrado['STATUS_GRUPO'] = df_filtrado['STATUS'].apply(_agrupar_status)
 
     # Pivot: tipo x status_grupo
     pivot = df_filtrado.pivot_table(
         values='VALOR_ORIGINAL', index='TIPO', columns='STATUS_GRUPO',
-        aggfunc='sum', fill_value=0
+        aggfunc='sum', fill_value=0, observed=True
     )
 
     # Ordenar por total
@@ -200,6 +225,20 @@ def _render_status_por_tipo(df, cores):
     # Calcular percentuais
     totais = pivot.sum(axis=1)
     pivot_pct = pivot.div(totais, axis=0) * 100
+    return pivot, pivot_pct
+
+
+def _render_status_por_tipo(df, cores):
+    """Status por tipo de documento - barras horizontais proporcionais"""
+    st.markdown("##### Status por Tipo")
+
+    resultado = compute_status_por_tipo(df)
+
+    if resultado is None:
+        st.info("Sem dados")
+        return
+
+    pivot, pivot_pct = resultado
 
     ordem_status = ['Recebido', 'A Vencer', 'Vencido']
     cores_status = {
@@ -238,6 +277,17 @@ def _render_status_por_tipo(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_vencidos_por_tipo(df_vencidos):
+    """8 tipos com maior saldo vencido"""
+    df_grp = df_vencidos.groupby('TIPO', observed=True).agg({
+        'SALDO': 'sum',
+        'VALOR_ORIGINAL': 'count'
+    }).sort_values('SALDO', ascending=False).head(8).reset_index()
+    df_grp.columns = ['Tipo', 'Saldo', 'Qtd']
+    return df_grp
+
+
 def _render_vencidos_por_tipo(df_vencidos, cores):
     """Vencidos por tipo"""
     st.markdown("##### Valor Vencido por Tipo")
@@ -246,11 +296,7 @@ def _render_vencidos_por_tipo(df_vencidos, cores):
         st.success("Sem titulos vencidos!")
         return
 
-    df_grp = df_vencidos.groupby('TIPO').agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).sort_values('SALDO', ascending=False).head(8).reset_index()
-    df_grp.columns = ['Tipo', 'Saldo', 'Qtd']
+    df_grp = compute_vencidos_por_tipo(df_vencidos)
 
     fig = go.Figure(go.Bar(
         y=df_grp['Tipo'],
@@ -271,6 +317,27 @@ def _render_vencidos_por_tipo(df_vencidos, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_tipos_disponiveis(df):
+    """Tipos com titulos, do mais ao menos frequente"""
+    return df['TIPO'].value_counts().loc[lambda s: s > 0].index.tolist()
+
+
+@memoizar_secao
+def compute_categorias_por_tipo(df, tipo_sel):
+    """(quantidade de titulos do tipo, quantidade/valor/pendente/recebido por categoria do tipo)"""
+    df_tipo = df[df['TIPO'] == tipo_sel]
+
+    # Agrupar por categoria
+    df_cat = df_tipo.groupby('DESCRICAO', observed=True).agg({
+        'VALOR_ORIGINAL': ['count', 'sum'],
+        'SALDO': 'sum'
+    }).reset_index()
+    df_cat.columns = ['Categoria', 'Qtd', 'Valor Total', 'Pendente']
+    df_cat['Recebido'] = (df_cat['Valor Total'] - df_cat['Pendente']).clip(lower=0)
+    return len(df_tipo), df_cat.sort_values('Qtd', ascending=False)
+
+
 def _render_categorias_por_tipo(df, cores):
     """Quantidade de documentos por categoria para cada tipo"""
     st.markdown("##### Categorias por Tipo de Documento")
@@ -279,7 +346,7 @@ def _render_categorias_por_tipo(df, cores):
         st.info("Coluna de categoria nao disponivel.")
         return
 
-    tipos_disp = df['TIPO'].value_counts().index.tolist()
+    tipos_disp = compute_tipos_disponiveis(df)
 
     if len(tipos_disp) == 0:
         st.info("Nenhum tipo de documento disponivel.")
@@ -297,21 +364,12 @@ def _render_categorias_por_tipo(df, cores):
     # Salvar seleção no session_state
     st.session_state['tipo_doc_rec_cat_valor'] = tipo_sel
 
-    df_tipo = df[df['TIPO'] == tipo_sel]
+    qtd_tipo, df_cat = compute_categorias_por_tipo(df, tipo_sel)
 
-    if len(df_tipo) == 0:
+    if qtd_tipo == 0:
         st.info(f"Nenhum titulo do tipo {tipo_sel}.")
         return
 
-    # Agrupar por categoria
-    df_cat = df_tipo.groupby('DESCRICAO').agg({
-        'VALOR_ORIGINAL': ['count', 'sum'],
-        'SALDO': 'sum'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Qtd', 'Valor Total', 'Pendente']
-    df_cat['Recebido'] = (df_cat['Valor Total'] - df_cat['Pendente']).clip(lower=0)
-    df_cat = df_cat.sort_values('Qtd', ascending=False)
-
     col1, col2 = st.columns(2)
 
     with col1:
@@ -342,34 +400,33 @@ def _render_categorias_por_tipo(df, cores):
     with col2:
         # Tabela completa
         st.markdown(f"###### Todas as Categorias - {tipo_sel}")
-        df_show = df_cat.copy()
+        df_show = df_cat.copy(deep=False)
         df_show['Valor Total'] = df_show['Valor Total'].apply(lambda x: formatar_moeda(x, completo=True))
         df_show['Recebido'] = df_show['Recebido'].apply(lambda x: formatar_moeda(x, completo=True))
         df_show['Pendente'] = df_show['Pendente'].apply(lambda x: formatar_moeda(x, completo=True))
 
         st.dataframe(df_show, use_container_width=True, hide_index=True, height=320)
-        st.caption(f"{len(df_cat)} categorias no tipo {tipo_sel} | {formatar_numero(len(df_tipo))} titulos")
-
+        st.caption(f"{len(df_cat)} categorias no tipo {tipo_sel} | {formatar_numero(qtd_tipo)} titulos")
 
-def _render_tabela_tipos(df, df_pendentes, df_vencidos, cores):
-    """Tabela resumo por tipo de documento"""
-    st.markdown("##### Resumo por Tipo de Documento")
 
+@memoizar_secao
+def compute_tabela_tipos(df, df_vencidos):
+    """Quantidade, total, saldo, recebido, vencido e % recebido por tipo, do maior total para o menor"""
     # Agrupar dados
-    df_grp = df.groupby('TIPO').agg({
+    df_grp = df.groupby('TIPO', observed=True).agg({
         'VALOR_ORIGINAL': ['count', 'sum'],
         'SALDO': 'sum'
     }).reset_index()
     df_grp.columns = ['Tipo', 'Qtd', 'Total', 'Saldo']
 
     # Calcular vencidos
-    df_venc_grp = df_vencidos.groupby('TIPO')['SALDO'].sum().reset_index()
+    df_venc_grp = df_vencidos.groupby('TIPO', observed=True)['SALDO'].sum().reset_index()
     df_venc_grp.columns = ['Tipo', 'Vencido']
     df_grp = df_grp.merge(df_venc_grp, on='Tipo', how='left')
     df_grp['Vencido'] = df_grp['Vencido'].fillna(0)
 
     # Calcular recebidos
-    df_rec = df[df['SALDO'] == 0].groupby('TIPO')['VALOR_ORIGINAL'].sum().reset_index()
+    df_rec = recorte(df, 'recebidos', lambda d: d['SALDO'] == 0).groupby('TIPO', observed=True)['VALOR_ORIGINAL'].sum().reset_index()
     df_rec.columns = ['Tipo', 'Recebido']
     df_grp = df_grp.merge(df_rec, on='Tipo', how='left')
     df_grp['Recebido'] = df_grp['Recebido'].fillna(0)
@@ -382,9 +439,15 @@ def _render_tabela_tipos(df, df_pendentes, df_vencidos, cores):
 
     # Adicionar descricao
     df_grp['Descricao'] = df_grp['Tipo'].map(lambda x: TIPOS_DESC.get(x, '-'))
+    return df_grp
+
+
+def _render_tabela_tipos(df, df_vencidos, cores):
+    """Tabela resumo por tipo de documento"""
+    st.markdown("##### Resumo por Tipo de Documento")
 
     # Formatar
-    df_show = df_grp.copy()
+    df_show = compute_tabela_tipos(df, df_vencidos)
     df_show['Total'] = df_show['Total'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Saldo'] = df_show['Saldo'].apply(lambda x: formatar_moeda(x, completo=True))
     df_show['Vencido'] = df_show['Vencido'].apply(lambda x: formatar_moeda(x, completo=True))
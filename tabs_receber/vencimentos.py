@@ -9,19 +9,20 @@ from datetime import datetime, timedelta
 
 from config.theme import get_cores
 from components.charts import criar_layout
+from data.fluxo_caixa import projetar_fluxo
+from data.secoes import memoizar_secao, recorte
 from utils.formatters import formatar_moeda, formatar_numero
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
 
 
 def get_df_pendentes(df):
     """Retorna titulos com saldo pendente (a vencer)"""
-    df_pend = df[(df['SALDO'] > 0) & (df['STATUS'] != 'Vencido')]
-    return df_pend
+    return recorte(df, 'a_vencer', lambda d: (d['SALDO'] > 0) & (d['STATUS'] != 'Vencido'))
 
 
 def get_df_vencidos(df):
     """Retorna titulos vencidos"""
-    return df[df['STATUS'] == 'Vencido']
+    return recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido')
 
 
 def render_vencimentos_receber(df):
@@ -95,11 +96,15 @@ def _detectar_multiplos_grupos(df):
 # =============================================================================
 # RESUMO GERAL (melhorado com ticket medio e atraso medio)
 # =============================================================================
-def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
-    """Resumo geral dos recebimentos"""
+@memoizar_secao
+def compute_pendentes_e_vencidos(df_pendentes, df_vencidos):
+    """A vencer + vencidos sem linhas repetidas"""
+    return pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
 
-    hoje_date = hoje.date()
 
+@memoizar_secao
+def compute_resumo_geral(df_pendentes, df_vencidos, hoje_date):
+    """Totais pendente/vencido, proximos 30 e 31-60 dias, ticket e atraso medio dos vencidos"""
     total_pendente = df_pendentes['SALDO'].sum() + df_vencidos['SALDO'].sum()
     qtd_pendente = len(df_pendentes) + len(df_vencidos)
 
@@ -121,6 +126,29 @@ def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
 
     pct_vencido = (total_vencido / total_pendente * 100) if total_pendente > 0 else 0
 
+    ticket_medio_vencido = (total_vencido / qtd_vencidos) if qtd_vencidos > 0 else 0
+    dias_atraso_medio = 0
+    if len(df_vencidos) > 0 and 'DIAS_ATRASO' in df_vencidos.columns:
+        dias_atraso_medio = df_vencidos['DIAS_ATRASO'].mean()
+
+    return {
+        'total_pendente': total_pendente, 'qtd_pendente': qtd_pendente,
+        'total_vencido': total_vencido, 'qtd_vencidos': qtd_vencidos, 'pct_vencido': pct_vencido,
+        'valor_30d': valor_30d, 'qtd_30d': qtd_30d,
+        'valor_31_60d': valor_31_60d, 'qtd_31_60d': qtd_31_60d,
+        'ticket_medio_vencido': ticket_medio_vencido, 'dias_atraso_medio': dias_atraso_medio,
+    }
+
+
+def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
+    """Resumo geral dos recebimentos"""
+
+    r = compute_resumo_geral(df_pendentes, df_vencidos, hoje.date())
+    total_pendente, qtd_pendente = r['total_pendente'], r['qtd_pendente']
+    total_vencido, qtd_vencidos, pct_vencido = r['total_vencido'], r['qtd_vencidos'], r['pct_vencido']
+    valor_30d, qtd_30d = r['valor_30d'], r['qtd_30d']
+    valor_31_60d, qtd_31_60d = r['valor_31_60d'], r['qtd_31_60d']
+
     # Cards principais
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; margin-bottom: 1rem;">
@@ -157,12 +185,9 @@ def _render_resumo_geral(df_pendentes, df_vencidos, cores, hoje):
     """, unsafe_allow_html=True)
 
     # Indicadores complementares
-    ticket_medio_vencido = (total_vencido / qtd_vencidos) if qtd_vencidos > 0 else 0
-    dias_atraso_medio = 0
-    if len(df_vencidos) > 0 and 'DIAS_ATRASO' in df_vencidos.columns:
-        dias_atraso_medio = df_vencidos['DIAS_ATRASO'].mean()
-
-    titulos_vencidos = len(df_vencidos)
+    ticket_medio_vencido = r['ticket_medio_vencido']
+    dias_atraso_medio = r['dias_atraso_medio']
+    titulos_vencidos = qtd_vencidos
 
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 0.75rem; margin-bottom: 0.5rem;">
@@ -198,35 +223,21 @@ def _render_calendario_30d(df_pendentes, df_vencidos, cores, hoje):
 
     hoje_date = hoje.date()
 
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
 
     if len(df_all) == 0:
         st.info("Sem dados")
         return
 
-    data_fim = hoje_date + timedelta(days=30)
-    df_futuro = df_all[
-        (df_all['VENCIMENTO'] >= pd.Timestamp(hoje_date)) &
-        (df_all['VENCIMENTO'] <= pd.Timestamp(data_fim))
-    ].copy()
+    # Hoje + 30 dias, dia a dia (data/fluxo_caixa.py)
+    df_dia = projetar_fluxo(df_all, hoje_date, horizonte=31, granularidade='dia')
+    df_dia = df_dia.rename(columns={'INICIO': 'Dia', 'VALOR': 'Valor', 'QTD': 'Qtd'})
 
-    if len(df_futuro) == 0:
+    if df_dia['Qtd'].sum() == 0:
         st.info("Nenhum vencimento nos proximos 30 dias")
         return
 
-    df_futuro['DIA'] = df_futuro['VENCIMENTO'].dt.date
-
-    df_dia = df_futuro.groupby('DIA').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).reset_index()
-    df_dia.columns = ['Dia', 'Valor', 'Qtd']
-
-    # Preencher todos os dias
-    datas = [hoje_date + timedelta(days=i) for i in range(31)]
-    all_days = pd.DataFrame({'Dia': datas})
-    df_dia = all_days.merge(df_dia, on='Dia', how='left').fillna(0)
-    df_dia['Label'] = df_dia['Dia'].apply(lambda d: d.strftime('%d/%m'))
+    df_dia['Label'] = df_dia['Dia'].dt.strftime('%d/%m')
 
     # Cores por intensidade
     max_val = df_dia['Valor'].max() if df_dia['Valor'].max() > 0 else 1
@@ -282,66 +293,74 @@ def _render_calendario_30d(df_pendentes, df_vencidos, cores, hoje):
 # =============================================================================
 # AGING COMPLETO
 # =============================================================================
+_LABELS_FAIXA = {
+    '1_Venc +60 dias': '+60 dias vencido',
+    '2_Venc 31-60 dias': '31-60 dias vencido',
+    '3_Venc 16-30 dias': '16-30 dias vencido',
+    '4_Venc 8-15 dias': '8-15 dias vencido',
+    '5_Venc 1-7 dias': '1-7 dias vencido',
+    '6_Vence em 7 dias': 'Vence em 7 dias',
+    '7_Vence em 8-30 dias': 'Vence em 8-30 dias',
+    '8_Vence em 31-60 dias': 'Vence em 31-60 dias',
+    '9_Vence em +60 dias': 'Vence em +60 dias',
+    '9_Sem data': 'Sem data'
+}
+
+
+def _faixa_vencimento(venc, hoje_date):
+    if pd.isna(venc):
+        return '9_Sem data'
+
+    venc = venc.date() if hasattr(venc, 'date') else venc
+    diff = (venc - hoje_date).days
+
+    if diff < -60:
+        return '1_Venc +60 dias'
+    elif diff < -30:
+        return '2_Venc 31-60 dias'
+    elif diff < -15:
+        return '3_Venc 16-30 dias'
+    elif diff < -7:
+        return '4_Venc 8-15 dias'
+    elif diff < 0:
+        return '5_Venc 1-7 dias'
+    elif diff <= 7:
+        return '6_Vence em 7 dias'
+    elif diff <= 30:
+        return '7_Vence em 8-30 dias'
+    elif diff <= 60:
+        return '8_Vence em 31-60 dias'
+    else:
+        return '9_Vence em +60 dias'
+
+
+@memoizar_secao
+def compute_aging_completo(df_all, hoje_date):
+    """Saldo e quantidade por faixa de vencimento (Faixa, Valor, Qtd, Label)"""
+    df_all = df_all.copy(deep=False)
+    df_all['FAIXA'] = df_all['VENCIMENTO'].apply(_faixa_vencimento, hoje_date=hoje_date)
+
+    df_grp = df_all.groupby('FAIXA', observed=True).agg({
+        'SALDO': 'sum',
+        'NUMERO': 'count'
+    }).sort_index().reset_index()
+    df_grp.columns = ['Faixa', 'Valor', 'Qtd']
+    df_grp['Label'] = df_grp['Faixa'].map(_LABELS_FAIXA)
+    return df_grp
+
+
 def _render_aging_completo(df_pendentes, df_vencidos, cores, hoje):
     """Aging completo - vencidos e a vencer"""
 
     st.markdown("##### Aging - Distribuicao por Faixa de Vencimento")
 
-    hoje_date = hoje.date()
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
 
     if len(df_all) == 0:
         st.info("Sem dados")
         return
 
-    def faixa_vencimento(row):
-        if pd.isna(row.get('VENCIMENTO')):
-            return '9_Sem data'
-
-        venc = row['VENCIMENTO'].date() if hasattr(row['VENCIMENTO'], 'date') else row['VENCIMENTO']
-        diff = (venc - hoje_date).days
-
-        if diff < -60:
-            return '1_Venc +60 dias'
-        elif diff < -30:
-            return '2_Venc 31-60 dias'
-        elif diff < -15:
-            return '3_Venc 16-30 dias'
-        elif diff < -7:
-            return '4_Venc 8-15 dias'
-        elif diff < 0:
-            return '5_Venc 1-7 dias'
-        elif diff <= 7:
-            return '6_Vence em 7 dias'
-        elif diff <= 30:
-            return '7_Vence em 8-30 dias'
-        elif diff <= 60:
-            return '8_Vence em 31-60 dias'
-        else:
-            return '9_Vence em +60 dias'
-
-    df_all['FAIXA'] = df_all.apply(faixa_vencimento, axis=1)
-
-    df_grp = df_all.groupby('FAIXA').agg({
-        'SALDO': 'sum',
-        'NUMERO': 'count'
-    }).sort_index().reset_index()
-    df_grp.columns = ['Faixa', 'Valor', 'Qtd']
-
-    labels = {
-        '1_Venc +60 dias': '+60 dias vencido',
-        '2_Venc 31-60 dias': '31-60 dias vencido',
-        '3_Venc 16-30 dias': '16-30 dias vencido',
-        '4_Venc 8-15 dias': '8-15 dias vencido',
-        '5_Venc 1-7 dias': '1-7 dias vencido',
-        '6_Vence em 7 dias': 'Vence em 7 dias',
-        '7_Vence em 8-30 dias': 'Vence em 8-30 dias',
-        '8_Vence em 31-60 dias': 'Vence em 31-60 dias',
-        '9_Vence em +60 dias': 'Vence em +60 dias',
-        '9_Sem data': 'Sem data'
-    }
-    df_grp['Label'] = df_grp['Faixa'].map(labels)
+    df_grp = compute_aging_completo(df_all, hoje.date())
 
     cores_faixas = {
         '1_Venc +60 dias': '#7f1d1d',
@@ -382,51 +401,44 @@ def _render_aging_completo(df_pendentes, df_vencidos, cores, hoje):
 # =============================================================================
 # FILIAL x AGING
 # =============================================================================
-def _render_filial_aging(df_pendentes, df_vencidos, cores):
-    """Aging por Filial/Grupo - vinculado ao filtro geral"""
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+def _faixa_simples(venc, hoje_date):
+    if pd.isna(venc):
+        return 'Outros'
+    venc = venc.date() if hasattr(venc, 'date') else venc
+    diff = (venc - hoje_date).days
+    if diff < 0:
+        return 'Vencido'
+    elif diff <= 30:
+        return '0-30 dias'
+    elif diff <= 60:
+        return '31-60 dias'
+    else:
+        return '60+ dias'
 
-    if len(df_all) == 0:
-        st.info("Sem dados")
-        return
 
+@memoizar_secao
+def compute_filial_aging(df_all, hoje_date):
+    """(multiplos grupos?, pivot AGRUPAMENTO x faixa de aging com as 12 maiores linhas);
+    pivot None sem NOME_FILIAL quando ha um grupo so"""
+    df_all = df_all.copy(deep=False)
     multiplos = _detectar_multiplos_grupos(df_all)
-    hoje_date = datetime.now().date()
 
     if multiplos:
-        st.markdown("##### Aging por Grupo")
         df_all['AGRUPAMENTO'] = df_all['FILIAL'].apply(
             lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
     else:
-        st.markdown("##### Aging por Filial")
         if 'NOME_FILIAL' not in df_all.columns:
-            st.info("Dados de filial nao disponiveis")
-            return
+            return multiplos, None
         df_all['AGRUPAMENTO'] = (
             df_all['FILIAL'].astype(int).astype(str) + ' - ' +
             df_all['NOME_FILIAL'].str.split(' - ').str[-1].str.strip()
         )
 
     # Classificar em faixas de aging
-    def faixa_simples(row):
-        if pd.isna(row.get('VENCIMENTO')):
-            return 'Outros'
-        venc = row['VENCIMENTO'].date() if hasattr(row['VENCIMENTO'], 'date') else row['VENCIMENTO']
-        diff = (venc - hoje_date).days
-        if diff < 0:
-            return 'Vencido'
-        elif diff <= 30:
-            return '0-30 dias'
-        elif diff <= 60:
-            return '31-60 dias'
-        else:
-            return '60+ dias'
-
-    df_all['FAIXA'] = df_all.apply(faixa_simples, axis=1)
+    df_all['FAIXA'] = df_all['VENCIMENTO'].apply(_faixa_simples, hoje_date=hoje_date)
 
     # Pivot por agrupamento x faixa
-    df_pivot = df_all.groupby(['AGRUPAMENTO', 'FAIXA'])['SALDO'].sum().unstack(fill_value=0).reset_index()
+    df_pivot = df_all.groupby(['AGRUPAMENTO', 'FAIXA'], observed=True)['SALDO'].sum().unstack(fill_value=0).reset_index()
 
     for col in ['Vencido', '0-30 dias', '31-60 dias', '60+ dias']:
         if col not in df_pivot.columns:
@@ -437,6 +449,27 @@ def _render_filial_aging(df_pendentes, df_vencidos, cores):
 
     if len(df_pivot) > 12:
         df_pivot = df_pivot.tail(12)
+    return multiplos, df_pivot
+
+
+def _render_filial_aging(df_pendentes, df_vencidos, cores):
+    """Aging por Filial/Grupo - vinculado ao filtro geral"""
+
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+
+    if len(df_all) == 0:
+        st.info("Sem dados")
+        return
+
+    multiplos, df_pivot = compute_filial_aging(df_all, datetime.now().date())
+
+    if multiplos:
+        st.markdown("##### Aging por Grupo")
+    else:
+        st.markdown("##### Aging por Filial")
+        if df_pivot is None:
+            st.info("Dados de filial nao disponiveis")
+            return
 
     fig = go.Figure()
 
@@ -478,25 +511,22 @@ def _render_filial_aging(df_pendentes, df_vencidos, cores):
 # =============================================================================
 # POR CATEGORIA
 # =============================================================================
-def _render_por_categoria(df_pendentes, df_vencidos, cores):
-    """Saldo a receber por categoria (DESCRICAO) - Vencido vs A Vencer"""
-
-    st.markdown("##### Por Categoria")
-
-    df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
+@memoizar_secao
+def compute_por_categoria(df_pendentes, df_vencidos):
+    """Saldo a receber, vencido e a vencer por categoria (12 maiores); None sem dados"""
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
 
     if len(df_all) == 0 or 'DESCRICAO' not in df_all.columns:
-        st.info("Sem dados de categoria")
-        return
+        return None
 
-    df_cat = df_all.groupby('DESCRICAO').agg({
+    df_cat = df_all.groupby('DESCRICAO', observed=True).agg({
         'SALDO': 'sum',
         'NUMERO': 'count'
     }).reset_index()
     df_cat.columns = ['Categoria', 'Valor', 'Qtd']
 
     if len(df_vencidos) > 0 and 'DESCRICAO' in df_vencidos.columns:
-        df_venc_cat = df_vencidos.groupby('DESCRICAO')['SALDO'].sum().reset_index()
+        df_venc_cat = df_vencidos.groupby('DESCRICAO', observed=True)['SALDO'].sum().reset_index()
         df_venc_cat.columns = ['Categoria', 'Vencido']
         df_cat = df_cat.merge(df_venc_cat, on='Categoria', how='left')
     else:
@@ -509,6 +539,18 @@ def _render_por_categoria(df_pendentes, df_vencidos, cores):
 
     if len(df_cat) > 12:
         df_cat = df_cat.tail(12)
+    return df_cat
+
+
+def _render_por_categoria(df_pendentes, df_vencidos, cores):
+    """Saldo a receber por categoria (DESCRICAO) - Vencido vs A Vencer"""
+
+    st.markdown("##### Por Categoria")
+
+    df_cat = compute_por_categoria(df_pendentes, df_vencidos)
+    if df_cat is None:
+        st.info("Sem dados de categoria")
+        return
 
     fig = go.Figure()
 
@@ -552,6 +594,12 @@ def _render_por_categoria(df_pendentes, df_vencidos, cores):
 # =============================================================================
 # VENCIDOS CRITICOS
 # =============================================================================
+@memoizar_secao
+def compute_vencidos_criticos(df_vencidos, n=15):
+    """Os n vencidos de maior saldo"""
+    return df_vencidos.nlargest(n, 'SALDO')
+
+
 def _render_vencidos_criticos(df_vencidos, cores):
     """Top titulos vencidos - maiores valores com dias de atraso"""
 
@@ -565,11 +613,11 @@ def _render_vencidos_criticos(df_vencidos, cores):
         st.success("Nenhum titulo vencido!")
         return
 
-    df_top = df_vencidos.nlargest(15, 'SALDO').copy()
+    df_top = compute_vencidos_criticos(df_vencidos)
 
     colunas = [col_cliente, 'NOME_FILIAL', 'TIPO', 'NUMERO', 'VENCIMENTO', 'DIAS_ATRASO', 'VALOR_ORIGINAL', 'SALDO']
     colunas_disp = [c for c in colunas if c in df_top.columns]
-    df_show = df_top[colunas_disp].copy()
+    df_show = df_top[colunas_disp]
 
     if col_cliente in df_show.columns:
         df_show[col_cliente] = df_show[col_cliente].str[:30]
@@ -606,26 +654,31 @@ def _render_vencidos_criticos(df_vencidos, cores):
 # =============================================================================
 # CONCENTRACAO VENCIDOS
 # =============================================================================
-def _render_concentracao_vencidos(df_vencidos, cores):
-    """Top clientes com maior valor vencido - concentracao de risco"""
-
-    st.markdown("##### Concentracao - Maiores Devedores Vencidos")
-
-    if len(df_vencidos) == 0:
-        st.success("Nenhum titulo vencido!")
-        return
-
+@memoizar_secao
+def compute_concentracao_vencidos(df_vencidos):
+    """(10 clientes de maior saldo vencido em ordem crescente, total vencido)"""
     col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_vencidos.columns else 'NOME_FORNECEDOR'
 
-    df_cli = df_vencidos.groupby(col_cliente).agg({
+    df_cli = df_vencidos.groupby(col_cliente, observed=True).agg({
         'SALDO': 'sum',
         'DIAS_ATRASO': 'mean',
         'NUMERO': 'count'
     }).reset_index()
     df_cli.columns = ['Cliente', 'Vencido', 'Atraso_Medio', 'Qtd']
     df_cli = df_cli.sort_values('Vencido', ascending=True).tail(10)
+    return df_cli, df_vencidos['SALDO'].sum()
 
-    total_vencido = df_vencidos['SALDO'].sum()
+
+def _render_concentracao_vencidos(df_vencidos, cores):
+    """Top clientes com maior valor vencido - concentracao de risco"""
+
+    st.markdown("##### Concentracao - Maiores Devedores Vencidos")
+
+    if len(df_vencidos) == 0:
+        st.success("Nenhum titulo vencido!")
+        return
+
+    df_cli, total_vencido = compute_concentracao_vencidos(df_vencidos)
 
     def cor_atraso(d):
         if d > 30:
@@ -675,6 +728,47 @@ def _render_concentracao_vencidos(df_vencidos, cores):
 # =============================================================================
 # DETALHAMENTO
 # =============================================================================
+@memoizar_secao
+def compute_opcoes_detalhamento(df_all):
+    """Opcoes de filial e categoria (None sem DESCRICAO) do detalhamento"""
+    filiais = ['Todas'] + sorted([str(x) for x in df_all['NOME_FILIAL'].unique() if pd.notna(x)])
+    categorias = None
+    if 'DESCRICAO' in df_all.columns:
+        categorias = ['Todas'] + sorted([str(x) for x in df_all['DESCRICAO'].unique() if pd.notna(x)])
+    return filiais, categorias
+
+
+@memoizar_secao
+def compute_detalhamento(df_pendentes, df_vencidos, status, filtro_filial, filtro_categoria, ordenar):
+    """Ate 100 titulos do status/filial/categoria escolhidos, na ordem pedida"""
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_all.columns else 'NOME_FORNECEDOR'
+
+    # Aplicar filtros
+    if status == "Vencidos":
+        df_show = df_vencidos.copy(deep=False)
+    elif status == "A Vencer":
+        df_show = df_pendentes.copy(deep=False)
+    else:
+        df_show = df_all
+
+    if filtro_filial != 'Todas':
+        df_show = df_show[df_show['NOME_FILIAL'] == filtro_filial]
+
+    if filtro_categoria != 'Todas' and 'DESCRICAO' in df_show.columns:
+        df_show = df_show[df_show['DESCRICAO'] == filtro_categoria]
+
+    # Ordenar
+    if ordenar == "Maior valor":
+        df_show = df_show.sort_values('SALDO', ascending=False)
+    elif ordenar == "Vencimento":
+        df_show = df_show.sort_values('VENCIMENTO')
+    else:
+        df_show = df_show.sort_values(col_cliente)
+
+    return df_show.head(100)
+
+
 def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
     """Detalhamento com filtros"""
 
@@ -689,20 +783,18 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
             key="venc_rec_status"
         )
 
+    df_all = compute_pendentes_e_vencidos(df_pendentes, df_vencidos)
+    filiais, categorias = compute_opcoes_detalhamento(df_all)
+
     with col2:
-        df_all = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
-        filiais = ['Todas'] + sorted([str(x) for x in df_all['NOME_FILIAL'].unique() if pd.notna(x)])
         filtro_filial = st.selectbox("Filial", filiais, key="venc_rec_filial")
 
     with col3:
-        if 'DESCRICAO' in df_all.columns:
-            categorias = ['Todas'] + sorted([str(x) for x in df_all['DESCRICAO'].unique() if pd.notna(x)])
+        if categorias is not None:
             filtro_categoria = st.selectbox("Categoria", categorias, key="venc_rec_categoria")
         else:
             filtro_categoria = 'Todas'
 
-    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_all.columns else 'NOME_FORNECEDOR'
-
     with col4:
         ordenar = st.selectbox(
             "Ordenar por",
@@ -710,29 +802,8 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
             key="venc_rec_ordem"
         )
 
-    # Aplicar filtros
-    if status == "Vencidos":
-        df_show = df_vencidos.copy()
-    elif status == "A Vencer":
-        df_show = df_pendentes.copy()
-    else:
-        df_show = pd.concat([df_pendentes, df_vencidos]).drop_duplicates()
-
-    if filtro_filial != 'Todas':
-        df_show = df_show[df_show['NOME_FILIAL'] == filtro_filial]
-
-    if filtro_categoria != 'Todas' and 'DESCRICAO' in df_show.columns:
-        df_show = df_show[df_show['DESCRICAO'] == filtro_categoria]
-
-    # Ordenar
-    if ordenar == "Maior valor":
-        df_show = df_show.sort_values('SALDO', ascending=False)
-    elif ordenar == "Vencimento":
-        df_show = df_show.sort_values('VENCIMENTO')
-    else:
-        df_show = df_show.sort_values(col_cliente)
-
-    df_show = df_show.head(100)
+    df_show = compute_detalhamento(df_pendentes, df_vencidos, status, filtro_filial, filtro_categoria, ordenar)
+    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_show.columns else 'NOME_FORNECEDOR'
 
     if len(df_show) == 0:
         st.info("Nenhum titulo encontrado")
@@ -745,7 +816,7 @@ def _render_detalhamento(df_pendentes, df_vencidos, cores, hoje):
     # Tabela
     colunas = ['NOME_FILIAL', col_cliente, 'TIPO', 'NUMERO', 'DESCRICAO', 'VENCIMENTO', 'SALDO', 'STATUS']
     colunas_disp = [c for c in colunas if c in df_show.columns]
-    df_tab = df_show[colunas_disp].copy()
+    df_tab = df_show[colunas_disp]
 
     if 'VENCIMENTO' in df_tab.columns:
         df_tab['VENCIMENTO'] = pd.to_datetime(df_tab['VENCIMENTO']).dt.strftime('%d/%m/%Y')
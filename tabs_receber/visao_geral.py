@@ -11,6 +11,9 @@ from config.theme import get_cores
 from config.settings import GRUPOS_FILIAIS, get_grupo_filial
 from components.charts import criar_layout
 from utils.formatters import formatar_moeda, formatar_numero
+from data.fluxo_caixa import periodo_por_titulo, projetar_fluxo
+from data.periodo import SEM_DATA, chave_periodo, dia_ref, rotulo_mes, soma_faixa, somas_acumuladas
+from data.secoes import memoizar_secao, recorte
 
 
 def render_visao_geral_receber(df):
@@ -23,15 +26,16 @@ def render_visao_geral_receber(df):
         return
 
     # Calcular metricas
-    df_pendentes = df[df['SALDO'] > 0]
-    df_vencidos = df[df['STATUS'] == 'Vencido']
+    df_pendentes = recorte(df, 'pendentes', lambda d: d['SALDO'] > 0)
+    df_vencidos = recorte(df, 'vencidos', lambda d: d['STATUS'] == 'Vencido')
 
-    total = df['VALOR_ORIGINAL'].sum()
-    recebido = total - df['SALDO'].sum()
-    pendente = df['SALDO'].sum()
-    vencido = df_vencidos['SALDO'].sum()
-    pct_recebido = (recebido / total * 100) if total > 0 else 0
-    pct_vencido = (vencido / pendente * 100) if pendente > 0 else 0
+    metricas = compute_metricas(df, df_vencidos)
+    total = metricas['total']
+    recebido = metricas['recebido']
+    pendente = metricas['pendente']
+    vencido = metricas['vencido']
+    pct_recebido = metricas['pct_recebido']
+    pct_vencido = metricas['pct_vencido']
 
     # ========== CARDS PRINCIPAIS ==========
     st.markdown(f"""
@@ -119,6 +123,36 @@ def render_visao_geral_receber(df):
     _render_tabela_filiais(df, df_pendentes, df_vencidos, cores)
 
 
+@memoizar_secao
+def compute_metricas(df, df_vencidos):
+    """Totais dos cards: emitido, recebido, pendente, vencido e percentuais"""
+    total = df['VALOR_ORIGINAL'].sum()
+    recebido = total - df['SALDO'].sum()
+    pendente = df['SALDO'].sum()
+    vencido = df_vencidos['SALDO'].sum()
+    return {
+        'total': total,
+        'recebido': recebido,
+        'pendente': pendente,
+        'vencido': vencido,
+        'pct_recebido': (recebido / total * 100) if total > 0 else 0,
+        'pct_vencido': (vencido / pendente * 100) if pendente > 0 else 0,
+    }
+
+
+@memoizar_secao
+def compute_alertas_recebimentos(df_pendentes, hoje_date):
+    """(valor, qtd) que vence hoje, amanha e de hoje ate 7 dias"""
+    # Saldo acumulado por dia de vencimento: cada janela sao duas buscas binarias
+    dias, acumulado = somas_acumuladas(chave_periodo(df_pendentes, 'VENCIMENTO'), df_pendentes['SALDO'])
+    dia_hoje = dia_ref(hoje_date)
+    return {
+        'hoje': soma_faixa(dias, acumulado, dia_hoje, dia_hoje),
+        'amanha': soma_faixa(dias, acumulado, dia_hoje + 1, dia_hoje + 1),
+        'semana': soma_faixa(dias, acumulado, dia_hoje, dia_hoje + 7),
+    }
+
+
 def _render_alertas_recebimentos(df_pendentes, df_vencidos, cores, hoje):
     """Alertas de recebimentos - hoje, amanha, semana"""
 
@@ -126,23 +160,10 @@ def _render_alertas_recebimentos(df_pendentes, df_vencidos, cores, hoje):
     amanha = hoje_date + timedelta(days=1)
     fim_semana = hoje_date + timedelta(days=7)
 
-    if len(df_pendentes) > 0:
-        df_hoje = df_pendentes[df_pendentes['VENCIMENTO'].dt.normalize() == pd.Timestamp(hoje_date)]
-        df_amanha = df_pendentes[df_pendentes['VENCIMENTO'].dt.normalize() == pd.Timestamp(amanha)]
-        df_semana = df_pendentes[
-            (df_pendentes['VENCIMENTO'].dt.normalize() >= pd.Timestamp(hoje_date)) &
-            (df_pendentes['VENCIMENTO'].dt.normalize() <= pd.Timestamp(fim_semana))
-        ]
-    else:
-        df_hoje = df_amanha = df_semana = pd.DataFrame()
-
-    valor_hoje = df_hoje['SALDO'].sum() if len(df_hoje) > 0 else 0
-    valor_amanha = df_amanha['SALDO'].sum() if len(df_amanha) > 0 else 0
-    valor_semana = df_semana['SALDO'].sum() if len(df_semana) > 0 else 0
-
-    qtd_hoje = len(df_hoje)
-    qtd_amanha = len(df_amanha)
-    qtd_semana = len(df_semana)
+    alertas = compute_alertas_recebimentos(df_pendentes, hoje_date)
+    valor_hoje, qtd_hoje = alertas['hoje']
+    valor_amanha, qtd_amanha = alertas['amanha']
+    valor_semana, qtd_semana = alertas['semana']
 
     label_semana = f"Hoje ate {fim_semana.strftime('%d/%m')}"
 
@@ -179,9 +200,9 @@ def _render_alertas_recebimentos(df_pendentes, df_vencidos, cores, hoje):
     """, unsafe_allow_html=True)
 
 
-def _render_aging_cards(df_pendentes, cores):
-    """Cards de aging por faixa de vencimento"""
-
+@memoizar_secao
+def compute_aging_cards(df_pendentes):
+    """Saldo e quantidade vencidos e a vencer em ate 7, 15 e 30 dias"""
     vencido = df_pendentes[df_pendentes['STATUS'] == 'Vencido']['SALDO'].sum()
     qtd_vencido = len(df_pendentes[df_pendentes['STATUS'] == 'Vencido'])
 
@@ -198,6 +219,22 @@ def _render_aging_cards(df_pendentes, cores):
     qtd_15d = len(ate_15d)
     vence_30d = ate_30d['SALDO'].sum() if len(ate_30d) > 0 else 0
     qtd_30d = len(ate_30d)
+    return {
+        'vencido': (vencido, qtd_vencido),
+        '7d': (vence_7d, qtd_7d),
+        '15d': (vence_15d, qtd_15d),
+        '30d': (vence_30d, qtd_30d),
+    }
+
+
+def _render_aging_cards(df_pendentes, cores):
+    """Cards de aging por faixa de vencimento"""
+
+    aging = compute_aging_cards(df_pendentes)
+    vencido, qtd_vencido = aging['vencido']
+    vence_7d, qtd_7d = aging['7d']
+    vence_15d, qtd_15d = aging['15d']
+    vence_30d, qtd_30d = aging['30d']
 
     st.markdown(f"""
     <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 0.75rem;">
@@ -267,10 +304,10 @@ def _render_por_filial(df_pendentes, cores):
     if multiplos_grupos:
         # Agrupar por GRUPO
         st.markdown("##### Saldo por Grupo")
-        df_temp = df_pendentes.copy()
+        df_temp = df_pendentes.copy(deep=False)
         df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
 
-        df_grp = df_temp.groupby('GRUPO').agg({
+        df_grp = df_temp.groupby('GRUPO', observed=True).agg({
             'SALDO': 'sum',
             'VALOR_ORIGINAL': 'count'
         }).reset_index()
@@ -298,7 +335,7 @@ def _render_por_filial(df_pendentes, cores):
     else:
         # Agrupar por filial individual (dentro de um grupo)
         st.markdown("##### Saldo por Filial")
-        df_filial = df_pendentes.groupby(['FILIAL', 'NOME_FILIAL']).agg({
+        df_filial = df_pendentes.groupby(['FILIAL', 'NOME_FILIAL'], observed=True).agg({
             'SALDO': 'sum',
             'VALOR_ORIGINAL': 'count'
         }).reset_index()
@@ -329,6 +366,22 @@ def _render_por_filial(df_pendentes, cores):
         st.plotly_chart(fig, use_container_width=True)
 
 
+@memoizar_secao
+def compute_top_categorias(df_pendentes):
+    """10 categorias de maior saldo pendente; None sem coluna de categoria"""
+    col_cat = 'CATEGORIA' if 'CATEGORIA' in df_pendentes.columns else 'DESCRICAO'
+
+    if col_cat not in df_pendentes.columns:
+        return None
+
+    df_cat = df_pendentes.groupby(col_cat, observed=True).agg({
+        'SALDO': 'sum',
+        'VALOR_ORIGINAL': 'count'
+    }).reset_index()
+    df_cat.columns = ['Categoria', 'Saldo', 'Qtd']
+    return df_cat.sort_values('Saldo', ascending=False).head(10)
+
+
 def _render_top_categorias(df_pendentes, cores):
     """Top categorias por saldo"""
 
@@ -338,19 +391,11 @@ def _render_top_categorias(df_pendentes, cores):
         st.info("Sem saldo pendente")
         return
 
-    col_cat = 'CATEGORIA' if 'CATEGORIA' in df_pendentes.columns else 'DESCRICAO'
-
-    if col_cat not in df_pendentes.columns:
+    df_cat = compute_top_categorias(df_pendentes)
+    if df_cat is None:
         st.info("Dados de categoria nao disponiveis.")
         return
 
-    df_cat = df_pendentes.groupby(col_cat).agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).reset_index()
-    df_cat.columns = ['Categoria', 'Saldo', 'Qtd']
-    df_cat = df_cat.sort_values('Saldo', ascending=False).head(10)
-
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
@@ -377,34 +422,44 @@ def _render_pago_pendente_filial(df, cores):
     _render_recebido_pendente_filial(df, cores)
 
 
-def _render_recebido_pendente_filial(df, cores):
-    """Graficos de Recebido e Pendente - por Grupo ou por Filial conforme filtro"""
-
+@memoizar_secao
+def compute_recebido_pendente_filial(df):
+    """(multiplos grupos?, recebido e saldo por GRUPO ou NOME_FILIAL); None sem dados"""
     if len(df) == 0:
-        return
+        return None
 
     multiplos_grupos = _detectar_multiplos_grupos(df)
 
     if multiplos_grupos:
         # Agrupar por GRUPO
-        df_temp = df.copy()
+        df_temp = df.copy(deep=False)
         df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-        df_agg = df_temp.groupby('GRUPO').agg({
+        df_agg = df_temp.groupby('GRUPO', observed=True).agg({
             'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'
         }).reset_index()
-        df_agg['RECEBIDO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
-        df_agg = df_agg[(df_agg['RECEBIDO'] > 0) | (df_agg['SALDO'] > 0)]
-        label_col = 'GRUPO'
-        titulo_rec = '##### Recebido por Grupo'
-        titulo_pend = '##### Pendente por Grupo'
     else:
         if 'NOME_FILIAL' not in df.columns:
-            return
-        df_agg = df.groupby('NOME_FILIAL').agg({
+            return None
+        df_agg = df.groupby('NOME_FILIAL', observed=True).agg({
             'VALOR_ORIGINAL': 'sum', 'SALDO': 'sum'
         }).reset_index()
-        df_agg['RECEBIDO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
-        df_agg = df_agg[(df_agg['RECEBIDO'] > 0) | (df_agg['SALDO'] > 0)]
+    df_agg['RECEBIDO'] = df_agg['VALOR_ORIGINAL'] - df_agg['SALDO']
+    return multiplos_grupos, df_agg[(df_agg['RECEBIDO'] > 0) | (df_agg['SALDO'] > 0)]
+
+
+def _render_recebido_pendente_filial(df, cores):
+    """Graficos de Recebido e Pendente - por Grupo ou por Filial conforme filtro"""
+
+    resultado = compute_recebido_pendente_filial(df)
+    if resultado is None:
+        return
+    multiplos_grupos, df_agg = resultado
+
+    if multiplos_grupos:
+        label_col = 'GRUPO'
+        titulo_rec = '##### Recebido por Grupo'
+        titulo_pend = '##### Pendente por Grupo'
+    else:
         label_col = 'NOME_FILIAL'
         titulo_rec = '##### Recebido por Filial'
         titulo_pend = '##### Pendente por Filial'
@@ -460,6 +515,31 @@ def _render_recebido_pendente_filial(df, cores):
             st.info("Nenhum titulo pendente")
 
 
+@memoizar_secao
+def compute_fluxo_caixa(df_pendentes, hoje_date):
+    """(ha vencimento futuro?, projecao das proximas 8 semanas ou None se nao ha nenhum nelas)"""
+    if not (chave_periodo(df_pendentes, 'VENCIMENTO') >= dia_ref(hoje_date)).any():
+        return False, None
+
+    # Semana de cada titulo pendente (1..8; 0 = vencido, sem data ou alem de 8 semanas)
+    if not (periodo_por_titulo(df_pendentes, hoje_date, horizonte=8) > 0).any():
+        return True, None
+
+    df_sem = projetar_fluxo(df_pendentes, hoje_date, horizonte=8)
+    return True, df_sem.rename(columns={'VALOR': 'Valor', 'QTD': 'Qtd'})
+
+
+@memoizar_secao
+def compute_detalhe_semana(df_pendentes, hoje_date, num_semana):
+    """Titulos pendentes que vencem na semana `num_semana`, do maior saldo para o menor"""
+    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_pendentes.columns else 'NOME_FORNECEDOR'
+    semana = periodo_por_titulo(df_pendentes, hoje_date, horizonte=8)
+    df_detalhe = df_pendentes[semana == num_semana]
+    colunas = [col_cliente, 'TIPO', 'NUMERO', 'VENCIMENTO', 'SALDO', 'NOME_FILIAL', 'DESCRICAO']
+    colunas_disp = [c for c in colunas if c in df_detalhe.columns]
+    return df_detalhe[colunas_disp].sort_values('SALDO', ascending=False)
+
+
 def _render_fluxo_caixa(df_pendentes, cores, hoje):
     """Fluxo de caixa - recebimentos futuros por semana"""
 
@@ -471,42 +551,20 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
 
     hoje_date = hoje.date() if hasattr(hoje, 'date') else hoje
 
-    df_futuro = df_pendentes[df_pendentes['VENCIMENTO'] >= pd.Timestamp(hoje_date)].copy()
-
-    if len(df_futuro) == 0:
+    tem_futuro, df_sem = compute_fluxo_caixa(df_pendentes, hoje_date)
+    if not tem_futuro:
         st.success("Nenhum vencimento futuro pendente")
         return
-
-    limite = pd.Timestamp(hoje_date + timedelta(days=56))
-    df_futuro = df_futuro[df_futuro['VENCIMENTO'] < limite].copy()
-
-    if len(df_futuro) == 0:
+    if df_sem is None:
         st.success("Nenhum vencimento nas proximas 8 semanas")
         return
 
-    df_futuro['SEMANA'] = df_futuro['VENCIMENTO'].apply(
-        lambda d: (d.date() - hoje_date).days // 7 + 1 if pd.notna(d) else None
-    )
-    df_futuro = df_futuro[df_futuro['SEMANA'].notna()]
-
-    df_sem = df_futuro.groupby('SEMANA').agg({
-        'SALDO': 'sum',
-        'VALOR_ORIGINAL': 'count'
-    }).reset_index()
-    df_sem.columns = ['Semana', 'Valor', 'Qtd']
-
-    todas_semanas = pd.DataFrame({'Semana': range(1, 9)})
-    df_sem = todas_semanas.merge(df_sem, on='Semana', how='left').fillna(0)
-
     # Gerar labels e mapeamento semana -> periodo
     labels = []
     semana_labels = {}
-    for i in range(1, 9):
-        inicio = hoje_date + timedelta(days=(i-1)*7)
-        fim = hoje_date + timedelta(days=i*7 - 1)
-        label = f"S{i} ({inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')})"
+    for i, inicio, fim in zip(df_sem['PERIODO'], df_sem['INICIO'], df_sem['FIM']):
         labels.append(f"S{i}\n{inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')}")
-        semana_labels[i] = label
+        semana_labels[int(i)] = f"S{i} ({inicio.strftime('%d/%m')}-{fim.strftime('%d/%m')})"
 
     cores_semana = [
         cores['perigo'], cores['alerta'], '#f59e0b', '#84cc16',
@@ -538,12 +596,11 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
     st.caption(f"**Total proximas 8 semanas:** {formatar_moeda(total_futuro)} | Vencimentos alem de 8 semanas nao sao exibidos.")
 
     # Detalhamento por semana
-    semanas_com_dados = [int(s) for s in df_futuro['SEMANA'].unique()]
-    semanas_com_dados.sort()
+    semanas_com_dados = [int(s) for s in df_sem.loc[df_sem['Qtd'] > 0, 'PERIODO']]
     opcoes = {semana_labels[s]: s for s in semanas_com_dados if s in semana_labels}
 
     if opcoes:
-        col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_futuro.columns else 'NOME_FORNECEDOR'
+        col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_pendentes.columns else 'NOME_FORNECEDOR'
 
         semana_sel = st.selectbox(
             "Detalhar semana:",
@@ -551,13 +608,9 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
             key="fluxo_semana_detalhe_receber"
         )
         num_semana = opcoes[semana_sel]
-        df_detalhe = df_futuro[df_futuro['SEMANA'] == num_semana].copy()
-
-        if len(df_detalhe) > 0:
-            colunas = [col_cliente, 'TIPO', 'NUMERO', 'VENCIMENTO', 'SALDO', 'NOME_FILIAL', 'DESCRICAO']
-            colunas_disp = [c for c in colunas if c in df_detalhe.columns]
-            df_show = df_detalhe[colunas_disp].sort_values('SALDO', ascending=False).copy()
+        df_show = compute_detalhe_semana(df_pendentes, hoje_date, num_semana)
 
+        if len(df_show) > 0:
             if col_cliente in df_show.columns:
                 df_show[col_cliente] = df_show[col_cliente].str[:30]
             if 'NOME_FILIAL' in df_show.columns:
@@ -580,6 +633,20 @@ def _render_fluxo_caixa(df_pendentes, cores, hoje):
             st.dataframe(df_show, use_container_width=True, hide_index=True, height=300)
 
 
+@memoizar_secao
+def compute_top_clientes(df_pendentes):
+    """10 clientes de maior saldo pendente, em ordem crescente; None sem coluna de cliente"""
+    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_pendentes.columns else 'NOME_FORNECEDOR'
+
+    if col_cliente not in df_pendentes.columns:
+        return None
+
+    df_top = df_pendentes.groupby(col_cliente, observed=True)['SALDO'].sum().reset_index()
+    df_top.columns = ['Cliente', 'Pendente']
+    df_top = df_top.nlargest(10, 'Pendente')
+    return df_top.sort_values('Pendente', ascending=True)
+
+
 def _render_top_clientes(df_pendentes, cores):
     """Top 10 clientes com maior valor pendente a receber"""
 
@@ -589,17 +656,11 @@ def _render_top_clientes(df_pendentes, cores):
         st.info("Sem pendente a receber")
         return
 
-    col_cliente = 'NOME_CLIENTE' if 'NOME_CLIENTE' in df_pendentes.columns else 'NOME_FORNECEDOR'
-
-    if col_cliente not in df_pendentes.columns:
+    df_top = compute_top_clientes(df_pendentes)
+    if df_top is None:
         st.info("Dados de cliente nao disponiveis.")
         return
 
-    df_top = df_pendentes.groupby(col_cliente)['SALDO'].sum().reset_index()
-    df_top.columns = ['Cliente', 'Pendente']
-    df_top = df_top.nlargest(10, 'Pendente')
-    df_top = df_top.sort_values('Pendente', ascending=True)
-
     if len(df_top) == 0:
         st.info("Sem dados")
         return
@@ -628,27 +689,35 @@ def _render_top_clientes(df_pendentes, cores):
     st.caption("Top 10 clientes rankeados pelo valor pendente a receber.")
 
 
-def _render_evolucao_mensal(df, cores):
-    """Evolucao mensal de emissao e recebimento"""
-
-    st.markdown("##### Evolucao Mensal")
-
+@memoizar_secao
+def compute_evolucao_mensal(df):
+    """Emitido, recebido, saldo e % recebido dos ultimos 12 meses de emissao; None sem EMISSAO"""
     if 'EMISSAO' not in df.columns:
-        st.info("Dados de evolucao nao disponiveis")
-        return
+        return None
 
-    df_temp = df.copy()
-    df_temp['MES'] = df_temp['EMISSAO'].dt.to_period('M')
+    df_temp = df.copy(deep=False)
+    df_temp['MES'] = chave_periodo(df_temp, 'EMISSAO', 'AAAAMM')
 
-    df_mes = df_temp.groupby('MES').agg({
+    df_mes = df_temp[df_temp['MES'] != SEM_DATA].groupby('MES', observed=True).agg({
         'VALOR_ORIGINAL': 'sum',
         'SALDO': 'sum'
     }).reset_index()
 
-    df_mes['MES'] = df_mes['MES'].astype(str)
+    df_mes['MES'] = rotulo_mes(df_mes['MES'])
     df_mes['Recebido'] = df_mes['VALOR_ORIGINAL'] - df_mes['SALDO']
     df_mes['Taxa'] = (df_mes['Recebido'] / df_mes['VALOR_ORIGINAL'] * 100).fillna(0)
-    df_mes = df_mes.tail(12)
+    return df_mes.tail(12)
+
+
+def _render_evolucao_mensal(df, cores):
+    """Evolucao mensal de emissao e recebimento"""
+
+    st.markdown("##### Evolucao Mensal")
+
+    df_mes = compute_evolucao_mensal(df)
+    if df_mes is None:
+        st.info("Dados de evolucao nao disponiveis")
+        return
 
     if len(df_mes) < 2:
         st.info("Dados insuficientes para evolucao")
@@ -694,22 +763,16 @@ def _render_evolucao_mensal(df, cores):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
-    """Tabela detalhada - por Grupo quando vendo todas, por filial quando filtrado"""
-
-    if len(df) == 0:
-        st.info("Sem dados")
-        return
-
+@memoizar_secao
+def compute_tabela_filiais(df, df_vencidos):
+    """(multiplos grupos?, resumo por GRUPO ou FILIAL com recebido, saldo, vencido e %)"""
     multiplos_grupos = _detectar_multiplos_grupos(df)
 
     if multiplos_grupos:
-        st.markdown("##### Resumo por Grupo")
-
-        df_temp = df.copy()
+        df_temp = df.copy(deep=False)
         df_temp['GRUPO'] = df_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
 
-        df_resumo = df_temp.groupby('GRUPO').agg({
+        df_resumo = df_temp.groupby('GRUPO', observed=True).agg({
             'VALOR_ORIGINAL': 'sum',
             'SALDO': 'sum',
             'NUMERO': 'count',
@@ -718,10 +781,10 @@ def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
         df_resumo.columns = ['Grupo', 'Total', 'Saldo', 'Titulos', 'Filiais']
 
         # Vencidos por grupo
-        df_venc_temp = df_vencidos.copy()
+        df_venc_temp = df_vencidos.copy(deep=False)
         if len(df_venc_temp) > 0:
             df_venc_temp['GRUPO'] = df_venc_temp['FILIAL'].apply(lambda x: _get_nome_grupo(x) if pd.notna(x) else 'Outros')
-            df_venc_grp = df_venc_temp.groupby('GRUPO')['SALDO'].sum().reset_index()
+            df_venc_grp = df_venc_temp.groupby('GRUPO', observed=True)['SALDO'].sum().reset_index()
             df_venc_grp.columns = ['Grupo', 'Vencido']
             df_resumo = df_resumo.merge(df_venc_grp, on='Grupo', how='left')
         else:
@@ -732,25 +795,14 @@ def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
         df_resumo['% Recebido'] = (df_resumo['Recebido'] / df_resumo['Total'] * 100).round(1)
         df_resumo['% Vencido'] = (df_resumo['Vencido'] / df_resumo['Saldo'] * 100).fillna(0).round(1)
         df_resumo = df_resumo.sort_values('Saldo', ascending=False)
-
-        df_display = df_resumo[['Grupo', 'Filiais', 'Titulos', 'Total', 'Recebido', 'Saldo', 'Vencido', '% Recebido', '% Vencido']].copy()
-        df_display['Total'] = df_display['Total'].apply(formatar_moeda)
-        df_display['Recebido'] = df_display['Recebido'].apply(formatar_moeda)
-        df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
-        df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
-        df_display['% Recebido'] = df_display['% Recebido'].apply(lambda x: f"{x:.1f}%")
-        df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
-        df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
     else:
-        st.markdown("##### Resumo por Filial")
-
-        df_resumo = df.groupby(['FILIAL', 'NOME_FILIAL']).agg({
+        df_resumo = df.groupby(['FILIAL', 'NOME_FILIAL'], observed=True).agg({
             'VALOR_ORIGINAL': 'sum',
             'SALDO': 'sum',
             'NUMERO': 'count'
         }).reset_index()
 
-        df_venc_filial = df_vencidos.groupby('FILIAL')['SALDO'].sum().reset_index()
+        df_venc_filial = df_vencidos.groupby('FILIAL', observed=True)['SALDO'].sum().reset_index()
         df_venc_filial.columns = ['FILIAL', 'Vencido']
 
         df_resumo = df_resumo.merge(df_venc_filial, on='FILIAL', how='left')
@@ -768,15 +820,32 @@ def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
             'NUMERO': 'Titulos'
         })
         df_resumo = df_resumo.sort_values('Saldo', ascending=False)
+    return multiplos_grupos, df_resumo
+
+
+def _render_tabela_filiais(df, df_pendentes, df_vencidos, cores):
+    """Tabela detalhada - por Grupo quando vendo todas, por filial quando filtrado"""
+
+    if len(df) == 0:
+        st.info("Sem dados")
+        return
+
+    multiplos_grupos, df_resumo = compute_tabela_filiais(df, df_vencidos)
 
-        df_display = df_resumo[['Cod', 'Filial', 'Titulos', 'Total', 'Recebido', 'Saldo', 'Vencido', '% Recebido', '% Vencido']].copy()
-        df_display['Total'] = df_display['Total'].apply(formatar_moeda)
-        df_display['Recebido'] = df_display['Recebido'].apply(formatar_moeda)
-        df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
-        df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
-        df_display['% Recebido'] = df_display['% Recebido'].apply(lambda x: f"{x:.1f}%")
-        df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
-        df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
+    if multiplos_grupos:
+        st.markdown("##### Resumo por Grupo")
+        df_display = df_resumo[['Grupo', 'Filiais', 'Titulos', 'Total', 'Recebido', 'Saldo', 'Vencido', '% Recebido', '% Vencido']]
+    else:
+        st.markdown("##### Resumo por Filial")
+        df_display = df_resumo[['Cod', 'Filial', 'Titulos', 'Total', 'Recebido', 'Saldo', 'Vencido', '% Recebido', '% Vencido']]
+
+    df_display['Total'] = df_display['Total'].apply(formatar_moeda)
+    df_display['Recebido'] = df_display['Recebido'].apply(formatar_moeda)
+    df_display['Saldo'] = df_display['Saldo'].apply(formatar_moeda)
+    df_display['Vencido'] = df_display['Vencido'].apply(formatar_moeda)
+    df_display['% Recebido'] = df_display['% Recebido'].apply(lambda x: f"{x:.1f}%")
+    df_display['% Vencido'] = df_display['% Vencido'].apply(lambda x: f"{x:.1f}%")
+    df_display['Titulos'] = df_display['Titulos'].apply(formatar_numero)
 
     st.dataframe(
         df_display,
@@ -0,0 +1,37 @@
+"""
+Testes da curva ABC (data/abc.py)
+"""
+import pandas as pd
+
+from data.abc import classes_abc, curva_abc, curva_abc_recorte
+
+COLUNAS_CURVA = ['PCT', 'PCT_ACUM', 'CLASSE', 'RANK']
+
+
+def _recorte(valores):
+    return pd.DataFrame({
+        'NOME_FORNECEDOR': [f'F{i}' for i in range(len(valores))],
+        'VALOR_ORIGINAL': valores,
+        'SALDO': [0.0] * len(valores),
+    })
+
+
+def test_classes_por_acumulado():
+    classes = classes_abc(_recorte([70.0, 15.0, 10.0, 5.0]), 'NOME_FORNECEDOR')
+    assert classes.to_dict() == {'F0': 'A', 'F1': 'B', 'F2': 'B', 'F3': 'C'}
+
+
+def test_total_zero_retorna_curva_vazia_com_colunas():
+    curva = curva_abc_recorte(_recorte([0.0, 0.0]), 'NOME_FORNECEDOR')
+    assert len(curva) == 0
+    assert all(c in curva.columns for c in COLUNAS_CURVA)
+    assert list(curva['CLASSE'].cat.categories) == ['A', 'B', 'C']
+    assert classes_abc(_recorte([0.0, 0.0]), 'NOME_FORNECEDOR').empty
+
+
+def test_agregado_vazio():
+    agregado = pd.DataFrame({'NOME_FORNECEDOR': pd.Series(dtype=object), 'VALOR_ORIGINAL': pd.Series(dtype=float)})
+    curva = curva_abc(agregado, 'NOME_FORNECEDOR', 'VALOR_ORIGINAL')
+    assert len(curva) == 0
+    assert all(c in curva.columns for c in COLUNAS_CURVA)
+    assert classes_abc(_recorte([]), 'NOME_FORNECEDOR').empty
@@ -0,0 +1,43 @@
+"""
+Testes da busca por trigramas (data/busca.py)
+"""
+import numpy as np
+import pandas as pd
+
+from data.busca import BuscaColuna, buscar, normalizar_consulta
+
+NOMES = ['ACME LTDA', 'Acme Comercio', 'BETA S.A.', None, 'GAMMA', 'acme ltda', 'BETA SA']
+CONSULTAS = ['acme', 'ACME LTDA', 'ltd', 'me', 'beta s', 'zzz', 'a', 's.a.', 'cme com']
+
+
+def _esperado(serie, consulta):
+    # Expressao que a busca substitui, com a consulta como trecho literal (nulos nunca casam)
+    return serie.str.contains(consulta, case=False, regex=False, na=False).to_numpy(dtype=bool)
+
+
+def test_buscar_igual_str_contains_em_texto_e_categorica():
+    for serie in (pd.Series(NOMES), pd.Series(NOMES, dtype='category')):
+        for consulta in CONSULTAS:
+            np.testing.assert_array_equal(buscar(serie, consulta), _esperado(serie, consulta), err_msg=consulta)
+
+
+def test_consulta_e_literal_nao_regex():
+    serie = pd.Series(['BETA S.A.', 'BETASXAX', 'X(1)'])
+    assert buscar(serie, 's.a').tolist() == [True, False, False]
+    assert buscar(serie, '(1').tolist() == [False, False, True]
+
+
+def test_busca_coluna_linhas_e_contem():
+    numeros = pd.Series(['1001', '2025/014 ', None, '10010', '77', '1001'])
+    busca = BuscaColuna(numeros)
+    for consulta in ['1001', '100', '2025/', '7', '999']:
+        esperado = _esperado(numeros, consulta)
+        np.testing.assert_array_equal(busca.linhas(consulta), np.flatnonzero(esperado))
+        posicoes = np.array([5, 0, 3])
+        np.testing.assert_array_equal(busca.contem(consulta, posicoes), esperado[posicoes])
+
+
+def test_normalizar_consulta():
+    assert normalizar_consulta('  Acme ') == 'acme'
+    assert normalizar_consulta('   ') == ''
+    assert normalizar_consulta(None) == ''
@@ -0,0 +1,62 @@
+"""
+Testes do cache de resultados com LRU por bytes (data/cache_resultados.py)
+"""
+import numpy as np
+import pandas as pd
+
+from data.cache_resultados import CacheResultados, _tamanho
+
+
+def _array(kb):
+    return np.zeros(kb * 1024 // 8, dtype='float64')
+
+
+def test_calcula_uma_vez_e_conta_acertos():
+    cache = CacheResultados(max_bytes=1 << 20)
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return _array(1)
+
+    primeiro = cache.obter('a', calcular)
+    assert cache.obter('a', calcular) is primeiro
+    assert len(chamadas) == 1
+    assert not primeiro.flags.writeable
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas'], estatisticas['itens']) == (1, 1, 1)
+    assert estatisticas['bytes'] == _tamanho(primeiro)
+
+
+def test_remove_o_menos_usado_dentro_do_orcamento():
+    tamanho = _tamanho(_array(10))
+    cache = CacheResultados(max_bytes=3 * tamanho)
+    for chave in 'abc':
+        cache.obter(chave, lambda: _array(10))
+    cache.obter('a', lambda: _array(10))  # 'a' passa a ser o mais recente
+    cache.obter('d', lambda: _array(10))  # estoura o orcamento: sai 'b'
+
+    recalculadas = []
+    for chave in 'acd':
+        cache.obter(chave, lambda: recalculadas.append(chave) or _array(10))
+    assert recalculadas == []
+    cache.obter('b', lambda: recalculadas.append('b') or _array(10))
+    assert recalculadas == ['b']
+    assert cache.estatisticas()['bytes'] <= 3 * tamanho
+    assert cache.estatisticas()['itens'] == 3
+
+
+def test_resultado_maior_que_o_orcamento_nao_fica_em_cache():
+    cache = CacheResultados(max_bytes=_tamanho(_array(1)))
+    cache.obter('pequeno', lambda: _array(1))
+    grande = cache.obter('grande', lambda: _array(64))
+    assert len(grande) == 64 * 1024 // 8
+    assert cache.estatisticas()['itens'] == 1
+    cache.limpar()
+    assert cache.estatisticas()['bytes'] == 0
+
+
+def test_tamanho_de_frames_e_containers():
+    df = pd.DataFrame({'A': np.arange(1000), 'B': ['x' * 10] * 1000})
+    assert _tamanho(df) >= df.memory_usage(deep=True).sum()
+    assert _tamanho((df, {'n': _array(1)})) > _tamanho(df) + _array(1).nbytes
@@ -0,0 +1,125 @@
+"""
+Testes da conciliacao intercompany titulo a titulo (data/conciliacao_ic.py)
+"""
+import numpy as np
+import pandas as pd
+
+from data.conciliacao_ic import conciliar_titulos
+
+
+def _titulos(linhas, index=None):
+    df = pd.DataFrame(linhas, columns=['GRUPO_ORIGEM', 'GRUPO_DESTINO', 'NUMERO', 'EMISSAO', 'VENCIMENTO',
+                                       'VALOR_ORIGINAL', 'SALDO'], index=index)
+    df['EMISSAO'] = pd.to_datetime(df['EMISSAO'])
+    df['VENCIMENTO'] = pd.to_datetime(df['VENCIMENTO'])
+    return df
+
+
+def _situacoes(pendencias, lado):
+    pend = pendencias[pendencias['LADO'] == lado]
+    return dict(zip(pend['ID'], pend['SITUACAO'].astype(str)))
+
+
+def test_tolerancia_janela_e_documento():
+    # A Pagar de AG3 para SDS casa com A Receber de SDS (origem) cobrando AG3 (destino)
+    pagar = _titulos([
+        ('AG3', 'SDS', 'NF 001', '2024-01-10', '2024-02-10', 100.00, 100.00),  # valor no limite (1,00)
+        ('AG3', 'SDS', '77', '2024-01-10', '2024-02-10', 200.00, 0.00),        # diferenca 1,01: fora
+        ('AG3', 'SDS', '55', '2024-01-10', '2024-02-10', 300.00, 50.00),       # documento diferente
+        ('AG3', 'SDS', None, '2024-01-10', None, 400.00, 400.00),              # sem numero e sem vencimento
+        ('AG3', 'SDS', '9', '2024-01-10', '2024-02-10', 500.00, 500.00),       # emissao a 16 dias: fora
+        ('AG3', 'CG3', '10', '2024-01-10', '2024-02-10', 600.00, 600.00),      # par de grupos sem receber
+    ], index=[30, 10, 20, 40, 50, 60])
+    receber = _titulos([
+        ('SDS', 'AG3', '1', '2024-01-25', '2024-02-25', 101.00, 60.00),
+        ('SDS', 'AG3', '77', '2024-01-10', '2024-02-10', 201.01, 0.00),
+        ('SDS', 'AG3', '56', '2024-01-10', '2024-02-10', 300.00, 50.00),
+        ('SDS', 'AG3', '123', '2024-01-12', '2024-03-01', 400.00, 400.00),
+        ('SDS', 'AG3', '9', '2024-01-26', '2024-02-10', 500.00, 500.00),
+    ], index=[7, 3, 5, 1, 9])
+
+    pares, pendencias = conciliar_titulos(pagar, receber, tolerancia=1.0, janela_dias=15)
+    assert dict(zip(pares['ID_PAGAR'], pares['ID_RECEBER'])) == {30: 7, 40: 1}
+    par = pares.set_index('ID_PAGAR').loc[30]
+    assert (par['DE'], par['PARA'], par['DIF_SALDO']) == ('AG3', 'SDS', 40.0)
+    assert _situacoes(pendencias, 'Pagar') == {10: 'Sem par', 20: 'Sem par', 50: 'Sem par', 60: 'Sem par'}
+    assert _situacoes(pendencias, 'Receber') == {3: 'Sem par', 5: 'Sem par', 9: 'Sem par'}
+
+
+def test_empates_ficam_ambiguos_e_par_mutuo_vence():
+    pagar = _titulos([
+        ('AG3', 'SDS', None, '2024-01-10', '2024-02-10', 100.00, 100.00),
+        ('AG3', 'SDS', None, '2024-01-10', '2024-02-10', 100.50, 100.50),
+        ('AG3', 'SDS', None, '2024-03-01', '2024-04-01', 700.00, 700.00),
+    ])
+    receber = _titulos([
+        ('SDS', 'AG3', None, '2024-01-10', '2024-02-10', 100.00, 100.00),
+        ('SDS', 'AG3', None, '2024-03-01', '2024-04-01', 700.00, 700.00),
+        ('SDS', 'AG3', None, '2024-03-01', '2024-04-01', 700.00, 700.00),
+    ])
+    pares, pendencias = conciliar_titulos(pagar, receber)
+    # 100,00 x 100,00 e o melhor para os dois; 100,50 fica sem candidata livre
+    assert dict(zip(pares['ID_PAGAR'], pares['ID_RECEBER'])) == {0: 0}
+    assert _situacoes(pendencias, 'Pagar') == {1: 'Sem par', 2: 'Ambiguo'}
+    assert _situacoes(pendencias, 'Receber') == {1: 'Ambiguo', 2: 'Ambiguo'}
+    assert pendencias.set_index(['LADO', 'ID']).loc[('Pagar', 2), 'CANDIDATAS'] == 2
+
+
+def _referencia(pagar, receber, tolerancia, janela_dias):
+    """Produto cartesiano por par de grupos + rodadas de melhor candidato mutuo em Python"""
+    p = pagar.reset_index(names='ID').assign(DE=pagar['GRUPO_ORIGEM'].to_numpy(), PARA=pagar['GRUPO_DESTINO'].to_numpy())
+    r = receber.reset_index(names='ID').assign(DE=receber['GRUPO_DESTINO'].to_numpy(), PARA=receber['GRUPO_ORIGEM'].to_numpy())
+    m = p.merge(r, on=['DE', 'PARA'], suffixes=('_P', '_R'))
+    dif_valor = (np.rint(m['VALOR_ORIGINAL_P'] * 100) - np.rint(m['VALOR_ORIGINAL_R'] * 100)).abs()
+    dif_emis = (m['EMISSAO_P'] - m['EMISSAO_R']).dt.days.abs()
+    dif_venc = (m['VENCIMENTO_P'] - m['VENCIMENTO_R']).dt.days.abs()
+    m = m[(dif_valor <= round(tolerancia * 100)) & (dif_emis <= janela_dias) & (dif_venc <= janela_dias)]
+    custo = {(a, b): (0, v, d) for a, b, v, d in zip(m['ID_P'], m['ID_R'], dif_valor[m.index], (dif_emis + dif_venc)[m.index])}
+
+    def melhor_unico(opcoes):
+        melhor = min(opcoes)
+        return melhor[1] if [c for c, _ in opcoes].count(melhor[0]) == 1 else None
+
+    pares, ativas = {}, dict(custo)
+    while ativas:
+        opcoes_p, opcoes_r = {}, {}
+        for (a, b), c in ativas.items():
+            opcoes_p.setdefault(a, []).append((c, b))
+            opcoes_r.setdefault(b, []).append((c, a))
+        mutuos = {}
+        for a, opcoes in opcoes_p.items():
+            b = melhor_unico(opcoes)
+            if b is not None and melhor_unico(opcoes_r[b]) == a:
+                mutuos[a] = b
+        if not mutuos:
+            break
+        pares.update(mutuos)
+        ativas = {(a, b): c for (a, b), c in ativas.items() if a not in pares and b not in pares.values()}
+    candidatas = pd.Series([a for a, _ in custo], dtype='int64').value_counts()
+    return pares, {a for a, _ in ativas}, candidatas
+
+
+def test_igual_ao_produto_cartesiano():
+    rng = np.random.default_rng(11)
+    grupos = ['AG3', 'CG3', 'SDS']
+
+    def aleatorios(n, inverter):
+        de, para = rng.choice(grupos, n), rng.choice(grupos, n)
+        emissao = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 8, n), unit='D')
+        valor = rng.choice([100.0, 100.4, 101.0, 250.0, 250.99, 999.0], n)
+        return _titulos({
+            'GRUPO_ORIGEM': para if inverter else de, 'GRUPO_DESTINO': de if inverter else para,
+            'NUMERO': None, 'EMISSAO': emissao, 'VENCIMENTO': emissao + pd.to_timedelta(30, unit='D'),
+            'VALOR_ORIGINAL': valor, 'SALDO': valor,
+        }, index=rng.permutation(np.arange(1000, 1000 + n)))
+
+    pagar, receber = aleatorios(80, False), aleatorios(70, True)
+    pares, pendencias = conciliar_titulos(pagar, receber, tolerancia=1.0, janela_dias=10)
+    esperado, ambiguos, candidatas = _referencia(pagar, receber, 1.0, 10)
+    assert len(esperado) > 0 and len(ambiguos) > 0
+    assert dict(zip(pares['ID_PAGAR'], pares['ID_RECEBER'])) == esperado
+    situacoes = _situacoes(pendencias, 'Pagar')
+    assert {i for i, s in situacoes.items() if s == 'Ambiguo'} == ambiguos
+    assert set(situacoes) == set(pagar.index) - set(esperado)
+    pend = pendencias[pendencias['LADO'] == 'Pagar'].set_index('ID')['CANDIDATAS']
+    assert pend.to_dict() == candidatas.reindex(pend.index, fill_value=0).to_dict()
@@ -0,0 +1,91 @@
+"""
+Testes do cubo de agregados (data/cubo.py)
+"""
+import numpy as np
+import pandas as pd
+
+from config.settings import get_grupo_filial
+from data.cubo import CuboAgregado, cubo_agregado
+from data.periodo import SEM_DATA
+from data.secoes import registrar_frame
+
+
+def _recorte():
+    return pd.DataFrame({
+        'FILIAL': [101, 101, 401, 201, 201, np.nan],
+        'NOME_FILIAL': ['101 - Sede', '101 - Sede', '401 - Tropical', '201 - Usina', '201 - Usina', None],
+        'DESCRICAO': ['Frete', 'Frete', 'Insumos', 'Frete', None, 'Insumos'],
+        'NOME_FORNECEDOR': ['A', 'B', 'A', 'C', 'C', 'A'],
+        'EMISSAO': pd.to_datetime(['2024-01-05', '2024-01-20', '2024-02-01', None, '2024-02-10', '2024-03-01']),
+        'STATUS': ['Pago', 'Vencido', 'A vencer', 'Pago', 'Vencido', 'A vencer'],
+        'VALOR_ORIGINAL': [100.0, 50.0, 30.0, 20.0, 10.0, 5.0],
+        'SALDO': [0.0, 50.0, 10.0, 0.0, 10.0, 5.0],
+    })
+
+
+def _comparar(obtido, esperado, por):
+    obtido = obtido.sort_values(por, ignore_index=True)
+    esperado = esperado.sort_values(por, ignore_index=True)
+    pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_dtype=False)
+
+
+def test_agregar_igual_groupby_no_recorte():
+    df = _recorte()
+    cubo = CuboAgregado(df)
+    for por in (['DESCRICAO'], ['NOME_FORNECEDOR', 'STATUS'], ['FILIAL', 'NOME_FILIAL']):
+        esperado = df.groupby(por).agg(
+            VALOR_ORIGINAL=('VALOR_ORIGINAL', 'sum'), SALDO=('SALDO', 'sum'), QTD=('SALDO', 'size'),
+            VALOR_MAX=('VALOR_ORIGINAL', 'max'), SALDO_MIN=('SALDO', 'min'),
+        ).reset_index()
+        _comparar(cubo.agregar(por), esperado, por)
+
+    pendentes = df[df['SALDO'] > 0]
+    esperado = pendentes.groupby('NOME_FORNECEDOR').agg(
+        SALDO_PENDENTE=('SALDO', 'sum'), QTD_PENDENTE=('SALDO', 'size')).reset_index()
+    obtido = cubo.agregar('NOME_FORNECEDOR')
+    _comparar(obtido[obtido['QTD_PENDENTE'] > 0], esperado, ['NOME_FORNECEDOR'])
+
+
+def test_total_filtro_e_mes_de_emissao():
+    df = _recorte()
+    cubo = CuboAgregado(df)
+    total = cubo.total()
+    assert total['VALOR_ORIGINAL'] == df['VALOR_ORIGINAL'].sum()
+    assert total['QTD'] == len(df)
+    assert total['QTD_QUITADO'] == (df['SALDO'] == 0).sum()
+
+    filtrado = cubo.agregar('NOME_FORNECEDOR', filtro={'DESCRICAO': 'Frete'})
+    esperado = df[df['DESCRICAO'] == 'Frete'].groupby('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sum()
+    assert filtrado.set_index('NOME_FORNECEDOR')['VALOR_ORIGINAL'].sort_index().to_dict() == esperado.to_dict()
+
+    por_mes = cubo.agregar('EMISSAO_AAAAMM')
+    com_data = df.dropna(subset=['EMISSAO'])
+    esperado = com_data.groupby(com_data['EMISSAO'].dt.year * 100 + com_data['EMISSAO'].dt.month)['VALOR_ORIGINAL'].sum()
+    obtido = por_mes.set_index('EMISSAO_AAAAMM')['VALOR_ORIGINAL']
+    assert obtido[obtido.index != SEM_DATA].sort_index().to_dict() == esperado.to_dict()
+
+
+def test_distintos_e_qtd_grupos():
+    df = _recorte()
+    cubo = CuboAgregado(df)
+    distintos = cubo.distintos('DESCRICAO', 'NOME_FORNECEDOR').set_index('DESCRICAO')['NOME_FORNECEDOR']
+    assert distintos.sort_index().to_dict() == df.groupby('DESCRICAO')['NOME_FORNECEDOR'].nunique().to_dict()
+
+    # 101 e 401 tem o mesmo nome de grupo ('Agricola') mas ids diferentes: contam como dois
+    ids = df['FILIAL'].dropna().apply(lambda x: get_grupo_filial(int(x))).nunique()
+    assert cubo.qtd_grupos() == ids == 3
+    so_agricola = CuboAgregado(df[df['FILIAL'].isin([101, 401])])
+    assert so_agricola.qtd_grupos() == 2
+    assert so_agricola.agregar('GRUPO')['GRUPO'].tolist() == ['Agricola']
+    pendentes = df[df['SALDO'] > 0]
+    assert cubo.qtd_grupos('QTD_PENDENTE') == pendentes['FILIAL'].dropna().apply(lambda x: get_grupo_filial(int(x))).nunique()
+
+
+def test_cubo_agregado_com_chave_usa_cache_de_resultados():
+    df = registrar_frame(_recorte(), ('teste_cubo', 1))
+    cubo = cubo_agregado(df)
+    assert cubo.chave == ('teste_cubo', 1)
+    primeiro = cubo.agregar('DESCRICAO')
+    primeiro['EXTRA'] = 1  # o renderizador pode acrescentar colunas sem tocar no cache
+    assert 'EXTRA' not in cubo.agregar('DESCRICAO').columns
+    _comparar(cubo.agregar('DESCRICAO'), CuboAgregado(_recorte()).agregar('DESCRICAO'), ['DESCRICAO'])
@@ -0,0 +1,84 @@
+"""
+Testes do motor de fluxo de caixa (data/fluxo_caixa.py)
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.fluxo_caixa import periodo_por_titulo, projetar_fluxo
+
+HOJE = date(2024, 3, 13)
+
+
+def _pendentes(n=60, seed=3):
+    rng = np.random.default_rng(seed)
+    vencimento = pd.Series(pd.Timestamp(HOJE) + pd.to_timedelta(rng.integers(-20, 90, n), unit='D'))
+    vencimento[rng.random(n) < 0.1] = pd.NaT
+    return pd.DataFrame({'VENCIMENTO': vencimento, 'SALDO': rng.integers(1, 500, n).astype(float)})
+
+
+def _semana_baseline(d, incluir_alem):
+    # get_semana das abas antes do motor
+    if pd.isna(d):
+        return None
+    dias = (d.date() - HOJE).days
+    if dias < 0:
+        return None
+    return min(dias // 7 + 1, 8) if incluir_alem else dias // 7 + 1
+
+
+def _por_periodo_baseline(df, coluna_periodo, periodos):
+    grupos = df.groupby(coluna_periodo).agg(VALOR=('SALDO', 'sum'), QTD=('SALDO', 'count'))
+    return grupos.reindex(periodos, fill_value=0)
+
+
+def test_semanas_com_e_sem_titulos_alem_do_horizonte():
+    df = _pendentes()
+    for incluir_alem in (False, True):
+        semanas = df['VENCIMENTO'].apply(_semana_baseline, incluir_alem=incluir_alem)
+        futuro = df.assign(SEMANA=semanas).dropna(subset=['SEMANA'])
+        futuro = futuro[futuro['SEMANA'] <= 8]
+        esperado = _por_periodo_baseline(futuro, 'SEMANA', range(1, 9))
+
+        fluxo = projetar_fluxo(df, HOJE, horizonte=8, incluir_alem=incluir_alem)
+        np.testing.assert_allclose(fluxo['VALOR'], esperado['VALOR'])
+        np.testing.assert_array_equal(fluxo['QTD'], esperado['QTD'])
+        np.testing.assert_allclose(fluxo['ACUMULADO'], esperado['VALOR'].cumsum())
+        assert fluxo['INICIO'].iloc[1] == pd.Timestamp(HOJE + timedelta(days=7))
+        assert fluxo['FIM'].iloc[0] == pd.Timestamp(HOJE + timedelta(days=6))
+
+
+def test_calendario_de_31_dias():
+    df = _pendentes()
+    fim = HOJE + timedelta(days=30)
+    futuro = df[(df['VENCIMENTO'] >= pd.Timestamp(HOJE)) & (df['VENCIMENTO'] <= pd.Timestamp(fim))]
+    futuro = futuro.assign(DIA=futuro['VENCIMENTO'].dt.date)
+    esperado = _por_periodo_baseline(futuro, 'DIA', [HOJE + timedelta(days=i) for i in range(31)])
+
+    fluxo = projetar_fluxo(df, HOJE, horizonte=31, granularidade='dia')
+    np.testing.assert_allclose(fluxo['VALOR'], esperado['VALOR'])
+    np.testing.assert_array_equal(fluxo['QTD'], esperado['QTD'])
+    assert fluxo['INICIO'].dt.date.tolist() == list(esperado.index)
+
+
+def test_meses_civis():
+    df = _pendentes()
+    futuro = df[df['VENCIMENTO'] >= pd.Timestamp(HOJE)]
+    meses = pd.period_range(pd.Timestamp(HOJE), periods=3, freq='M')
+    esperado = _por_periodo_baseline(futuro.assign(MES=futuro['VENCIMENTO'].dt.to_period('M')), 'MES', meses)
+
+    fluxo = projetar_fluxo(df, HOJE, horizonte=3, granularidade='mes')
+    np.testing.assert_allclose(fluxo['VALOR'], esperado['VALOR'])
+    np.testing.assert_array_equal(fluxo['QTD'], esperado['QTD'])
+    assert fluxo['INICIO'].iloc[0] == pd.Timestamp(HOJE)
+    assert fluxo['INICIO'].iloc[1] == pd.Timestamp('2024-04-01')
+    assert fluxo['FIM'].iloc[0] == pd.Timestamp('2024-03-31')
+
+
+def test_periodo_por_titulo():
+    df = _pendentes()
+    esperado = df['VENCIMENTO'].apply(_semana_baseline, incluir_alem=False)
+    esperado = esperado.where(esperado <= 8).fillna(0).astype(int)
+    pd.testing.assert_series_equal(periodo_por_titulo(df, HOJE, horizonte=8), esperado, check_names=False,
+                                   check_dtype=False)
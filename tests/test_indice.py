@@ -0,0 +1,94 @@
+"""
+Testes do indice bitmap (data/indice.py) e dos filtros do ledger de pagar
+"""
+import numpy as np
+import pandas as pd
+
+from data.indice import IndiceBitmap, selecionar_linhas
+from data.loader import filtrar_posicoes
+
+STATUS = ['Pago', 'Vencido', 'Vence em 7 dias', 'Vence em 30 dias', 'A vencer']
+
+
+def _ledger(n=103, seed=7):
+    rng = np.random.default_rng(seed)
+    emissao = pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 120, n), unit='D'))
+    emissao[rng.random(n) < 0.05] = pd.NaT
+    saldo = np.where(rng.random(n) < 0.4, 0.0, rng.integers(1, 1000, n).astype(float))
+    df = pd.DataFrame({
+        'EMISSAO': emissao,
+        'FILIAL': rng.choice([101, 102, 201, 401], n),
+        'STATUS': pd.Categorical(rng.choice(STATUS, n)),
+        'DESCRICAO': pd.Categorical(rng.choice(['Frete', 'Insumos', None], n)),
+        'NOME_FORNECEDOR': pd.Categorical(rng.choice(['ACME LTDA', 'Beta Comercio', 'Gamma'], n)),
+        'TIPO_DOC': pd.Categorical(rng.choice(['Com NF', 'Sem NF'], n)),
+        'DESCRICAO_FORMA_PAGAMENTO': pd.Categorical(rng.choice(['Boleto', 'PIX'], n)),
+        'SALDO': saldo,
+    })
+    return df.sort_values('EMISSAO', kind='stable', na_position='last', ignore_index=True)
+
+
+def test_bitsets_iguais_as_mascaras():
+    df = _ledger()
+    indice = IndiceBitmap(df, ['FILIAL', 'DESCRICAO'], mascaras={'QUITADO': df['SALDO'] == 0})
+    np.testing.assert_array_equal(indice.posicoes(indice.valor('FILIAL', 201)), np.flatnonzero(df['FILIAL'] == 201))
+    np.testing.assert_array_equal(indice.posicoes(indice.valor('FILIAL', 999)), [])
+    np.testing.assert_array_equal(
+        indice.posicoes(indice.qualquer('FILIAL', [101, 401]) & indice.mascara('QUITADO')),
+        np.flatnonzero(df['FILIAL'].isin([101, 401]) & (df['SALDO'] == 0)))
+    np.testing.assert_array_equal(indice.posicoes(indice.valor('DESCRICAO', 'Frete')),
+                                  np.flatnonzero(df['DESCRICAO'] == 'Frete'))
+    assert 'FILIAL' in indice and 'STATUS' not in indice
+
+
+def test_posicoes_em_intervalo_e_marcadas():
+    df = _ledger()
+    indice = IndiceBitmap(df, ['FILIAL'])
+    bits = indice.qualquer('FILIAL', [102, 201])
+    mascara = df['FILIAL'].isin([102, 201]).to_numpy()
+    # Intervalos que comecam e terminam fora do limite de byte
+    for inicio, fim in [(0, 103), (3, 61), (8, 16), (13, 14), (50, 50), (97, 103)]:
+        np.testing.assert_array_equal(indice.posicoes(bits, inicio, fim), np.flatnonzero(mascara[inicio:fim]) + inicio)
+    posicoes = np.array([0, 5, 17, 64, 102])
+    np.testing.assert_array_equal(indice.marcadas(bits, posicoes), mascara[posicoes])
+
+
+def test_selecionar_linhas():
+    df = _ledger()
+    pd.testing.assert_frame_equal(selecionar_linhas(df, np.arange(10, 20)), df.iloc[10:20])
+    pd.testing.assert_frame_equal(selecionar_linhas(df, np.array([1, 4, 9])), df.iloc[[1, 4, 9]])
+
+
+def _filtro_baseline(df, data_inicio, data_fim, filiais, status, categoria, busca, tipo_doc, forma):
+    # aplicar_filtros antes do indice: uma mascara booleana por filtro
+    ts_fim = pd.Timestamp(data_fim) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    mask = (df['EMISSAO'] >= pd.Timestamp(data_inicio)) & (df['EMISSAO'] <= ts_fim)
+    if filiais is not None:
+        mask &= df['FILIAL'].isin(filiais)
+    if status == 'Pago':
+        mask &= df['SALDO'] == 0
+    elif status != 'Todos os Status':
+        mask &= df['STATUS'] == status
+    if categoria != 'Todas as Categorias':
+        mask &= df['DESCRICAO'] == categoria
+    if busca:
+        mask &= df['NOME_FORNECEDOR'].str.contains(busca, case=False, na=False)
+    if tipo_doc != 'Todos':
+        mask &= df['TIPO_DOC'] == tipo_doc
+    if forma != 'Todas':
+        mask &= df['DESCRICAO_FORMA_PAGAMENTO'] == forma
+    return np.flatnonzero(mask.to_numpy())
+
+
+def test_filtrar_posicoes_igual_mascaras_booleanas():
+    df = _ledger()
+    casos = [
+        ('2024-01-01', '2024-12-31', None, 'Todos os Status', 'Todas as Categorias', '', 'Todos', 'Todas'),
+        ('2024-01-15', '2024-02-20', [101, 201], 'Pago', 'Todas as Categorias', '', 'Todos', 'Todas'),
+        ('2024-02-01', '2024-03-31', None, 'Vencido', 'Frete', '', 'Com NF', 'Todas'),
+        ('2024-01-01', '2024-04-30', [401], 'Todos os Status', 'Insumos', 'acme', 'Todos', 'PIX'),
+        ('2024-03-01', '2024-03-01', None, 'Vence em 7 dias', 'Todas as Categorias', 'COMERCIO', 'Sem NF', 'Boleto'),
+        ('2025-01-01', '2025-12-31', None, 'Todos os Status', 'Todas as Categorias', '', 'Todos', 'Todas'),
+    ]
+    for caso in casos:
+        np.testing.assert_array_equal(filtrar_posicoes(df, *caso), _filtro_baseline(df, *caso), err_msg=str(caso))
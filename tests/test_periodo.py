@@ -0,0 +1,37 @@
+"""
+Testes das chaves de periodo (data/periodo.py)
+"""
+import numpy as np
+import pandas as pd
+
+from data.periodo import SEM_DATA, chaves_periodo, dias_entre, soma_faixa, somas_acumuladas
+
+
+def test_chaves_e_sem_data():
+    datas = pd.Series(pd.to_datetime(['1970-01-01', '2024-12-30', None]))
+    chaves = chaves_periodo(datas)
+    assert chaves['DIA'].tolist() == [0, 20087, SEM_DATA]
+    assert chaves['AAAAMM'].tolist() == [197001, 202412, SEM_DATA]
+    # 2024-12-30 (segunda) ja e a semana 1 de 2025 no calendario ISO
+    assert chaves['SEMANA'].tolist() == [197001, 202501, SEM_DATA]
+    assert chaves['MES'].tolist() == [1, 12, SEM_DATA]
+    esperado = datas.dt.isocalendar()
+    assert (esperado['year'] * 100 + esperado['week']).iloc[:2].tolist() == chaves['SEMANA'][:2].tolist()
+
+
+def test_dias_entre_com_1970_e_sem_data():
+    df = pd.DataFrame({
+        'EMISSAO': pd.to_datetime(['1970-01-01', '2024-01-01', None]),
+        'DT_BAIXA': pd.to_datetime(['1970-01-11', None, '2024-01-05']),
+    })
+    esperado = (df['DT_BAIXA'] - df['EMISSAO']).dt.days
+    pd.testing.assert_series_equal(dias_entre(df, 'DT_BAIXA', 'EMISSAO'), esperado.astype('float64'), check_names=False)
+
+
+def test_soma_faixa_igual_a_mascara():
+    dias = np.array([10, SEM_DATA, 12, 11, 10, 15])
+    valores = np.array([1.0, 100.0, 2.0, np.nan, 4.0, 8.0])
+    chaves, acumulado = somas_acumuladas(dias, valores)
+    for inicio, fim in [(10, 10), (10, 12), (11, 14), (13, 14), (0, 20), (12, 10)]:
+        mascara = (dias >= inicio) & (dias <= fim)
+        assert soma_faixa(chaves, acumulado, inicio, fim) == (np.nansum(valores[mascara]), int(mascara.sum()))
@@ -0,0 +1,42 @@
+"""
+Testes do snapshot Parquet (data/snapshot.py) com o schema compacto (data/schema.py)
+"""
+import pandas as pd
+
+from data import snapshot
+from data.schema import aplicar_schema
+
+
+def _ledger():
+    # Como nos relatorios de receber: NUMERO e PARCELA misturam inteiros e textos
+    return pd.DataFrame({
+        'FILIAL': [1, 2, 1],
+        'NUMERO': [123, '2025/014 ', 456],
+        'PARCELA': ['  ', 1, '002'],
+        'OBS': ['a', 7, None],
+        'VALOR_ORIGINAL': [10.0, 20.0, 30.0],
+    })
+
+
+def test_schema_converte_colunas_misturadas_em_texto():
+    df = aplicar_schema(_ledger(), 'teste')
+    assert df['NUMERO'].tolist() == ['123', '2025/014 ', '456']
+    assert df['PARCELA'].tolist() == ['  ', '1', '002']
+    assert df['OBS'].iloc[:2].tolist() == ['a', '7']
+    assert df['OBS'].isna().iloc[2]
+
+
+def test_snapshot_grava_parquet_e_rele_sem_reconstruir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', str(tmp_path))
+    origem = tmp_path / 'origem.xlsx'
+    origem.write_bytes(b'conteudo')
+
+    construidas = snapshot.carregar_snapshot('t', [str(origem)], lambda: (aplicar_schema(_ledger(), 'teste'),))
+    assert (tmp_path / 't_0.parquet').exists()
+    assert not list(tmp_path.glob('*.pickle'))
+
+    def falhar():
+        raise AssertionError('snapshot valido nao deve reconstruir')
+
+    lidas = snapshot.carregar_snapshot('t', [str(origem)], falhar)
+    pd.testing.assert_frame_equal(lidas[0], construidas[0], check_dtype=False)
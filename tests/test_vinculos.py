@@ -0,0 +1,114 @@
+"""
+Testes do vinculo adiantamento <-> baixas (data/vinculos.py)
+"""
+import numpy as np
+import pandas as pd
+
+from data.vinculos import baixas_vinculadas, chave_titulo, vincular_adiantamentos
+
+
+def _bases():
+    # Indices nao sequenciais e adiantamentos intercalados com titulos comuns
+    contas = pd.DataFrame({
+        'FILIAL': [101, 101, 101, 102, 101, 101, 201, 102],
+        'NUMERO': ['A1', 'X9', 'A1', 'B7', 'A1', 'C3', 'D4', 'B7'],
+        'IS_ADIANTAMENTO': [True, False, True, True, True, True, True, True],
+        'EMISSAO': pd.to_datetime(['2024-01-10', '2024-01-01', '2024-01-05', '2024-02-01', None,
+                                   '2024-03-01', '1970-01-01', '2024-02-01']),
+        'VALOR_ORIGINAL': [100.0, 999.0, 50.0, 80.0, 30.0, 40.0, 10.0, 20.0],
+    }, index=[40, 7, 12, 3, 25, 31, 8, 19])
+    baixas = pd.DataFrame({
+        'FILIAL': [101, 101, 102, 101, 101, 999, 201, 102, 102],
+        'NUMERO': ['A1', 'A1', 'B7', 'A1', 'X9', 'A1', 'D4', 'B7', 'B7'],
+        'DT_BAIXA': pd.to_datetime(['2024-01-20', '2024-01-06', '2024-02-10', '2024-02-15', '2024-01-02',
+                                    '2024-01-03', '1970-01-11', None, '2024-02-11']),
+        # 0.1 + 0.2 != 0.3 em float: a tolerancia de centavos fecha o adiantamento B7 de 80
+        'VALOR_BAIXA': [90.0, 50.0, 79.7, 40.0, 5.0, 500.0, 10.0, 0.1, 0.2],
+    }, index=[5, 9, 2, 14, 0, 6, 11, 21, 4])
+    return contas, baixas
+
+
+def _dia(data):
+    return np.inf if pd.isna(data) else (data - pd.Timestamp('1970-01-01')).days
+
+
+def _fifo_referencia(contas, baixas, tolerancia=0.005):
+    """Alocacao FIFO linha a linha: adiantamentos e baixas de cada titulo em ordem de (data, indice)"""
+    adiant = contas[contas['IS_ADIANTAMENTO']]
+    resultado = {}
+    id_adiantamento = {i: -1 for i in baixas.index}
+    for chave, grupo in adiant.groupby(['FILIAL', 'NUMERO']):
+        bx = baixas[(baixas['FILIAL'] == chave[0]) & (baixas['NUMERO'] == chave[1])]
+        grupo = sorted(grupo.index, key=lambda i: (_dia(grupo.at[i, 'EMISSAO']), i))
+        bx = sorted(bx.index, key=lambda i: (_dia(baixas.at[i, 'DT_BAIXA']), i))
+        acumulado_bx, fim_bx = 0.0, []
+        for i in bx:
+            inicio = acumulado_bx
+            acumulado_bx += baixas.at[i, 'VALOR_BAIXA']
+            fim_bx.append((i, inicio, acumulado_bx))
+        total = acumulado_bx
+        fim_ad, acumulado = [], 0.0
+        for i in grupo:
+            valor = contas.at[i, 'VALOR_ORIGINAL']
+            inicio, acumulado = acumulado, acumulado + valor
+            fim_ad.append((i, acumulado))
+            compensado = min(max(min(acumulado, total) - inicio, 0), valor)
+            quitacao = next((b for b, _, fim in fim_bx if fim >= acumulado - tolerancia), -1)
+            dias = np.nan
+            if quitacao >= 0 and not pd.isna(contas.at[i, 'EMISSAO']) and not pd.isna(baixas.at[quitacao, 'DT_BAIXA']):
+                dias = float((baixas.at[quitacao, 'DT_BAIXA'] - contas.at[i, 'EMISSAO']).days)
+            resultado[i] = (compensado, valor - compensado, dias, quitacao)
+        for b, inicio, _ in fim_bx:
+            id_adiantamento[b] = next((a for a, fim in fim_ad if fim > inicio + tolerancia), -1)
+    return resultado, id_adiantamento
+
+
+def test_baixas_vinculadas_igual_ao_apply_por_linha():
+    contas, baixas = _bases()
+    adiant = contas[contas['IS_ADIANTAMENTO']]
+    chaves_ad = set(zip(adiant['FILIAL'], adiant['NUMERO'].astype(str)))
+    esperado = baixas[baixas.apply(lambda r: (r['FILIAL'], str(r['NUMERO'])) in chaves_ad, axis=1)]
+    pd.testing.assert_frame_equal(baixas_vinculadas(adiant, baixas), esperado)
+
+
+def test_chave_titulo_ignora_tipo_da_filial():
+    a = pd.DataFrame({'FILIAL': [101, 102], 'NUMERO': ['1', '2']})
+    b = pd.DataFrame({'FILIAL': [101.0, 102.0], 'NUMERO': ['1', '3']})
+    assert (chave_titulo(a) == chave_titulo(b)).tolist() == [True, False]
+
+
+def test_fifo_igual_a_alocacao_linha_a_linha():
+    contas, baixas = _bases()
+    esperado, esperado_bx = _fifo_referencia(contas, baixas)
+    vincular_adiantamentos(contas, baixas)
+
+    for i, (compensado, saldo, dias, id_baixa) in esperado.items():
+        assert contas.at[i, 'ADTO_COMPENSADO'] == compensado, i
+        assert contas.at[i, 'ADTO_SALDO_FIFO'] == saldo, i
+        np.testing.assert_equal(contas.at[i, 'DIAS_ATE_QUITAR'], dias, err_msg=str(i))
+        assert contas.at[i, 'ID_BAIXA'] == id_baixa, i
+    assert baixas['ID_ADIANTAMENTO'].to_dict() == esperado_bx
+
+    # Titulo comum fica sem vinculo
+    assert np.isnan(contas.at[7, 'ADTO_COMPENSADO']) and contas.at[7, 'ID_BAIXA'] == -1
+    # Adiantamento de 1970-01-01 (chave DIA 0) tem data: 10 dias ate a baixa
+    assert contas.at[8, 'DIAS_ATE_QUITAR'] == 10
+
+
+def test_baixas_e_adiantamentos_de_valor_zero_seguem_a_ordem_de_data():
+    # Empates no acumulado (valores zero): vale a primeira na ordem de data
+    n = 300
+    contas = pd.DataFrame({
+        'FILIAL': 101, 'NUMERO': 'Z1', 'IS_ADIANTAMENTO': True,
+        'EMISSAO': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(n), unit='D'),
+        'VALOR_ORIGINAL': np.where(np.arange(n) % 3 == 0, 10.0, 0.0),
+    })
+    baixas = pd.DataFrame({
+        'FILIAL': 101, 'NUMERO': 'Z1',
+        'DT_BAIXA': pd.Timestamp('2024-03-01') + pd.to_timedelta(np.arange(n), unit='D'),
+        'VALOR_BAIXA': np.where(np.arange(n) % 4 == 0, 10.0, 0.0),
+    })
+    esperado, esperado_bx = _fifo_referencia(contas, baixas)
+    vincular_adiantamentos(contas, baixas)
+    assert contas['ID_BAIXA'].to_dict() == {i: v[3] for i, v in esperado.items()}
+    assert baixas['ID_ADIANTAMENTO'].to_dict() == esperado_bx